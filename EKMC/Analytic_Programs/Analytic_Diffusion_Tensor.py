@@ -0,0 +1,191 @@
+'''
+Analytic_Diffusion_Tensor.py, Geoffrey Weal, 19/10/26
+
+This program will determine the diffusion tensor of an exciton in a crystal without energetic or coupling disorder, directly from the rate constants (without running any kinetic Monte Carlo simulations).
+'''
+import os
+import numpy as np
+
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data                     import read_KMC_setup_data, KMC_setup_data_filename
+from EKMC.Analytic_Programs.Analytic_methods.get_disorder_free_rate_table  import get_disorder_free_rate_table
+
+class CLICommand:
+    """Will determine the diffusion tensor of an exciton in a crystal without disorder, directly from the rate constants in KMC_setup_data.ekmc.
+    """
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('paths', nargs='*', help='These are the folders containing the KMC_setup_data.ekmc files to examine. If none are given, all KMC_setup_data.ekmc files in this directory and its subdirectories will be examined.')
+
+    @staticmethod
+    def run(arguments):
+        Run_method(arguments.paths)
+
+analytic_data_filename = 'Analytic_Diffusion_Data.txt'
+def Run_method(paths=None):
+    """
+    This method will determine the diffusion tensor of an exciton in a crystal without disorder for each KMC_setup_data.ekmc file.
+
+    Parameters
+    ----------
+    paths : list of str.
+        These are the folders containing the KMC_setup_data.ekmc files to examine. If None or empty, all KMC_setup_data.ekmc files in this directory and its subdirectories will be examined.
+    """
+
+    # First, obtain the folders that contain KMC_setup_data.ekmc files.
+    paths = [] if (paths is None) else list(paths)
+    if len(paths) == 0:
+        for root, dirs, files in os.walk('.'):
+            dirs.sort()
+            if KMC_setup_data_filename in files:
+                paths.append(root)
+                dirs[:] = [dirname for dirname in dirs if not (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+
+    # Second, obtain the analytic diffusion tensor for each crystal.
+    for path in paths:
+
+        # 2.1: Obtain the analytic diffusion tensor.
+        diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity, molecule_names, kinetics_details = get_analytic_diffusion_tensor_from_file(path)
+
+        # 2.2: Report the results to the user, and save them to disk.
+        toString = get_analytic_diffusion_tensor_report(path, diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity, molecule_names, kinetics_details)
+        print(toString)
+        with open(path+'/'+analytic_data_filename, 'w') as fileTXT:
+            fileTXT.write(toString)
+
+# ============================================================================================================================================================================================================
+
+def get_analytic_diffusion_tensor_from_file(path_to_KMC_setup_data):
+    """
+    This method will obtain the analytic diffusion tensor for the crystal given in the KMC_setup_data.ekmc file.
+
+    Parameters
+    ----------
+    path_to_KMC_setup_data : str.
+        This is the folder that contains the KMC_setup_data.ekmc file.
+
+    Returns
+    -------
+    See get_analytic_diffusion_tensor, along with molecule_names and kinetics_details.
+    """
+
+    # First, read the KMC_setup_data.ekmc file.
+    molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data = read_KMC_setup_data(path_to_KMC_setup_data)
+
+    # Second, obtain the rate constants and hopping displacement vectors for the crystal without disorder.
+    donor_indices, acceptor_indices, cell_points, coupling_values, rate_constants, hop_displacements = get_disorder_free_rate_table(molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data)
+
+    # Third, obtain the analytic diffusion tensor.
+    diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity = get_analytic_diffusion_tensor(len(molecule_names), donor_indices, acceptor_indices, rate_constants, hop_displacements)
+
+    # Fourth, return the results.
+    return diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity, molecule_names, kinetics_details
+
+def get_analytic_diffusion_tensor(no_of_molecules, donor_indices, acceptor_indices, rate_constants, hop_displacements):
+    """
+    This method will obtain the diffusion tensor of an exciton in a periodic crystal from the master equation, using the expansion of the
+    master equation in the Bloch wavevector q to second order.
+
+    For a crystal with one molecule in the unit cell, this gives D = 1/2 sum(k r⊗r). For crystals with more than one molecule in the
+    unit cell, the sum is weighted by the stationary populations of the molecules in the unit cell, and a correction for the correlations
+    between consecutive hops is included.
+
+    Parameters
+    ----------
+    no_of_molecules : int
+        This is the number of molecules in the unit cell.
+    donor_indices : numpy.array of ints
+        These are the indices of the exciton donors.
+    acceptor_indices : numpy.array of ints
+        These are the indices of the exciton acceptors.
+    rate_constants : numpy.array
+        These are the rate constants of each exciton hop (in s-1).
+    hop_displacements : numpy.array
+        These are the displacement vectors of each exciton hop (in A).
+
+    Returns
+    -------
+    diffusion_tensor : numpy.array
+        This is the diffusion tensor (in cm2/s).
+    eigenvalues : numpy.array
+        These are the eigenvalues of the diffusion tensor (in cm2/s), from largest to smallest.
+    eigenvectors : numpy.array
+        These are the eigenvectors of the diffusion tensor, given as columns.
+    stationary_populations : numpy.array
+        These are the stationary populations of the molecules in the unit cell.
+    drift_velocity : numpy.array
+        This is the drift velocity of the exciton (in cm/s). This should be zero.
+    """
+
+    # First, obtain the master equation generator for the unit cell (with periodic boundary conditions).
+    generator = np.zeros((no_of_molecules, no_of_molecules))
+    np.add.at(generator, (acceptor_indices, donor_indices), rate_constants)
+    np.add.at(generator, (donor_indices, donor_indices), -rate_constants)
+
+    # Second, obtain the stationary populations of the molecules in the unit cell, which is the null space of the generator.
+    augmented_generator = np.vstack([generator, np.ones(no_of_molecules)])
+    right_hand_side = np.zeros(no_of_molecules+1); right_hand_side[-1] = 1.0
+    stationary_populations = np.linalg.lstsq(augmented_generator, right_hand_side, rcond=None)[0]
+
+    # Third, obtain the first moment generators (for each direction) and the drift velocity.
+    first_moment_generators = np.zeros((3, no_of_molecules, no_of_molecules))
+    for direction in range(3):
+        np.add.at(first_moment_generators[direction], (acceptor_indices, donor_indices), rate_constants * hop_displacements[:,direction])
+    drift_velocity = first_moment_generators.sum(axis=1) @ stationary_populations
+
+    # Fourth, obtain the population weighted sum of k r⊗r.
+    second_moment = 0.5 * np.einsum('n,n,ni,nj->ij', stationary_populations[donor_indices], rate_constants, hop_displacements, hop_displacements)
+
+    # Fifth, obtain the correction for the correlations between consecutive hops using the group inverse of the generator.
+    #        For one molecule in the unit cell, this is zero.
+    projector = np.outer(stationary_populations, np.ones(no_of_molecules))
+    group_inverse = np.linalg.inv(generator - projector) + projector
+    centred_first_moments = first_moment_generators @ stationary_populations - drift_velocity[:,np.newaxis] * stationary_populations[np.newaxis,:]
+    response = np.einsum('ab,jb->ja', group_inverse, centred_first_moments)
+    correction = np.einsum('ia,ja->ij', first_moment_generators.sum(axis=1) - drift_velocity[:,np.newaxis], response)
+    correction = 0.5 * (correction + correction.T)
+
+    # Sixth, obtain the diffusion tensor, and convert from A^2/s to cm^2/s.
+    diffusion_tensor = (second_moment - correction) * (10.0 ** -16.0)
+    drift_velocity = drift_velocity * (10.0 ** -8.0)
+
+    # Seventh, diagonalise the diffusion tensor, and sort from largest to smallest eigenvalues.
+    eigenvalues, eigenvectors = np.linalg.eigh(diffusion_tensor)
+    eigenvalues, eigenvectors = eigenvalues[::-1], eigenvectors[:,::-1]
+
+    # Eighth, return the diffusion tensor and its details.
+    return diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity
+
+# ============================================================================================================================================================================================================
+
+def get_analytic_diffusion_tensor_report(path, diffusion_tensor, eigenvalues, eigenvectors, stationary_populations, drift_velocity, molecule_names, kinetics_details):
+    """
+    This method will write a report of the analytic diffusion tensor.
+
+    Returns
+    -------
+    toString : str.
+        The report of the analytic diffusion tensor.
+    """
+    toString  = '==============================================================================\n'
+    toString += 'Analytic diffusion tensor (no disorder) for: '+str(path)+'\n'
+    if (kinetics_details.get('energetic_disorder',0) not in [0, 0.0, '0%', '0.0%']) or (kinetics_details.get('coupling_disorder',0) not in [0, 0.0, '0%', '0.0%']):
+        toString += 'Note: This crystal has energetic disorder = '+str(kinetics_details.get('energetic_disorder'))+' and coupling disorder = '+str(kinetics_details.get('coupling_disorder'))+'. These disorders are not included in the analytic diffusion tensor.\n'
+    toString += '\n'
+    toString += 'Diffusion tensor (cm2/s):\n'
+    for row in diffusion_tensor:
+        toString += '    '+'  '.join(['{: .10e}'.format(value) for value in row])+'\n'
+    toString += '\n'
+    toString += 'Eigenvalues (cm2/s) and eigenvectors:\n'
+    for index in range(3):
+        toString += '    {: .10e}'.format(eigenvalues[index])+'    ('+', '.join(['{: .6f}'.format(value) for value in eigenvectors[:,index]])+')\n'
+    toString += '\n'
+    toString += 'Isotropic diffusion coefficient (cm2/s): {:.10e}\n'.format(np.trace(diffusion_tensor)/3.0)
+    toString += '\n'
+    toString += 'Stationary populations of molecules in the unit cell:\n'
+    for molname, population in zip(molecule_names, stationary_populations):
+        toString += '    '+str(molname)+': {:.10f}'.format(population)+'\n'
+    toString += '\n'
+    toString += 'Drift velocity (cm/s): ('+', '.join(['{: .6e}'.format(value) for value in drift_velocity])+')\n'
+    toString += '==============================================================================\n'
+    return toString
@@ -0,0 +1,77 @@
+"""
+get_disorder_free_rate_table.py, Geoffrey Weal, 19/10/26
+
+This script is designed to obtain the rate constants and hopping displacement vectors for every exciton hop from a molecule in the origin unit cell, for a crystal without disorder.
+"""
+import numpy as np
+
+def get_disorder_free_rate_table(molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data):
+    """
+    This method is designed to obtain the rate constants and hopping displacement vectors for every exciton hop from a molecule in the origin unit cell, for a crystal without disorder.
+
+    Parameters
+    ----------
+    molecule_names : list of ints
+        These are the names of all the molecules in the crystal.
+    molecule_list_and_com : dict.
+        This dictionary contains the centre of masses for each molecule in the unit cell crystal.
+    unit_cell_matrix : list of list of doubles
+        This contains the matrix elements for the unit cell matrix.
+    kinetic_model :str.
+        This is the kinetic model used to simulate an exciton about the molecules within a crystal. Only 'Marcus' is available.
+    constant_rate_data : tuple.
+        These are the constants in the rate law that are the same for each neighbour.
+    molecule_bandgap_energy_data : dict.
+        These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
+    dimer_reorganisation_energy_data : dict.
+        These are the reorganisation energies of the dimers in the crystal. Reorganisation energies are in eV.
+    coupling_value_data : dict.
+        This dictionary contains all the coupling data between molecules in the dimers in the crystal. Coupling values are in eV.
+
+    Returns
+    -------
+    donor_indices : numpy.array of ints
+        These are the indices (in molecule_names) of the exciton donors.
+    acceptor_indices : numpy.array of ints
+        These are the indices (in molecule_names) of the exciton acceptors.
+    cell_points : numpy.array of ints
+        These are the unit cells of the acceptors, relative to the donors.
+    coupling_values : numpy.array
+        These are the coupling values of each dimer (in eV).
+    rate_constants : numpy.array
+        These are the rate constants of each exciton hop (in s-1).
+    hop_displacements : numpy.array
+        These are the displacement vectors of each exciton hop (in A).
+    """
+
+    # First, check that the kinetic model can be used.
+    if not (kinetic_model.lower() == 'marcus'):
+        raise Exception('Error: Only the Marcus kinetic model can currently be used. kinetic_model = '+str(kinetic_model))
+    M_constant, X_constant = float(constant_rate_data[0]), float(constant_rate_data[1])
+
+    # Second, obtain the centre of masses of the molecules in the crystal.
+    molecule_index = {molname: index for index, molname in enumerate(molecule_names)}
+    centre_of_masses = {int(str(molname).replace('S','')): np.array(centre_of_mass, dtype=float) for molname, centre_of_mass in molecule_list_and_com.items()}
+    unit_cell_matrix = np.array(unit_cell_matrix, dtype=float)
+
+    # Third, obtain the details of every exciton hop.
+    donor_indices = []; acceptor_indices = []; cell_points = []; coupling_values = []; reorganisation_energies = []; deltaEs = []; hop_displacements = []
+    for mol1, value1 in sorted(coupling_value_data.items()):
+        for mol2, value2 in sorted(value1.items()):
+            for cell_point, coupling_value in sorted(value2.items()):
+                donor_indices.append(molecule_index[mol1])
+                acceptor_indices.append(molecule_index[mol2])
+                cell_points.append(cell_point)
+                coupling_values.append(coupling_value)
+                reorganisation_energies.append(dimer_reorganisation_energy_data[(mol1, mol2)])
+                deltaEs.append(molecule_bandgap_energy_data[mol2] - molecule_bandgap_energy_data[mol1])
+                hop_displacements.append(centre_of_masses[mol2] - centre_of_masses[mol1] + np.matmul(cell_point, unit_cell_matrix))
+    coupling_values = np.array(coupling_values, dtype=float)
+    reorganisation_energies = np.array(reorganisation_energies, dtype=float)
+    deltaEs = np.array(deltaEs, dtype=float)
+
+    # Fourth, obtain the Marcus rate constants for each exciton hop (in s-1).
+    rate_constants = (np.abs(coupling_values) ** 2.0) / np.sqrt(reorganisation_energies) * M_constant * np.exp(-X_constant * ((deltaEs + reorganisation_energies) ** 2.0) / reorganisation_energies)
+
+    # Fifth, return the details of every exciton hop.
+    return np.array(donor_indices, dtype=np.int64), np.array(acceptor_indices, dtype=np.int64), np.array(cell_points, dtype=np.int64).reshape(-1,3), coupling_values, rate_constants, np.array(hop_displacements, dtype=float).reshape(-1,3)
@@ -0,0 +1,120 @@
+"""
+get_supercell_generator.py, Geoffrey Weal, 19/10/26
+
+This script is designed to build the sparse master equation generator for an exciton in a periodic L x L x L supercell of a crystal, with sampled energetic and coupling disorder.
+"""
+import numpy as np
+from scipy.sparse import coo_matrix
+
+def get_supercell_generator(supercell_size, no_of_molecules, donor_indices, acceptor_indices, cell_points, coupling_values, reorganisation_energies, bandgap_energies, hop_displacements, M_constant, X_constant, energetic_disorder, coupling_disorder, generator):
+    """
+    This method is designed to build the sparse master equation generator for an exciton in a periodic L x L x L supercell of a crystal, with sampled energetic and coupling disorder.
+
+    As in the EKMC C++ code, each molecule in the supercell is given an energy drawn from a normal distribution, and each directed
+    dimer (donor -> acceptor) is given a coupling value drawn from a normal distribution.
+
+    Parameters
+    ----------
+    supercell_size : int
+        This is the number of unit cells along each direction of the supercell (L).
+    no_of_molecules : int
+        This is the number of molecules in the unit cell.
+    donor_indices : numpy.array of ints
+        These are the indices of the exciton donors in the unit cell.
+    acceptor_indices : numpy.array of ints
+        These are the indices of the exciton acceptors in the unit cell.
+    cell_points : numpy.array of ints
+        These are the unit cells of the acceptors, relative to the donors.
+    coupling_values : numpy.array
+        These are the coupling values of each dimer (in eV), without disorder.
+    reorganisation_energies : numpy.array
+        These are the reorganisation energies of each dimer (in eV).
+    bandgap_energies : numpy.array
+        These are the bandgap energies of the molecules in the unit cell (in eV), without disorder.
+    hop_displacements : numpy.array
+        These are the displacement vectors of each exciton hop (in A).
+    M_constant : float
+        This is the M constant in the Marcus rate law.
+    X_constant : float
+        This is the X constant in the Marcus rate law.
+    energetic_disorder : float or str.
+        This is the energetic disorder. Given as a percentage of the bandgap if this is a string ending in '%'.
+    coupling_disorder : float or str.
+        This is the coupling disorder. Given as a percentage of the coupling value if this is a string ending in '%'.
+    generator : numpy.random.Generator
+        This is the random number generator used to sample the disorder.
+
+    Returns
+    -------
+    master_equation_generator : scipy.sparse.csr_matrix
+        This is the generator W of the master equation dp/dt = W p, where W[acceptor, donor] is the rate constant for the exciton hop (in s-1).
+    hop_donors : numpy.array of ints
+        These are the supercell sites of the exciton donors for every hop.
+    hop_acceptors : numpy.array of ints
+        These are the supercell sites of the exciton acceptors for every hop.
+    hop_rate_constants : numpy.array
+        These are the rate constants for every hop (in s-1).
+    hop_vectors : numpy.array
+        These are the displacement vectors for every hop (in A).
+    site_energies : numpy.array
+        These are the energies of every site in the supercell (in eV), with disorder.
+    """
+
+    # First, check that the supercell is large enough that an exciton can not hop onto a periodic image of itself or its neighbour.
+    if supercell_size <= 2*int(np.abs(cell_points).max(initial=0)):
+        raise Exception('Error: The supercell needs to be larger than twice the largest relative unit cell displacement of a neighbour ('+str(int(np.abs(cell_points).max(initial=0)))+'). supercell_size = '+str(supercell_size))
+
+    # Second, obtain the supercell cell points, and the site index of every molecule in the supercell.
+    no_of_cells = supercell_size ** 3
+    no_of_sites = no_of_cells * no_of_molecules
+    supercell_cell_points = np.stack(np.unravel_index(np.arange(no_of_cells), (supercell_size,)*3), axis=1)
+    def site_index(molecule_indices, cells):
+        cells = np.mod(cells, supercell_size)
+        return np.ravel_multi_index((cells[...,0], cells[...,1], cells[...,2]), (supercell_size,)*3) * no_of_molecules + molecule_indices
+
+    # Third, sample the energy of every site in the supercell.
+    site_bandgap_energies = np.tile(bandgap_energies, no_of_cells)
+    site_energies = site_bandgap_energies + get_disorder_sd(energetic_disorder, site_bandgap_energies) * generator.standard_normal(no_of_sites)
+
+    # Fourth, obtain the donors, acceptors and hop vectors of every hop in the supercell.
+    hop_donors    = site_index(donor_indices[np.newaxis,:], np.broadcast_to(supercell_cell_points[:,np.newaxis,:], (no_of_cells, len(donor_indices), 3))).ravel()
+    hop_acceptors = site_index(acceptor_indices[np.newaxis,:], supercell_cell_points[:,np.newaxis,:] + cell_points[np.newaxis,:,:]).ravel()
+    hop_vectors   = np.tile(hop_displacements, (no_of_cells, 1))
+
+    # Fifth, sample the coupling value of every directed dimer in the supercell.
+    hop_coupling_values = np.tile(coupling_values, no_of_cells)
+    hop_coupling_values = hop_coupling_values + get_disorder_sd(coupling_disorder, hop_coupling_values) * generator.standard_normal(len(hop_coupling_values))
+    hop_reorganisation_energies = np.tile(reorganisation_energies, no_of_cells)
+
+    # Sixth, obtain the Marcus rate constants for every hop (in s-1).
+    deltaE_with_disorders = site_energies[hop_acceptors] - site_energies[hop_donors]
+    hop_rate_constants = (np.abs(hop_coupling_values) ** 2.0) / np.sqrt(hop_reorganisation_energies) * M_constant * np.exp(-X_constant * ((deltaE_with_disorders + hop_reorganisation_energies) ** 2.0) / hop_reorganisation_energies)
+
+    # Seventh, build the sparse master equation generator. Duplicate entries are summed together.
+    rows = np.concatenate([hop_acceptors, hop_donors])
+    cols = np.concatenate([hop_donors, hop_donors])
+    data = np.concatenate([hop_rate_constants, -hop_rate_constants])
+    master_equation_generator = coo_matrix((data, (rows, cols)), shape=(no_of_sites, no_of_sites)).tocsr()
+
+    # Eighth, return the master equation generator and the details of every hop.
+    return master_equation_generator, hop_donors, hop_acceptors, hop_rate_constants, hop_vectors, site_energies
+
+def get_disorder_sd(disorder, values):
+    """
+    This method will return the standard deviation of the disorder for each value.
+
+    Parameters
+    ----------
+    disorder : float or str.
+        This is the disorder. Given as a percentage of the value if this is a string ending in '%'.
+    values : numpy.array
+        These are the values that disorder is being added to.
+
+    Returns
+    -------
+    disorder_sd : float or numpy.array
+        This is the standard deviation of the disorder.
+    """
+    if isinstance(disorder, str):
+        return np.abs(values * (float(disorder.replace('%',''))/100.0))
+    return float(disorder)
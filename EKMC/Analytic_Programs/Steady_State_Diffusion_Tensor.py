@@ -0,0 +1,263 @@
+'''
+Steady_State_Diffusion_Tensor.py, Geoffrey Weal, 19/10/26
+
+This program will determine the diffusion tensor of an exciton in a disordered crystal deterministically, by solving the master equation of periodic L x L x L supercells with sampled disorder (without running any kinetic Monte Carlo simulations).
+'''
+import os
+import numpy as np
+from scipy.sparse.linalg import splu, bicgstab, spilu, LinearOperator
+
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data                     import read_KMC_setup_data, KMC_setup_data_filename
+from EKMC.Analytic_Programs.Analytic_methods.get_disorder_free_rate_table  import get_disorder_free_rate_table
+from EKMC.Analytic_Programs.Analytic_methods.get_supercell_generator       import get_supercell_generator
+from EKMC.Postprocessing_Programs.Process_Results_methods.time_average_data import mean_confidence_interval
+
+class CLICommand:
+    """Will determine the diffusion tensor of an exciton in a disordered crystal by solving the master equation of periodic supercells, averaged over disorder realisations.
+    """
+
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('paths', nargs='*', help='These are the folders containing the KMC_setup_data.ekmc files to examine. If none are given, all KMC_setup_data.ekmc files in this directory and its subdirectories will be examined.')
+        parser.add_argument('--supercell_size', type=int, default=10, help='This is the number of unit cells along each direction of the supercell. Default: 10')
+        parser.add_argument('--no_of_realisations', type=int, default=5, help='This is the number of disorder realisations to average over. Default: 5')
+        parser.add_argument('--solver', default='direct', choices=['direct', 'iterative'], help='This is the sparse solver to use. "direct" uses a sparse LU decomposition, "iterative" uses BiCGSTAB with an incomplete LU preconditioner. Default: direct')
+        parser.add_argument('--seed', type=int, default=None, help='This is the seed used to sample the disorder.')
+
+    @staticmethod
+    def run(arguments):
+        Run_method(arguments.paths, supercell_size=arguments.supercell_size, no_of_realisations=arguments.no_of_realisations, solver=arguments.solver, seed=arguments.seed)
+
+steady_state_data_filename = 'Steady_State_Diffusion_Data.txt'
+def Run_method(paths=None, supercell_size=10, no_of_realisations=5, solver='direct', seed=None):
+    """
+    This method will determine the diffusion tensor of an exciton in a disordered crystal for each KMC_setup_data.ekmc file.
+
+    Parameters
+    ----------
+    paths : list of str.
+        These are the folders containing the KMC_setup_data.ekmc files to examine. If None or empty, all KMC_setup_data.ekmc files in this directory and its subdirectories will be examined.
+    supercell_size : int
+        This is the number of unit cells along each direction of the supercell.
+    no_of_realisations : int
+        This is the number of disorder realisations to average over.
+    solver : str.
+        This is the sparse solver to use, either 'direct' or 'iterative'.
+    seed : int or None
+        This is the seed used to sample the disorder.
+    """
+
+    # First, obtain the folders that contain KMC_setup_data.ekmc files.
+    paths = [] if (paths is None) else list(paths)
+    if len(paths) == 0:
+        for root, dirs, files in os.walk('.'):
+            dirs.sort()
+            if KMC_setup_data_filename in files:
+                paths.append(root)
+                dirs[:] = [dirname for dirname in dirs if not (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+
+    # Second, obtain the steady state diffusion tensor for each crystal.
+    for path in paths:
+
+        # 2.1: Obtain the diffusion tensors for each disorder realisation.
+        diffusion_tensors, average_energies, molecule_names, kinetics_details = get_steady_state_diffusion_tensors_from_file(path, supercell_size=supercell_size, no_of_realisations=no_of_realisations, solver=solver, seed=seed)
+
+        # 2.2: Report the results to the user, and save them to disk.
+        toString = get_steady_state_diffusion_tensor_report(path, diffusion_tensors, average_energies, supercell_size, kinetics_details)
+        print(toString)
+        with open(path+'/'+steady_state_data_filename, 'w') as fileTXT:
+            fileTXT.write(toString)
+
+# ============================================================================================================================================================================================================
+
+def get_steady_state_diffusion_tensors_from_file(path_to_KMC_setup_data, supercell_size=10, no_of_realisations=5, solver='direct', seed=None):
+    """
+    This method will obtain the diffusion tensor of each disorder realisation for the crystal given in the KMC_setup_data.ekmc file.
+
+    Parameters
+    ----------
+    path_to_KMC_setup_data : str.
+        This is the folder that contains the KMC_setup_data.ekmc file.
+    supercell_size : int
+        This is the number of unit cells along each direction of the supercell.
+    no_of_realisations : int
+        This is the number of disorder realisations to average over.
+    solver : str.
+        This is the sparse solver to use, either 'direct' or 'iterative'.
+    seed : int or None
+        This is the seed used to sample the disorder.
+
+    Returns
+    -------
+    diffusion_tensors : numpy.array
+        These are the diffusion tensors (in cm2/s) for each disorder realisation.
+    average_energies : numpy.array
+        These are the average energies of the exciton in the steady state (in eV) for each disorder realisation.
+    molecule_names : list of ints
+        These are the names of all the molecules in the crystal.
+    kinetics_details : dict.
+        This contains the coupling and energetic disorders, as well as the temperature of the simulation.
+    """
+
+    # First, read the KMC_setup_data.ekmc file.
+    molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data = read_KMC_setup_data(path_to_KMC_setup_data)
+
+    # Second, obtain the coupling values and hopping displacement vectors for the crystal.
+    donor_indices, acceptor_indices, cell_points, coupling_values, rate_constants, hop_displacements = get_disorder_free_rate_table(molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data)
+    reorganisation_energies = np.array([dimer_reorganisation_energy_data[(molecule_names[donor_index], molecule_names[acceptor_index])] for donor_index, acceptor_index in zip(donor_indices, acceptor_indices)], dtype=float)
+    bandgap_energies = np.array([molecule_bandgap_energy_data[molname] for molname in molecule_names], dtype=float)
+
+    # Third, obtain the diffusion tensor for each disorder realisation.
+    generator = np.random.default_rng(seed)
+    diffusion_tensors = []
+    average_energies = []
+    for realisation in range(no_of_realisations):
+
+        # 3.1: Obtain the master equation generator for this disorder realisation.
+        master_equation_generator, hop_donors, hop_acceptors, hop_rate_constants, hop_vectors, site_energies = get_supercell_generator(supercell_size, len(molecule_names), donor_indices, acceptor_indices, cell_points, coupling_values, reorganisation_energies, bandgap_energies, hop_displacements, float(constant_rate_data[0]), float(constant_rate_data[1]), kinetics_details['energetic_disorder'], kinetics_details['coupling_disorder'], generator)
+
+        # 3.2: Obtain the diffusion tensor and steady state for this disorder realisation.
+        diffusion_tensor, stationary_populations, drift_velocity = get_steady_state_diffusion_tensor(master_equation_generator, hop_donors, hop_acceptors, hop_rate_constants, hop_vectors, solver=solver)
+        diffusion_tensors.append(diffusion_tensor)
+        average_energies.append(np.dot(stationary_populations, site_energies))
+
+    # Fourth, return the diffusion tensors for each disorder realisation.
+    return np.array(diffusion_tensors), np.array(average_energies), molecule_names, kinetics_details
+
+def get_steady_state_diffusion_tensor(master_equation_generator, hop_donors, hop_acceptors, hop_rate_constants, hop_vectors, solver='direct'):
+    """
+    This method will obtain the diffusion tensor of an exciton in a periodic supercell from its master equation generator.
+
+    The supercell is treated as one large unit cell, and the diffusion tensor is obtained from the expansion of the master equation
+    in the Bloch wavevector q to second order (see get_analytic_diffusion_tensor in Analytic_Diffusion_Tensor.py). This is equivalent
+    to a Kubo formula, where the velocity autocorrelation is obtained by solving the linear system W z = y, rather than by sampling
+    trajectories. The linear systems are solved using scipy.sparse solvers.
+
+    Parameters
+    ----------
+    master_equation_generator : scipy.sparse.csr_matrix
+        This is the generator W of the master equation dp/dt = W p.
+    hop_donors : numpy.array of ints
+        These are the sites of the exciton donors for every hop.
+    hop_acceptors : numpy.array of ints
+        These are the sites of the exciton acceptors for every hop.
+    hop_rate_constants : numpy.array
+        These are the rate constants for every hop (in s-1).
+    hop_vectors : numpy.array
+        These are the displacement vectors for every hop (in A).
+    solver : str.
+        This is the sparse solver to use, either 'direct' or 'iterative'.
+
+    Returns
+    -------
+    diffusion_tensor : numpy.array
+        This is the diffusion tensor (in cm2/s).
+    stationary_populations : numpy.array
+        These are the stationary populations of each site in the supercell.
+    drift_velocity : numpy.array
+        This is the drift velocity of the exciton (in A/s).
+    """
+
+    # First, replace the last row of the generator with the normalisation condition sum(p) = 0 (or 1). As the rows
+    #        of the generator sum to zero, this row is redundant, and this makes the linear system non-singular.
+    no_of_sites = master_equation_generator.shape[0]
+    constrained_generator = master_equation_generator.tolil()
+    constrained_generator[no_of_sites-1,:] = np.ones(no_of_sites)
+    constrained_generator = constrained_generator.tocsc()
+
+    # Second, obtain the method to solve the linear systems.
+    if solver == 'direct':
+        LU_decomposition = splu(constrained_generator)
+        solve = LU_decomposition.solve
+    elif solver == 'iterative':
+        preconditioner = spilu(constrained_generator)
+        preconditioner = LinearOperator(constrained_generator.shape, preconditioner.solve)
+        def solve(right_hand_side):
+            solution, info = bicgstab(constrained_generator, right_hand_side, M=preconditioner, rtol=1e-12, atol=0.0, maxiter=10000)
+            if info != 0:
+                raise Exception('Error: The iterative solver did not converge (info = '+str(info)+'). Try using the direct solver.')
+            return solution
+    else:
+        raise Exception('Error: solver needs to be either "direct" or "iterative". solver = '+str(solver))
+
+    # Third, obtain the stationary populations of each site.
+    right_hand_side = np.zeros(no_of_sites); right_hand_side[-1] = 1.0
+    stationary_populations = solve(right_hand_side)
+
+    # Fourth, obtain the first moment of each site (sum of k r for the hops from each site), the flux of first moment into each
+    #         site in the steady state, and the drift velocity.
+    first_moments = np.zeros((3, no_of_sites))
+    first_moment_fluxes = np.zeros((3, no_of_sites))
+    for direction in range(3):
+        first_moments[direction] = np.bincount(hop_donors, weights=hop_rate_constants*hop_vectors[:,direction], minlength=no_of_sites)
+        first_moment_fluxes[direction] = np.bincount(hop_acceptors, weights=hop_rate_constants*hop_vectors[:,direction]*stationary_populations[hop_donors], minlength=no_of_sites)
+    drift_velocity = first_moments @ stationary_populations
+
+    # Fifth, obtain the population weighted sum of k r⊗r.
+    second_moment = 0.5 * np.einsum('n,ni,nj->ij', stationary_populations[hop_donors] * hop_rate_constants, hop_vectors, hop_vectors)
+
+    # Sixth, obtain the correction for the correlations between consecutive hops, by solving W z = y where y = (J - v) p for each direction.
+    centred_first_moments = first_moment_fluxes - drift_velocity[:,np.newaxis] * stationary_populations[np.newaxis,:]
+    responses = []
+    for direction in range(3):
+        right_hand_side = centred_first_moments[direction].copy()
+        right_hand_side[-1] = 0.0
+        responses.append(solve(right_hand_side))
+    responses = np.array(responses)
+    correction = (first_moments - drift_velocity[:,np.newaxis]) @ responses.T
+    correction = 0.5 * (correction + correction.T)
+
+    # Seventh, obtain the diffusion tensor, and convert from A^2/s to cm^2/s.
+    diffusion_tensor = (second_moment - correction) * (10.0 ** -16.0)
+
+    # Eighth, return the diffusion tensor and steady state details.
+    return diffusion_tensor, stationary_populations, drift_velocity
+
+# ============================================================================================================================================================================================================
+
+def get_steady_state_diffusion_tensor_report(path, diffusion_tensors, average_energies, supercell_size, kinetics_details):
+    """
+    This method will write a report of the steady state diffusion tensor, averaged over the disorder realisations.
+
+    Returns
+    -------
+    toString : str.
+        The report of the steady state diffusion tensor.
+    """
+
+    # First, obtain the average diffusion tensor and eigenvalues, along with their confidence intervals.
+    no_of_realisations = len(diffusion_tensors)
+    eigenvalues = np.linalg.eigvalsh(diffusion_tensors)[:,::-1]
+    diffusion_tensor = np.mean(diffusion_tensors, axis=0)
+    eigenvalue       = np.mean(eigenvalues, axis=0)
+    average_energy   = np.mean(average_energies)
+    if no_of_realisations > 1:
+        diffusion_tensor_ci = mean_confidence_interval(diffusion_tensors, axis=0)
+        eigenvalue_ci       = mean_confidence_interval(eigenvalues, axis=0)
+        average_energy_ci   = mean_confidence_interval(average_energies)
+    else:
+        diffusion_tensor_ci, eigenvalue_ci, average_energy_ci = np.zeros((3,3)), np.zeros(3), 0.0
+    average_eigenvalues, average_eigenvectors = np.linalg.eigh(diffusion_tensor)
+
+    # Second, write the report.
+    toString  = '==============================================================================\n'
+    toString += 'Steady state diffusion tensor for: '+str(path)+'\n'
+    toString += 'Energetic disorder = '+str(kinetics_details.get('energetic_disorder'))+'; Coupling disorder = '+str(kinetics_details.get('coupling_disorder'))+'\n'
+    toString += 'Supercell: '+str(supercell_size)+' x '+str(supercell_size)+' x '+str(supercell_size)+'; Number of disorder realisations: '+str(no_of_realisations)+'\n'
+    toString += '\n'
+    toString += 'Average diffusion tensor (cm2/s) +- 95% confidence interval:\n'
+    for row, row_ci in zip(diffusion_tensor, diffusion_tensor_ci):
+        toString += '    '+'  '.join(['{: .6e} +- {:.2e}'.format(value, value_ci) for value, value_ci in zip(row, row_ci)])+'\n'
+    toString += '\n'
+    toString += 'Average eigenvalues of the diffusion tensors (cm2/s) +- 95% confidence interval:\n'
+    for value, value_ci in zip(eigenvalue, eigenvalue_ci):
+        toString += '    {: .6e} +- {:.2e}'.format(value, value_ci)+'\n'
+    toString += '\n'
+    toString += 'Eigenvectors of the average diffusion tensor:\n'
+    for index in range(2,-1,-1):
+        toString += '    {: .6e}'.format(average_eigenvalues[index])+'    ('+', '.join(['{: .6f}'.format(value) for value in average_eigenvectors[:,index]])+')\n'
+    toString += '\n'
+    toString += 'Isotropic diffusion coefficient (cm2/s): {:.6e}\n'.format(np.trace(diffusion_tensor)/3.0)
+    toString += 'Average steady state energy (eV): {:.6f} +- {:.2e}\n'.format(average_energy, average_energy_ci)
+    toString += '==============================================================================\n'
+    return toString
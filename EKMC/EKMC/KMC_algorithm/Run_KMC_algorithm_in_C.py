@@ -4,26 +4,18 @@ Run_KMC_algorithm_in_C.py, Geoffrey Weal, 28/5/23
 This script is designed to provide a C wrapper to run the KMC code in C++ from python
 """
 import os, ctypes
+import numpy as np
 from random import choice
 
-class Molecule_Centre_Of_Mass_CObject(ctypes.Structure):
-	_fields_ = [('mol', ctypes.c_int), ('centre_of_mass_x', ctypes.c_longdouble), ('centre_of_mass_y', ctypes.c_longdouble), ('centre_of_mass_z', ctypes.c_longdouble)]
-
-class Bandgap_Energies_CObject(ctypes.Structure):
-	_fields_ = [('mol', ctypes.c_int), ('bandgap_energy', ctypes.c_longdouble)]
-
-class Reorganisation_Energies_CObject(ctypes.Structure):
-	_fields_ = [('mol1', ctypes.c_int), ('mol2', ctypes.c_int), ('reorganisation_energy', ctypes.c_longdouble)]
-
-class Coupling_Value_Data_CObject(ctypes.Structure):
-	_fields_ = [('mol1', ctypes.c_int), ('mol2', ctypes.c_int), ('uniti', ctypes.c_int), ('unitj', ctypes.c_int), ('unitk', ctypes.c_int), ('coupling_value', ctypes.c_longdouble)]
-
-def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate_constants, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, conformationally_equivalent_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, energetic_disorder, coupling_disorder, sim_time_limit=float('inf'), max_no_of_steps='inf', starting_molecule='any', temp_folder_path=None, write_rate_constants_to_file=False):
+def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate_constants, crystal_tables, kinetic_model, constant_rate_data, energetic_disorder, coupling_disorder, sim_time_limit=float('inf'), max_no_of_steps='inf', starting_molecule='any', temp_folder_path=None, write_rate_constants_to_file=False, path_to_status_file=None, heartbeat_interval=60.0, path_to_time_index=None, time_index_interval=1.0):
 	"""
 	This method is a C wrapper to run the kMC algorithm for an exciton moving about the molecules in a crystal in C++.
 
 	This method was designed with advice from https://realpython.com/python-bindings-overview/
 
+	The crystal is given to the C++ code as flat NumPy arrays (see get_crystal_tables.py), which are passed by pointer. The C++ code reads these arrays 
+	directly, so no data needs to be copied element by element into ctypes objects.
+
 	Parameters
 	----------
 	path_to_c_code : str.
@@ -32,22 +24,12 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 		This is the path to ...
 	path_to_kMC_sim_rate_constants : str
 		This is the path to ...
-	molecule_list_and_com : dict. 
-		This dictionary contains the centre of masses for each molecule in the unit cell crystal.
-	unit_cell_matrix : list of list of doubles
-		This contains the matrix elements for the unit cell matrix. 
+	crystal_tables : dict.
+		These are the flat tables that describe the crystal, as given by get_crystal_tables.
 	kinetic_model :str.
 		This is the kinetic model you would like to use to simulate an exciton about the molecules within a crystal.
 	constant_rate_data : tuple.
 		These are the constants in the rate law that are the same for each neighbour.
-	conformationally_equivalent_data : dict.
-		This dictionary contains information about which molecules are conformationally equivalent to each other. 
-	molecule_bandgap_energy_data : dict.
-		These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
-	dimer_reorganisation_energy_data : dict.
-		These are the reorganisation energies of the dimers in the crystal. Reorganisation energies are in eV.
-	coupling_value_data : dict.
-		This dictionary contains all the coupling data between molecules in the dimers in the crystal. Coupling values are in eV.
 	energetic_disorder : float
 		This is the disorder that is associated with the DeltaE value
 	coupling_disorder : float
@@ -56,10 +38,20 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 		This is the simulated time limit to run the kinetic Monte Carlo simulation over. Time given in ps.
 	max_no_of_steps : int
 		This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over.
+	starting_molecule : "any", "lowest", "equilibrium", or int
+		This is the molecule in the (0,0,0) cell that you want the exciton to begin the KMC simulation on. "equilibrium" will draw the starting molecule from the Boltzmann-weighted equilibrium occupation of the local disordered energy landscape (this is done in the C++ code).
 	temp_folder_path : str. or None
 		This is the path to place files as the KMC file is running for temporary storage. This is not vital for running a simulation. If set to None, no temporary folder will be created. Dafault: None 
 	write_rate_constants_to_file : bool
 		This indicates if you want to write a file called "kMC_sim_rate_constants.txt" that includes all the rate constant data for an exciton moving from the exciton donor it is currently on to any of the neighbouring exciton acceptors. 
+	path_to_status_file : str. or None
+		This is the path to the status file that the C++ code writes to every heartbeat_interval seconds while the simulation is running. If None, no status file is written. Default: None
+	heartbeat_interval : float
+		This is the (wall) time to wait between writing the status file, in seconds. Default: 60 s
+	path_to_time_index : str. or None
+		This is the path to the time index file that the C++ code writes alongside the kMC_sim.txt file. If None, no time index file is written. Default: None
+	time_index_interval : float
+		This is the simulated time between each checkpoint in the time index file, in ps. Default: 1 ps
 	"""
 
 	# First, setup the C string that specifies the 
@@ -69,46 +61,25 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 	# Second, setup the C string that specifies the kinetic model that will be used.
 	kinetic_model_C = ctypes.c_char_p(kinetic_model.lower().encode())
 
-	# Third, get the C tuple for the list of molecules in the unit cell crystal along with it's centre of mass.
-	centre_of_masses_C = (Molecule_Centre_Of_Mass_CObject * len(molecule_list_and_com))()
-	for index, (molname, centre_of_mass) in enumerate(molecule_list_and_com.items()):
-		centre_of_masses_C[index] = Molecule_Centre_Of_Mass_CObject(int(molname), centre_of_mass[0], centre_of_mass[1], centre_of_mass[2])
-	centre_of_masses_C_size = len(centre_of_masses_C)
-
-	# Fourth, get the C tuple for the list containing the unit cell matrix.
-	unit_cell_matrix_1D = [j for sub in unit_cell_matrix for j in sub]
-	unit_cell_matrix_C = (ctypes.c_longdouble * len(unit_cell_matrix_1D))(*unit_cell_matrix_1D)
-	unit_cell_matrix_C_size = len(unit_cell_matrix_C)
+	# Third, get the pointers to the names and centre of masses of the molecules in the unit cell, and the unit cell matrix.
+	no_of_molecules_C     = ctypes.c_int(crystal_tables['no_of_molecules'])
+	molecule_names_C      = get_pointer(crystal_tables['molecule_names'], ctypes.c_int)
+	centre_of_molecules_C = get_pointer(crystal_tables['centre_of_molecules'], ctypes.c_double)
+	unit_cell_matrix_C    = get_pointer(crystal_tables['unit_cell_matrix'], ctypes.c_double)
 
-	# Fifth, get the C long double of the Marcus rate constant constants
+	# Fourth, get the C long double of the Marcus rate constant constants
 	constant_rate_data_1C = ctypes.c_longdouble(constant_rate_data[0])
 	constant_rate_data_2C = ctypes.c_longdouble(constant_rate_data[1])
 
-	# Sixth, get the C tuple for the bandgap energies of the molecules in the crystal.
-	bandgap_energies_C = (Bandgap_Energies_CObject * len(molecule_bandgap_energy_data))()
-	for index, (molname, bandgap_energy) in enumerate(molecule_bandgap_energy_data.items()):
-		bandgap_energies_C[index] = Bandgap_Energies_CObject(molname, bandgap_energy)
-	bandgap_energies_C_size = len(bandgap_energies_C)
-
-	# Seventh, get the C tuple for the reorganisation energies of the dimers in the crystal.
-	reorganisation_energies_C = (Reorganisation_Energies_CObject * len(dimer_reorganisation_energy_data))()
-	for index, ((mol1, mol2), reorganisation_energy) in enumerate(dimer_reorganisation_energy_data.items()):
-		reorganisation_energies_C[index] = Reorganisation_Energies_CObject(mol1, mol2, reorganisation_energy)
-	reorganisation_energies_C_size = len(reorganisation_energies_C)
-
-	# Eighth, get the C objects for the coupling values of the dimers in the crystal.
-	coupling_value_data_list = []
-	for mol1, value1 in sorted(coupling_value_data.items()):
-		for mol2, value2 in sorted(value1.items()):
-			for (uniti, unitj, unitk), coupling_value in sorted(value2.items()):
-				coupling_value_data_list.append((mol1, mol2, uniti, unitj, unitk, coupling_value))
-	coupling_value_data_C = (Coupling_Value_Data_CObject * len(coupling_value_data_list))()
-	for index, (mol1, mol2, uniti, unitj, unitk, coupling_value) in enumerate(coupling_value_data_list):
-		coupling_value_data_C[index] = Coupling_Value_Data_CObject(mol1, mol2, uniti, unitj, unitk, coupling_value)
-	del coupling_value_data_list
-	coupling_value_data_size_C = len(coupling_value_data_C)
-
-	# Ninth, obtain the C long double for the energetic (site energy) value, and specify if it is a percentage or not.
+	# Fifth, get the pointers to the bandgap energies of the molecules and the reorganisation energies of the dimers in the crystal.
+	bandgap_energies_C        = get_pointer(crystal_tables['bandgap_energies'], ctypes.c_double)
+	reorganisation_energies_C = get_pointer(crystal_tables['reorganisation_energies'], ctypes.c_double)
+
+	# Sixth, get the pointers to the neighbours (and their coupling values) of each molecule in the unit cell.
+	neighbour_offsets_C = get_pointer(crystal_tables['neighbour_offsets'], ctypes.c_int)
+	neighbours_C        = get_pointer(crystal_tables['neighbours'], None)
+
+	# Seventh, obtain the C long double for the energetic (site energy) value, and specify if it is a percentage or not.
 	if isinstance(energetic_disorder,str):
 		energetic_disorder_is_percent_C = ctypes.c_bool(True)
 		energetic_disorder_value_C  = ctypes.c_longdouble(float(energetic_disorder.replace('%','')))
@@ -116,7 +87,7 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 		energetic_disorder_is_percent_C = ctypes.c_bool(False)
 		energetic_disorder_value_C  = ctypes.c_longdouble(float(energetic_disorder))
 
-	# Tenth, obtain the C long double for the coupling value, and specify if it is a percentage or not.
+	# Eighth, obtain the C long double for the coupling value, and specify if it is a percentage or not.
 	if isinstance(coupling_disorder,str):
 		coupling_disorder_is_percent_C = ctypes.c_bool(True)
 		coupling_disorder_value_C  = ctypes.c_longdouble(float(coupling_disorder.replace('%','')))
@@ -124,43 +95,55 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 		coupling_disorder_is_percent_C = ctypes.c_bool(False)
 		coupling_disorder_value_C  = ctypes.c_longdouble(float(coupling_disorder))
 
-	# Eleventh, get the C long double for the simulation time to simulate the KMC simulation for. 
+	# Ninth, get the C long double for the simulation time to simulate the KMC simulation for. 
 	if sim_time_limit == 'inf':
 		sim_time_limit_C = ctypes.c_longdouble(-1.0)
 	else:
 		sim_time_limit_C = ctypes.c_longdouble(float(sim_time_limit))
 
-	# Twelfth, specify the maximum number of steps to perform if you want to put a KMC step limit on your simulation. 
+	# Tenth, specify the maximum number of steps to perform if you want to put a KMC step limit on your simulation. 
 	if max_no_of_steps == 'inf':
 		max_no_of_steps_C = ctypes.c_longlong(-1)
 	else:
 		max_no_of_steps_C = ctypes.c_longlong(max_no_of_steps)
 
-	# Thirteenth, specify what the starting molecule in the origin nit cell for the simulation will be. 
+	# Eleventh, specify what the starting molecule in the origin nit cell for the simulation will be. 
 	if starting_molecule == None:
 		starting_molecule = 'any'
+	molecule_names = crystal_tables['molecule_names'].tolist()
 	if isinstance(starting_molecule,str):
 		if starting_molecule.lower() == 'any':
-			molecule_names = list(coupling_value_data.keys())
-			starting_molecule_C = ctypes.c_int(choice(molecule_names))
+			starting_molecule_C = ctypes.c_int(choice(range(len(molecule_names))))
 		elif starting_molecule.lower() == 'lowest':
-			molecule_names = names_of_lowest_bandgap_molecules_in_crystal(molecule_reorganisation_energy_data, conformationally_equivalent_data)
-			starting_molecule_C = ctypes.c_int(choice(molecule_names))
+			lowest_bandgap_indices = np.flatnonzero(crystal_tables['bandgap_energies'] == crystal_tables['bandgap_energies'].min())
+			starting_molecule_C = ctypes.c_int(int(choice(lowest_bandgap_indices)))
+		elif starting_molecule.lower() == 'equilibrium':
+			starting_molecule_C = ctypes.c_int(-1)
 		else:
-			raise Exception('Error: starting_molecule needs to be either "any", "lower", or the molecule or molecules you would like as the molecule the exciton begins on.')
+			raise Exception('Error: starting_molecule needs to be either "any", "lowest", "equilibrium", or the molecule or molecules you would like as the molecule the exciton begins on.')
 	else:
-		starting_molecule_C = ctypes.c_int(int(starting_molecule))
+		if int(starting_molecule) not in molecule_names:
+			raise Exception('Error: starting_molecule '+str(starting_molecule)+' is not a molecule in the unit cell. Molecules in the unit cell: '+str(molecule_names))
+		starting_molecule_C = ctypes.c_int(molecule_names.index(int(starting_molecule)))
 
-	# Fourtheenth, get the C string for the directory to temprarly store KMC data to while the simulation is running if desired. 
+	# Twelfth, get the C string for the directory to temprarly store KMC data to while the simulation is running if desired. 
 	if temp_folder_path is None:
 		temp_folder_path = '.'
 	temp_folder_path_C = ctypes.c_char_p(temp_folder_path.encode())
 
-	# Fiftheenth, determine if you want to write the rate constants for each of the KMC steps for an exciton moving from the exciton donor it is currently on to one of the neighbouring exciton acceptors. 
+	# Thirteenth, determine if you want to write the rate constants for each of the KMC steps for an exciton moving from the exciton donor it is currently on to one of the neighbouring exciton acceptors. 
 	write_rate_constants_to_file_C     = ctypes.c_bool(write_rate_constants_to_file[0])
 	write_500_rate_constants_to_file_C = ctypes.c_bool(write_rate_constants_to_file[1])
 
-	# Sixteenth, load the EKMC C++ shared object code for running the simulation in. 
+	# 13.1: Get the C string for the path to the status file, and the time between writing the status file.
+	path_to_status_file_C = ctypes.c_char_p(('' if (path_to_status_file is None) else path_to_status_file).encode())
+	heartbeat_interval_C  = ctypes.c_double(heartbeat_interval)
+
+	# 13.2: Get the C string for the path to the time index file, and the simulated time between each checkpoint in the time index file.
+	path_to_time_index_C  = ctypes.c_char_p(('' if (path_to_time_index is None) else path_to_time_index).encode())
+	time_index_interval_C = ctypes.c_double(time_index_interval)
+
+	# Fourteenth, load the EKMC C++ shared object code for running the simulation in. 
 	print('Beginning to run KMC simulation in C++')
 	if not os.path.exists(path_to_c_code):
 		raise Exception('There was an error when trying to load the EKMC C++ shared object file. You may have not compiled the C++ code?\nCheck to see if this file exists: '+str(path_to_c_code)+'\n\nRun the following command in the terminal to compile the EKMC C++ code and try again: \n\nEKMC compile\n')
@@ -169,6 +152,26 @@ def Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate
 	except Exception as exception:
 		raise Exception('There was an error when trying to run the EKMC C++ shared object file. See below:\n\n'+str(exception))
 
-	# Seventeenth, run the EKMC C++ code. 
-	run_kMC_algorithm.KMC_algorithm(path_to_kMC_sim_C, path_to_kMC_sim_rate_constants_C, centre_of_masses_C, centre_of_masses_C_size, unit_cell_matrix_C, unit_cell_matrix_C_size, kinetic_model_C, constant_rate_data_1C, constant_rate_data_2C, bandgap_energies_C, bandgap_energies_C_size, reorganisation_energies_C, reorganisation_energies_C_size, coupling_value_data_C, coupling_value_data_size_C, coupling_disorder_value_C, coupling_disorder_is_percent_C, energetic_disorder_value_C, energetic_disorder_is_percent_C, sim_time_limit_C, max_no_of_steps_C, starting_molecule_C, temp_folder_path_C, write_rate_constants_to_file_C, write_500_rate_constants_to_file_C)
+	# Fifteenth, run the EKMC C++ code. 
+	run_kMC_algorithm.KMC_algorithm(path_to_kMC_sim_C, path_to_kMC_sim_rate_constants_C, no_of_molecules_C, molecule_names_C, centre_of_molecules_C, unit_cell_matrix_C, kinetic_model_C, constant_rate_data_1C, constant_rate_data_2C, bandgap_energies_C, reorganisation_energies_C, neighbour_offsets_C, neighbours_C, coupling_disorder_value_C, coupling_disorder_is_percent_C, energetic_disorder_value_C, energetic_disorder_is_percent_C, sim_time_limit_C, max_no_of_steps_C, starting_molecule_C, temp_folder_path_C, write_rate_constants_to_file_C, write_500_rate_constants_to_file_C, path_to_status_file_C, heartbeat_interval_C, path_to_time_index_C, time_index_interval_C)
+
+def get_pointer(array, c_type):
+	"""
+	This method will obtain the pointer to the data in a NumPy array, to give to the C++ code.
 
+	Parameters
+	----------
+	array : numpy.array
+		This is a C-contiguous NumPy array.
+	c_type : ctypes type or None
+		This is the ctypes type of each element in the array. If None, a void pointer is given.
+
+	Returns
+	-------
+	The pointer to the data in the array.
+	"""
+	if not array.flags['C_CONTIGUOUS']:
+		raise Exception('Error: Arrays given to the EKMC C++ code need to be C-contiguous.')
+	if c_type is None:
+		return ctypes.c_void_p(array.ctypes.data)
+	return array.ctypes.data_as(ctypes.POINTER(c_type))
@@ -0,0 +1,600 @@
+"""
+Run_KMC_algorithm_in_NumPy.py, Geoffrey Weal, 19/10/26
+
+This script is designed to run the KMC algorithm for many excitons (walkers) at once in NumPy.
+
+This is a portable alternative to the EKMC C++ code (Run_KMC_algorithm_in_C.py) that does not need to be compiled. Each walker is an
+independent simulation with its own disorder realisation, and all walkers are advanced in lockstep, one KMC step at a time, using
+arrays. Each walker writes its own kMC_sim.txt file in the same format as the C++ code.
+"""
+import numpy as np
+from time import time as wall_time
+
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file import write_simulation_status, running_state
+from EKMC.EKMC.Run_EKMC_setup_files.time_index_file        import make_time_index, time_index_interval as default_time_index_interval
+
+# This is the number of KMC steps to hold in memory before writing them to the kMC_sim.txt files.
+no_of_steps_to_buffer = 1000
+
+# This is the format of a line in the kMC_sim.txt file, as written by write_data_to_kMC_simTXT, for values that are at most 30 characters long.
+kMC_simTXT_line_format = '%-10d %-10d %-25s '+' '.join(['%-32.14f']*3+['%+-32.14f', '%-32.14f'])+' | '+' '.join(['%-32.14f']*6)+' |'
+
+def Run_KMC_algorithm_in_NumPy(paths_to_kMC_sim, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, energetic_disorder, coupling_disorder, sim_time_limit='inf', max_no_of_steps='inf', starting_molecule='any', seed=None, paths_to_status_folders=None, heartbeat_interval=60.0, time_index_interval=default_time_index_interval):
+	"""
+	This method will run the kMC algorithm for many excitons (walkers) moving about the molecules in a crystal at once in NumPy.
+
+	Parameters
+	----------
+	paths_to_kMC_sim : str. or list of str.
+		These are the paths to the kMC_sim.txt files to write for each walker. One walker is simulated for each path given.
+	molecule_list_and_com : dict.
+		This dictionary contains the centre of masses for each molecule in the unit cell crystal.
+	unit_cell_matrix : list of list of doubles
+		This contains the matrix elements for the unit cell matrix.
+	kinetic_model :str.
+		This is the kinetic model you would like to use to simulate an exciton about the molecules within a crystal. Only 'Marcus' is available.
+	constant_rate_data : tuple.
+		These are the constants in the rate law that are the same for each neighbour.
+	molecule_bandgap_energy_data : dict.
+		These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
+	dimer_reorganisation_energy_data : dict.
+		These are the reorganisation energies of the dimers in the crystal. Reorganisation energies are in eV.
+	coupling_value_data : dict.
+		This dictionary contains all the coupling data between molecules in the dimers in the crystal. Coupling values are in eV.
+	energetic_disorder : float or str.
+		This is the disorder that is associated with the DeltaE value. Given as a percentage if this is a string ending in '%'.
+	coupling_disorder : float or str.
+		This is the disorder that is associated with the V12 value. Given as a percentage if this is a string ending in '%'.
+	sim_time_limit : float
+		This is the simulated time limit to run the kinetic Monte Carlo simulation over. Time given in ps.
+	max_no_of_steps : int
+		This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over.
+	starting_molecule : "any", "lowest", "equilibrium", int, or list of ints
+		This is the molecule in the (0,0,0) cell that you want each exciton to begin the KMC simulation on.
+	seed : int or None
+		This is the seed used to generate the disorder and the KMC steps. If None, a random seed is used.
+	paths_to_status_folders : list of str. or None
+		These are the folders to write the status file of each walker to every heartbeat_interval seconds while the walkers are running. If None, no status files are written. Default: None
+	heartbeat_interval : float
+		This is the (wall) time to wait between writing the status files, in seconds. Default: 60 s
+	time_index_interval : float or None
+		This is the simulated time between each checkpoint in the time index file written next to each kMC_sim.txt file, in ps. If None, no time index files are written. Default: 1 ps
+	"""
+
+	# First, check that the kinetic model can be used by this code.
+	if not (kinetic_model.lower() == 'marcus'):
+		raise Exception('Error: The NumPy EKMC code can currently only run the Marcus kinetic model. kinetic_model = '+str(kinetic_model))
+
+	# Second, obtain the paths to the kMC_sim.txt files to write to for each walker.
+	if isinstance(paths_to_kMC_sim, str):
+		paths_to_kMC_sim = [paths_to_kMC_sim]
+	no_of_walkers = len(paths_to_kMC_sim)
+
+	# Third, obtain the random number generator for the KMC steps, and the key used to obtain the disorder for each walker.
+	seed_sequence = np.random.SeedSequence(seed)
+	generator = np.random.default_rng(seed_sequence)
+	disorder_key = np.uint64(seed_sequence.generate_state(1, dtype=np.uint64)[0])
+	walker_keys = np.arange(no_of_walkers, dtype=np.uint64)
+
+	# Fourth, obtain the lookup tables for the molecules in the crystal.
+	molecule_names, centre_of_masses, bandgap_energies = get_molecule_tables(molecule_list_and_com, molecule_bandgap_energy_data)
+	unit_cell_matrix = np.array(unit_cell_matrix, dtype=float)
+
+	# Fifth, obtain the padded neighbour matrix for every molecule in the origin unit cell.
+	neighbour_indices, neighbour_cell_points, neighbour_couplings, neighbour_reorganisation_energies, neighbour_displacements, neighbour_mask = get_padded_neighbour_matrix(molecule_names, centre_of_masses, unit_cell_matrix, dimer_reorganisation_energy_data, coupling_value_data)
+
+	# Sixth, obtain the disorder details.
+	energetic_disorder_value, energetic_disorder_is_percent = get_disorder_details(energetic_disorder)
+	coupling_disorder_value,  coupling_disorder_is_percent  = get_disorder_details(coupling_disorder)
+	def get_E_with_disorder(walkers, molecule_indices, cell_points):
+		return get_energy_with_disorder(disorder_key, walker_keys[walkers], molecule_names, bandgap_energies, molecule_indices, cell_points, energetic_disorder_value, energetic_disorder_is_percent)
+
+	# Seventh, obtain the constants in the Marcus rate law.
+	M_constant, X_constant = float(constant_rate_data[0]), float(constant_rate_data[1])
+
+	# Eighth, obtain the time and step limits of the simulation.
+	sim_time_limit  = float('inf') if (sim_time_limit  == 'inf') else float(sim_time_limit)
+	max_no_of_steps = float('inf') if (max_no_of_steps == 'inf') else int(max_no_of_steps)
+
+	# Ninth, obtain the starting molecule and cell point for each walker.
+	current_molecule_indices, current_cell_points = get_starting_positions(starting_molecule, no_of_walkers, molecule_names, bandgap_energies, neighbour_indices, neighbour_cell_points, neighbour_mask, X_constant, get_E_with_disorder, generator)
+
+	# Tenth, initialise the kMC_sim.txt files for each walker.
+	header = write_data_to_kMC_simTXT('Count:', 'Molecule', 'Cell Point', 'Time (ps)', 'Time Step (fs)', 'Hop Distance (A)', 'Energy (eV)', 'Σ kij (ps-1)', 'D(xx)', 'D(yy)', 'D(zz)', 'D(xy)', 'D(xz)', 'D(yz)')
+	for path_to_kMC_sim in paths_to_kMC_sim:
+		with open(path_to_kMC_sim, 'w') as kMC_simTXT:
+			kMC_simTXT.write(header+'\n')
+	buffered_steps = []
+
+	# Eleventh, initialise the time, time step, and hop distance for each walker.
+	current_times   = np.zeros(no_of_walkers) # in ps
+	delta_times     = np.zeros(no_of_walkers) # in fs
+	hop_distances   = np.zeros(no_of_walkers) # in A
+	active_walkers  = np.arange(no_of_walkers)
+
+	# Twelfth, perform the kinetic Monte Carlo algorithm for all walkers in lockstep.
+	last_heartbeat_time = wall_time()
+	print('-------------')
+	print('Start performing the Exciton kinetic Monte Carlo algorithm in NumPy for '+str(no_of_walkers)+' walker(s).')
+	counter = 0
+	while (len(active_walkers) > 0) and (counter <= max_no_of_steps):
+
+		# 12.1: Obtain the details of the molecules the active walkers are currently on.
+		donor_indices = current_molecule_indices[active_walkers]
+		donor_cell_points = current_cell_points[active_walkers]
+		donor_energies = get_E_with_disorder(active_walkers, donor_indices[:,np.newaxis], donor_cell_points[:,np.newaxis,:])[:,0]
+
+		# 12.2: Obtain the details of the neighbouring molecules that the exciton can hop to.
+		acceptor_indices = neighbour_indices[donor_indices]
+		acceptor_cell_points = donor_cell_points[:,np.newaxis,:] + neighbour_cell_points[donor_indices]
+		acceptor_energies = get_E_with_disorder(active_walkers, acceptor_indices, acceptor_cell_points)
+
+		# 12.3: Obtain the coupling values with disorder for each dimer.
+		coupling_values = neighbour_couplings[donor_indices]
+		if coupling_disorder_value > 0.0:
+			coupling_disorder_sd = np.abs(coupling_values * (coupling_disorder_value/100.0)) if coupling_disorder_is_percent else coupling_disorder_value
+			dimer_keys = (molecule_names[donor_indices][:,np.newaxis], donor_cell_points[:,np.newaxis,0], donor_cell_points[:,np.newaxis,1], donor_cell_points[:,np.newaxis,2], molecule_names[acceptor_indices], acceptor_cell_points[...,0], acceptor_cell_points[...,1], acceptor_cell_points[...,2])
+			coupling_values = coupling_values + coupling_disorder_sd * counter_based_standard_normal(disorder_key, 1, walker_keys[active_walkers][:,np.newaxis], *dimer_keys)
+
+		# 12.4: Obtain the Marcus rate constants for the exciton to hop from the current molecule to each neighbouring molecule (in s-1).
+		reorganisation_energies = neighbour_reorganisation_energies[donor_indices]
+		deltaE_with_disorders = acceptor_energies - donor_energies[:,np.newaxis]
+		rate_constants = (np.abs(coupling_values) ** 2.0) / np.sqrt(reorganisation_energies) * M_constant * np.exp(-X_constant * ((deltaE_with_disorders + reorganisation_energies) ** 2.0) / reorganisation_energies)
+		rate_constants[~neighbour_mask[donor_indices]] = 0.0
+		sum_of_rate_constants = rate_constants.sum(axis=1)
+
+		# 12.5: Obtain the probability based stepwise diffusion tensor for the step of interest (in cm2/s).
+		hop_displacements = neighbour_displacements[donor_indices]
+		diffusion_tensors = 0.5 * (10.0 ** -16.0) * np.einsum('wn,wni,wnj->wij', rate_constants, hop_displacements, hop_displacements)
+
+		# 12.6: Record the data of the current molecule in the current cell position for each active walker. These are kept as arrays, and are only formatted into lines when they are written to disk.
+		step_values = np.column_stack((current_times[active_walkers], delta_times[active_walkers], hop_distances[active_walkers], donor_energies, sum_of_rate_constants * (10.0 ** -12.0), diffusion_tensors[:,0,0], diffusion_tensors[:,1,1], diffusion_tensors[:,2,2], diffusion_tensors[:,0,1], diffusion_tensors[:,0,2], diffusion_tensors[:,1,2]))
+		buffered_steps.append((active_walkers, counter, molecule_names[donor_indices], donor_cell_points, step_values))
+
+		# 12.7: Write data to the kMC_sim.txt files every so often.
+		if (counter % no_of_steps_to_buffer) == 0:
+			flush_buffered_steps(paths_to_kMC_sim, buffered_steps)
+
+			# 12.7.1: Write the status file of each walker every heartbeat_interval seconds.
+			if (paths_to_status_folders is not None) and ((wall_time() - last_heartbeat_time) >= heartbeat_interval):
+				for walker in active_walkers:
+					write_simulation_status(paths_to_status_folders[walker], running_state, current_times[walker], counter, sim_time_limit, max_no_of_steps)
+				last_heartbeat_time = wall_time()
+
+		# 12.8: If walkers have reached the time limit, finish the kinetic Monte Carlo algorithm for these walkers.
+		still_running = current_times[active_walkers] < sim_time_limit
+		if np.any(sum_of_rate_constants[still_running] <= 0.0):
+			raise Exception('Error: An exciton has been found on a molecule that it can not hop away from. Check the coupling data for molecule(s) '+str(sorted(set(molecule_names[donor_indices[still_running & (sum_of_rate_constants <= 0.0)]].tolist()))))
+		active_walkers = active_walkers[still_running]
+		donor_indices, donor_cell_points = donor_indices[still_running], donor_cell_points[still_running]
+		rate_constants, sum_of_rate_constants, hop_displacements = rate_constants[still_running], sum_of_rate_constants[still_running], hop_displacements[still_running]
+		acceptor_indices, acceptor_cell_points = acceptor_indices[still_running], acceptor_cell_points[still_running]
+
+		# 12.9: Randomly select where each exciton will move to based on the relative rate constants (batched categorical sampling).
+		random_values = generator.random(len(active_walkers)) * sum_of_rate_constants
+		cumulative_rate_constants = np.cumsum(rate_constants, axis=1)
+		chosen_indices = (cumulative_rate_constants <= random_values[:,np.newaxis]).sum(axis=1)
+		chosen_indices = np.minimum(chosen_indices, rate_constants.shape[1]-1)
+		walker_range = np.arange(len(active_walkers))
+
+		# 12.10: Update the molecule and cell point each exciton is on, as well as the hopping distance.
+		current_molecule_indices[active_walkers] = acceptor_indices[walker_range, chosen_indices]
+		current_cell_points[active_walkers] = acceptor_cell_points[walker_range, chosen_indices]
+		hop_distances[active_walkers] = np.linalg.norm(hop_displacements[walker_range, chosen_indices], axis=1)
+
+		# 12.11: Determine the time that has lapsed, and add this to the current time.
+		delta_time = -np.log1p(-generator.random(len(active_walkers))) / sum_of_rate_constants # in seconds
+		current_times[active_walkers] += delta_time * (10.0 ** 12.0) # in ps
+		delta_times[active_walkers] = delta_time * (10.0 ** 15.0) # in fs
+
+		# 12.12: Print counter to screen to show to the user that the algorithm is performing.
+		if (counter % 500) == 0:
+			print('Count: '+str(counter)+'\tActive walkers: '+str(len(active_walkers))+'\tLowest time simulated: '+(str(round(float(current_times[active_walkers].min()), 6)) if (len(active_walkers) > 0) else '-')+' ps')
+		counter += 1
+
+	# Thirteenth, write the rest of the data to the kMC_sim.txt files.
+	flush_buffered_steps(paths_to_kMC_sim, buffered_steps)
+
+	# Fourteenth, write the time index file of each kMC_sim.txt file.
+	if time_index_interval is not None:
+		for path_to_kMC_sim in paths_to_kMC_sim:
+			make_time_index(path_to_kMC_sim, interval=time_index_interval)
+
+# -----------------------------------------------------------------------------------------------------------------------------------------
+
+def get_molecule_tables(molecule_list_and_com, molecule_bandgap_energy_data):
+	"""
+	This method will obtain the lookup tables of the molecule names, centre of masses and bandgap energies, indexed by the position of each molecule in molecule_names.
+
+	Parameters
+	----------
+	molecule_list_and_com : dict.
+		This dictionary contains the centre of masses for each molecule in the unit cell crystal.
+	molecule_bandgap_energy_data : dict.
+		These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
+
+	Returns
+	-------
+	molecule_names : numpy.array of ints
+		These are the names of the molecules in the crystal.
+	centre_of_masses : numpy.array
+		These are the centre of masses of the molecules in the crystal.
+	bandgap_energies : numpy.array
+		These are the bandgap energies of the molecules in the crystal.
+	"""
+	molecule_names = np.array(sorted(int(str(molname).replace('S','')) for molname in molecule_list_and_com.keys()), dtype=np.int64)
+	centre_of_masses_dict = {int(str(molname).replace('S','')): centre_of_mass for molname, centre_of_mass in molecule_list_and_com.items()}
+	centre_of_masses = np.array([centre_of_masses_dict[molname] for molname in molecule_names], dtype=float)
+	bandgap_energies = np.array([molecule_bandgap_energy_data[molname] for molname in molecule_names], dtype=float)
+	return molecule_names, centre_of_masses, bandgap_energies
+
+def get_padded_neighbour_matrix(molecule_names, centre_of_masses, unit_cell_matrix, dimer_reorganisation_energy_data, coupling_value_data):
+	"""
+	This method will obtain the neighbours of every molecule in the unit cell as padded 2D arrays (molecule, neighbour).
+
+	Parameters
+	----------
+	molecule_names : numpy.array of ints
+		These are the names of the molecules in the crystal.
+	centre_of_masses : numpy.array
+		These are the centre of masses of the molecules in the crystal.
+	unit_cell_matrix : numpy.array
+		This is the unit cell matrix.
+	dimer_reorganisation_energy_data : dict.
+		These are the reorganisation energies of the dimers in the crystal. Reorganisation energies are in eV.
+	coupling_value_data : dict.
+		This dictionary contains all the coupling data between molecules in the dimers in the crystal. Coupling values are in eV.
+
+	Returns
+	-------
+	neighbour_indices : numpy.array
+		The indices (in molecule_names) of the neighbouring molecules.
+	neighbour_cell_points : numpy.array
+		The relative unit cells of the neighbouring molecules.
+	neighbour_couplings : numpy.array
+		The coupling values between the molecule and the neighbouring molecules (in eV).
+	neighbour_reorganisation_energies : numpy.array
+		The reorganisation energies between the molecule and the neighbouring molecules (in eV).
+	neighbour_displacements : numpy.array
+		The displacement vectors from the molecule to the neighbouring molecules (in A).
+	neighbour_mask : numpy.array of bools
+		This indicates which entries in the padded arrays are real neighbours.
+	"""
+
+	# First, obtain the neighbours of each molecule.
+	molecule_index = {molname: index for index, molname in enumerate(molecule_names.tolist())}
+	all_neighbours = [[] for _ in molecule_names]
+	for mol1, value1 in sorted(coupling_value_data.items()):
+		for mol2, value2 in sorted(value1.items()):
+			for cell_point, coupling_value in sorted(value2.items()):
+				all_neighbours[molecule_index[mol1]].append((molecule_index[mol2], cell_point, coupling_value, dimer_reorganisation_energy_data[(mol1, mol2)]))
+
+	# Second, initialise the padded arrays. Padded entries are given a reorganisation energy of 1 eV so that rate constants can be safely computed for them.
+	max_no_of_neighbours = max([len(neighbours) for neighbours in all_neighbours]+[1])
+	shape = (len(molecule_names), max_no_of_neighbours)
+	neighbour_indices                 = np.zeros(shape, dtype=np.int64)
+	neighbour_cell_points             = np.zeros(shape+(3,), dtype=np.int64)
+	neighbour_couplings               = np.zeros(shape, dtype=float)
+	neighbour_reorganisation_energies = np.ones(shape, dtype=float)
+	neighbour_mask                    = np.zeros(shape, dtype=bool)
+
+	# Third, fill in the padded arrays.
+	for index1, neighbours in enumerate(all_neighbours):
+		for index2, (neighbour_index, cell_point, coupling_value, reorganisation_energy) in enumerate(neighbours):
+			neighbour_indices[index1,index2] = neighbour_index
+			neighbour_cell_points[index1,index2] = cell_point
+			neighbour_couplings[index1,index2] = coupling_value
+			neighbour_reorganisation_energies[index1,index2] = reorganisation_energy
+			neighbour_mask[index1,index2] = True
+
+	# Fourth, obtain the displacement vectors for each neighbour.
+	neighbour_displacements = centre_of_masses[neighbour_indices] - centre_of_masses[:,np.newaxis,:] + np.matmul(neighbour_cell_points, unit_cell_matrix)
+	neighbour_displacements[~neighbour_mask] = 0.0
+
+	# Fifth, return the padded arrays.
+	return neighbour_indices, neighbour_cell_points, neighbour_couplings, neighbour_reorganisation_energies, neighbour_displacements, neighbour_mask
+
+def get_disorder_details(disorder):
+	"""
+	This method will return the disorder value, and if it is a percentage or not.
+
+	Parameters
+	----------
+	disorder : float or str.
+		This is the disorder. Given as a percentage if this is a string ending in '%'.
+
+	Returns
+	-------
+	disorder_value : float
+		This is the disorder value.
+	disorder_is_percent : bool.
+		This indicates if the disorder is a percentage.
+	"""
+	if isinstance(disorder,str):
+		return float(disorder.replace('%','')), True
+	return float(disorder), False
+
+# -----------------------------------------------------------------------------------------------------------------------------------------
+
+def counter_based_uniform(disorder_key, stream, *keys):
+	"""
+	This method will return a uniform random number in (0,1) for each set of keys, using a counter-based (hash) random number generator.
+
+	The same keys always give the same random number, so the disorder of a molecule or dimer does not need to be stored as the exciton moves about the crystal.
+
+	Parameters
+	----------
+	disorder_key : numpy.uint64
+		This is the key for this set of simulations.
+	stream : int
+		This is an index to give independent random numbers for the same keys.
+	keys : numpy.arrays of ints
+		These are the (broadcastable) keys to obtain random numbers for.
+
+	Returns
+	-------
+	uniform_values : numpy.array
+		The uniform random numbers in (0,1).
+	"""
+	with np.errstate(over='ignore'):
+		hash_values = np.uint64(disorder_key) ^ np.uint64(stream)
+		for key in keys:
+			hash_values = splitmix64(hash_values ^ np.asarray(key).astype(np.int64).astype(np.uint64))
+	return ((hash_values >> np.uint64(11)).astype(np.float64) + 0.5) * (2.0 ** -53)
+
+def splitmix64(values):
+	"""
+	This method is the splitmix64 mixing function.
+
+	Parameters
+	----------
+	values : numpy.array of numpy.uint64
+		The values to mix.
+
+	Returns
+	-------
+	values : numpy.array of numpy.uint64
+		The mixed values.
+	"""
+	values = values + np.uint64(0x9E3779B97F4A7C15)
+	values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+	values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+	return values ^ (values >> np.uint64(31))
+
+def counter_based_standard_normal(disorder_key, stream, *keys):
+	"""
+	This method will return a standard normal random number for each set of keys, using the Box-Muller transform on two counter-based uniform random numbers.
+
+	Parameters
+	----------
+	disorder_key : numpy.uint64
+		This is the key for this set of simulations.
+	stream : int
+		This is an index to give independent random numbers for the same keys.
+	keys : numpy.arrays of ints
+		These are the (broadcastable) keys to obtain random numbers for.
+
+	Returns
+	-------
+	normal_values : numpy.array
+		The standard normal random numbers.
+	"""
+	uniform_values_1 = counter_based_uniform(disorder_key, 2*stream,   *keys)
+	uniform_values_2 = counter_based_uniform(disorder_key, 2*stream+1, *keys)
+	return np.sqrt(-2.0 * np.log(uniform_values_1)) * np.cos(2.0 * np.pi * uniform_values_2)
+
+def get_energy_with_disorder(disorder_key, walker_keys, molecule_names, bandgap_energies, molecule_indices, cell_points, energetic_disorder_value, energetic_disorder_is_percent):
+	"""
+	This method will obtain the energy (bandgap) of molecules with disorder.
+
+	Parameters
+	----------
+	disorder_key : numpy.uint64
+		This is the key for this set of simulations.
+	walker_keys : numpy.array
+		These are the walkers to obtain energies for. Each walker has its own disorder realisation.
+	molecule_names : numpy.array of ints
+		These are the names of the molecules in the crystal.
+	bandgap_energies : numpy.array
+		These are the bandgap energies of the molecules in the crystal.
+	molecule_indices : numpy.array
+		These are the indices of the molecules to obtain energies for, given as (walker, molecule).
+	cell_points : numpy.array
+		These are the unit cells of the molecules to obtain energies for, given as (walker, molecule, 3).
+	energetic_disorder_value : float
+		This is the energetic (bandgap) disorder value, either given as a standard deviation (in eV), or as a percentage of the bandgap of a molecule.
+	energetic_disorder_is_percent : bool.
+		This indicates if energetic_disorder_value is a percentage.
+
+	Returns
+	-------
+	energies : numpy.array
+		These are the energies (bandgaps) of the molecules with disorder (in eV).
+	"""
+	energies = bandgap_energies[molecule_indices]
+	if energetic_disorder_value == 0.0:
+		return energies
+	energetic_disorder_sd = np.abs(energies * (energetic_disorder_value/100.0)) if energetic_disorder_is_percent else energetic_disorder_value
+	return energies + energetic_disorder_sd * counter_based_standard_normal(disorder_key, 0, walker_keys[:,np.newaxis], molecule_names[molecule_indices], cell_points[...,0], cell_points[...,1], cell_points[...,2])
+
+# -----------------------------------------------------------------------------------------------------------------------------------------
+
+def get_starting_positions(starting_molecule, no_of_walkers, molecule_names, bandgap_energies, neighbour_indices, neighbour_cell_points, neighbour_mask, X_constant, get_E_with_disorder, generator):
+	"""
+	This method will obtain the starting molecule and cell point for each walker.
+
+	Parameters
+	----------
+	starting_molecule : "any", "lowest", "equilibrium", int, or list of ints
+		This is the molecule in the (0,0,0) cell that you want each exciton to begin the KMC simulation on.
+	no_of_walkers : int
+		This is the number of walkers.
+	molecule_names : numpy.array of ints
+		These are the names of the molecules in the crystal.
+	bandgap_energies : numpy.array
+		These are the bandgap energies of the molecules in the crystal.
+	neighbour_indices : numpy.array
+		The indices (in molecule_names) of the neighbouring molecules.
+	neighbour_cell_points : numpy.array
+		The relative unit cells of the neighbouring molecules.
+	neighbour_mask : numpy.array of bools
+		This indicates which entries in the padded arrays are real neighbours.
+	X_constant : float
+		This is the X constant in the Marcus rate law, equal to 1/(4 kB T).
+	get_E_with_disorder : function
+		This method gives the energies of molecules with disorder for the given walkers.
+	generator : numpy.random.Generator
+		This is the random number generator.
+
+	Returns
+	-------
+	current_molecule_indices : numpy.array
+		These are the indices of the molecules each walker starts on.
+	current_cell_points : numpy.array
+		These are the unit cells each walker starts in.
+	"""
+
+	# First, initialise the cell points, which is the origin unit cell (0, 0, 0)
+	current_cell_points = np.zeros((no_of_walkers, 3), dtype=np.int64)
+	molecule_index = {molname: index for index, molname in enumerate(molecule_names.tolist())}
+
+	# Second, determine the starting molecule for each walker.
+	if starting_molecule is None:
+		starting_molecule = 'any'
+	if isinstance(starting_molecule, str):
+		if starting_molecule.lower() == 'any':
+			current_molecule_indices = generator.integers(len(molecule_names), size=no_of_walkers)
+		elif starting_molecule.lower() == 'lowest':
+			lowest_indices = np.flatnonzero(bandgap_energies == bandgap_energies.min())
+			current_molecule_indices = generator.choice(lowest_indices, size=no_of_walkers)
+		elif starting_molecule.lower() == 'equilibrium':
+
+			# 2.1: Obtain the molecules in the local energy landscape, which are the molecules in the origin unit cell as well as their neighbours.
+			local_molecule_descriptions = [(index, (0, 0, 0)) for index in range(len(molecule_names))]
+			for index1 in range(len(molecule_names)):
+				for index2 in np.flatnonzero(neighbour_mask[index1]):
+					local_molecule_descriptions.append((int(neighbour_indices[index1,index2]), tuple(neighbour_cell_points[index1,index2].tolist())))
+			local_molecule_descriptions = sorted(set(local_molecule_descriptions))
+			local_indices = np.array([index for index, _ in local_molecule_descriptions], dtype=np.int64)
+			local_cell_points = np.array([cell_point for _, cell_point in local_molecule_descriptions], dtype=np.int64)
+
+			# 2.2: Obtain the Boltzmann weights for each walker, relative to the lowest energy.
+			local_energies = get_E_with_disorder(np.arange(no_of_walkers), np.broadcast_to(local_indices, (no_of_walkers, len(local_indices))), np.broadcast_to(local_cell_points, (no_of_walkers,)+local_cell_points.shape))
+			thermal_energy = 1.0 / (4.0 * X_constant)
+			boltzmann_weights = np.exp(-(local_energies - local_energies.min(axis=1)[:,np.newaxis]) / thermal_energy)
+
+			# 2.3: Randomly select the starting position based on the Boltzmann weights.
+			cumulative_weights = np.cumsum(boltzmann_weights, axis=1)
+			random_values = generator.random(no_of_walkers) * cumulative_weights[:,-1]
+			chosen_indices = np.minimum((cumulative_weights <= random_values[:,np.newaxis]).sum(axis=1), len(local_indices)-1)
+			current_molecule_indices = local_indices[chosen_indices]
+			current_cell_points = local_cell_points[chosen_indices].copy()
+
+		else:
+			raise Exception('Error: starting_molecule needs to be either "any", "lowest", "equilibrium", or the molecule or molecules you would like as the molecule the exciton begins on.')
+	elif isinstance(starting_molecule, (list, tuple)):
+		current_molecule_indices = generator.choice([molecule_index[int(molname)] for molname in starting_molecule], size=no_of_walkers)
+	else:
+		current_molecule_indices = np.full(no_of_walkers, molecule_index[int(starting_molecule)], dtype=np.int64)
+
+	# Third, return the starting molecule and cell points for each walker.
+	return np.array(current_molecule_indices, dtype=np.int64), current_cell_points
+
+# -----------------------------------------------------------------------------------------------------------------------------------------
+
+def placement_counter(input_toString, total_no_of_charaters, input_toString_max_length=1000000000):
+	"""
+	This method will create an output toString that has a desired number of characters is it, as done in the C++ code.
+
+	As in the C++ code, the length of the string is measured in bytes, so that lines containing non-ASCII characters (such as Σ) line up the same way.
+	"""
+	input_toString = str(input_toString)[:input_toString_max_length]
+	return input_toString + ' '*(total_no_of_charaters - len(input_toString.encode()))
+
+def write_data_to_kMC_simTXT(counter, current_molecule_name, current_cell_point, current_time, current_time_step, hop_distance, current_molecule_description_energy, sum_of_rate_constants, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz):
+	"""
+	This method is designed to give the line to write into the kMC_sim.txt file for a KMC step. This is the same format as written by the C++ code.
+	"""
+
+	# First, convert the values into strings, if they are not strings already.
+	if not isinstance(counter, str):
+		current_cell_point = '('+','.join(str(int(value)) for value in current_cell_point)+')'
+		current_time, current_time_step, hop_distance, sum_of_rate_constants, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz = ['{:.14f}'.format(value) for value in (current_time, current_time_step, hop_distance, sum_of_rate_constants, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz)]
+		current_molecule_description_energy = ('+' if (current_molecule_description_energy > 0.0) else '')+'{:.14f}'.format(current_molecule_description_energy)
+
+	# Second, return the line to write to the kMC_sim.txt file.
+	toString  = placement_counter(counter, 10)+' '+placement_counter(current_molecule_name, 10)+' '+placement_counter(current_cell_point, 25)+' '
+	toString += ' '.join([placement_counter(value, 30+2, 30) for value in (current_time, current_time_step, hop_distance, current_molecule_description_energy, sum_of_rate_constants)])
+	toString += ' | '+' '.join([placement_counter(value, 30+2, 30) for value in (D_xx, D_yy, D_zz, D_xy, D_xz, D_yz)])+' |'
+	return toString
+
+def format_kMC_simTXT_lines(counters, current_molecule_names, current_cell_points, step_values):
+	"""
+	This method is designed to give the lines to write into the kMC_sim.txt file for many KMC steps at once. This gives the same lines as write_data_to_kMC_simTXT.
+
+	As in numpy.savetxt, each line is made with one format string. The few lines that this format string does not give the same as
+	write_data_to_kMC_simTXT (lines with values that may be cut down to 30 characters, nan values, or energies of zero) are made with write_data_to_kMC_simTXT.
+
+	Parameters
+	----------
+	counters : numpy.array of ints
+		These are the step numbers of each line.
+	current_molecule_names : numpy.array of ints
+		These are the names of the molecules that the exciton is on for each line.
+	current_cell_points : numpy.array of ints
+		These are the cell points that the exciton is in for each line.
+	step_values : numpy.array
+		These are the time (in ps), time step (in fs), hop distance (in A), energy (in eV), sum of the rate constants (in ps-1), and the D(xx), D(yy), D(zz), D(xy), D(xz) and D(yz) components of the diffusion tensor (in cm2/s) for each line.
+
+	Returns
+	-------
+	lines : list of str.
+		These are the lines to write to the kMC_sim.txt file.
+	"""
+
+	# First, make the lines with one format string for each line.
+	cell_points = ['(%d,%d,%d)' % cell_point for cell_point in map(tuple, current_cell_points.tolist())]
+	lines = [kMC_simTXT_line_format % line_values for line_values in zip(counters.tolist(), current_molecule_names.tolist(), cell_points, *step_values.T.tolist())]
+
+	# Second, remake the lines where a value is more than 30 characters long or the energy has no sign, using write_data_to_kMC_simTXT.
+	with np.errstate(invalid='ignore'):
+		lines_to_remake = np.any(np.abs(step_values) >= 1.0e14, axis=1) | np.any(np.isnan(step_values), axis=1) | (step_values[:,3] == 0.0)
+	for index in np.flatnonzero(lines_to_remake):
+		lines[index] = write_data_to_kMC_simTXT(counters[index], current_molecule_names[index], current_cell_points[index], *step_values[index])
+
+	# Third, return the lines to write to the kMC_sim.txt file.
+	return lines
+
+def flush_buffered_steps(paths_to_kMC_sim, buffered_steps):
+	"""
+	This method will format the buffered KMC steps into lines, write them to each walker's kMC_sim.txt file, and empty the buffer.
+
+	Parameters
+	----------
+	paths_to_kMC_sim : list of str.
+		These are the paths to the kMC_sim.txt files to write for each walker.
+	buffered_steps : list of tuples
+		These are the KMC steps that are waiting to be written. Each contains the active walkers, the step number, and the molecule names, cell points and values of the active walkers for that step.
+	"""
+
+	# First, place the data of all the buffered steps into arrays.
+	if len(buffered_steps) == 0:
+		return
+	walkers = np.concatenate([step[0] for step in buffered_steps])
+	counters = np.concatenate([np.full(len(step[0]), step[1], dtype=np.int64) for step in buffered_steps])
+	current_molecule_names = np.concatenate([step[2] for step in buffered_steps])
+	current_cell_points = np.concatenate([step[3] for step in buffered_steps])
+	step_values = np.concatenate([step[4] for step in buffered_steps])
+	buffered_steps.clear()
+
+	# Second, format all the lines at once.
+	lines = format_kMC_simTXT_lines(counters, current_molecule_names, current_cell_points, step_values)
+
+	# Third, write the lines of each walker to its kMC_sim.txt file, in the order of the steps.
+	sorted_indices = np.argsort(walkers, kind='stable')
+	walkers_with_lines, first_indices = np.unique(walkers[sorted_indices], return_index=True)
+	for walker, walker_indices in zip(walkers_with_lines, np.split(sorted_indices, first_indices[1:])):
+		with open(paths_to_kMC_sim[walker], 'a') as kMC_simTXT:
+			kMC_simTXT.write('\n'.join([lines[index] for index in walker_indices.tolist()])+'\n')
+
+# -----------------------------------------------------------------------------------------------------------------------------------------
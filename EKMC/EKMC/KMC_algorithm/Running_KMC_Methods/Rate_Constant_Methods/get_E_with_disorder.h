@@ -8,5 +8,5 @@ using namespace std;
 #include "../../auxillary_file.h"
 #include "../../databases.h"
 
-long double get_E_with_disorder(int molecule_name, int* cell_point, Molecule_Energetic_Disorder_Database* molecule_energetic_disorder_database, 
-    unordered_map<int, long double>* molecule_bandgap_energies, long double energetic_disorder_value, bool energetic_disorder_is_percent);
\ No newline at end of file
+long double get_E_with_disorder(int molecule_index, int* cell_point, Molecule_Energetic_Disorder_Database* molecule_energetic_disorder_database, 
+    const Crystal_Tables* crystal_tables, long double energetic_disorder_value, bool energetic_disorder_is_percent);
\ No newline at end of file
@@ -8,11 +8,9 @@
 #include <unordered_map>
 using namespace std;
 #include "../../databases.h"
-#include "../../Initialisation_Methods/convert_arrays_to_unordered_maps.h"
+#include "../../auxillary_file.h"
 
-tuple<long double, list<tuple<int,int,int,int>>, list<long double>> get_marcus_rate_constants_data(int current_molecule_name, int* current_cell_point, 
+tuple<long double, list<tuple<int,int,int,int>>, list<long double>> get_marcus_rate_constants_data(int current_molecule_index, int* current_cell_point, 
     long double M_constant, long double X_constant, long double energetic_disorder_value, bool energetic_disorder_is_percent, 
-    long double coupling_disorder_value, bool coupling_disorder_is_percent, unordered_map<int, long double>* molecule_bandgap_energies, 
-    unordered_map<tuple<int,int>, long double, hash_tuple_DRE>* dimer_reorganisation_energies,
-    unordered_map<int, vector<tuple<int,int,int,int,long double>>>* coupling_value_data,
+    long double coupling_disorder_value, bool coupling_disorder_is_percent, const Crystal_Tables* crystal_tables, 
     Molecule_Energetic_Disorder_Database* molecule_energetic_disorder_database, Rate_Constant_Database* rate_constant_database);
\ No newline at end of file
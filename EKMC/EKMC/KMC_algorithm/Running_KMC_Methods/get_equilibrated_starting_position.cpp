@@ -0,0 +1,70 @@
+/**
+ * get_equilibrated_starting_position.cpp, Geoffrey Weal, 19/10/26
+ * 
+ * This algorithm is designed to draw the molecule the exciton begins on from the Boltzmann-weighted equilibrium occupation of the local disordered energy landscape about the origin unit cell.
+ */
+#include <cmath>
+#include <tuple>
+#include <random>
+#include <vector>
+#include <algorithm>
+using namespace std;
+#include "get_equilibrated_starting_position.h"
+#include "Rate_Constant_Methods/get_E_with_disorder.h"
+
+tuple<int,int,int,int> get_equilibrated_starting_position(long double X_constant, long double energetic_disorder_value, bool energetic_disorder_is_percent, 
+	const Crystal_Tables* crystal_tables, Molecule_Energetic_Disorder_Database* molecule_energetic_disorder_database, mt19937* generator) {
+	/**
+	 * This method is designed to draw the molecule the exciton begins on from the Boltzmann-weighted equilibrium occupation of the local disordered energy landscape about the origin unit cell.
+	 * 
+	 * The local landscape is made up of every molecule in the origin unit cell along with all the molecules these are coupled to. The energies 
+	 * (with disorder) of these molecules are obtained through molecule_energetic_disorder_database, so the exciton will continue to experience 
+	 * the same energy landscape that its starting position was drawn from once the KMC simulation begins. 
+	 * 
+	 * @param X_constant This is the X constant in the Marcus Theory Rate law, equal to 1/(4 kB T). This is used to obtain kB T.
+	 * @param energetic_disorder_value This is the energetic (bandgap) disorder value, either given as a standard deviation (in eV), or as a percentage of a energy (bandgap) for a molecule. 
+	 * @param energetic_disorder_is_percent If True, energetic_disorder_value is a percentage. If False, energetic_disorder_value is a standard deviation (in eV).
+	 * @param crystal_tables These are the flat tables containing the bandgap energies and the neighbours of each molecule in the crystal.
+	 * @param molecule_energetic_disorder_database This map holds all the energies (bandgap) for each molecule sampled in a KMC simulation. 
+	 * @param generator This is the random number generator used to draw the starting position.
+	 * 
+	 * @returns The molecule index and the unit cell (i, j, k) that the exciton will begin the KMC simulation from.
+	 */
+
+	// First, obtain the thermal energy (kB T, in eV) from the X constant in the Marcus rate law.
+	long double thermal_energy = 1.0 / (4.0 * X_constant);
+
+	// Second, gather the molecules in the local energy landscape, which are the molecules in the origin unit cell as well as their neighbours.
+	vector<tuple<int,int,int,int>> local_molecule_descriptions;
+	for (int molecule_index = 0; molecule_index < crystal_tables->no_of_molecules; molecule_index++) {
+		local_molecule_descriptions.push_back(make_tuple(molecule_index, 0, 0, 0));
+		for (int neighbour = crystal_tables->neighbour_offsets[molecule_index]; neighbour < crystal_tables->neighbour_offsets[molecule_index+1]; neighbour++) {
+			const Neighbour_CObject& local_neighbourhood = crystal_tables->neighbours[neighbour];
+			tuple<int,int,int,int> neighbouring_molecule_description = make_tuple(local_neighbourhood.mol_index, local_neighbourhood.uniti, local_neighbourhood.unitj, local_neighbourhood.unitk);
+			if (find(local_molecule_descriptions.begin(), local_molecule_descriptions.end(), neighbouring_molecule_description) == local_molecule_descriptions.end()) {
+				local_molecule_descriptions.push_back(neighbouring_molecule_description);
+			}
+		}
+	}
+
+	// Third, obtain the energies (with disorder) of all the molecules in the local energy landscape.
+	vector<long double> local_energies;
+	for (const auto& local_molecule_description : local_molecule_descriptions) {
+		int cell_point[3] = {get<1>(local_molecule_description), get<2>(local_molecule_description), get<3>(local_molecule_description)};
+		local_energies.push_back(get_E_with_disorder(get<0>(local_molecule_description), cell_point, molecule_energetic_disorder_database, crystal_tables, energetic_disorder_value, energetic_disorder_is_percent));
+	}
+
+	// Fourth, obtain the Boltzmann weights of each molecule. These are given relative to the lowest energy to prevent exp from overflowing.
+	long double lowest_energy = *min_element(local_energies.begin(), local_energies.end());
+	vector<long double> boltzmann_weights;
+	for (long double local_energy : local_energies) {
+		boltzmann_weights.push_back(exp(-(local_energy - lowest_energy) / thermal_energy));
+	}
+
+	// Fifth, randomly select the starting position based on the Boltzmann weights.
+	discrete_distribution<int> starting_position_distribution(boltzmann_weights.begin(), boltzmann_weights.end());
+	int index = starting_position_distribution(*generator);
+
+	// Sixth, return the starting position. 
+	return local_molecule_descriptions[index];
+}
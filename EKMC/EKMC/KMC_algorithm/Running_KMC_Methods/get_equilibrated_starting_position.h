@@ -0,0 +1,14 @@
+/**
+ * get_equilibrated_starting_position.h, Geoffrey Weal, 19/10/26
+ * 
+ * This algorithm is designed to draw the molecule the exciton begins on from the Boltzmann-weighted equilibrium occupation of the local disordered energy landscape about the origin unit cell.
+ */
+#include <tuple>
+#include <random>
+#include <vector>
+using namespace std;
+#include "../databases.h"
+#include "../auxillary_file.h"
+
+tuple<int,int,int,int> get_equilibrated_starting_position(long double X_constant, long double energetic_disorder_value, bool energetic_disorder_is_percent, 
+	const Crystal_Tables* crystal_tables, Molecule_Energetic_Disorder_Database* molecule_energetic_disorder_database, mt19937* generator);
@@ -5,9 +5,8 @@
  */
 #include <list>
 #include <tuple>
-#include <vector>
-#include <unordered_map>
 using namespace std;
+#include "../auxillary_file.h"
 
-tuple<long double,long double,long double,long double,long double,long double> get_probability_based_stepwise_diffusion_tensor(int current_molecule_name, int* current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, vector<vector<long double>> *unit_cell_matrix, unordered_map<int, vector<long double>> *centre_of_molecules);
+tuple<long double,long double,long double,long double,long double,long double> get_probability_based_stepwise_diffusion_tensor(int current_molecule_index, int* current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, const Crystal_Tables* crystal_tables);
 
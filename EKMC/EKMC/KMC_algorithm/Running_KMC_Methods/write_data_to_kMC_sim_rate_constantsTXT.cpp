@@ -13,7 +13,7 @@
 #include "Auxiliary_Methods/auxillary_methods.h"
 using namespace std;
 
-string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecule_name, int *current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, long double sum_of_rate_constants) {
+string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecule_name, int *current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, long double sum_of_rate_constants, const int* molecule_names) {
 	/**
 	 * This method is designed to write the information about the probability for an exciton to jump from the exciton donor to any of its neighbours during a KMC step.
 	 * 
@@ -25,6 +25,7 @@ string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecul
 	 * @param other_molecule_descriptions These are all the details of the neighbouring molecules surrounding the exciton donor that the exciton is currently on.
 	 * @param rate_constants These are all the rate constants for all the neighbouring molecules given in other_molecule_descriptions
 	 * @param sum_of_rate_constants This is the sum of rate constants for the exciton to jump from current_molecule_name, current_cell_point to a neighbouring molecule. 
+	 * @param molecule_names These are the names of the molecules for each molecule index given in other_molecule_descriptions.
 	 * 
 	 * @return toString a string that can be written to the kMC.txt simulations storage file containing the information about the probabilities. 
 	 */
@@ -53,7 +54,7 @@ string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecul
 
     	// 5.1: Get the details about neighbouring exciton acceptor.
     	other_molecule_description = (*it1); 
-		toString += to_string(get<0>(other_molecule_description))+" ("+to_string(get<1>(other_molecule_description))+", "+to_string(get<2>(other_molecule_description))+", "+to_string(get<3>(other_molecule_description))+"): ";
+		toString += to_string(molecule_names[get<0>(other_molecule_description)])+" ("+to_string(get<1>(other_molecule_description))+", "+to_string(get<2>(other_molecule_description))+", "+to_string(get<3>(other_molecule_description))+"): ";
 		
 		// 5.2: Get the rate constant for the corresponding neighbouring exciton acceptor.
 		toString += to_string_long_double(*it2);
@@ -9,4 +9,4 @@
 #include <list>
 using namespace std;
 
-string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecule_name, int *current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, long double sum_of_rate_constants); 
\ No newline at end of file
+string write_data_to_kMC_sim_rate_constantsTXT(long counter, int current_molecule_name, int *current_cell_point, list<tuple<int,int,int,int>> *other_molecule_descriptions, list<long double> *rate_constants, long double sum_of_rate_constants, const int* molecule_names); 
\ No newline at end of file
@@ -0,0 +1,53 @@
+/**
+ * write_status_file.cpp, 19/10/26, Geoffrey Weal
+ * 
+ * This algorithm is designed to write the status (heartbeat) file of the simulation while it is running.
+ * 
+ * This is the same file as written by simulation_status_file.py in python. The file is written to a temporary file first, 
+ * which is then renamed to the status file, so the status file is never seen half written.
+ */
+#include <fstream>
+#include <sstream>
+#include <iomanip>
+#include <string>
+#include <chrono>
+#include <filesystem>
+#include "write_status_file.h"
+using namespace std;
+
+void write_status_file(const char* path_to_status_file, string state, long double current_time, long counter, long double sim_time_limit, long long max_no_of_steps) {
+	/**
+	 * This method is designed to write the status (heartbeat) file of the simulation.
+	 * 
+	 * @param path_to_status_file This is the path to the status file. If this is an empty string, nothing is written.
+	 * @param state This is the state of the simulation.
+	 * @param current_time This is the time that has been simulated (in ps).
+	 * @param counter This is the number of KMC steps that have been performed.
+	 * @param sim_time_limit This is the simulated time limit to run the kinetic Monte Carlo simulation over (-1.0 if there is no limit). Time given in ps.
+	 * @param max_no_of_steps This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over (-1 if there is no limit).
+	 */
+
+	// First, if no path was given, do not write a status file.
+	if (string(path_to_status_file).empty()) { return; }
+
+	// Second, obtain the time now, in seconds since the epoch.
+	double last_update = chrono::duration_cast<chrono::milliseconds>(chrono::system_clock::now().time_since_epoch()).count() / 1000.0;
+
+	// Third, write the status to a temporary file.
+	ostringstream toString;
+	toString << setprecision(17);
+	toString << "{\"state\": \"" << state << "\", \"time\": " << (double) current_time << ", \"no_of_steps\": " << counter;
+	toString << ", \"sim_time_limit\": "; if (sim_time_limit == -1.0) { toString << "null"; } else { toString << (double) sim_time_limit; }
+	toString << ", \"max_no_of_steps\": "; if (max_no_of_steps == -1) { toString << "null"; } else { toString << max_no_of_steps; }
+	toString << ", \"last_update\": " << last_update << "}";
+	string path_to_temp_file = string(path_to_status_file) + ".tmp";
+	ofstream statusJSON(path_to_temp_file);
+	if (!statusJSON.is_open()) { return; } // The status file is not vital for running a simulation.
+	statusJSON << toString.str();
+	statusJSON.close();
+
+	// Fourth, rename the temporary file to the status file.
+	error_code error;
+	filesystem::rename(path_to_temp_file, path_to_status_file, error);
+
+}
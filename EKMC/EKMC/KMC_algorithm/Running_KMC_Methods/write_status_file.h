@@ -0,0 +1,9 @@
+/**
+ * write_status_file.h, 19/10/26, Geoffrey Weal
+ * 
+ * This algorithm is designed to write the status (heartbeat) file of the simulation while it is running.
+ */
+#include <string>
+using namespace std;
+
+void write_status_file(const char* path_to_status_file, string state, long double current_time, long counter, long double sim_time_limit, long long max_no_of_steps);
@@ -0,0 +1,36 @@
+/**
+ * write_time_index_file.cpp, 19/10/26, Geoffrey Weal
+ * 
+ * This algorithm is designed to write the checkpoints of the time index file of the simulation while it is running.
+ * 
+ * This is the same file as made by time_index_file.py in python. For each checkpoint time (every time_index_interval ps), the time index 
+ * file gives the record (KMC step) that the exciton is on at that time, and the byte offset of the line of that record in the kMC_sim.txt file. 
+ */
+#include <fstream>
+#include <string>
+#include "write_time_index_file.h"
+using namespace std;
+
+void write_time_index_checkpoints(ofstream& time_indexTXT, long& checkpoint_number, const double time_index_interval, long double up_to_time, bool include_up_to_time, long record, long long byte_offset) {
+	/**
+	 * This method is designed to write the checkpoints that the exciton is on record for into the time index file.
+	 * 
+	 * @param time_indexTXT This is the time index file. If this is not open, nothing is written.
+	 * @param checkpoint_number This is the number of the next checkpoint to write. This is updated as checkpoints are written.
+	 * @param time_index_interval This is the simulated time between each checkpoint, in ps.
+	 * @param up_to_time This is the time to write checkpoints up to, in ps. This is the time of the next record, or the time of record if it is the last record.
+	 * @param include_up_to_time If true, a checkpoint at up_to_time is also written (used for the last record).
+	 * @param record This is the record (KMC step) that the exciton is on for these checkpoints.
+	 * @param byte_offset This is the byte offset of the line of record in the kMC_sim.txt file.
+	 */
+
+	// First, if the time index file is not being written, do nothing.
+	if (!time_indexTXT.is_open()) { return; }
+
+	// Second, write each checkpoint before (or at) up_to_time.
+	while ((checkpoint_number * time_index_interval < up_to_time) or (include_up_to_time and (checkpoint_number * time_index_interval <= up_to_time))) {
+		time_indexTXT << to_string(checkpoint_number * time_index_interval) << " " << to_string(record) << " " << to_string(byte_offset) << "\n";
+		checkpoint_number++;
+	}
+
+}
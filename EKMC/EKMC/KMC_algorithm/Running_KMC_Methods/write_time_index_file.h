@@ -0,0 +1,9 @@
+/**
+ * write_time_index_file.h, 19/10/26, Geoffrey Weal
+ * 
+ * This algorithm is designed to write the checkpoints of the time index file of the simulation while it is running.
+ */
+#include <fstream>
+using namespace std;
+
+void write_time_index_checkpoints(ofstream& time_indexTXT, long& checkpoint_number, const double time_index_interval, long double up_to_time, bool include_up_to_time, long record, long long byte_offset);
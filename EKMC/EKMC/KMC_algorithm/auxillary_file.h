@@ -1,7 +1,7 @@
 /**
  * auxillary_file.h, Geoffrey Weal, 30/5/23
- * 
- * This script contains various structs used for KMC simulations. 
+ *
+ * This script contains various structs used for KMC simulations.
  */
 #ifndef AUXILLARY_FILE_H
 #define AUXILLARY_FILE_H
@@ -10,59 +10,46 @@
 #include <cmath>
 using namespace std;
 
-struct COM_CObject { 
+struct Neighbour_CObject {
 	/**
-	 * This contains the information required to obtain the centre of mass/molecule for a molecule
-	 * 
-	 * @param mol This is the name of the molecule.
-	 * @param centre_of_mass This is the centre of mass/molecule of the molecule.
+	 * This contains the coupling value for a neighbour of a molecule in the origin unit cell. This matches the neighbours_dtype NumPy structured array in get_crystal_tables.py.
+	 *
+	 * @param mol_index The index of the neighbouring molecule (which is located in the (uniti, unitj, unitk) unit cell).
+	 * @param uniti This is the position of the neighbouring molecule, shifted by i * length of unit cell in i direction
+	 * @param unitj This is the position of the neighbouring molecule, shifted by j * length of unit cell in j direction
+	 * @param unitk This is the position of the neighbouring molecule, shifted by k * length of unit cell in k direction
+	 * @param coupling_value This is the coupling value between the molecules in the dimer (in eV).
 	 */
-	int mol;
-	long double centre_of_mass_x;
-	long double centre_of_mass_y;
-	long double centre_of_mass_z;
-};
-
-struct Bandgap_Energies_CObject { 
-	/**
-	 * This contains the information required to obtain the reorganisation energy for a molecule
-	 * 
-	 * @param mol This is the name of the molecule.
-	 * @param bandgap_energy This is the bandgap energy of the molecule.
-	 */
-	int mol;
-	long double bandgap_energy;
-};
-
-struct Reorganisation_Energies_CObject { 
-	/**
-	 * This contains the information required to obtain the reorganisation energy for a molecule
-	 * 
-	 * @param mol1 This is the name of the first molecule.
-	 * @param mol2 This is the name of the second molecule.
-	 * @param reorganisation_energy This is the reorganisation energy for a exciton jumping from molecule 1 to molecule 2. 
-	 */
-	int mol1;
-	int mol2;
-	long double reorganisation_energy;
+	int mol_index;
+	int uniti;
+	int unitj;
+	int unitk;
+	double coupling_value;
 };
 
-struct Coupling_Value_Data_CObject { 
+struct Crystal_Tables {
 	/**
-	 * This contains the coupling values for molecules in a dimer.
-	 * 
-	 * @param mol1 The name of the first molecule in the dimer (which is located in the origin unit cell).
-	 * @param mol2 The name of the second molecule in the dimer (which is located in the (uniti, unitj, unitk) unit cell).
-	 * @param uniti This is the position of the second molecule, shifted by i * length of unit cell in i direction
-	 * @param unitj This is the position of the second molecule, shifted by j * length of unit cell in j direction
-	 * @param unitk This is the position of the second molecule, shifted by k * length of unit cell in k direction
+	 * This contains the flat tables that describe the crystal. These point directly to the NumPy arrays given from python, and are indexed by the index of
+	 * each molecule in the unit cell (rather than by the molecule's name).
+	 *
+	 * @param no_of_molecules This is the number of molecules in the unit cell.
+	 * @param molecule_names These are the names of each molecule in the unit cell [no_of_molecules].
+	 * @param centre_of_molecules These are the centre of mass/molecule of each molecule in the unit cell [no_of_molecules x 3].
+	 * @param unit_cell_matrix This is the unit cell matrix, where each row is a lattice vector [3 x 3].
+	 * @param bandgap_energies These are the bandgap energies of each molecule in the unit cell [no_of_molecules].
+	 * @param reorganisation_energies These are the reorganisation energies for an exciton jumping from molecule 1 to molecule 2 [no_of_molecules x no_of_molecules].
+	 * @param neighbour_offsets The neighbours of molecule index i are given in neighbours[neighbour_offsets[i]:neighbour_offsets[i+1]] [no_of_molecules + 1].
+	 * @param neighbours These are the neighbours of each molecule in the unit cell, along with their coupling values.
 	 */
-	int mol1;
-	int mol2;
-	int uniti;
-	int unitj;
-	int unitk;
-	long double coupling_value;
+	int no_of_molecules;
+	const int* molecule_names;
+	const double* centre_of_molecules;
+	const double* unit_cell_matrix;
+	const double* bandgap_energies;
+	const double* reorganisation_energies;
+	const int* neighbour_offsets;
+	const Neighbour_CObject* neighbours;
 };
 
 #endif
+
@@ -0,0 +1,91 @@
+"""
+get_crystal_tables.py, Geoffrey Weal, 19/10/26
+
+This script is designed to prepare the flat tables that describe the crystal for the EKMC C++ code, from the arrays in the KMC_setup_data.npz model file.
+"""
+import numpy as np
+
+# This matches the Neighbour_CObject struct in auxillary_file.h
+neighbours_dtype = np.dtype([('mol_index', np.int32), ('uniti', np.int32), ('unitj', np.int32), ('unitk', np.int32), ('coupling_value', np.float64)], align=True)
+
+def get_crystal_tables(KMC_model):
+	"""
+	This method is designed to prepare the flat tables that describe the crystal for the EKMC C++ code.
+
+	Each molecule is given an index (from 0 to the number of molecules in the unit cell - 1, in order of molecule name), and every table is
+	indexed by this index. The neighbours of each molecule are given in the neighbours table in CSR form, where the neighbours of molecule index i
+	are neighbours[neighbour_offsets[i]:neighbour_offsets[i+1]]. All tables are contiguous arrays with C-compatible dtypes, so they can be given
+	to the C++ code by pointer.
+
+	Parameters
+	----------
+	KMC_model : dict.
+		This contains the arrays in the model file (see read_KMC_model.py).
+
+	Returns
+	-------
+	crystal_tables : dict.
+		This contains the flat tables that describe the crystal.
+	"""
+
+	# First, obtain the names and centre of masses of the molecules, sorted by name.
+	molecules = KMC_model['molecules']
+	molecules = molecules[np.argsort(molecules['mol'], kind='stable')]
+	molecule_names = np.ascontiguousarray(molecules['mol'], dtype=np.int32)
+	no_of_molecules = len(molecule_names)
+	centre_of_molecules = np.ascontiguousarray(molecules['centre_of_mass'], dtype=np.float64)
+	unit_cell_matrix = np.ascontiguousarray(KMC_model['unit_cell_matrix'], dtype=np.float64)
+
+	# Second, obtain the bandgap energy of each molecule.
+	bandgap_energies = np.full(no_of_molecules, np.nan)
+	bandgap_energies[get_molecule_indices(molecule_names, KMC_model['bandgap_energies']['mol'], 'bandgap_energies')] = KMC_model['bandgap_energies']['bandgap_energy']
+	if np.isnan(bandgap_energies).any():
+		raise Exception('Error: The following molecules do not have bandgap energies: '+str(molecule_names[np.isnan(bandgap_energies)].tolist()))
+
+	# Third, obtain the reorganisation energy of each dimer.
+	reorganisation_energies = np.full((no_of_molecules, no_of_molecules), np.nan)
+	mol1_indices = get_molecule_indices(molecule_names, KMC_model['reorganisation_energies']['mol1'], 'reorganisation_energies')
+	mol2_indices = get_molecule_indices(molecule_names, KMC_model['reorganisation_energies']['mol2'], 'reorganisation_energies')
+	reorganisation_energies[mol1_indices, mol2_indices] = KMC_model['reorganisation_energies']['reorganisation_energy']
+
+	# Fourth, obtain the neighbours of each molecule, sorted by the index of the molecule in the origin unit cell.
+	coupling_values = KMC_model['coupling_values']
+	donor_indices    = get_molecule_indices(molecule_names, coupling_values['mol1'], 'coupling_values')
+	acceptor_indices = get_molecule_indices(molecule_names, coupling_values['mol2'], 'coupling_values')
+	if np.isnan(reorganisation_energies[donor_indices, acceptor_indices]).any():
+		missing_dimers = np.unique(np.stack([molecule_names[donor_indices], molecule_names[acceptor_indices]], axis=1)[np.isnan(reorganisation_energies[donor_indices, acceptor_indices])], axis=0)
+		raise Exception('Error: The following dimers do not have reorganisation energies: '+str([tuple(dimer) for dimer in missing_dimers.tolist()]))
+	order = np.argsort(donor_indices, kind='stable')
+	neighbours = np.empty(len(coupling_values), dtype=neighbours_dtype)
+	neighbours['mol_index'] = acceptor_indices[order]
+	for name in ['uniti', 'unitj', 'unitk', 'coupling_value']:
+		neighbours[name] = coupling_values[name][order]
+	neighbour_offsets = np.zeros(no_of_molecules+1, dtype=np.int32)
+	neighbour_offsets[1:] = np.cumsum(np.bincount(donor_indices, minlength=no_of_molecules))
+
+	# Fifth, return the crystal tables.
+	return {'no_of_molecules': no_of_molecules, 'molecule_names': molecule_names, 'centre_of_molecules': centre_of_molecules, 'unit_cell_matrix': unit_cell_matrix, 'bandgap_energies': bandgap_energies, 'reorganisation_energies': np.nan_to_num(reorganisation_energies, nan=0.0), 'neighbour_offsets': neighbour_offsets, 'neighbours': neighbours}
+
+def get_molecule_indices(molecule_names, names, table_name):
+	"""
+	This method will obtain the index of each molecule in names.
+
+	Parameters
+	----------
+	molecule_names : numpy.array of ints
+		These are the names of the molecules in the unit cell, sorted from lowest to highest.
+	names : numpy.array of ints
+		These are the names of the molecules to obtain the indices of.
+	table_name : str.
+		This is the name of the table that names are from. This is used for reporting errors.
+
+	Returns
+	-------
+	indices : numpy.array of ints
+		These are the indices of each molecule in names.
+	"""
+	indices = np.searchsorted(molecule_names, names)
+	is_unknown = (indices >= len(molecule_names)) | (molecule_names[np.minimum(indices, len(molecule_names)-1)] != names)
+	if is_unknown.any():
+		raise Exception('Error: The following molecules in '+str(table_name)+' are not in the unit cell: '+str(np.unique(np.asarray(names)[is_unknown]).tolist()))
+	return indices.astype(np.int32)
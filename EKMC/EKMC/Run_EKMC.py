@@ -8,14 +8,16 @@ import os, shutil, math
 from random import choice
 from EKMC.EKMC.Run_EKMC_setup_files.get_EKMC_version                              import get_EKMC_version
 from EKMC.EKMC.Run_EKMC_setup_files.did_finish                                    import did_finish
-from EKMC.EKMC.Run_EKMC_setup_files.check_molecule_consistancy_across_datasets    import check_molecule_consistancy_across_datasets
-from EKMC.EKMC.Run_EKMC_setup_files.expand_to_include_unique_molecules_in_dict    import expand_to_include_unique_molecules_in_dict
-from EKMC.EKMC.Run_EKMC_setup_files.update_bandgap_and_reorganisation_energy_data import update_bandgap_and_reorganisation_energy_data
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file                        import status_filename, write_simulation_status, running_state, finished_state, heartbeat_interval
+from EKMC.EKMC.Run_EKMC_setup_files.time_index_file                               import time_index_filename, time_index_interval
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data                           import read_KMC_setup_data
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_model                                import load_KMC_model, get_KMC_model_details, convert_KMC_model_to_KMC_setup_data, convert_KMC_setup_data_to_KMC_model
 from EKMC.EKMC.Run_EKMC_setup_files.names_of_lowest_bandgap_molecules_in_crystal  import names_of_lowest_bandgap_molecules_in_crystal
 from EKMC.EKMC.KMC_algorithm.Run_KMC_algorithm_in_C                               import Run_KMC_algorithm_in_C
+from EKMC.EKMC.KMC_algorithm.get_crystal_tables                                   import get_crystal_tables
+from EKMC.EKMC.KMC_algorithm.Run_KMC_algorithm_in_NumPy                           import Run_KMC_algorithm_in_NumPy
 
-KMC_setup_data_filename = 'KMC_setup_data.ekmc'
-def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf', max_no_of_steps='inf', write_rate_constants_to_file=False, starting_molecule='any'):
+def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf', max_no_of_steps='inf', write_rate_constants_to_file=False, starting_molecule='any', engine='auto'):
 	"""
 	This program is designed to simulate the movement of an exciton through a OPV crystal system.
 
@@ -31,36 +33,29 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 		This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over.
 	write_rate_constants_to_file : bool
 		This indicates if you want to write a file called "kMC_sim_rate_constants.txt" that includes all the rate constant data for an exciton moving from the exciton donor it is currently on to any of the neighbouring exciton acceptors. 
-	starting_molecule : "any", "lowest", int, list of ints
-		This is the molecule in the (0,0,0) cell that you want the exciton to begin the KMC simulation on. If you set this to "any", the exciton will randomly be placed on any molecule in the unit cell. "lowest" means you will place the crystal on the lowest energy molecules.
+	starting_molecule : "any", "lowest", "equilibrium", int, list of ints
+		This is the molecule in the (0,0,0) cell that you want the exciton to begin the KMC simulation on. If you set this to "any", the exciton will randomly be placed on any molecule in the unit cell. "lowest" means you will place the crystal on the lowest energy molecules. "equilibrium" means the exciton will be placed on a molecule drawn from the Boltzmann-weighted equilibrium occupation of the disordered energies of the molecules in and about the origin unit cell. This removes the need to wait for the exciton to relax into the low-energy tail of the disorder distribution before recording results.
+	engine : "auto", "C++", or "NumPy"
+		This is the code used to run the kinetic Monte Carlo algorithm. "auto" will use the C++ code if it has been compiled, otherwise the NumPy code will be used. Default: "auto"
 	"""
 
 	# First, this is needed to prevent multiprocessing.Process from doing weird stuff
 	if not (__name__ == 'EKMC.EKMC.Run_EKMC'):
 		return
 
-	# Second, retrieve data for setting up the kinetic Monte Carlo simulation from the KMC_setup_data.ekmc file.
-	with open(path_to_KMC_setup_data+'/'+KMC_setup_data_filename) as KMC_setup_data_EKMC:
-		molecule_list_and_com            = eval(KMC_setup_data_EKMC.readline().replace('S','.0').rstrip()) # remove any solvent tags, will include them here for running EKMC simulation.
-		molecule_list_and_com            = {str(int(name))+'S' if isinstance(name,float) else str(name): centre_of_mass for name, centre_of_mass in molecule_list_and_com.items()}
-		solvent_list                     = [int(name.replace('S','')) for name in molecule_list_and_com.keys() if name.endswith('S')]
-		unit_cell_matrix                 = eval(KMC_setup_data_EKMC.readline().rstrip())
-		kinetic_model                    =  str(KMC_setup_data_EKMC.readline().rstrip())
-		kinetics_details                 = eval(KMC_setup_data_EKMC.readline().rstrip())
-		molecule_bandgap_energy_data     = eval(KMC_setup_data_EKMC.readline().rstrip())
-		dimer_reorganisation_energy_data = eval(KMC_setup_data_EKMC.readline().rstrip())
-		conformationally_equivalent_data = eval(KMC_setup_data_EKMC.readline().rstrip())
-		constant_rate_data               = eval(KMC_setup_data_EKMC.readline().rstrip())
-		coupling_value_data              = eval(KMC_setup_data_EKMC.readline().rstrip())
-
-	# Third, obtain all the names of the molecules in the crystal, as reported in 'KMC_setup_data.ekmc'
-	molecule_names = sorted([int(str(molname).replace('S','')) for molname in molecule_list_and_com.keys()])
-	
-	# Fourth, get the given coupling and energetic disorders. 
+	# Second, retrieve data for setting up the kinetic Monte Carlo simulation. This is memory mapped from the KMC_setup_data.npz model file if it was written 
+	#         during setup. Otherwise, the KMC_setup_data.ekmc file is read. This includes checking that the molecules are consistent between datasets, 
+	#         and adding conformationally unique molecule data to the bandgap and reorganisation energy data.
+	KMC_model = load_KMC_model(path_to_KMC_setup_data)
+	if KMC_model is None:
+		KMC_model = convert_KMC_setup_data_to_KMC_model(*read_KMC_setup_data(path_to_KMC_setup_data, use_KMC_model=False))
+	molecule_names, kinetic_model, kinetics_details, molecule_bandgap_energy_data, constant_rate_data = get_KMC_model_details(KMC_model)
+
+	# Third, get the given coupling and energetic disorders. 
 	coupling_disorder = kinetics_details['coupling_disorder']
 	energetic_disorder = kinetics_details['energetic_disorder']
 
-	# Fifth, run the exciton kinetic Monte Carlo Simulation.
+	# Fourth, run the exciton kinetic Monte Carlo Simulation.
 	print('------------------------------------------------')
 	print('------------------------------------------------')
 	print('-------- RUNNING EXCITON KMC SIMULATION --------')
@@ -71,7 +66,7 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 	print('------------------------------------------------')
 	print('------------------------------------------------')
 
-	# Sixth, check that the simulation has finished.
+	# Fifth, check that the simulation has finished.
 	kMC_sim_name      = 'kMC_sim.txt'
 	kMC_sim_rate_constants_name = 'kMC_sim_rate_constants.txt'
 	reached_sim_time_limit, reached_max_no_of_steps, time_simulated, no_of_steps_simulated = did_finish(kMC_sim_name, sim_time_limit, max_no_of_steps)
@@ -86,20 +81,21 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 		print('Number of steps simulated: '+str(no_of_steps_simulated))
 		print('Will finish the Exciton kinetic Monte Carlo algorithm without doing anything.')
 		print('------------------------------------------------')
+		write_simulation_status('.', finished_state, time_simulated, no_of_steps_simulated, sim_time_limit, max_no_of_steps)
 		return
 
-	# Seventh, if you want to save data to a temp file during the KMC run, do this here
+	# Sixth, if you want to save data to a temp file during the KMC run, do this here
 	if temp_folder_path is not None:
 
-		# 7.1: Check that this temp folder path does not currently exist yet
+		# 6.1: Check that this temp folder path does not currently exist yet
 		if os.path.exists(temp_folder_path):
 			raise Exception('Error: The temp folder you are trying to create has already been created ('+str(temp_folder_path)+'). Check this out')
 
-		# 7.2: Create the temp folder
+		# 6.2: Create the temp folder
 		print('Making a temp folder to store data in: '+str(temp_folder_path))
 		os.makedirs(temp_folder_path)
 
-		# 7.3: Copy the kMC_sim file into this temp folder if there is a current kMC_sim file.
+		# 6.3: Copy the kMC_sim file into this temp folder if there is a current kMC_sim file.
 		if kMC_sim_name in os.listdir('.'):
 			shutil.copy(kMC_sim_name, temp_folder_path+'/'+kMC_sim_name)
 		if kMC_sim_rate_constants_name in os.listdir('.'):
@@ -108,20 +104,24 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 	else:
 		temp_folder_path = '.'
 
-	# Eighth, get the path to the kMC_sim file.
+	# Seventh, get the path to the kMC_sim file.
 	path_to_kMC_sim                = temp_folder_path+'/'+kMC_sim_name
 	path_to_kMC_sim_rate_constants = temp_folder_path+'/'+kMC_sim_rate_constants_name
 
-	# Ninth, check that the molecules in the 'KMC_setup_data.ekmc' file are consistent between molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, and conformationally_equivalent_data dictionaries.
-	check_molecule_consistancy_across_datasets(molecule_names, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, conformationally_equivalent_data)
-
-	# Tenth, update conformationally_equivalent_data to include unique molecules that link to themselves.
-	conformationally_equivalent_data = expand_to_include_unique_molecules_in_dict(conformationally_equivalent_data, molecule_names)
-
-	# Eleventh, add conformationally unique molecule data to molecule_bandgap_energy_data and dimer_reorganisation_energy_data.
-	molecule_bandgap_energy_data, dimer_reorganisation_energy_data = update_bandgap_and_reorganisation_energy_data(molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data)
-
-	# Twelfth, determine what the starting molecule will be where the exciton begins from in the origin unit cell. 
+	# Eighth, determine the engine to run the KMC algorithm with. If the C++ code has not been compiled, the NumPy code will be used.
+	path_to_c_code = os.path.dirname(os.path.realpath(__file__)) + "/KMC_algorithm/KMC_algorithm.so"
+	if engine.lower() == 'auto':
+		if os.path.exists(path_to_c_code):
+			engine = 'c++'
+		else:
+			print('Could not find the compiled EKMC C++ code ('+str(path_to_c_code)+'). Will run the KMC algorithm using the NumPy code instead.')
+			print('Run "EKMC compile" in the terminal to use the faster C++ code.')
+			engine = 'numpy'
+	engine = engine.lower()
+	if engine not in ['c++', 'numpy']:
+		raise Exception('Error: engine needs to be either "auto", "C++", or "NumPy". engine = '+str(engine))
+
+	# Ninth, determine what the starting molecule will be where the exciton begins from in the origin unit cell. 
 	if starting_molecule == None:
 		starting_molecule = 'any'
 	if   isinstance(starting_molecule,str):
@@ -130,14 +130,18 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 		elif starting_molecule.lower() == 'lowest':
 			molecule_names_of_lowest_bandgap_molecules = names_of_lowest_bandgap_molecules_in_crystal(molecule_bandgap_energy_data)
 			current_molecule_name = choice(molecule_names_of_lowest_bandgap_molecules)
+		elif starting_molecule.lower() == 'equilibrium':
+			if not (kinetic_model.lower() == 'marcus'):
+				raise Exception('Error: starting_molecule = "equilibrium" can currently only be used with the Marcus kinetic model. kinetic_model = '+str(kinetic_model))
+			current_molecule_name = 'equilibrium'
 		else:
-			raise Exception('Error: starting_molecule needs to be either "any", "lower", or the molecule or molecules you would like as the molecule the exciton begins on.')
+			raise Exception('Error: starting_molecule needs to be either "any", "lowest", "equilibrium", or the molecule or molecules you would like as the molecule the exciton begins on.')
 	elif isinstance(starting_molecule,list):
 		current_molecule_name = int(choice(starting_molecule))
 	else:
 		current_molecule_name = int(starting_molecule)
 
-	# Thirteenth, give the current cell point, which is the origin unit cell (0, 0, 0)
+	# Tenth, give the current cell point, which is the origin unit cell (0, 0, 0)
 	# and get the current_molecule_description, which contains current_molecule_name and current_cell_point
 	current_cell_point = (0, 0, 0)
 	current_molecule_description = (current_molecule_name, current_cell_point)
@@ -145,18 +149,33 @@ def Run_EKMC(path_to_KMC_setup_data, temp_folder_path=None, sim_time_limit='inf'
 	if write_rate_constants_to_file == False:
 		write_rate_constants_to_file = (False, False)
 
-	# Fourteenth, run the KMC algorithm in C++
-	path_to_c_code = os.path.dirname(os.path.realpath(__file__)) + "/KMC_algorithm/KMC_algorithm.so"
-	Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate_constants, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, conformationally_equivalent_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, energetic_disorder, coupling_disorder, sim_time_limit, max_no_of_steps, starting_molecule, temp_folder_path, write_rate_constants_to_file)
+	# Eleventh, run the KMC algorithm in C++ (or NumPy). The status file is always written to the Sim folder (not the temp folder), 
+	#           so that the progress of the simulation can be checked while it is running.
+	write_simulation_status('.', running_state, 0.0, 0, sim_time_limit, max_no_of_steps)
+	if engine == 'c++':
+		crystal_tables = get_crystal_tables(KMC_model)
+		Run_KMC_algorithm_in_C(path_to_c_code, path_to_kMC_sim, path_to_kMC_sim_rate_constants, crystal_tables, kinetic_model, constant_rate_data, energetic_disorder, coupling_disorder, sim_time_limit, max_no_of_steps, current_molecule_name, temp_folder_path, write_rate_constants_to_file, path_to_status_file='./'+status_filename, heartbeat_interval=heartbeat_interval, path_to_time_index=temp_folder_path+'/'+time_index_filename, time_index_interval=time_index_interval)
+	else:
+		if write_rate_constants_to_file[0]:
+			print('Note: The NumPy code does not write the kMC_sim_rate_constants.txt file.')
+			write_rate_constants_to_file = (False, False)
+		molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data = convert_KMC_model_to_KMC_setup_data(KMC_model)
+		Run_KMC_algorithm_in_NumPy(path_to_kMC_sim, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, energetic_disorder, coupling_disorder, sim_time_limit, max_no_of_steps, current_molecule_name, paths_to_status_folders=['.'], heartbeat_interval=heartbeat_interval, time_index_interval=time_index_interval)
 
-	# Fiftheenth, if you had a temp folder, copy the relavant files from the temp folder to the current folder and remove the temp folder.
+	# Twelfth, if you had a temp folder, copy the relavant files from the temp folder to the current folder and remove the temp folder.
 	if not (temp_folder_path == '.'):
 		shutil.move(temp_folder_path+'/'+kMC_sim_name,'./'+kMC_sim_name)
 		if write_rate_constants_to_file[0]:
 			shutil.move(temp_folder_path+'/'+kMC_sim_rate_constants_name,'./'+kMC_sim_rate_constants_name)
+		if os.path.exists(temp_folder_path+'/'+time_index_filename):
+			shutil.move(temp_folder_path+'/'+time_index_filename,'./'+time_index_filename)
 		shutil.rmtree(temp_folder_path)
 
-	# Sixtheenth, finish off with an ending message.
+	# Thirteenth, record in the status file that the simulation has finished. 
+	reached_sim_time_limit, reached_max_no_of_steps, time_simulated, no_of_steps_simulated = did_finish(kMC_sim_name, sim_time_limit, max_no_of_steps)
+	write_simulation_status('.', finished_state, time_simulated, no_of_steps_simulated, sim_time_limit, max_no_of_steps)
+
+	# Fourteenth, finish off with an ending message.
 	print('Finished the Exciton kinetic Monte Carlo algorithm.')
 	print('-------------')
 
@@ -0,0 +1,126 @@
+"""
+Run_EKMC_Ensemble.py, Geoffrey Weal, 19/10/26
+
+This method is designed to run an ensemble of exciton kinetic Monte Carlo simulations at once using the NumPy code, without needing the C++ code or a job per simulation.
+"""
+
+import os
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data          import read_KMC_setup_data
+from EKMC.EKMC.KMC_algorithm.Run_KMC_algorithm_in_NumPy          import Run_KMC_algorithm_in_NumPy
+from EKMC.EKMC.Run_EKMC_setup_files.did_finish                   import did_finish
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file       import write_simulation_status, running_state, finished_state, heartbeat_interval
+
+def Run_EKMC_Ensemble(path_to_KMC_setup_data, no_of_simulations, sim_time_limit='inf', max_no_of_steps='inf', starting_molecule='any', seed=None, path_to_simulations='.'):
+	"""
+	This program is designed to simulate the movement of many excitons through a OPV crystal system at once using the NumPy code.
+
+	Each simulation is written to its own Sim folder (Sim1, Sim2, ...) in the same format as the C++ code. A Run_EKMC.py file is also 
+	written to path_to_simulations (as EKMC setup does), which records sim_time_limit for "EKMC process_results" and can be used to run 
+	more simulations in new Sim folders. To process the results with "EKMC process_results", the KMC_setup_data.ekmc file must also be 
+	in path_to_simulations.
+
+	Parameters
+	----------
+	path_to_KMC_setup_data : str.
+		This is te path to the ekmc file that contains information about your kinetic Monte Carlo simulation.
+	no_of_simulations : int
+		This is the number of simulations (walkers) to perform.
+	sim_time_limit : float
+		This is the maximum simulated time limit to run the kinetic Monte Carlo simulation over.
+	max_no_of_steps : int
+		This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over.
+	starting_molecule : "any", "lowest", "equilibrium", int, list of ints
+		This is the molecule in the (0,0,0) cell that you want the exciton to begin the KMC simulation on.
+	seed : int or None
+		This is the seed used to generate the disorder and the KMC steps. If None, a random seed is used.
+	path_to_simulations : str.
+		This is the folder to place the Sim folders in. Default: '.'
+	"""
+
+	# First, retrieve data for setting up the kinetic Monte Carlo simulation from the KMC_setup_data.ekmc file.
+	molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data = read_KMC_setup_data(path_to_KMC_setup_data)
+
+	# Second, create the Sim folders for each simulation.
+	paths_to_sims = []
+	paths_to_kMC_sim = []
+	for sim_no in range(1, no_of_simulations+1):
+		path_to_sim = path_to_simulations+'/Sim'+str(sim_no)
+		if not os.path.exists(path_to_sim):
+			os.makedirs(path_to_sim)
+		write_simulation_status(path_to_sim, running_state, 0.0, 0, sim_time_limit, max_no_of_steps)
+		paths_to_sims.append(path_to_sim)
+		paths_to_kMC_sim.append(path_to_sim+'/kMC_sim.txt')
+
+	# Third, run all the simulations at once.
+	Run_KMC_algorithm_in_NumPy(paths_to_kMC_sim, molecule_list_and_com, unit_cell_matrix, kinetic_model, constant_rate_data, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, kinetics_details['energetic_disorder'], kinetics_details['coupling_disorder'], sim_time_limit, max_no_of_steps, starting_molecule, seed, paths_to_status_folders=paths_to_sims, heartbeat_interval=heartbeat_interval)
+
+	# Fourth, record in the status file of each simulation that it has finished.
+	for path_to_sim, path_to_kMC_sim in zip(paths_to_sims, paths_to_kMC_sim):
+		reached_sim_time_limit, reached_max_no_of_steps, time_simulated, no_of_steps_simulated = did_finish(path_to_kMC_sim, sim_time_limit, max_no_of_steps)
+		write_simulation_status(path_to_sim, finished_state, time_simulated, no_of_steps_simulated, sim_time_limit, max_no_of_steps)
+
+	# Fifth, write the Run_EKMC.py file for this ensemble, so that sim_time_limit can be obtained by "EKMC process_results".
+	make_Run_EKMC_file_for_ensemble(path_to_simulations, path_to_KMC_setup_data, sim_time_limit, max_no_of_steps, starting_molecule)
+
+	# Sixth, finish off with an ending message.
+	print('Finished running '+str(no_of_simulations)+' Exciton kinetic Monte Carlo simulations with the NumPy code.')
+	print('-------------')
+
+Run_EKMC_filename = 'Run_EKMC.py'
+def make_Run_EKMC_file_for_ensemble(path_to_simulations, path_to_KMC_setup_data, sim_time_limit, max_no_of_steps, starting_molecule):
+	"""
+	This method is designed to create the Run_EKMC.py file for an ensemble, in the same format as the Run_EKMC.py file made by EKMC setup.
+
+	This Run_EKMC.py file runs one simulation when it is run from a new Sim folder in path_to_simulations.
+
+	Parameters
+	----------
+	path_to_simulations : str.
+		This is the folder that the Sim folders were placed in. The Run_EKMC.py file is saved here.
+	path_to_KMC_setup_data : str.
+		This is the path to the folder containing the ekmc file that contains information about your kinetic Monte Carlo simulation.
+	sim_time_limit : float
+		This is the maximum simulated time limit to run the kinetic Monte Carlo simulation over.
+	max_no_of_steps : int
+		This is the maximum number of kmc steps to run the kinetic Monte Carlo simulation over.
+	starting_molecule : "any", "lowest", "equilibrium", int, list of ints
+		This is the molecule in the (0,0,0) cell that you want the exciton to begin the KMC simulation on.
+	"""
+
+	# First, obtain the path to the KMC_setup_data.ekmc file from a Sim folder in path_to_simulations.
+	path_to_KMC_setup_data_from_sim = os.path.relpath(os.path.abspath(path_to_KMC_setup_data), os.path.abspath(path_to_simulations+'/Sim1'))
+
+	# Second, write the Run_EKMC.py file.
+	with open(path_to_simulations+'/'+Run_EKMC_filename, 'w') as EKMC_PY:
+		EKMC_PY.write('"""\n')
+		EKMC_PY.write('This script will allow you to perform a Exciton-based kinetic Monte-Carlo simulation on your crystal.\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('This was written by Run_EKMC_Ensemble. Run this from a new Sim folder to add a simulation to this ensemble.\n')
+		EKMC_PY.write('"""\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('import sys\n')
+		EKMC_PY.write('try:\n')
+		EKMC_PY.write('\tfrom EKMC.EKMC.Run_EKMC import Run_EKMC\n')
+		EKMC_PY.write('except:\n')
+		EKMC_PY.write('\tfrom EKMC import Run_EKMC'+'\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('# First, give the path to the KMC_setup_data, which has been run previously.\n')
+		EKMC_PY.write(f'path_to_KMC_setup_data = "{path_to_KMC_setup_data_from_sim}"\n')
+		EKMC_PY.write('temp_folder_path = (None if (len(sys.argv) == 1) else str(sys.argv[1]))\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('# Second, give the amount of time or the number of steps you would like to simulate.\n')
+		if isinstance(sim_time_limit,str):
+			EKMC_PY.write(f'sim_time_limit = "inf"\n')
+		else:
+			EKMC_PY.write(f'sim_time_limit = {sim_time_limit}'+' # ps\n')
+		if isinstance(max_no_of_steps,str):
+			max_no_of_steps = '"'+max_no_of_steps+'"'
+		EKMC_PY.write(f'max_no_of_steps = {max_no_of_steps}'+'\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('# Third, indicate if you want the exciton to begin on a particular molecule or one of a set of molecules.\n')
+		if isinstance(starting_molecule,str):
+			starting_molecule = '"'+starting_molecule+'"'
+		EKMC_PY.write(f'starting_molecule = {starting_molecule}'+'\n')
+		EKMC_PY.write('\n')
+		EKMC_PY.write('# Fourth, perform the exciton kinetic Monte Carlo simulation.\n')
+		EKMC_PY.write('Run_EKMC(path_to_KMC_setup_data=path_to_KMC_setup_data, temp_folder_path=temp_folder_path, sim_time_limit=sim_time_limit, max_no_of_steps=max_no_of_steps, starting_molecule=starting_molecule)'+'\n')
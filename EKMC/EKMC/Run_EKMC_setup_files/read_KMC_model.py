@@ -0,0 +1,226 @@
+"""
+read_KMC_model.py, Geoffrey Weal, 19/10/26
+
+This script is designed to read the binary KMC_setup_data.npz model file that is written next to KMC_setup_data.ekmc during setup.
+
+The model file is an uncompressed npz file containing NumPy arrays (with C-compatible dtypes) of the molecules, centre of masses,
+unit cell, bandgap energies, reorganisation energies, and coupling values in the crystal. Because the npz file is uncompressed, each
+array can be memory-mapped directly from the file without any parsing, and shared via the page cache between all the simulations
+running on a node.
+"""
+import os, json, zipfile
+import numpy as np
+
+KMC_model_filename = 'KMC_setup_data.npz'
+KMC_model_format_version = 2
+
+molecules_dtype               = np.dtype([('mol', np.int32), ('is_solvent', np.bool_), ('centre_of_mass', np.float64, (3,))])
+bandgap_energies_dtype        = np.dtype([('mol', np.int32), ('bandgap_energy', np.float64)])
+reorganisation_energies_dtype = np.dtype([('mol1', np.int32), ('mol2', np.int32), ('reorganisation_energy', np.float64)])
+coupling_values_dtype         = np.dtype([('mol1', np.int32), ('mol2', np.int32), ('uniti', np.int32), ('unitj', np.int32), ('unitk', np.int32), ('coupling_value', np.float64)])
+conformational_dtype          = np.dtype([('mol', np.int32), ('unique_mol', np.int32)])
+
+def get_KMC_setup_data_key(path_to_KMC_setup_data):
+	"""
+	This method will obtain the size and modification time of the KMC_setup_data.ekmc file. These are stored in the model file, so that a model file that was made from an older KMC_setup_data.ekmc file is not used.
+
+	Only the file is stat-ed (rather than read), so each simulation can check the model file without reading the KMC_setup_data.ekmc file. 
+	If the KMC_setup_data.ekmc file is copied without keeping its modification time, the KMC_setup_data.ekmc file will be read instead.
+
+	Parameters
+	----------
+	path_to_KMC_setup_data : str.
+		This is the path to the folder that contains the KMC_setup_data.ekmc file.
+
+	Returns
+	-------
+	KMC_setup_data_key : numpy.array of ints
+		This is the size (in bytes) and the modification time (in ns) of the KMC_setup_data.ekmc file.
+	"""
+	from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data import KMC_setup_data_filename
+	stat_result = os.stat(path_to_KMC_setup_data+'/'+KMC_setup_data_filename)
+	return np.array([stat_result.st_size, stat_result.st_mtime_ns], dtype=np.int64)
+
+def load_KMC_model(path_to_KMC_setup_data):
+	"""
+	This method will load the KMC_setup_data.npz model file, if it exists and is up to date with the KMC_setup_data.ekmc file.
+
+	Parameters
+	----------
+	path_to_KMC_setup_data : str.
+		This is the path to the folder that contains the KMC_setup_data.ekmc and KMC_setup_data.npz files.
+
+	Returns
+	-------
+	KMC_model : dict. or None
+		This contains the memory-mapped arrays in the model file. None is returned if the model file does not exist, is from a different format version, or was made from a different KMC_setup_data.ekmc file.
+	"""
+
+	# First, check that the model file exists.
+	path_to_KMC_model = path_to_KMC_setup_data+'/'+KMC_model_filename
+	if not os.path.exists(path_to_KMC_model):
+		return None
+
+	# Second, memory map the arrays in the model file.
+	KMC_model = memory_map_npz(path_to_KMC_model)
+
+	# Third, check that the model file is the same version as this version of EKMC can read.
+	if int(KMC_model['format_version']) != KMC_model_format_version:
+		print('Note: '+str(path_to_KMC_model)+' is format version '+str(int(KMC_model['format_version']))+', but this version of EKMC reads format version '+str(KMC_model_format_version)+'. Will read '+str(path_to_KMC_setup_data)+'/KMC_setup_data.ekmc instead.')
+		return None
+
+	# Fourth, check that the model file was made from the current KMC_setup_data.ekmc file.
+	if not np.array_equal(KMC_model['KMC_setup_data_key'], get_KMC_setup_data_key(path_to_KMC_setup_data)):
+		print('Note: '+str(path_to_KMC_model)+' was not made from the current '+str(path_to_KMC_setup_data)+'/KMC_setup_data.ekmc file. Will read KMC_setup_data.ekmc instead.')
+		return None
+
+	# Fifth, return the model.
+	return KMC_model
+
+def memory_map_npz(path_to_npz):
+	"""
+	This method will memory map each array in an uncompressed npz file.
+
+	np.load does not memory map the arrays in npz files, so the offset of each array in the npz file is obtained from the zip file headers.
+
+	Parameters
+	----------
+	path_to_npz : str.
+		This is the path to the npz file.
+
+	Returns
+	-------
+	arrays : dict.
+		These are the memory-mapped arrays in the npz file.
+	"""
+	arrays = {}
+	with zipfile.ZipFile(path_to_npz) as npz_file, open(path_to_npz, 'rb') as raw_file:
+		for zip_info in npz_file.infolist():
+
+			# First, check that the array has not been compressed.
+			if not (zip_info.compress_type == zipfile.ZIP_STORED):
+				raise Exception('Error: '+str(path_to_npz)+' needs to be uncompressed to be memory mapped. Array: '+str(zip_info.filename))
+
+			# Second, obtain the position of the array in the file from the local file header.
+			raw_file.seek(zip_info.header_offset)
+			local_file_header = raw_file.read(30)
+			filename_length = int.from_bytes(local_file_header[26:28], 'little')
+			extra_length    = int.from_bytes(local_file_header[28:30], 'little')
+			raw_file.seek(zip_info.header_offset + 30 + filename_length + extra_length)
+
+			# Third, read the npy header of the array.
+			version = np.lib.format.read_magic(raw_file)
+			if version == (1, 0):
+				shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(raw_file)
+			else:
+				shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(raw_file)
+			offset = raw_file.tell()
+
+			# Fourth, memory map the array.
+			name = zip_info.filename[:-len('.npy')] if zip_info.filename.endswith('.npy') else zip_info.filename
+			if int(np.prod(shape)) == 0:
+				arrays[name] = np.empty(shape, dtype=dtype)
+			else:
+				arrays[name] = np.memmap(path_to_npz, dtype=dtype, mode='r', offset=offset, shape=shape, order='F' if fortran_order else 'C')
+	return arrays
+
+def convert_KMC_model_to_KMC_setup_data(KMC_model):
+	"""
+	This method will convert the arrays in the model file into the data given by read_KMC_setup_data.
+
+	Parameters
+	----------
+	KMC_model : dict.
+		This contains the arrays in the model file.
+
+	Returns
+	-------
+	See read_KMC_setup_data.
+	"""
+
+	# First, obtain the molecules and their centre of masses.
+	molecules = KMC_model['molecules']
+	molecule_list_and_com = {str(mol)+('S' if is_solvent else ''): tuple(centre_of_mass) for mol, is_solvent, centre_of_mass in zip(molecules['mol'].tolist(), molecules['is_solvent'].tolist(), molecules['centre_of_mass'].tolist())}
+
+	# Second, obtain the unit cell matrix, kinetic model, kinetic details, and bandgap energies.
+	unit_cell_matrix = KMC_model['unit_cell_matrix'].tolist()
+	molecule_names, kinetic_model, kinetics_details, molecule_bandgap_energy_data, constant_rate_data = get_KMC_model_details(KMC_model)
+
+	# Third, obtain the reorganisation energies, and conformationally equivalent molecules.
+	reorganisation_energies = KMC_model['reorganisation_energies']
+	dimer_reorganisation_energy_data = dict(zip(zip(reorganisation_energies['mol1'].tolist(), reorganisation_energies['mol2'].tolist()), reorganisation_energies['reorganisation_energy'].tolist()))
+	conformationally_equivalent_molecules = KMC_model['conformationally_equivalent_molecules']
+	conformationally_equivalent_data = dict(zip(conformationally_equivalent_molecules['mol'].tolist(), conformationally_equivalent_molecules['unique_mol'].tolist()))
+
+	# Fourth, obtain the coupling values between molecules in the crystal.
+	coupling_value_data = {}
+	coupling_values = KMC_model['coupling_values']
+	for mol1, mol2, uniti, unitj, unitk, coupling_value in zip(*[coupling_values[name].tolist() for name in coupling_values_dtype.names]):
+		coupling_value_data.setdefault(mol1, {}).setdefault(mol2, {})[(uniti, unitj, unitk)] = coupling_value
+
+	# Fifth, return the data for running the kinetic Monte Carlo algorithm.
+	return molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data
+
+def get_KMC_model_details(KMC_model):
+	"""
+	This method will obtain the details from the model file that are needed to begin a simulation, without needing to convert all the arrays in the model file into dictionaries.
+
+	Parameters
+	----------
+	KMC_model : dict.
+		This contains the arrays in the model file.
+
+	Returns
+	-------
+	molecule_names : list of ints
+		These are the names of all the molecules in the crystal.
+	kinetic_model :str.
+		This is the kinetic model you would like to use to simulate an exciton about the molecules within a crystal.
+	kinetics_details : dict.
+		This contains the coupling and energetic disorders, as well as the temperature of the simulation.
+	molecule_bandgap_energy_data : dict.
+		These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
+	constant_rate_data : tuple.
+		These are the constants in the rate law that are the same for each neighbour.
+	"""
+	molecule_names = sorted(KMC_model['molecules']['mol'].tolist())
+	kinetic_model = str(KMC_model['kinetic_model'])
+	kinetics_details = json.loads(str(KMC_model['kinetics_details']))
+	bandgap_energies = KMC_model['bandgap_energies']
+	molecule_bandgap_energy_data = dict(zip(bandgap_energies['mol'].tolist(), bandgap_energies['bandgap_energy'].tolist()))
+	constant_rate_data = tuple(KMC_model['constant_rate_data'].tolist())
+	return molecule_names, kinetic_model, kinetics_details, molecule_bandgap_energy_data, constant_rate_data
+
+def convert_KMC_setup_data_to_KMC_model(molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data):
+	"""
+	This method will convert the data given by read_KMC_setup_data into the arrays that are stored in the model file.
+
+	Parameters
+	----------
+	See read_KMC_setup_data.
+
+	Returns
+	-------
+	KMC_model : dict.
+		This contains the arrays that are stored in the model file.
+	"""
+
+	# First, obtain the array of the molecules and their centre of masses.
+	molecules = np.array([(int(str(molname).replace('S','')), str(molname).endswith('S'), centre_of_mass) for molname, centre_of_mass in molecule_list_and_com.items()], dtype=molecules_dtype)
+	molecules = molecules[np.argsort(molecules['mol'], kind='stable')]
+
+	# Second, obtain the arrays of the bandgap energies, reorganisation energies, and conformationally equivalent molecules.
+	bandgap_energies = np.array(sorted(molecule_bandgap_energy_data.items()), dtype=bandgap_energies_dtype)
+	reorganisation_energies = np.array([(mol1, mol2, reorganisation_energy) for (mol1, mol2), reorganisation_energy in sorted(dimer_reorganisation_energy_data.items())], dtype=reorganisation_energies_dtype)
+	conformationally_equivalent_molecules = np.array(sorted(conformationally_equivalent_data.items()), dtype=conformational_dtype)
+
+	# Third, obtain the array of the coupling values between molecules in the crystal.
+	coupling_values = []
+	for mol1, value1 in sorted(coupling_value_data.items()):
+		for mol2, value2 in sorted(value1.items()):
+			for (uniti, unitj, unitk), coupling_value in sorted(value2.items()):
+				coupling_values.append((mol1, mol2, uniti, unitj, unitk, coupling_value))
+	coupling_values = np.array(coupling_values, dtype=coupling_values_dtype)
+
+	# Fourth, return the arrays for the model file.
+	return {'molecules': molecules, 'unit_cell_matrix': np.array(unit_cell_matrix, dtype=np.float64), 'kinetic_model': np.array(str(kinetic_model)), 'kinetics_details': np.array(json.dumps(kinetics_details)), 'constant_rate_data': np.array(constant_rate_data, dtype=np.float64), 'bandgap_energies': bandgap_energies, 'reorganisation_energies': reorganisation_energies, 'conformationally_equivalent_molecules': conformationally_equivalent_molecules, 'coupling_values': coupling_values}
@@ -0,0 +1,81 @@
+"""
+read_KMC_setup_data.py, Geoffrey Weal, 19/10/26
+
+This script is designed to read the KMC_setup_data.ekmc file, and prepare the data in it for running the kinetic Monte Carlo algorithm.
+"""
+from EKMC.EKMC.Run_EKMC_setup_files.check_molecule_consistancy_across_datasets    import check_molecule_consistancy_across_datasets
+from EKMC.EKMC.Run_EKMC_setup_files.expand_to_include_unique_molecules_in_dict    import expand_to_include_unique_molecules_in_dict
+from EKMC.EKMC.Run_EKMC_setup_files.update_bandgap_and_reorganisation_energy_data import update_bandgap_and_reorganisation_energy_data
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_model                                import load_KMC_model, convert_KMC_model_to_KMC_setup_data
+
+KMC_setup_data_filename = 'KMC_setup_data.ekmc'
+def read_KMC_setup_data(path_to_KMC_setup_data, use_KMC_model=True):
+	"""
+	This method is designed to read the KMC_setup_data.ekmc file, and prepare the data in it for running the kinetic Monte Carlo algorithm.
+
+	If the binary KMC_setup_data.npz model file was written during setup (and is up to date), the data will be read from the model file instead, which avoids needing to eval the KMC_setup_data.ekmc file.
+
+	Parameters
+	----------
+	path_to_KMC_setup_data : str.
+		This is the path to the folder that contains the KMC_setup_data.ekmc file.
+	use_KMC_model : bool
+		If True, read the data from the KMC_setup_data.npz model file if it is available. Default: True
+
+	Returns
+	-------
+	molecule_names : list of ints
+		These are the names of all the molecules in the crystal.
+	molecule_list_and_com : dict.
+		This dictionary contains the centre of masses for each molecule in the unit cell crystal.
+	unit_cell_matrix : list of list of doubles
+		This contains the matrix elements for the unit cell matrix.
+	kinetic_model :str.
+		This is the kinetic model you would like to use to simulate an exciton about the molecules within a crystal.
+	kinetics_details : dict.
+		This contains the coupling and energetic disorders, as well as the temperature of the simulation.
+	molecule_bandgap_energy_data : dict.
+		These are all the bandgap energies of the molecules in the crystal. Bandgap energies are in eV.
+	dimer_reorganisation_energy_data : dict.
+		These are the reorganisation energies of the dimers in the crystal. Reorganisation energies are in eV.
+	conformationally_equivalent_data : dict.
+		This dictionary contains information about which molecules are conformationally equivalent to each other.
+	constant_rate_data : tuple.
+		These are the constants in the rate law that are the same for each neighbour.
+	coupling_value_data : dict.
+		This dictionary contains all the coupling data between molecules in the dimers in the crystal. Coupling values are in eV.
+	"""
+
+	# First, read the data from the KMC_setup_data.npz model file if it is available. This data has already been prepared for running the kinetic Monte Carlo algorithm.
+	if use_KMC_model:
+		KMC_model = load_KMC_model(path_to_KMC_setup_data)
+		if KMC_model is not None:
+			return convert_KMC_model_to_KMC_setup_data(KMC_model)
+
+	# Second, retrieve data for setting up the kinetic Monte Carlo simulation from the KMC_setup_data.ekmc file.
+	with open(path_to_KMC_setup_data+'/'+KMC_setup_data_filename) as KMC_setup_data_EKMC:
+		molecule_list_and_com            = eval(KMC_setup_data_EKMC.readline().replace('S','.0').rstrip()) # remove any solvent tags, will include them here for running EKMC simulation.
+		molecule_list_and_com            = {str(int(name))+'S' if isinstance(name,float) else str(name): centre_of_mass for name, centre_of_mass in molecule_list_and_com.items()}
+		unit_cell_matrix                 = eval(KMC_setup_data_EKMC.readline().rstrip())
+		kinetic_model                    =  str(KMC_setup_data_EKMC.readline().rstrip())
+		kinetics_details                 = eval(KMC_setup_data_EKMC.readline().rstrip())
+		molecule_bandgap_energy_data     = eval(KMC_setup_data_EKMC.readline().rstrip())
+		dimer_reorganisation_energy_data = eval(KMC_setup_data_EKMC.readline().rstrip())
+		conformationally_equivalent_data = eval(KMC_setup_data_EKMC.readline().rstrip())
+		constant_rate_data               = eval(KMC_setup_data_EKMC.readline().rstrip())
+		coupling_value_data              = eval(KMC_setup_data_EKMC.readline().rstrip())
+
+	# Third, obtain all the names of the molecules in the crystal, as reported in 'KMC_setup_data.ekmc'
+	molecule_names = sorted([int(str(molname).replace('S','')) for molname in molecule_list_and_com.keys()])
+
+	# Fourth, check that the molecules in the 'KMC_setup_data.ekmc' file are consistent between molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, and conformationally_equivalent_data dictionaries.
+	check_molecule_consistancy_across_datasets(molecule_names, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, coupling_value_data, conformationally_equivalent_data)
+
+	# Fifth, update conformationally_equivalent_data to include unique molecules that link to themselves.
+	conformationally_equivalent_data = expand_to_include_unique_molecules_in_dict(conformationally_equivalent_data, molecule_names)
+
+	# Sixth, add conformationally unique molecule data to molecule_bandgap_energy_data and dimer_reorganisation_energy_data.
+	molecule_bandgap_energy_data, dimer_reorganisation_energy_data = update_bandgap_and_reorganisation_energy_data(molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data)
+
+	# Seventh, return the data for running the kinetic Monte Carlo algorithm.
+	return molecule_names, molecule_list_and_com, unit_cell_matrix, kinetic_model, kinetics_details, molecule_bandgap_energy_data, dimer_reorganisation_energy_data, conformationally_equivalent_data, constant_rate_data, coupling_value_data
@@ -0,0 +1,82 @@
+"""
+simulation_status_file.py, Geoffrey Weal, 19/10/26
+
+This script is designed to write and read the status file of a simulation (kMC_sim_status.json).
+
+The status file is a small file in each Sim folder that is written by the EKMC engine while the simulation is running (as a heartbeat),
+and once it has finished. It contains the state of the simulation, the simulated time, the number of KMC steps performed, the limits
+the simulation is being run to, and when the file was last updated. This means that the progress of a simulation can be checked
+without reading its kMC_sim.txt file or its Run_EKMC.py file.
+
+The status file is always written to a temporary file first and then renamed, so it is never seen half written.
+"""
+import os, json, time
+
+status_filename = 'kMC_sim_status.json'
+
+# These are the states that a simulation can be given in its status file.
+running_state  = 'running'
+finished_state = 'finished'
+
+# This is the (wall) time to wait between writing the status file while a simulation is running, in seconds.
+heartbeat_interval = 60.0
+
+def write_simulation_status(path_to_sim_folder, state, time_simulated, no_of_steps, sim_time_limit='inf', max_no_of_steps='inf'):
+    """
+    This method will write the status file of a simulation.
+
+    Parameters
+    ----------
+    path_to_sim_folder : str.
+        This is the folder of the simulation.
+    state : str.
+        This is the state of the simulation (either running_state or finished_state).
+    time_simulated : float
+        This is the time that has been simulated (in ps).
+    no_of_steps : int
+        This is the number of KMC steps that have been performed.
+    sim_time_limit : float or 'inf'
+        This is the simulated time limit the simulation is being run to (in ps). Default: 'inf'
+    max_no_of_steps : int or 'inf'
+        This is the maximum number of kmc steps the simulation is being run to. Default: 'inf'
+    """
+    status = {}
+    status['state']           = state
+    status['time']            = float(time_simulated)
+    status['no_of_steps']     = int(no_of_steps)
+    status['sim_time_limit']  = None if (sim_time_limit  in ('inf', float('inf'))) else float(sim_time_limit)
+    status['max_no_of_steps'] = None if (max_no_of_steps in ('inf', float('inf'))) else int(max_no_of_steps)
+    status['last_update']     = time.time()
+    path_to_status_file = path_to_sim_folder+'/'+status_filename
+    with open(path_to_status_file+'.tmp', 'w') as statusJSON:
+        json.dump(status, statusJSON)
+    os.replace(path_to_status_file+'.tmp', path_to_status_file)
+
+def read_simulation_status(path_to_sim_folder):
+    """
+    This method will read the status file of a simulation.
+
+    Parameters
+    ----------
+    path_to_sim_folder : str.
+        This is the folder of the simulation.
+
+    Returns
+    -------
+    status : dict. or None
+        This is the status of the simulation, containing 'state', 'time', 'no_of_steps', 'sim_time_limit', 'max_no_of_steps' and 'last_update'. The limits are None if there is no limit. None is given if the simulation does not have a status file, or if its status file can not be read (such as if it was copied while it was being written), so that the simulation is checked from its kMC_sim.txt file instead.
+    """
+
+    # First, read the status file.
+    try:
+        with open(path_to_sim_folder+'/'+status_filename, 'r') as statusJSON:
+            status = json.load(statusJSON)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    # Second, check that the status file contains the status of the simulation.
+    if not (isinstance(status, dict) and all((key in status) for key in ('state', 'time', 'no_of_steps', 'last_update'))):
+        return None
+
+    # Third, return status
+    return status
@@ -0,0 +1,131 @@
+"""
+time_index_file.py, Geoffrey Weal, 19/10/26
+
+This script is designed to make and read the time index file of a simulation (kMC_sim_time_index.txt).
+
+The time index file is a small file in each Sim folder, written by the EKMC engine alongside the kMC_sim.txt file. For each checkpoint
+time (every time_index_interval ps of simulated time), it gives the KMC step (record) that the exciton is on at that time, and the byte
+offset of the line of this record in the kMC_sim.txt file. This means that programs that only need the simulation within a window of
+time can seek straight to the start of that window, and stop reading at the end of that window, rather than reading the kMC_sim.txt
+file from the start.
+
+Each line after the first (title) line of the time index file is: checkpoint time (ps), record number, byte offset.
+"""
+import os
+import numpy as np
+
+time_index_filename = 'kMC_sim_time_index.txt'
+
+# This is the simulated time between each checkpoint in the time index file, in ps.
+time_index_interval = 1.0
+
+# This is the title line of the time index file.
+time_index_title = 'Time (ps) Record Byte Offset'
+
+def read_time_index(path_to_sim_folder):
+    """
+    This method will read the time index file of a simulation.
+
+    Parameters
+    ----------
+    path_to_sim_folder : str.
+        This is the folder of the simulation.
+
+    Returns
+    -------
+    time_index : tuple of numpy.arrays or None
+        These are the checkpoint times (in ps), the record number of each checkpoint, and the byte offset of the line of each of these records in the kMC_sim.txt file. None is given if there is no time index file, or if it could not be read.
+    """
+    path_to_time_index = path_to_sim_folder+'/'+time_index_filename
+    if not os.path.exists(path_to_time_index):
+        return None
+    try:
+        with open(path_to_time_index, 'rb') as time_indexTXT:
+            time_indexTXT.readline()
+            entries = np.fromstring(time_indexTXT.read(), sep=' ')
+    except OSError:
+        return None
+    if (len(entries) == 0) or not (len(entries) % 3 == 0):
+        return None
+    entries = entries.reshape(-1, 3)
+    return entries[:,0], entries[:,1].astype(np.int64), entries[:,2].astype(np.int64)
+
+def get_byte_range_of_time_window(time_index, start_time=None, end_time=None):
+    """
+    This method will obtain the part of the kMC_sim.txt file that needs to be read to obtain the simulation between start_time and end_time.
+
+    Parameters
+    ----------
+    time_index : tuple of numpy.arrays
+        This is the time index of the simulation, as given by read_time_index.
+    start_time : float or None
+        This is the time (in ps) that the window begins at. If None, the window begins at the start of the simulation. Default: None
+    end_time : float or None
+        This is the time (in ps) that the window ends at. If None, the window ends at the end of the simulation. Default: None
+
+    Returns
+    -------
+    start_record : int
+        This is the first record to read. This is the record that the exciton is on at start_time (or 0 if this could not be found from the time index).
+    start_offset : int or None
+        This is the byte offset of the line of start_record. If None, read from the line after the title line.
+    end_record : int or None
+        This is the record that the exciton is on at the first checkpoint at or after end_time. None if end_offset is None.
+    end_offset : int or None
+        This is the byte offset of the last line that needs to be read. This line is the record that the exciton is on at the first checkpoint at or after end_time. If None, read to the end of the file.
+    """
+    checkpoint_times, records, byte_offsets = time_index
+
+    # First, obtain the last checkpoint at or before start_time.
+    start_record, start_offset = 0, None
+    if start_time is not None:
+        index = int(np.searchsorted(checkpoint_times, start_time, side='right')) - 1
+        if index >= 0:
+            start_record, start_offset = int(records[index]), int(byte_offsets[index])
+
+    # Second, obtain the first checkpoint at or after end_time.
+    end_record, end_offset = None, None
+    if end_time is not None:
+        index = int(np.searchsorted(checkpoint_times, end_time, side='left'))
+        if index < len(checkpoint_times):
+            end_record, end_offset = int(records[index]), int(byte_offsets[index])
+
+    # Third, return start_record, start_offset, end_record, and end_offset
+    return start_record, start_offset, end_record, end_offset
+
+def make_time_index(path_to_kMC_sim, path_to_time_index=None, interval=time_index_interval):
+    """
+    This method will make the time index file of a kMC_sim.txt file that has already been written, such as those written by the NumPy code.
+
+    Parameters
+    ----------
+    path_to_kMC_sim : str.
+        This is the path to the kMC_sim.txt file.
+    path_to_time_index : str. or None
+        This is the path to write the time index file to. If None, it is written next to the kMC_sim.txt file. Default: None
+    interval : float
+        This is the simulated time between each checkpoint, in ps. Default: time_index_interval
+    """
+    if path_to_time_index is None:
+        path_to_time_index = os.path.dirname(os.path.abspath(path_to_kMC_sim))+'/'+time_index_filename
+    with open(path_to_kMC_sim, 'rb') as kMC_simTXT, open(path_to_time_index, 'w') as time_indexTXT:
+        time_indexTXT.write(time_index_title+'\n')
+
+        # First, read each record of the kMC_sim.txt file, keeping track of the byte offset of each line.
+        byte_offset = len(kMC_simTXT.readline())
+        checkpoint_number = 0
+        previous_record = None
+        for line in kMC_simTXT:
+            record, time = int(line.split()[0]), float(line.split()[3])
+
+            # Second, the previous record is the record the exciton is on for all checkpoints before the time of this record.
+            while (previous_record is not None) and (checkpoint_number * interval < time):
+                time_indexTXT.write(str(checkpoint_number * interval)+' '+str(previous_record[0])+' '+str(previous_record[1])+'\n')
+                checkpoint_number += 1
+            previous_record = (record, byte_offset, time)
+            byte_offset += len(line)
+
+        # Third, the last record is the record the exciton is on for all checkpoints up to the time of this record.
+        while (previous_record is not None) and (checkpoint_number * interval <= previous_record[2]):
+            time_indexTXT.write(str(checkpoint_number * interval)+' '+str(previous_record[0])+' '+str(previous_record[1])+'\n')
+            checkpoint_number += 1
@@ -2,103 +2,173 @@
 Did_Complete_Main.py, Geoffrey Weal, 08/03/2019
 
 This program will determine which of your dimers have been successfully calculated in Gaussian.
+
+The state of each simulation is obtained from the status file (kMC_sim_status.json) that the EKMC engine writes into each Sim folder.
+These are read in a thread pool. Simulations that were run before status files were written are checked from the end of their
+kMC_sim.txt file instead.
 '''
-import os, sys, subprocess
+import os
+from concurrent.futures import ThreadPoolExecutor
+from time import time as wall_time
+
+from EKMC.EKMC.Run_EKMC_setup_files.did_finish             import did_finish
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file import read_simulation_status, running_state, finished_state
 
-def tail(f, n, offset=0):
-    proc = subprocess.Popen(['tail', '-n', str(n + offset), f], stdout=subprocess.PIPE)
-    lines = proc.stdout.readlines()
-    return lines
+# These are the other states a simulation can be found in.
+stalled_state           = 'stalled'
+not_started_state       = 'not started'
+incomplete_legacy_state = 'incomplete'
+problem_state           = 'problem'
+all_states = (finished_state, running_state, stalled_state, incomplete_legacy_state, not_started_state, problem_state)
 
 def get_variables_from_run(filepath):
+    """
+    This method will obtain the sim_time_limit from the Run_EKMC.py file in filepath.
+
+    Parameters
+    ----------
+    filepath : str.
+        This is the folder that contains the Run_EKMC.py file.
+
+    Returns
+    -------
+    sim_time_limit : float or None
+        This is the simulated time limit given in Run_EKMC.py. None is given if it could not be found.
+    """
+    if not os.path.exists(filepath+'/Run_EKMC.py'):
+        return None
     with open(filepath+'/Run_EKMC.py','r') as RunPY:
-        sim_time_limit = None
         for line in RunPY:
             if line.startswith('sim_time_limit = '):
-                sim_time_limit = float(eval(line.replace('sim_time_limit = ','')))
-                break
-    if sim_time_limit is None:
-        print('Error')
-        print(sim_time_limit)
-        import pdb; pdb.set_trace()
-        exit('Error')
-    return sim_time_limit
-
-problem_simulations = []
-def Did_Simulation_finish_successfully(filepath):
+                return float(eval(line.replace('sim_time_limit = ','')))
+    return None
+
+def get_simulation_state(path_to_sim_folder, stale_after=1800.0):
     """
-    This method will go through the kMC_sim.txt file and see if the simulation completed or not.
- 
+    This method will obtain the state of a simulation from its status file.
+
     Parameters
     ----------
-    filepath : str.
-        This is the path to the output.log file.
+    path_to_sim_folder : str.
+        This is the Sim folder of the simulation.
+    stale_after : float
+        If a running simulation has not updated its status file for this many seconds, it is given as stalled.
 
     Returns
     -------
-    True if finished successfully. False if not.
+    state : str. or None
+        This is the state of the simulation. None is given if the simulation has a kMC_sim.txt file but no status file, meaning it needs to be checked from its kMC_sim.txt file.
+    time : float
+        This is the time that has been simulated (in ps).
     """
+    try:
+        status = read_simulation_status(path_to_sim_folder)
+    except Exception:
+        return problem_state, 0.0
+    if status is None:
+        return (None if os.path.exists(path_to_sim_folder+'/kMC_sim.txt') else not_started_state), 0.0
+    if (status['state'] == running_state) and ((wall_time() - status['last_update']) > stale_after):
+        return stalled_state, status['time']
+    return status['state'], status['time']
+
+def get_legacy_simulation_state(path_to_sim_folder, sim_time_limit):
+    """
+    This method will obtain the state of a simulation that does not have a status file from the last line of its kMC_sim.txt file.
+
+    Parameters
+    ----------
+    path_to_sim_folder : str.
+        This is the Sim folder of the simulation.
+    sim_time_limit : float or None
+        This is the simulated time limit of the simulation.
 
-    # First, obtain the sim_time_limit fromthe local Run_EKMC.py file.
-    sim_time_limit = get_variables_from_run(filepath)
-
-    # Second, if kMC_sim.txt not found, return False, the simulation has not begun.
-    if not os.path.exists(filepath+'/kMC_sim.txt'):
-        return False
-    
-    # Third, obtain the last line in the kMC_sim.txt file
-    last_lines_in_kMC_simTXT = tail(filepath+'/kMC_sim.txt',1) 
-    last_lines_in_kMC_simTXT = last_lines_in_kMC_simTXT[0]
-    if isinstance(last_lines_in_kMC_simTXT, bytes):
-        last_lines_in_kMC_simTXT = last_lines_in_kMC_simTXT.decode()
-
-    # Fourth, determine if a simulation has begun.
-    if last_lines_in_kMC_simTXT.strip() == "":
-        return False
-    if last_lines_in_kMC_simTXT.startswith('Count:'):
-        return False
-
-    # Fifth, obtain the components of the last line in the kMC_sim.txt file.
+    Returns
+    -------
+    state : str.
+        This is the state of the simulation.
+    time : float
+        This is the time that has been simulated (in ps).
+    """
+    if sim_time_limit is None:
+        return problem_state, 0.0
     try:
-        count, molecule, cell_point, time, time_step, hop_distance, energy, sum_kij, _, Dxx, Dyy, Dzz, Dxy, Dxz, Dyz, _ = last_lines_in_kMC_simTXT.rstrip().split()
-    except Exception as exception:
-        to_string = 'error with '+str(filepath)+'. Error Message\n'+str(exception)
-        print(to_string)
-        import pdb; pdb.set_trace()
-        raise Exception(to_string)
-
-    # Sixth, convert time variable from string to float
-    time = float(time)
-
-    # Seventh, return True if time is greater or equal to sim_time_limit (indicating the simulation completed successfully). Otherwise, return False if time < sim_time_limit.
-    return (time >= sim_time_limit)
-
-def has_all_simulations_finished(dirpath, dirnames):
-
-    print('Scanning: '+str(dirpath))
-
-    completed_Simulations = []
-    incomplete_Simulations = []
-    dirnames = [dirname for dirname in dirnames if dirname.startswith('Sim')]
-    dirnames.sort(key=lambda dirname: int(dirname.replace('Sim','')))
-    number_of_dirnames = len(dirnames)
-    for index in range(number_of_dirnames):
-        dirname = dirnames[index]
-        simulation_no = int(dirname.replace('Sim',''))
-        did_simulation_finish_successfully = Did_Simulation_finish_successfully(dirpath+'/'+dirname)
-        if did_simulation_finish_successfully:
-            completed_Simulations.append(simulation_no)
-        else:
-            incomplete_Simulations.append(simulation_no)
-        ###########
-        sys.stdout.write("\r                                                                  ")
-        sys.stdout.flush()
-        sys.stdout.write("\rScanning Completion: "+str(round((float(index+1)/float(number_of_dirnames)*100.0),2))+" % (Checked "+str(dirname)+").")
-        sys.stdout.flush()
-        ###########
-    completed_Simulations.sort()
-    incomplete_Simulations.sort()
-    completed_successfully = True if len(incomplete_Simulations) == 0 else False
-    return completed_successfully, completed_Simulations, incomplete_Simulations, problem_simulations
+        reached_sim_time_limit, reached_max_no_of_steps, time, no_of_steps = did_finish(path_to_sim_folder+'/kMC_sim.txt', 'inf', 'inf')
+    except Exception:
+        return problem_state, 0.0
+    return (finished_state if (time >= sim_time_limit) else incomplete_legacy_state), time
+
+def get_simulation_states(sims_to_check, no_of_threads=16, stale_after=1800.0, return_times=False):
+    """
+    This method will obtain the state of each simulation in a thread pool.
+
+    Parameters
+    ----------
+    sims_to_check : list of (str., int)
+        These are the folder containing the Sim folders (root) and the number of each simulation to check.
+    no_of_threads : int
+        This is the number of threads to read the status files with.
+    stale_after : float
+        If a running simulation has not updated its status file for this many seconds, it is given as stalled.
+    return_times : bool.
+        If True, the time that each simulation has simulated is also given. Default: False
+
+    Returns
+    -------
+    simulation_states : dict.
+        This contains the state of each simulation, given as simulation_states[root][sim_no] = state. If return_times is True, this is given as simulation_states[root][sim_no] = (state, time).
+    """
+
+    with ThreadPoolExecutor(max_workers=max(no_of_threads, 1)) as executor:
+
+        # First, obtain the state of each simulation from its status file.
+        states = list(executor.map(lambda sim_to_check: get_simulation_state(sim_to_check[0]+'/Sim'+str(sim_to_check[1]), stale_after), sims_to_check))
+
+        # Second, check simulations without a status file from their kMC_sim.txt files. The sim_time_limit is only read once for each root.
+        legacy_indices = [index for index, (state, time) in enumerate(states) if (state is None)]
+        sim_time_limits = {}
+        for index in legacy_indices:
+            root, sim_no = sims_to_check[index]
+            if root not in sim_time_limits:
+                sim_time_limits[root] = get_variables_from_run(root)
+                if sim_time_limits[root] is None:
+                    sim_time_limits[root] = get_variables_from_run(root+'/Sim'+str(sim_no))
+        legacy_states = executor.map(lambda index: get_legacy_simulation_state(sims_to_check[index][0]+'/Sim'+str(sims_to_check[index][1]), sim_time_limits[sims_to_check[index][0]]), legacy_indices)
+        for index, state in zip(legacy_indices, legacy_states):
+            states[index] = state
+
+    # Third, group the states of the simulations by root.
+    simulation_states = {}
+    for (root, sim_no), (state, time) in zip(sims_to_check, states):
+        simulation_states.setdefault(root, {})[sim_no] = (state, time) if return_times else state
+    return simulation_states
+
+def has_all_simulations_finished(sim_states):
+    """
+    This method will determine which simulations in a root have finished, and which have not.
 
+    Parameters
+    ----------
+    sim_states : dict.
+        This contains the state of each simulation in the root, given by simulation number.
 
+    Returns
+    -------
+    completed_successfully : bool.
+        True if all simulations have finished.
+    completed_Simulations : list of int
+        These are the simulations that have finished.
+    incomplete_Simulations : list of int
+        These are the simulations that have not finished.
+    problem_simulations : list of int
+        These are the simulations whose status could not be read.
+    state_counts : dict.
+        This is the number of simulations in each state.
+    """
+    completed_Simulations  = sorted([sim_no for sim_no, state in sim_states.items() if (state == finished_state)])
+    incomplete_Simulations = sorted([sim_no for sim_no, state in sim_states.items() if (state != finished_state)])
+    problem_simulations    = sorted([sim_no for sim_no, state in sim_states.items() if (state == problem_state)])
+    state_counts = {state: 0 for state in all_states}
+    for state in sim_states.values():
+        state_counts[state] = state_counts.get(state, 0) + 1
+    completed_successfully = (len(incomplete_Simulations) == 0)
+    return completed_successfully, completed_Simulations, incomplete_Simulations, problem_simulations, state_counts
@@ -5,7 +5,8 @@ This program will determine which of your dimers have been successfully calculat
 '''
 import os
 
-from EKMC.EKMC_Programs.Did_Complete_Main import has_all_simulations_finished
+from EKMC.EKMC_Programs.Did_Complete_Main import get_simulation_states, has_all_simulations_finished, all_states
+from EKMC.EKMC_Setup.run_manifest_file     import get_roots_from_manifest, list_roots
 
 class CLICommand:
     """Will determine which EKMC jobs have completed and which ones have not.
@@ -13,57 +14,94 @@ class CLICommand:
 
     @staticmethod
     def add_arguments(parser):
-        pass
+        parser.add_argument('no_of_threads', nargs='?', type=int, default=16, help='This is the number of threads to use to read the status files of the simulations. Default: 16')
+        parser.add_argument('--stale_after', type=float, default=1800.0, help='If a running simulation has not updated its status file for this many seconds, it is reported as stalled. Default: 1800 s')
         
     @staticmethod
     def run(args):
-        Run_method()
+        Run_method(no_of_threads=args.no_of_threads, stale_after=args.stale_after)
 
-def Run_method(time_between_250_cancels=60):
+def Run_method(no_of_threads=16, stale_after=1800.0):
     """
     This method will determine which of your dimers have been successfully calculated in Gaussian.
+
+    Parameters
+    ----------
+    no_of_threads : int
+        This is the number of threads to use to read the status files of the simulations.
+    stale_after : float
+        If a running simulation has not updated its status file for this many seconds, it is reported as stalled.
     """
 
     path = os.getcwd()
 
-    number_of_simulations = []
-    Overall_Simulations_to_check = {}
-
-    all_problem_simulations = []
-
-    for dirpath, dirnames, filenames in os.walk(path):
+    # First, obtain all the simulations to check in every folder that contains Sim folders.
+    # 1.1: If there is a run manifest, only look in the roots it gives. Sims that have not been made yet are also checked (and given as not started).
+    roots_from_manifest = get_roots_from_manifest(path)
+    if roots_from_manifest is None:
+        folders_to_check = os.walk(path)
+        no_of_simulations_planned = {}
+    else:
+        folders_to_check = list_roots([root for root, root_details in roots_from_manifest])
+        no_of_simulations_planned = {root: root_details['no_of_simulations'] for root, root_details in roots_from_manifest}
+    # 1.2: Obtain the simulations in each folder.
+    sims_to_check = []
+    for dirpath, dirnames, filenames in folders_to_check:
         dirnames.sort()
-        if any([(dirname.startswith('Sim') and dirname.replace('Sim','').isdigit()) for dirname in dirnames]):
-            completed_successfully, completed_Simulations, incomplete_Simulations, problem_simulations = has_all_simulations_finished(dirpath, dirnames)
-            toString = ''
-            toString += '******************************************************************************\n'
-            toString += '******************************************************************************\n'
-            toString += 'This set of Exciton Kinetic Monte Carlo simulations finished '+('SUCCESSFULLY' if completed_successfully else 'UNSUCCESSFULLY')+'.\n'
-            toString += '\n'
-            toString += '# Successful Simulations: '+str(len(completed_Simulations))+';\t# Unsuccessful Simulations: '+str(len(incomplete_Simulations))+';\tTotal # of Simulations: '+str(len(completed_Simulations)+len(incomplete_Simulations))+'\n'
-            number_of_simulations.append((dirpath,len(completed_Simulations),len(incomplete_Simulations)))
-            toString += '\n'
-            toString += 'The following Simulations in '+str(dirpath)+' completed or did not complete.\n'
-            toString += 'Completed Simulations: '+str(completed_Simulations)+'\n'
-            toString += 'Incomplete Simulations: '+str(incomplete_Simulations)+'\n'
-            toString += 'There were '+str(len(incomplete_Simulations))+' incomplete simulations.\n'
-            toString += '******************************************************************************\n'
-            toString += '******************************************************************************\n'
-            print(toString)
-            with open(dirpath+'/SimulationsCompletionDetails.txt','w') as SimulationsCompletionDetailsTXT:
-                SimulationsCompletionDetailsTXT.write(toString)
+        sim_numbers = [int(dirname.replace('Sim','')) for dirname in dirnames if (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+        sim_numbers = set(sim_numbers) | set(range(1, no_of_simulations_planned.get(dirpath, 0)+1))
+        if len(sim_numbers) > 0:
+            sims_to_check += [(dirpath, sim_no) for sim_no in sorted(sim_numbers)]
             dirnames[:] = []
             filenames[:] = []
-            if not completed_successfully:
-                Overall_Simulations_to_check[dirpath] = incomplete_Simulations
-            all_problem_simulations += problem_simulations
+
+    # Second, obtain the state of every simulation at once in a thread pool.
+    print('Scanning '+str(len(sims_to_check))+' simulations.')
+    simulation_states = get_simulation_states(sims_to_check, no_of_threads=no_of_threads, stale_after=stale_after)
+
+    # Third, report which simulations have completed in each folder.
+    number_of_simulations = []
+    Overall_Simulations_to_check = {}
+    all_problem_simulations = []
+    overall_state_counts = {state: 0 for state in all_states}
+    for dirpath in sorted(simulation_states.keys()):
+        completed_successfully, completed_Simulations, incomplete_Simulations, problem_simulations, state_counts = has_all_simulations_finished(simulation_states[dirpath])
+        states_string = ';\t'.join([str(state)+': '+str(count) for state, count in state_counts.items() if (count > 0)])
+        toString = ''
+        toString += '******************************************************************************\n'
+        toString += '******************************************************************************\n'
+        toString += 'This set of Exciton Kinetic Monte Carlo simulations finished '+('SUCCESSFULLY' if completed_successfully else 'UNSUCCESSFULLY')+'.\n'
+        toString += '\n'
+        toString += '# Successful Simulations: '+str(len(completed_Simulations))+';\t# Unsuccessful Simulations: '+str(len(incomplete_Simulations))+';\tTotal # of Simulations: '+str(len(completed_Simulations)+len(incomplete_Simulations))+'\n'
+        toString += 'States of Simulations: '+states_string+'\n'
+        number_of_simulations.append((dirpath,len(completed_Simulations),len(incomplete_Simulations),states_string))
+        toString += '\n'
+        toString += 'The following Simulations in '+str(dirpath)+' completed or did not complete.\n'
+        toString += 'Completed Simulations: '+str(completed_Simulations)+'\n'
+        toString += 'Incomplete Simulations: '+str(incomplete_Simulations)+'\n'
+        toString += 'There were '+str(len(incomplete_Simulations))+' incomplete simulations.\n'
+        toString += '******************************************************************************\n'
+        toString += '******************************************************************************\n'
+        print(toString)
+        with open(dirpath+'/SimulationsCompletionDetails.txt','w') as SimulationsCompletionDetailsTXT:
+            SimulationsCompletionDetailsTXT.write(toString)
+        if not completed_successfully:
+            Overall_Simulations_to_check[dirpath] = incomplete_Simulations
+        all_problem_simulations += [dirpath+'/Sim'+str(sim_no) for sim_no in problem_simulations]
+        for state, count in state_counts.items():
+            overall_state_counts[state] = overall_state_counts.get(state, 0) + count
 
     print('########################################################################')
     print('########################################################################')
     number_of_simulations.sort()
     print('Number of Simulations that were performed for each set of simulations:')
-    for dirpath, no_of_successful, no_of_unsuccessful in number_of_simulations:
-        print(dirpath+': '+str(no_of_successful+no_of_unsuccessful)+'\t(successful: '+str(no_of_successful)+'; unsuccessful: '+str(no_of_unsuccessful)+')')
+    for dirpath, no_of_successful, no_of_unsuccessful, states_string in number_of_simulations:
+        print(dirpath+': '+str(no_of_successful+no_of_unsuccessful)+'\t(successful: '+str(no_of_successful)+'; unsuccessful: '+str(no_of_unsuccessful)+')\t'+states_string)
+    print('########################################################################')
+    print('########################################################################')
+    print('Number of Simulations in each state:')
+    for state, count in overall_state_counts.items():
+        print(str(state)+': '+str(count))
     print('########################################################################')
     print('########################################################################')
     print('Details of Simulations that did not complete:')
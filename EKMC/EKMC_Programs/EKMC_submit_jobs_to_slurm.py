@@ -19,6 +19,7 @@ from EKMC.EKMC_Programs.EKMC_submit_jobs_to_slurm_methods.check_max_jobs_in_queu
 from EKMC.EKMC_Programs.EKMC_submit_jobs_to_slurm_methods.check_max_jobs_in_queue_after_next_submission import get_number_to_trials_that_will_be_submitted_by_ekmc_mass_submitSL
 from EKMC.EKMC_Programs.EKMC_submit_jobs_to_slurm_methods.wait_for_slurmjob_queue_decrease              import wait_for_slurmjob_queue_decrease
 from EKMC.EKMC_Programs.EKMC_submit_jobs_to_slurm_methods.countdown                                     import countdown
+from EKMC.EKMC_Setup.run_manifest_file                                                                  import walk_roots
 
 # Get the path to the settings script.
 this_scripts_path = os.path.dirname(os.path.abspath(__file__))
@@ -120,8 +121,9 @@ def Run_method():
     # Sixth, check to make sure the array line in all ekmc_mass_submit.sl scripts is there and that none of the mass_submission script submit more than Max_total_jobs_in_queue_at_any_one_time into the queue. 
     print('-----------------------------------------------')
     print('Checking to make sure that the array line in all ekmc_mass_submit.sl scripts is there and that none of the mass_submission script submit more than Max_total_jobs_in_queue_at_any_one_time into the queue.')
+    # If there is a run manifest, only the roots it gives are looked in.
     number_of_jobs_to_process = 0
-    pbar = tqdm.tqdm(os.walk(path))
+    pbar = tqdm.tqdm(walk_roots(path))
     for (dirpath, dirnames, filenames) in pbar:
         pbar.set_description(dirpath)
         dirnames.sort()
@@ -150,7 +152,7 @@ def Run_method():
     # Seventh, time to submit all the GA scripts! Lets get this stuff going!
     job_submission_counter = 0
     error_counter = 0
-    for (dirpath, dirnames, filenames) in os.walk(path):
+    for (dirpath, dirnames, filenames) in walk_roots(path):
         dirnames.sort()
         if 'ekmc_mass_submit.sl' in filenames:
             
@@ -43,15 +43,17 @@ def make_mass_submitSL_full(local_path,temp_folder_path,job_name,project=None,no
         else:
             high_job_number = max_no_of_arrayjobs_in_a_mass_submit_file
 
-def make_single_mass_submitSL_file_full(mass_submit_counter,temp_folder_path,low_job_number,high_job_number,local_path,job_name,project=None,time='0-01:00',cpus_per_task=1,mem=None,mem_per_cpu=None,partition='parallel',constraint=None,email='',python_version='Python/3.9.5',gcc_version='GCC/10.3.0',gcccore_version='GCCcore/10.3.0',binutils_version='binutils/2.39'):
+def make_single_mass_submitSL_file_full(mass_submit_counter,temp_folder_path,low_job_number,high_job_number,local_path,job_name,project=None,time='0-01:00',cpus_per_task=1,mem=None,mem_per_cpu=None,partition='parallel',constraint=None,email='',python_version='Python/3.9.5',gcc_version='GCC/10.3.0',gcccore_version='GCCcore/10.3.0',binutils_version='binutils/2.39',submit_filename=None,sim_no_offset=None):
     """
-
+    If submit_filename is given, the mass_submit.sl file is saved with this name. If sim_no_offset is given, the simulation number for each arrayjob is sim_no_offset + SLURM_ARRAY_TASK_ID.
     """
     # create name for job
     #print("creating mass_submit.sl for "+str(job_name))
     name = job_name.replace('/','_')
+    if submit_filename is None:
+        submit_filename = "ekmc_mass_submit"+(('_'+str(mass_submit_counter)) if (mass_submit_counter >= 2) else '')+".sl"
     # writing the mass_submit.sl script
-    with open(local_path+'/'+"ekmc_mass_submit"+(('_'+str(mass_submit_counter)) if (mass_submit_counter >= 2) else '')+".sl", "w") as submitSL:
+    with open(local_path+'/'+submit_filename, "w") as submitSL:
         submitSL.write('#!/bin/bash -e\n')
         submitSL.write('#SBATCH -J ' + str(name) + '_ArrayJob_Set_' + str(mass_submit_counter) + '\n')
         if project is not None:
@@ -81,8 +83,11 @@ def make_single_mass_submitSL_file_full(mass_submit_counter,temp_folder_path,low
         submitSL.write('echo "My SLURM_ARRAY_TASK_ID: "${SLURM_ARRAY_TASK_ID}\n')
         submitSL.write('\n')
         submitSL.write('# Get the simulation number for this simulation\n')
-        submitSL.write('arrayjobset='+str(mass_submit_counter)+'\n')
-        submitSL.write('sim_name=$(( $(( $(( ${arrayjobset} - 1 )) * '+str(max_no_of_arrayjobs_in_a_mass_submit_file)+' )) + ${SLURM_ARRAY_TASK_ID} ))\n')
+        if sim_no_offset is None:
+            submitSL.write('arrayjobset='+str(mass_submit_counter)+'\n')
+            submitSL.write('sim_name=$(( $(( $(( ${arrayjobset} - 1 )) * '+str(max_no_of_arrayjobs_in_a_mass_submit_file)+' )) + ${SLURM_ARRAY_TASK_ID} ))\n')
+        else:
+            submitSL.write('sim_name=$(( '+str(sim_no_offset)+' + ${SLURM_ARRAY_TASK_ID} ))\n')
         submitSL.write('\n')
         submitSL.write('# Load python\n')
         submitSL.write('module load '+str(python_version)+'\n')
@@ -126,6 +131,44 @@ def make_single_mass_submitSL_file_full(mass_submit_counter,temp_folder_path,low
 
 # ----------------------------------------------------------------------------------------------------------------------------------------
 
+def make_mass_submitSL_for_additional_sims(local_path,temp_folder_path,job_name,first_sim_no,no_of_simulations,submit_name='ekmc_additional_submit',project=None,time='0-01:00',cpus_per_task=1,mem=None,mem_per_cpu=None,partition='parallel',constraint=None,email='',python_version='Python/3.9.5',gcc_version='GCC/10.3.0',gcccore_version='GCCcore/10.3.0',binutils_version='binutils/2.39'):
+    """
+    This method is designed to create the mass_submit.sl files required to run the simulations Sim<first_sim_no> to Sim<first_sim_no + no_of_simulations - 1> on slurm.
+
+    Each simulation is run as its own arrayjob. If more than max_no_of_arrayjobs_in_a_mass_submit_file simulations are requested, more than one mass_submit.sl file is made.
+
+    Parameters
+    ----------
+    local_path : str.
+        This is the path to where you want to place the mass_submit.sl files in.
+    temp_folder_path : str.
+        This is the path to the scratch drive to save temp files to. 
+    job_name : str.
+        This is the name of the job 
+    first_sim_no : int
+        This is the number of the first simulation to run.
+    no_of_simulations : int
+        This is the number of simulations to run.
+    submit_name : str.
+        This is the start of the name of the mass_submit.sl files. Each file is called <submit_name>_<first sim no>_<last sim no>.sl
+
+    See make_mass_submitSL_packets for the other parameters.
+
+    Returns
+    -------
+    submit_filenames : list of str.
+        These are the names of the mass_submit.sl files that were made.
+    """
+    submit_filenames = []
+    for low_sim_no in range(first_sim_no, first_sim_no+no_of_simulations, max_no_of_arrayjobs_in_a_mass_submit_file):
+        high_sim_no = min(low_sim_no+max_no_of_arrayjobs_in_a_mass_submit_file, first_sim_no+no_of_simulations) - 1
+        submit_filename = str(submit_name)+'_'+str(low_sim_no)+'_'+str(high_sim_no)+'.sl'
+        make_single_mass_submitSL_file_full(len(submit_filenames)+1,temp_folder_path,1,high_sim_no-low_sim_no+1,local_path,job_name,project=project,time=time,cpus_per_task=cpus_per_task,mem=mem,mem_per_cpu=mem_per_cpu,partition=partition,constraint=constraint,email=email,python_version=python_version,gcc_version=gcc_version,gcccore_version=gcccore_version,binutils_version=binutils_version,submit_filename=submit_filename,sim_no_offset=low_sim_no-1)
+        submit_filenames.append(submit_filename)
+    return submit_filenames
+
+# ----------------------------------------------------------------------------------------------------------------------------------------
+
 def make_mass_submitSL_packets(local_path,temp_folder_path,job_name,project=None,no_of_simulations=1000,no_of_sims_per_packet=100,time='0-01:00',cpus_per_task=1,mem=None,mem_per_cpu=None,partition='parallel',constraint=None,email='',python_version='python/3.8.1',gcc_version='GCC/11.2.0',gcccore_version='GCCcore/11.2.0',binutils_version='binutils/2.39'):
     """
     This method is designed to create the mass_submit.sl files required to run KMC simulations on slurm. 
@@ -20,6 +20,7 @@ from EKMC.EKMC_Setup.EKMC_Only_Setup.get_RE_and_bandgap_data
 
 from EKMC.EKMC_Setup.EKMC_Only_Setup.get_dimer_coupling_values                      import get_dimer_coupling_values
 from EKMC.EKMC_Setup.EKMC_Only_Setup.get_constant_rate_law_data                     import get_constant_rate_law_data
+from EKMC.EKMC_Setup.EKMC_Only_Setup.save_KMC_model_to_disk                         import save_KMC_model_to_disk
 
 from SUMELF                                                                         import remove_folder, make_folder
 
@@ -255,6 +256,8 @@ def save_KMC_data_to_disk(path_to_KMC_setup_data, molecule_names, molecules, cry
 	"""
 	This method is designed to save the data required to simulate the exciton kmc simulation, including the electronic details of the local behaviour of each molecule in the crystal.
 
+	This will write the KMC_setup_data.ekmc text file, as well as the binary KMC_setup_data.npz model file.
+
 	Parameters
 	----------
 	path_to_KMC_setup_data : str.
@@ -302,6 +305,9 @@ def save_KMC_data_to_disk(path_to_KMC_setup_data, molecule_names, molecules, cry
 		KMC_setup_data.write(str(constant_rate_data)+'\n')
 		KMC_setup_data.write(save_all_coupling_values_data(all_coupling_values)+'\n')
 
+	# Fourth, save the binary KMC_setup_data.npz model file, which EKMC can memory map rather than needing to eval the KMC_setup_data.ekmc file.
+	save_KMC_model_to_disk(path_to_KMC_setup_data)
+
 def save_all_coupling_values_data(all_coupling_values):
 	"""
 	This method is designed to order the printing of all_coupling_values.
@@ -0,0 +1,37 @@
+"""
+save_KMC_model_to_disk.py, Geoffrey Weal, 19/10/26
+
+This script is designed to save the binary KMC_setup_data.npz model file next to the KMC_setup_data.ekmc file.
+"""
+import os
+import numpy as np
+
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data import read_KMC_setup_data
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_model      import KMC_model_filename, KMC_model_format_version, get_KMC_setup_data_key, convert_KMC_setup_data_to_KMC_model
+
+def save_KMC_model_to_disk(path_to_KMC_setup_data):
+	"""
+	This method is designed to save the binary KMC_setup_data.npz model file next to the KMC_setup_data.ekmc file.
+
+	The data is read from KMC_setup_data.ekmc in the same way as when running EKMC (including adding conformationally equivalent molecules
+	to the bandgap and reorganisation energy data), so that the model file can be memory mapped and used directly without any further processing.
+
+	Parameters
+	----------
+	path_to_KMC_setup_data : str.
+		This is the path to the folder that contains the KMC_setup_data.ekmc file.
+	"""
+
+	# First, read the data from the KMC_setup_data.ekmc file. The size and modification time of the file are obtained before it is read, 
+	#        so that the model file is not used if the KMC_setup_data.ekmc file changes while it is being read.
+	KMC_setup_data_key = get_KMC_setup_data_key(path_to_KMC_setup_data)
+	KMC_setup_data = read_KMC_setup_data(path_to_KMC_setup_data, use_KMC_model=False)
+
+	# Second, convert the data into the arrays that are stored in the model file.
+	KMC_model = convert_KMC_setup_data_to_KMC_model(*KMC_setup_data)
+
+	# Third, save the model file. This is written to a temporary file first, so that a simulation never reads a partly written model file.
+	path_to_KMC_model = path_to_KMC_setup_data+'/'+KMC_model_filename
+	path_to_temp_KMC_model = path_to_KMC_model+'.tmp.npz'
+	np.savez(path_to_temp_KMC_model, format_version=np.array(KMC_model_format_version, dtype=np.int32), KMC_setup_data_key=KMC_setup_data_key, **KMC_model)
+	os.replace(path_to_temp_KMC_model, path_to_KMC_model)
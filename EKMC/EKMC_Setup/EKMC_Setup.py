@@ -7,6 +7,9 @@ import os, math
 from EKMC.EKMC.Run_EKMC_setup_files.get_EKMC_version import get_EKMC_version
 from EKMC.EKMC_Setup.EKMC_Only_Setup.EKMC_Only_Setup import EKMC_Only_Setup
 from EKMC.EKMC_Setup.Create_submitSL_slurm_Main      import make_mass_submitSL_full, make_mass_submitSL_packets
+from EKMC.EKMC_Setup.mass_submission_information_file import save_mass_submission_information
+from EKMC.EKMC_Setup.results_index import register_setup_in_results_index
+from EKMC.EKMC_Setup.run_manifest_file import add_root_to_manifest
 
 exciton_filename = 'Run_EKMC.py'
 mass_submit_filename = 'mass_submit.sl'
@@ -117,6 +120,14 @@ def EKMC_Setup(EKMC_settings, mass_submission_information, setup_folder_name=Non
 	make_mass_submit_file(path_to_EKMC_simulations=path_to_EKMC_simulations, temp_folder_path=temp_folder_path, crystal_name=crystal_name, functional_and_basis_set=functional_and_basis_set, mass_submission_information=mass_submission_information)
 	print('-----------------------------------------------------')
 
+	# Fifteenth, register this system in the results index, so it can be found along with the systems in other studies.
+	register_setup_in_results_index(path_to_EKMC_simulations, sim_time_limit, mass_submission_information['no_of_simulations'])
+
+	# Sixteenth, add this system to the run manifest, so the other EKMC programs can find it without walking through every folder.
+	submit_scripts = sorted([filename for filename in os.listdir(path_to_EKMC_simulations) if (filename.startswith('ekmc_') and filename.endswith('.sl'))])
+	expected_outputs = ['kMC_sim.txt', 'kMC_sim_status.json'] + (['kMC_sim_rate_constants.txt'] if write_rate_constants_to_file else [])
+	add_root_to_manifest(os.getcwd(), path_to_EKMC_simulations, submit_scripts, mass_submission_information['no_of_simulations'], expected_outputs, Run_EKMC_filename=exciton_filename)
+
 	print('-'*dash_number)
 	print('-'*dash_number)
 	print('-'*dash_number)
@@ -222,3 +233,6 @@ def make_mass_submit_file(path_to_EKMC_simulations, temp_folder_path, crystal_na
 		print('  * packet: Perform "no_of_simulations" number of individual simulations in "no_of_sims_per_packet" submitted jobs.')
 		exit('Check this out and try this program again. This program will finish without continuing')
 
+	# Third, save the information used to make the mass_submit.sl file, so that more simulations can be submitted later with the same settings.
+	save_mass_submission_information(path_to_EKMC_simulations, job_name, temp_folder_path, mass_submission_information)
+
@@ -0,0 +1,57 @@
+"""
+mass_submission_information_file.py, Geoffrey Weal, 19/10/26
+
+This script is designed to save and read the information used to make the ekmc_mass_submit.sl files for a system.
+
+This file is written during setup, so that more simulations can be created and submitted later for this system (such as by
+``EKMC adaptive_ensemble``) using the same slurm settings as the original simulations.
+"""
+import os, json
+
+mass_submission_information_filename = 'ekmc_mass_submission_information.json'
+
+def save_mass_submission_information(path_to_EKMC_simulations, job_name, temp_folder_path, mass_submission_information):
+	"""
+	This method is designed to save the information used to make the ekmc_mass_submit.sl files for a system.
+
+	Parameters
+	----------
+	path_to_EKMC_simulations : str.
+		This is the path to the folder that contains the ekmc_mass_submit.sl files.
+	job_name : str.
+		This is the name of the job given to slurm.
+	temp_folder_path : str. or None
+		This is the path to place files as the KMC file is running for temporary storage.
+	mass_submission_information : dict.
+		This is all the information required for submitting the exciton kinetic Monte Carlo algorithm on slurm using ArrayJobs.
+	"""
+	mass_submission_data = {'job_name': job_name, 'temp_folder_path': temp_folder_path, 'mass_submission_information': mass_submission_information}
+	path_to_file = path_to_EKMC_simulations+'/'+mass_submission_information_filename
+	with open(path_to_file+'.tmp', 'w') as mass_submission_information_JSON:
+		json.dump(mass_submission_data, mass_submission_information_JSON, indent=4)
+	os.replace(path_to_file+'.tmp', path_to_file)
+
+def read_mass_submission_information(path_to_EKMC_simulations):
+	"""
+	This method is designed to read the information used to make the ekmc_mass_submit.sl files for a system.
+
+	Parameters
+	----------
+	path_to_EKMC_simulations : str.
+		This is the path to the folder that contains the ekmc_mass_submit.sl files.
+
+	Returns
+	-------
+	job_name : str.
+		This is the name of the job given to slurm.
+	temp_folder_path : str. or None
+		This is the path to place files as the KMC file is running for temporary storage.
+	mass_submission_information : dict.
+		This is all the information required for submitting the exciton kinetic Monte Carlo algorithm on slurm using ArrayJobs.
+	"""
+	path_to_file = path_to_EKMC_simulations+'/'+mass_submission_information_filename
+	if not os.path.exists(path_to_file):
+		raise Exception('Error: Could not find '+str(path_to_file)+'. This file is written when setting up the EKMC simulations. Set up the EKMC simulations for this system again to make this file.')
+	with open(path_to_file, 'r') as mass_submission_information_JSON:
+		mass_submission_data = json.load(mass_submission_information_JSON)
+	return mass_submission_data['job_name'], mass_submission_data['temp_folder_path'], mass_submission_data['mass_submission_information']
@@ -0,0 +1,256 @@
+"""
+results_index.py, Geoffrey Weal, 19/10/26
+
+This script is designed to keep a SQLite index of every system (root) that has been set up or processed by EKMC.
+
+Each root is registered when it is set up (EKMC_Setup) and again each time it is processed (EKMC process_results). The index holds
+the setup parameters read from the KMC_setup_data.ekmc file, the number of Sims found and finished, the headline results (the
+time-averaged energy and diffusion coefficient, the eigenvalues of the diffusion tensor, and their confidence intervals), and the
+paths to the detailed outputs. The same index is used across studies, so systems in different folders can be compared with a query
+rather than by opening the excel spreadsheet of each study.
+
+By default, the index is stored in ~/.EKMC/EKMC_results_index.db. This can be changed by setting the EKMC_RESULTS_INDEX environment
+variable to the path of the index file you would like to use.
+"""
+import os, json, time, sqlite3
+import numpy as np
+
+default_results_index_path = os.path.expanduser('~/.EKMC/EKMC_results_index.db')
+
+# These are the columns in the roots table, along with their types. The disorders are NUMERIC, as they can be given as a value or as a percentage (such as '10%').
+roots_table_columns = [('path', 'TEXT PRIMARY KEY'), ('kinetic_model', 'TEXT'), ('temperature', 'REAL'), ('energetic_disorder', 'NUMERIC'), ('coupling_disorder', 'NUMERIC'), ('kinetic_model_parameters', 'TEXT'), ('no_of_molecules', 'INTEGER'), ('sim_time_limit', 'REAL'), ('no_of_simulations_planned', 'INTEGER'), ('setup_at', 'REAL')]
+roots_table_columns += [('no_of_simulations', 'INTEGER'), ('no_of_finished_simulations', 'INTEGER'), ('latest_simulation_change', 'REAL'), ('processed_at', 'REAL'), ('begin_recording_time', 'REAL'), ('end_recording_time', 'REAL'), ('end_time', 'REAL')]
+roots_table_columns += [('energy', 'REAL'), ('energy_sd', 'REAL'), ('energy_ci', 'REAL'), ('diffusion', 'REAL'), ('diffusion_sd', 'REAL'), ('diffusion_ci', 'REAL'), ('diffusion_tensor', 'TEXT'), ('diffusion_tensor_ci', 'TEXT')]
+roots_table_columns += [('eigenvalue_major', 'REAL'), ('eigenvalue_major_ci', 'REAL'), ('eigenvalue_minor_1', 'REAL'), ('eigenvalue_minor_1_ci', 'REAL'), ('eigenvalue_minor_2', 'REAL'), ('eigenvalue_minor_2_ci', 'REAL')]
+roots_table_columns += [('path_to_results', 'TEXT'), ('path_to_excel', 'TEXT')]
+
+def get_results_index_path():
+    """
+    This method will obtain the path to the results index.
+
+    Returns
+    -------
+    path_to_results_index : str.
+        This is the path to the results index.
+    """
+    return os.environ.get('EKMC_RESULTS_INDEX', default_results_index_path)
+
+def connect_to_results_index(path_to_results_index=None):
+    """
+    This method will connect to the results index, making it if it does not exist yet.
+
+    Parameters
+    ----------
+    path_to_results_index : str. or None
+        This is the path to the results index. If None, get_results_index_path is used. Default: None
+
+    Returns
+    -------
+    connection : sqlite3.Connection
+        This is the connection to the results index.
+    """
+    if path_to_results_index is None:
+        path_to_results_index = get_results_index_path()
+    if os.path.dirname(path_to_results_index) != '':
+        os.makedirs(os.path.dirname(path_to_results_index), exist_ok=True)
+    connection = sqlite3.connect(path_to_results_index, timeout=60.0)
+    connection.row_factory = sqlite3.Row
+    with connection:
+        connection.execute('CREATE TABLE IF NOT EXISTS roots ('+', '.join([name+' '+column_type for name, column_type in roots_table_columns])+')')
+        connection.execute('CREATE INDEX IF NOT EXISTS roots_by_conditions ON roots (kinetic_model, temperature, energetic_disorder, coupling_disorder)')
+    return connection
+
+def read_setup_parameters(path_to_KMC_setup_data_file):
+    """
+    This method will read the setup parameters of a root from its KMC_setup_data.ekmc file.
+
+    Parameters
+    ----------
+    path_to_KMC_setup_data_file : str.
+        This is the path to the KMC_setup_data.ekmc file.
+
+    Returns
+    -------
+    setup_parameters : dict.
+        These are the setup parameters to record in the results index.
+    """
+    with open(path_to_KMC_setup_data_file,'r') as KMC_setup_data_EKMC:
+        molnames_and_coms        = eval(KMC_setup_data_EKMC.readline().rstrip())
+        unit_cell_matrix         = KMC_setup_data_EKMC.readline()
+        kinetic_model            = KMC_setup_data_EKMC.readline().rstrip()
+        kinetic_model_parameters = eval(KMC_setup_data_EKMC.readline().rstrip())
+    setup_parameters = {}
+    setup_parameters['kinetic_model']            = kinetic_model
+    setup_parameters['temperature']              = kinetic_model_parameters.get('temperature', None)
+    setup_parameters['energetic_disorder']       = kinetic_model_parameters.get('energetic_disorder', None)
+    setup_parameters['coupling_disorder']        = kinetic_model_parameters.get('coupling_disorder', None)
+    setup_parameters['kinetic_model_parameters'] = json.dumps(kinetic_model_parameters, default=str)
+    setup_parameters['no_of_molecules']          = len(molnames_and_coms)
+    return setup_parameters
+
+def update_root_in_results_index(path_to_root, values, path_to_results_index=None):
+    """
+    This method will add or update a root in the results index. Only the columns given in values are changed.
+
+    Parameters
+    ----------
+    path_to_root : str.
+        This is the path to the root.
+    values : dict.
+        These are the values of the columns to record for this root.
+    path_to_results_index : str. or None
+        This is the path to the results index. If None, get_results_index_path is used. Default: None
+    """
+    values = {name: value for name, value in values.items() if (name != 'path')}
+    unknown_columns = set(values.keys()) - set(name for name, column_type in roots_table_columns)
+    if len(unknown_columns) > 0:
+        raise Exception('Error: These are not columns in the results index: '+str(sorted(unknown_columns)))
+    connection = connect_to_results_index(path_to_results_index)
+    try:
+        with connection:
+            connection.execute('INSERT OR IGNORE INTO roots (path) VALUES (?)', (os.path.abspath(path_to_root),))
+            if len(values) > 0:
+                connection.execute('UPDATE roots SET '+', '.join([name+' = ?' for name in values.keys()])+' WHERE path = ?', tuple(values.values())+(os.path.abspath(path_to_root),))
+    finally:
+        connection.close()
+
+def register_setup_in_results_index(path_to_root, sim_time_limit, no_of_simulations_planned, KMC_setup_data_filename='KMC_setup_data.ekmc'):
+    """
+    This method will register a root in the results index once it has been set up.
+
+    Parameters
+    ----------
+    path_to_root : str.
+        This is the path to the root.
+    sim_time_limit : float or 'inf'
+        This is the simulated time limit the simulations are run to (in ps).
+    no_of_simulations_planned : int
+        This is the number of simulations that will be run for this root.
+    KMC_setup_data_filename : str.
+        This is the name of the KMC_setup_data.ekmc file in the root.
+    """
+    values = read_setup_parameters(path_to_root+'/'+KMC_setup_data_filename)
+    values['sim_time_limit']            = None if (sim_time_limit == 'inf') else float(sim_time_limit)
+    values['no_of_simulations_planned'] = int(no_of_simulations_planned)
+    values['setup_at']                  = time.time()
+    register_in_results_index(path_to_root, values)
+
+def register_processed_results_in_results_index(path_to_root, processed_data, sim_time_limit, no_of_simulations, no_of_finished_simulations, latest_simulation_change, path_to_results, path_to_excel, end_recording_time, KMC_setup_data_filename='KMC_setup_data.ekmc'):
+    """
+    This method will register the results of a root in the results index once it has been processed.
+
+    Parameters
+    ----------
+    path_to_root : str.
+        This is the path to the root.
+    processed_data : tuple
+        These are the results of the root, as given by collect_save_and_provide_data_from_simulation in Process_Results.py.
+    sim_time_limit : float or 'inf'
+        This is the simulated time limit the simulations are run to (in ps).
+    no_of_simulations : int
+        This is the number of Sims that were processed.
+    no_of_finished_simulations : int
+        This is the number of Sims that have finished.
+    latest_simulation_change : float
+        This is the latest time that a kMC_sim.txt file in the root was changed.
+    path_to_results : str.
+        This is the folder that the detailed results of the root were saved to.
+    path_to_excel : str.
+        This is the excel spreadsheet that the results of the root were saved to.
+    end_recording_time : float
+        This is the time (in ps) that the data was time-averaged up to.
+    KMC_setup_data_filename : str.
+        This is the name of the KMC_setup_data.ekmc file in the root.
+    """
+
+    # First, obtain the results of the root.
+    root, time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci, begin_recording_time, endtime, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies = processed_data
+
+    # Second, gather the values to record in the results index.
+    values = read_setup_parameters(path_to_root+'/'+KMC_setup_data_filename)
+    values['sim_time_limit']             = None if (sim_time_limit == 'inf') else float(sim_time_limit)
+    values['no_of_simulations']          = int(no_of_simulations)
+    values['no_of_finished_simulations'] = int(no_of_finished_simulations)
+    values['latest_simulation_change']   = float(latest_simulation_change)
+    values['processed_at']               = time.time()
+    values['begin_recording_time']       = float(begin_recording_time)
+    values['end_recording_time']         = float(end_recording_time)
+    values['end_time']                   = float(endtime)
+    values['energy']                     = float(time_average_energy)
+    values['energy_sd']                  = float(time_average_energy_sd)
+    values['energy_ci']                  = float(time_average_energy_ci)
+    values['diffusion']                  = float(time_average_diffusion)
+    values['diffusion_sd']               = float(time_average_diffusion_sd)
+    values['diffusion_ci']               = float(time_average_diffusion_ci)
+    values['diffusion_tensor']           = json.dumps(np.asarray(time_average_diffusion_tensor, dtype=float).tolist())
+    values['diffusion_tensor_ci']        = json.dumps(np.asarray(time_average_diffusion_tensor_ci, dtype=float).tolist())
+    for index, eigenvalue_name in enumerate(['eigenvalue_major', 'eigenvalue_minor_1', 'eigenvalue_minor_2']):
+        values[eigenvalue_name]       = float(np.real(time_average_eigenvalues_of_diffusion_tensor[index]))
+        values[eigenvalue_name+'_ci'] = float(np.real(time_average_eigenvalues_of_diffusion_tensor_ci[index]))
+    values['path_to_results']            = os.path.abspath(path_to_results)
+    values['path_to_excel']              = os.path.abspath(path_to_excel)
+
+    # Third, record the values in the results index.
+    register_in_results_index(path_to_root, values)
+
+def register_in_results_index(path_to_root, values):
+    """
+    This method will record values for a root in the results index. A problem with the results index is reported, but does not stop the setup or processing of the root.
+
+    Parameters
+    ----------
+    path_to_root : str.
+        This is the path to the root.
+    values : dict.
+        These are the values of the columns to record for this root.
+    """
+    try:
+        update_root_in_results_index(path_to_root, values)
+    except sqlite3.Error as exception:
+        print('Warning: Could not register '+str(path_to_root)+' in the results index ('+str(get_results_index_path())+'): '+str(exception))
+
+def get_latest_simulation_change(path_to_root, sim_numbers):
+    """
+    This method will obtain the latest time that a kMC_sim.txt file in the root was changed.
+
+    Parameters
+    ----------
+    path_to_root : str.
+        This is the path to the root.
+    sim_numbers : list of int
+        These are the numbers of the Sims in the root.
+
+    Returns
+    -------
+    latest_simulation_change : float
+        This is the latest modification time of the kMC_sim.txt files in the root. 0.0 is given if there are none.
+    """
+    latest_simulation_change = 0.0
+    for sim_number in sim_numbers:
+        try:
+            latest_simulation_change = max(latest_simulation_change, os.stat(path_to_root+'/Sim'+str(sim_number)+'/kMC_sim.txt').st_mtime)
+        except FileNotFoundError:
+            pass
+    return latest_simulation_change
+
+def is_root_stale(row):
+    """
+    This method will determine if the results of a root in the results index are stale, meaning that Sims have been added or changed since the root was last processed.
+
+    Parameters
+    ----------
+    row : sqlite3.Row
+        This is the row of the root in the results index.
+
+    Returns
+    -------
+    True if the root needs to be processed again. False if not.
+    """
+    if row['processed_at'] is None:
+        return True
+    if not os.path.isdir(row['path']):
+        return False
+    sim_numbers = [int(dirname.replace('Sim','')) for dirname in os.listdir(row['path']) if (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+    if not (len(sim_numbers) == row['no_of_simulations']):
+        return True
+    return get_latest_simulation_change(row['path'], sim_numbers) > row['latest_simulation_change']
@@ -0,0 +1,189 @@
+"""
+run_manifest_file.py, Geoffrey Weal, 19/10/26
+
+This script is designed to write and read the run manifest (ekmc_manifest.json) of a study.
+
+The run manifest is written by EKMC_Setup into the folder that the setup script is run from. It records each system (root) that has
+been set up, along with its submit scripts, the number of simulations in the root (given in the Sim1, Sim2, ... folders), and the
+files each simulation is expected to write. The EKMC programs (such as ``EKMC submit``, ``EKMC did_complete``, ``EKMC process_results``
+and ``EKMC process_steps``) use the run manifest to find the roots to look at, rather than walking through every folder (including
+every Sim folder). If no run manifest is found, these programs walk through the folders as before.
+"""
+import os, json
+
+manifest_filename = 'ekmc_manifest.json'
+
+def read_manifest(path_to_manifest_folder):
+	"""
+	This method will read the run manifest in a folder.
+
+	Parameters
+	----------
+	path_to_manifest_folder : str.
+		This is the folder that contains the run manifest.
+
+	Returns
+	-------
+	manifest : dict.
+		This is the run manifest. This is empty if there is no run manifest in the folder.
+	"""
+	path_to_manifest = path_to_manifest_folder+'/'+manifest_filename
+	if not os.path.exists(path_to_manifest):
+		return {'roots': {}}
+	with open(path_to_manifest, 'r') as manifestJSON:
+		return json.load(manifestJSON)
+
+def save_manifest(path_to_manifest_folder, manifest):
+	"""
+	This method will save the run manifest to a folder. The run manifest is written to a temporary file first, and then renamed.
+
+	Parameters
+	----------
+	path_to_manifest_folder : str.
+		This is the folder to save the run manifest to.
+	manifest : dict.
+		This is the run manifest.
+	"""
+	path_to_manifest = path_to_manifest_folder+'/'+manifest_filename
+	with open(path_to_manifest+'.tmp', 'w') as manifestJSON:
+		json.dump(manifest, manifestJSON, indent=4, sort_keys=True)
+	os.replace(path_to_manifest+'.tmp', path_to_manifest)
+
+def add_root_to_manifest(path_to_manifest_folder, path_to_root, submit_scripts, no_of_simulations, expected_outputs, KMC_setup_data_filename='KMC_setup_data.ekmc', Run_EKMC_filename='Run_EKMC.py'):
+	"""
+	This method will add a root to the run manifest, or update it if it is already in the run manifest.
+
+	Parameters
+	----------
+	path_to_manifest_folder : str.
+		This is the folder that contains the run manifest.
+	path_to_root : str.
+		This is the path to the root.
+	submit_scripts : list of str.
+		These are the names of the submit scripts in the root.
+	no_of_simulations : int
+		This is the number of simulations in the root. These are run in the Sim1 to Sim<no_of_simulations> folders.
+	expected_outputs : list of str.
+		These are the files that each simulation is expected to write in its Sim folder.
+	KMC_setup_data_filename : str.
+		This is the name of the KMC_setup_data.ekmc file in the root.
+	Run_EKMC_filename : str.
+		This is the name of the Run_EKMC.py file in the root.
+	"""
+	manifest = read_manifest(path_to_manifest_folder)
+	root_name = os.path.relpath(os.path.abspath(path_to_root), os.path.abspath(path_to_manifest_folder))
+	manifest['roots'][root_name] = {'KMC_setup_data': KMC_setup_data_filename, 'Run_EKMC': Run_EKMC_filename, 'submit_scripts': list(submit_scripts), 'no_of_simulations': int(no_of_simulations), 'expected_outputs': list(expected_outputs)}
+	save_manifest(path_to_manifest_folder, manifest)
+
+def update_root_in_manifest(path_to_root, no_of_simulations=None, submit_scripts_to_add=()):
+	"""
+	This method will update the number of simulations and the submit scripts of a root in the run manifest, if the root is in a run manifest.
+
+	Parameters
+	----------
+	path_to_root : str.
+		This is the path to the root.
+	no_of_simulations : int or None
+		This is the new number of simulations in the root. If None, this is not changed. Default: None
+	submit_scripts_to_add : list of str.
+		These are the names of new submit scripts in the root.
+	"""
+	path_to_manifest_folder = find_manifest(path_to_root)
+	if path_to_manifest_folder is None:
+		return
+	manifest = read_manifest(path_to_manifest_folder)
+	root_name = os.path.relpath(os.path.abspath(path_to_root), os.path.abspath(path_to_manifest_folder))
+	if root_name not in manifest['roots']:
+		return
+	if no_of_simulations is not None:
+		manifest['roots'][root_name]['no_of_simulations'] = int(no_of_simulations)
+	manifest['roots'][root_name]['submit_scripts'] += [submit_script for submit_script in submit_scripts_to_add if (submit_script not in manifest['roots'][root_name]['submit_scripts'])]
+	save_manifest(path_to_manifest_folder, manifest)
+
+def find_manifest(path='.'):
+	"""
+	This method will find the run manifest in the folder given, or in any folder above it.
+
+	Parameters
+	----------
+	path : str.
+		This is the folder to begin looking for the run manifest from.
+
+	Returns
+	-------
+	path_to_manifest_folder : str. or None
+		This is the folder that contains the run manifest. None is given if no run manifest was found.
+	"""
+	path_to_folder = os.path.abspath(path)
+	while True:
+		if os.path.exists(path_to_folder+'/'+manifest_filename):
+			return path_to_folder
+		path_to_parent_folder = os.path.dirname(path_to_folder)
+		if path_to_parent_folder == path_to_folder:
+			return None
+		path_to_folder = path_to_parent_folder
+
+def get_roots_from_manifest(path='.'):
+	"""
+	This method will obtain the roots in the run manifest that are in the folder given (or in folders below it).
+
+	Parameters
+	----------
+	path : str.
+		This is the folder to obtain the roots in.
+
+	Returns
+	-------
+	roots : list of (str., dict.) or None
+		These are the path to each root (given relative to path, in the same way as os.walk(path) would give it) and its details in the run manifest. None is given if no run manifest was found, or if the run manifest has no roots in path.
+	"""
+	path_to_manifest_folder = find_manifest(path)
+	if path_to_manifest_folder is None:
+		return None
+	roots = []
+	for root_name, root_details in sorted(read_manifest(path_to_manifest_folder)['roots'].items()):
+		path_to_root_from_path = os.path.relpath(os.path.join(path_to_manifest_folder, root_name), os.path.abspath(path))
+		if (path_to_root_from_path == '..') or path_to_root_from_path.startswith('../'):
+			continue
+		roots.append((path if (path_to_root_from_path == '.') else os.path.join(path, path_to_root_from_path), root_details))
+	if len(roots) == 0:
+		return None
+	return roots
+
+def walk_roots(path='.'):
+	"""
+	This method will give the roots to look at in the same way as os.walk(path) does, but only giving the roots in the run manifest.
+
+	Only the contents of each root are listed, rather than every folder below path. If no run manifest is found, os.walk(path) is given instead.
+
+	Parameters
+	----------
+	path : str.
+		This is the folder to obtain the roots in.
+
+	Returns
+	-------
+	An iterator of (root, dirnames, filenames), as given by os.walk.
+	"""
+	roots = get_roots_from_manifest(path)
+	if roots is None:
+		return os.walk(path)
+	return list_roots([root for root, root_details in roots])
+
+def list_roots(roots):
+	"""
+	This method will list the contents of each root, giving (root, dirnames, filenames) as os.walk does. Roots that no longer exist are skipped.
+
+	Parameters
+	----------
+	roots : list of str.
+		These are the paths to the roots.
+	"""
+	for root in roots:
+		try:
+			entries = list(os.scandir(root))
+		except FileNotFoundError:
+			continue
+		dirnames  = [entry.name for entry in entries if entry.is_dir()]
+		filenames = [entry.name for entry in entries if not entry.is_dir()]
+		yield root, dirnames, filenames
@@ -0,0 +1,182 @@
+'''
+Adaptive_Ensemble_Sizing.py, Geoffrey Weal, 19/10/26
+
+This program will determine how many more simulations each system needs for the confidence interval of its diffusion coefficient to
+reach a target relative error, and will create and submit only those simulations.
+
+This is designed to be run again each time the simulations that were submitted have finished, until every system has reached the
+target relative error (or the maximum number of simulations). Systems with a small variance stop early, so the simulations are spent
+on the systems that are noisy.
+'''
+import os
+from subprocess import run as subprocess_run
+from subprocess import PIPE, TimeoutExpired
+from tqdm.contrib.concurrent import process_map
+
+from EKMC.EKMC_Setup.mass_submission_information_file                                          import save_mass_submission_information, read_mass_submission_information
+from EKMC.EKMC_Setup.Create_submitSL_slurm_Main                                                import make_mass_submitSL_for_additional_sims
+from EKMC.EKMC_Setup.run_manifest_file                                                         import update_root_in_manifest
+from EKMC.Postprocessing_Programs.Process_Results                                              import get_roots_to_process, get_cpu_budget_for_roots, collect_save_and_provide_data_from_simulation, collect_save_and_provide_data_from_simulation_single_input
+from EKMC.Postprocessing_Programs.Adaptive_Ensemble_Sizing_methods.get_no_of_simulations_needed import get_relative_errors, get_no_of_simulations_needed, get_simulation_progress
+
+class CLICommand:
+    """Will submit more exciton kinetic monte carlo simulations for each system until a target relative error is reached.
+    """
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('target_relative_error', type=float, help='This is the relative error (the confidence interval over the absolute value) wanted for the time-averaged diffusion coefficient of each system. The energy is not used, as its relative error depends on where the zero of energy is taken. For example, 0.05 for a 5%% relative error.')
+        parser.add_argument('no_of_cpus', nargs='?', type=int, default=1, help='This is the number of CPUs to use to process data. Default: 1')
+        parser.add_argument('--begin_recording_time', type=float, default=500.0, help='This is the time (in ps) to begin time-averaging data from. Default: 500 ps')
+        parser.add_argument('--end_recording_time', type=float, default=1000.0, help='This is the time (in ps) to sample and time-average data up to. Default: 1000 ps')
+        parser.add_argument('--max_no_of_simulations', type=int, default=None, help='This is the maximum number of simulations to perform for each system. By default, there is no maximum.')
+        parser.add_argument('--no_submit', action='store_true', help='Make the submit files for the extra simulations, but do not submit them to slurm.')
+        parser.add_argument('--no_cache', action='store_true', help='Do not use or write the cache files (kMC_sim_cache.npz and kMC_sim_sampled_cache.npz) in each Sim folder.')
+
+    @staticmethod
+    def run(arguments):
+        Run_method(arguments.target_relative_error, no_of_cpus=arguments.no_of_cpus, begin_recording_time=arguments.begin_recording_time, end_recording_time=arguments.end_recording_time, max_no_of_simulations=arguments.max_no_of_simulations, submit=(not arguments.no_submit), use_cache=(not arguments.no_cache))
+
+def Run_method(target_relative_error, no_of_cpus=1, begin_recording_time=500.0, end_recording_time=1000.0, max_no_of_simulations=None, submit=True, use_cache=True):
+    """
+    This method will determine how many more simulations each system needs to reach target_relative_error, and create and submit them.
+
+    Parameters
+    ----------
+    target_relative_error : float
+        This is the relative error wanted for the time-averaged diffusion coefficient of each system.
+    no_of_cpus : int.
+        This is the number of CPUs to use to process data.
+    begin_recording_time : float
+        This is the time (in ps) to begin time-averaging data from.
+    end_recording_time : float
+        This is the time (in ps) to sample and time-average data up to.
+    max_no_of_simulations : int or None
+        This is the maximum number of simulations to perform for each system. If None, there is no maximum. Default: None
+    submit : bool.
+        If True, the submit files for the extra simulations are submitted to slurm. Default: True
+    use_cache : bool.
+        This indicates if the cache files in each Sim folder should be used and written. Default: True
+    """
+
+    # First, check the inputs.
+    if not (target_relative_error > 0.0):
+        raise Exception('Error: target_relative_error must be greater than 0. target_relative_error = '+str(target_relative_error))
+
+    # Second, obtain the roots that contain the EKMC simulations, and only keep the roots where all the simulations submitted so far have finished.
+    roots_ready = []
+    summary = {}
+    for root_details in get_roots_to_process():
+        root, sim_time_limit = root_details[0], root_details[7]
+        # 2.1: Roots set up before the mass submission information was saved can not be given more simulations, so skip these roots.
+        try:
+            job_name, temp_folder_path, mass_submission_information = read_mass_submission_information(root)
+        except Exception as exception:
+            print('==============================================================================')
+            print(str(exception))
+            print('In: '+str(root))
+            print('==============================================================================')
+            summary[root] = 'Skipped, as its mass submission information could not be read. Check this.'
+            continue
+        # 2.2: Only keep the roots where all the simulations submitted so far have finished.
+        sim_numbers, no_of_finished_simulations = get_simulation_progress(root, min(end_recording_time, sim_time_limit))
+        no_of_planned_simulations = max([int(mass_submission_information['no_of_simulations'])] + sim_numbers)
+        if no_of_finished_simulations < no_of_planned_simulations:
+            summary[root] = 'Waiting for simulations to finish ('+str(no_of_finished_simulations)+' of '+str(no_of_planned_simulations)+' finished).'
+            continue
+        roots_ready.append((root_details, no_of_planned_simulations))
+
+    # Third, process the simulations of the roots that are ready, in the same way as ``EKMC process_results``.
+    print('Time-averaging data between begin_recording_time = '+str(begin_recording_time)+' ps and end_recording_time = '+str(end_recording_time)+' ps')
+    no_of_roots_at_once, no_of_cpus_per_root = get_cpu_budget_for_roots(no_of_cpus, len(roots_ready))
+    inputs = [tuple(root_details) + (None, begin_recording_time, end_recording_time, no_of_cpus_per_root, use_cache) for root_details, no_of_planned_simulations in roots_ready]
+    if no_of_roots_at_once <= 1:
+        processed_data = [collect_save_and_provide_data_from_simulation(*input_datum) for input_datum in inputs]
+    else:
+        processed_data = process_map(collect_save_and_provide_data_from_simulation_single_input, inputs, max_workers=no_of_roots_at_once, chunksize=1, unit=' folders', desc='Processing folders')
+
+    # Fourth, for each root, determine how many more simulations are needed, and make and submit them.
+    for (root_details, no_of_simulations), processed_datum in zip(roots_ready, processed_data):
+        root = root_details[0]
+
+        # 4.1: Obtain the relative error of the diffusion coefficient, and the number of simulations needed for it to reach target_relative_error.
+        root, time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci = processed_datum[:7]
+        relative_errors = get_relative_errors(time_average_diffusion, time_average_diffusion_ci)
+        relative_errors_string = ', '.join([name+': '+str(round(100.0*relative_error, 3))+'%' for name, relative_error in relative_errors.items()])
+        no_of_simulations_needed = get_no_of_simulations_needed(no_of_simulations, max(relative_errors.values()), target_relative_error, max_no_of_simulations=max_no_of_simulations)
+        if no_of_simulations_needed is None:
+            summary[root] = 'Could not estimate the number of simulations needed (relative errors: '+relative_errors_string+'). Check this.'
+            continue
+        no_of_extra_simulations = no_of_simulations_needed - no_of_simulations
+        if no_of_extra_simulations == 0:
+            summary[root] = 'Finished with '+str(no_of_simulations)+' simulations (relative errors: '+relative_errors_string+').'
+            continue
+
+        # 4.2: Make the submit files for the extra simulations, using the same slurm settings as the original simulations.
+        job_name, temp_folder_path, mass_submission_information = read_mass_submission_information(root)
+        submit_filenames = make_additional_submit_files(root, job_name, temp_folder_path, mass_submission_information, no_of_simulations+1, no_of_extra_simulations)
+
+        # 4.3: Record the new number of simulations for this root, including in the run manifest.
+        mass_submission_information['no_of_simulations'] = no_of_simulations_needed
+        save_mass_submission_information(root, job_name, temp_folder_path, mass_submission_information)
+        update_root_in_manifest(root, no_of_simulations=no_of_simulations_needed, submit_scripts_to_add=submit_filenames)
+
+        # 4.4: Submit the extra simulations to slurm.
+        message = 'Made '+str(no_of_extra_simulations)+' more simulations (Sim'+str(no_of_simulations+1)+' to Sim'+str(no_of_simulations_needed)+', relative errors: '+relative_errors_string+').'
+        if submit:
+            message += ' ' + submit_to_slurm(root, submit_filenames)
+        else:
+            message += ' Submit with: '+', '.join(submit_filenames)
+        summary[root] = message
+
+    # Fifth, print a summary of each root.
+    print('=================================================================================')
+    print('Target relative error: '+str(round(100.0*target_relative_error, 3))+'%')
+    for root in sorted(summary.keys()):
+        print(str(root)+': '+str(summary[root]))
+    print('=================================================================================')
+
+# ============================================================================================================================================================================================================
+
+def make_additional_submit_files(root, job_name, temp_folder_path, mass_submission_information, first_sim_no, no_of_simulations):
+    """
+    This method will make the submit files for running the simulations Sim<first_sim_no> to Sim<first_sim_no + no_of_simulations - 1>, using the same slurm settings given in mass_submission_information.
+
+    Returns
+    -------
+    submit_filenames : list of str.
+        These are the names of the submit files that were made.
+    """
+    slurm_settings = {}
+    slurm_settings['project']          = mass_submission_information.get('project',None)
+    slurm_settings['time']             = mass_submission_information['time']
+    slurm_settings['cpus_per_task']    = mass_submission_information.get('cpus_per_task',1)
+    slurm_settings['mem']              = mass_submission_information.get('mem',None)
+    slurm_settings['mem_per_cpu']      = mass_submission_information.get('mem_per_cpu',None)
+    slurm_settings['partition']        = mass_submission_information['partition']
+    slurm_settings['constraint']       = mass_submission_information.get('constraint',None)
+    slurm_settings['email']            = mass_submission_information.get('email', '')
+    slurm_settings['python_version']   = mass_submission_information.get('python_version', 'Python/3.9.5')
+    slurm_settings['gcc_version']      = mass_submission_information.get('gcc_version', None)
+    slurm_settings['gcccore_version']  = mass_submission_information.get('gcccore_version', 'GCCcore/10.3.0')
+    slurm_settings['binutils_version'] = mass_submission_information.get('binutils_version', None)
+    return make_mass_submitSL_for_additional_sims(root, temp_folder_path, job_name, first_sim_no, no_of_simulations, **slurm_settings)
+
+def submit_to_slurm(root, submit_filenames):
+    """
+    This method will submit the submit files in root to slurm.
+
+    Returns
+    -------
+    message : str.
+        This message gives the slurm job numbers of the submitted files, or the problem found when submitting them.
+    """
+    job_numbers = []
+    for submit_filename in submit_filenames:
+        try:
+            proc = subprocess_run(['sbatch', submit_filename], cwd=root, stdout=PIPE, stderr=PIPE, timeout=(2*60))
+        except (TimeoutExpired, FileNotFoundError) as exception:
+            return 'Error in submitting '+str(submit_filename)+' to slurm: '+str(exception)+'. Submit the remaining files by hand.'
+        if not (proc.returncode == 0):
+            return 'Error in submitting '+str(submit_filename)+' to slurm: '+proc.stderr.decode('utf-8').strip()+'. Submit the remaining files by hand.'
+        job_numbers.append(proc.stdout.decode('utf-8').replace('Submitted batch job','').strip())
+    return 'Submitted to slurm: '+', '.join(job_numbers)
@@ -0,0 +1,101 @@
+"""
+get_no_of_simulations_needed.py, Geoffrey Weal, 19/10/26
+
+This script is designed to estimate the number of simulations needed in an ensemble to reach a target relative error in the
+time-averaged diffusion coefficient.
+"""
+import os
+import numpy as np
+from math import ceil
+
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file import finished_state
+from EKMC.EKMC_Programs.Did_Complete_Main                  import get_simulation_states
+
+def get_relative_errors(time_average_diffusion, time_average_diffusion_ci):
+    """
+    This method is designed to obtain the relative error of the time-averaged diffusion coefficient, given as the half-width of its confidence interval over its absolute value.
+
+    The energy is not used, as its relative error depends on where the zero of energy is taken.
+
+    Parameters
+    ----------
+    time_average_diffusion : float
+        This is the time-averaged diffusion coefficient of the ensemble (in cm^2/s).
+    time_average_diffusion_ci : float
+        This is the confidence interval of the time-averaged diffusion coefficient (in cm^2/s).
+
+    Returns
+    -------
+    relative_errors : dict.
+        This contains the relative error of the diffusion coefficient ('D'). This is nan if the diffusion coefficient is zero.
+    """
+    relative_errors = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_errors['D'] = float(np.float64(time_average_diffusion_ci) / abs(np.float64(time_average_diffusion)))
+    return relative_errors
+
+def get_no_of_simulations_needed(no_of_simulations, relative_error, target_relative_error, max_no_of_simulations=None):
+    """
+    This method is designed to estimate the number of simulations needed for the relative error to reach target_relative_error.
+
+    The relative error is assumed to decrease as 1/sqrt(N), where N is the number of simulations in the ensemble.
+
+    Parameters
+    ----------
+    no_of_simulations : int
+        This is the number of simulations in the ensemble that the relative error was obtained from.
+    relative_error : float
+        This is the current relative error.
+    target_relative_error : float
+        This is the relative error that is wanted.
+    max_no_of_simulations : int or None
+        This is the maximum number of simulations to perform for this system. If None, there is no maximum. Default: None
+
+    Returns
+    -------
+    no_of_simulations_needed : int or None
+        This is the number of simulations needed in total (at least no_of_simulations). None is given if this could not be estimated.
+    """
+
+    # First, check that the relative error can be used.
+    if not (target_relative_error > 0.0):
+        raise Exception('Error: target_relative_error must be greater than 0. target_relative_error = '+str(target_relative_error))
+    if (no_of_simulations < 1) or (not np.isfinite(relative_error)):
+        return None
+
+    # Second, estimate the number of simulations needed, assuming the relative error decreases as 1/sqrt(N).
+    no_of_simulations_needed = max(int(ceil(no_of_simulations * (relative_error / target_relative_error) ** 2.0)), no_of_simulations)
+
+    # Third, do not give more than max_no_of_simulations simulations.
+    if max_no_of_simulations is not None:
+        no_of_simulations_needed = max(min(no_of_simulations_needed, max_no_of_simulations), no_of_simulations)
+
+    # Fourth, return no_of_simulations_needed
+    return no_of_simulations_needed
+
+def get_simulation_progress(root, time_needed, no_of_threads=16):
+    """
+    This method is designed to obtain the Sim folders in root, and how many of them have run for at least time_needed.
+
+    The state of each simulation is read from its status file in the same way as ``EKMC did_complete``.
+
+    Parameters
+    ----------
+    root : str.
+        This is the folder that contains the Sim folders.
+    time_needed : float
+        This is the simulated time that each simulation needs to have run for (in ps).
+    no_of_threads : int
+        This is the number of threads to read the status files with. Default: 16
+
+    Returns
+    -------
+    sim_numbers : list of int
+        These are the numbers of the Sim folders in root.
+    no_of_finished_simulations : int
+        This is the number of simulations that have run for at least time_needed (or have finished).
+    """
+    sim_numbers = sorted([int(dirname.replace('Sim','')) for dirname in os.listdir(root) if (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit() and os.path.isdir(root+'/'+dirname))])
+    simulation_states = get_simulation_states([(root, sim_number) for sim_number in sim_numbers], no_of_threads=no_of_threads, return_times=True).get(root, {})
+    no_of_finished_simulations = sum([1 for state, time in simulation_states.values() if ((state == finished_state) or (time >= time_needed))])
+    return sim_numbers, no_of_finished_simulations
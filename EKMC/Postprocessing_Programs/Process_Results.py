@@ -8,16 +8,24 @@ import numpy as np
 from tqdm import tqdm
 from ase.io import read
 import multiprocessing as mp
+from tqdm.contrib.concurrent import process_map
 from SUMELF import make_folder, remove_folder
 
 from EKMC.Postprocessing_Programs.Process_Results_methods.split_string_by_floats                         import split_string_by_floats
-from EKMC.Postprocessing_Programs.Process_Results_methods.collect_data                                   import collect_data
 from EKMC.Postprocessing_Programs.Process_Results_methods.process_and_save_average_hopping_probabilities import process_and_save_average_hopping_probabilities
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data                                   import process_data
-from EKMC.Postprocessing_Programs.Process_Results_methods.save_data_and_plot_figures                     import save_data_and_plot_figures
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data                                   import collect_and_accumulate_simulations, get_times_to_sample, process_ensemble_accumulator
+from EKMC.Postprocessing_Programs.Process_Results_methods.partial_accumulators                           import partials_foldername, get_shard_from_environment, get_partials_folder, save_partial_accumulators, load_and_merge_partial_accumulators
+from EKMC.Postprocessing_Programs.Process_Results_methods.hop_probability_accumulator                    import get_hop_neighbour_list
+from EKMC.Postprocessing_Programs.Process_Results_methods.save_data_and_plot_figures                     import save_data_and_plot_figures, save_ensemble_statistics
 from EKMC.Postprocessing_Programs.Process_Results_methods.time_average_data                              import time_average_data
 from EKMC.Postprocessing_Programs.Process_Results_methods.save_time_averaged_data                        import save_time_averaged_data
 from EKMC.Postprocessing_Programs.Process_Results_methods.save_to_excel_spreadsheet                      import save_to_excel_spreadsheet
+from EKMC.Postprocessing_Programs.Process_Results_methods.plot_figures                                   import plot_figures, get_folders_to_plot
+from EKMC.EKMC_Setup.results_index                                                                      import register_processed_results_in_results_index, get_latest_simulation_change
+from EKMC.EKMC_Programs.Did_Complete_Main                                                               import get_simulation_states
+from EKMC.EKMC.Run_EKMC_setup_files.simulation_status_file                                             import finished_state
+from EKMC.Postprocessing_Programs.Process_Results_methods.profiling                                      import StageProfiler, save_profile, load_profile, print_profile_summary
+from EKMC.EKMC_Setup.run_manifest_file                                                                  import walk_roots
 
 class CLICommand:
     """Will determine which exciton kinetic monte carlo jobs have run for the time you desire.
@@ -26,6 +34,20 @@ class CLICommand:
     def add_arguments(parser):
         parser.add_argument('no_of_cpus', nargs='*', help='This is the number of CPUs to use to process data.')
         parser.add_argument('path_to_crystal_file', nargs='*', help='This is the crystal to add to Diffusion Diagonalisation Eigenvector Analysis.')
+        parser.add_argument('--begin_recording_time', type=float, default=500.0, help='This is the time (in ps) to begin time-averaging data from. The hopping probabilities are also obtained from the steps from this time. If your simulations began from equilibrated starting molecules (starting_molecule = "equilibrium"), this can be set to 0, in which case the data is time-averaged from the first sampled time after 0 ps (as the diffusion coefficient is not defined at 0 ps). Default: 500 ps')
+        parser.add_argument('--end_recording_time', type=float, default=1000.0, help='This is the time (in ps) to sample and time-average data up to. Default: 1000 ps')
+        parser.add_argument('--max_roots_at_once', type=int, default=None, help='This is the maximum number of folders (each containing a KMC_setup_data.ekmc file and Sim folders) to process at the same time. The CPUs given are shared between these folders. By default, as many folders as there are CPUs are processed at the same time.')
+        parser.add_argument('--no_plots', '--no-plots', action='store_true', help='Only save the data (text files, xyz files and excel spreadsheet), and do not plot any figures. The figures can be plotted later with --plots_only.')
+        parser.add_argument('--plots_only', action='store_true', help='Do not process any simulations, but plot the figures from the data already saved in the '+str(data_foldername)+' folder.')
+        parser.add_argument('--max_points_per_plot', type=int, default=None, help='This is the maximum number of points to plot for each line in a figure. By default, all points are plotted.')
+        parser.add_argument('--no_cache', action='store_true', help='Do not use or write the cache files (kMC_sim_cache.npz and kMC_sim_sampled_cache.npz) in each Sim folder. By default, the data of each Sim is read from its cache file if its kMC_sim.txt file has not changed since the cache file was written, so only new or changed Sims are read.')
+        parser.add_argument('--multiple_time_origins', action='store_true', help='Average the displacement squared values and displacement tensors of each simulation over every sampled time origin, rather than only measuring them from t = 0 ps. This gives smoother diffusion coefficients for the same number of simulations. The average displacements and energies are still measured from t = 0 ps.')
+        parser.add_argument('--read_up_to_end_recording_time', action='store_true', help='Only read each kMC_sim.txt file up to end_recording_time, using the time index file (kMC_sim_time_index.txt) of each Sim to find where to stop reading. This is faster when the simulations have been run for much longer than end_recording_time. The time simulated, time steps and hopping probabilities are then only given up to end_recording_time. Sims without a time index file are read in full.')
+        parser.add_argument('--profile', action='store_true', help='Record the wall time, CPU time and peak memory (RSS) of each stage of processing for each folder. These are saved to '+str(data_foldername)+'/EKMC_profile.json and EKMC_profile.csv.')
+        parser.add_argument('--map', action='store_true', help='Only process a shard of the Sims in each folder, and save them as partial accumulators in '+str(partials_foldername)+'. This is designed to be run as each task of a slurm array (for example, sbatch --array=0-99), where the shard is given by the slurm array task. Once all the shards have finished, run process_results with --reduce to obtain the usual data, figures and Excel spreadsheet.')
+        parser.add_argument('--shard_index', type=int, default=None, help='This is the shard to process with --map, from 0 to no_of_shards-1. Default: SLURM_ARRAY_TASK_ID - SLURM_ARRAY_TASK_MIN')
+        parser.add_argument('--no_of_shards', type=int, default=None, help='This is the number of shards to split the Sims in each folder between with --map. Default: SLURM_ARRAY_TASK_COUNT')
+        parser.add_argument('--reduce', action='store_true', help='Merge the partial accumulators in '+str(partials_foldername)+' made by all the shards of process_results --map, and save the usual data, figures and Excel spreadsheet from them. Use the same --begin_recording_time, --end_recording_time and --multiple_time_origins as given with --map.')
 
     @staticmethod
     def run(arguments):
@@ -48,29 +70,127 @@ class CLICommand:
         else:
             path_to_crystal_file = None
 
-        # Third, run the processing program.
-        Run_method(path_to_crystal_file, no_of_cpus=no_of_cpus)
+        # Third, obtain the shard to process, if running as a shard of process_results --map.
+        if arguments.map and arguments.reduce:
+            exit('Error: Only one of --map and --reduce can be given.')
+        map_shard = get_shard_from_environment(arguments.shard_index, arguments.no_of_shards) if arguments.map else None
+
+        # Fourth, run the processing program.
+        Run_method(path_to_crystal_file, no_of_cpus=no_of_cpus, begin_recording_time=arguments.begin_recording_time, end_recording_time=arguments.end_recording_time, use_cache=(not arguments.no_cache), max_roots_at_once=arguments.max_roots_at_once, make_plots=(not arguments.no_plots), plots_only=arguments.plots_only, max_points_per_plot=arguments.max_points_per_plot, profile=arguments.profile, multiple_time_origins=arguments.multiple_time_origins, read_up_to_end_recording_time=arguments.read_up_to_end_recording_time, map_shard=map_shard, reduce=arguments.reduce)
 
 KMC_setup_data_filename = 'KMC_setup_data.ekmc'
 data_foldername = 'EKMC_Ensemble_Data_Folder'
-def Run_method(path_to_crystal_file=None, no_of_cpus=1):
+def Run_method(path_to_crystal_file=None, no_of_cpus=1, begin_recording_time=500.0, end_recording_time=1000.0, use_cache=True, max_roots_at_once=None, make_plots=True, plots_only=False, max_points_per_plot=None, profile=False, multiple_time_origins=False, read_up_to_end_recording_time=False, map_shard=None, reduce=False):
     """
     This method will create a number of plots for checking the simulations performed, as well as to obtain data about your KMC simulation.
+
+    Parameters
+    ----------
+    path_to_crystal_file : str. or None
+        This is the crystal to add to Diffusion Diagonalisation Eigenvector Analysis.
+    no_of_cpus : int.
+        This is the number of CPUs to use to process data.
+    begin_recording_time : float
+        This is the time (in ps) to begin time-averaging data from. This can be set to 0 ps if simulations began from equilibrated starting molecules. 
+    end_recording_time : float
+        This is the time (in ps) to sample and time-average data up to.
+    use_cache : bool.
+        This indicates if the cache files in each Sim folder should be used and written. Default: True
+    max_roots_at_once : int or None
+        This is the maximum number of roots to process at the same time. The no_of_cpus CPUs are shared between these roots. If None, up to no_of_cpus roots are processed at the same time. Default: None
+    make_plots : bool.
+        This indicates if the figures should be plotted once all the roots have been processed. Default: True
+    plots_only : bool.
+        If True, no roots are processed, and the figures are plotted from the data already saved in data_foldername. Default: False
+    max_points_per_plot : int or None
+        This is the maximum number of points to plot for each line in a figure. If None, all points are plotted. Default: None
+    profile : bool.
+        If True, the wall time, CPU time and peak RSS of each stage is recorded for each root, and saved to data_foldername. Default: False
+    multiple_time_origins : bool.
+        If True, the displacement squared values and displacement tensors of each simulation are averaged over every sampled time origin. Default: False
+    read_up_to_end_recording_time : bool.
+        If True, each kMC_sim.txt file is only read up to end_recording_time, using the time index file of each Sim. Default: False
+    map_shard : tuple of ints or None
+        If given, this is the (shard_index, no_of_shards) of the Sims to process in each root. These are saved as partial accumulators in partials_foldername, rather than being saved as data. Default: None
+    reduce : bool.
+        If True, the partial accumulators of all the shards in partials_foldername are merged for each root, rather than reading the Sims. Default: False
     """
+    profiler = StageProfiler('process_results', enabled=profile)
+
+    # Zeroth, if only plotting figures, plot the figures from the data already saved in data_foldername.
+    if plots_only:
+        with profiler.stage('plot_figures'):
+            plot_figures(get_folders_to_plot(data_foldername), cpu_count=no_of_cpus, max_points_per_plot=max_points_per_plot)
+        if profile:
+            save_and_print_profile(profiler, [])
+        return
+
+    # First, obtain the roots that contain the EKMC simulations to process.
+    with profiler.stage('get_roots_to_process'):
+        roots = get_roots_to_process()
+
+    # 1.1: If processing a shard of the Sims, save the partial accumulators of the shard for each root, and finish.
+    if map_shard is not None:
+        map_roots(roots, map_shard, no_of_cpus=no_of_cpus, begin_recording_time=begin_recording_time, end_recording_time=end_recording_time, use_cache=use_cache, max_roots_at_once=max_roots_at_once, profile=profile, multiple_time_origins=multiple_time_origins, read_up_to_end_recording_time=read_up_to_end_recording_time)
+        return
+
+    # Second, Process the data from EKMC simulations, and gather the data to save to excel spreadsheet. 
+    #          The roots are processed at the same time in a process pool, where the CPUs are shared between the roots being processed.
+    print('Time-averaging data between begin_recording_time = '+str(begin_recording_time)+' ps and end_recording_time = '+str(end_recording_time)+' ps')
+    if multiple_time_origins:
+        print('The displacement squared values and displacement tensors of each simulation are averaged over every sampled time origin, so the times of these are lag times.')
+    no_of_roots_at_once, no_of_cpus_per_root = get_cpu_budget_for_roots(no_of_cpus, len(roots), max_roots_at_once=max_roots_at_once)
+    inputs = [(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_time, end_recording_time, no_of_cpus_per_root, use_cache, profile, multiple_time_origins, read_up_to_end_recording_time) for root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit in roots]
+    #          If reducing, the partial accumulators of the shards of each root are merged rather than reading the Sims.
+    with profiler.stage('process_roots'):
+        if no_of_roots_at_once <= 1:
+            data_for_excel = [(reduce_save_and_provide_data_from_partials if reduce else collect_save_and_provide_data_from_simulation)(*input_datum) for input_datum in inputs]
+        else:
+            print('Processing '+str(no_of_roots_at_once)+' folders at the same time, with '+str(no_of_cpus_per_root)+' CPU(s) for each folder.')
+            data_for_excel = process_map((reduce_save_and_provide_data_from_partials_single_input if reduce else collect_save_and_provide_data_from_simulation_single_input), inputs, max_workers=no_of_roots_at_once, chunksize=1, unit=' folders', desc='Processing folders')
+
+    # Third, save data to excel spreadsheet.
+    with profiler.stage('save_to_excel_spreadsheet'):
+        save_to_excel_spreadsheet(data_foldername, data_for_excel)
+
+    # Fourth, register the results of each root in the results index.
+    with profiler.stage('register_in_results_index'):
+        register_roots_in_results_index(roots, data_for_excel, end_recording_time, no_of_threads=max(no_of_cpus, 1))
+
+    # Fifth, plot the figures for all the roots together in a process pool.
+    if make_plots:
+        with profiler.stage('plot_figures'):
+            plot_figures([get_saving_folder(data_foldername, root[2::]) for root, *_ in roots], cpu_count=no_of_cpus, max_points_per_plot=max_points_per_plot)
 
-    # First, get the current path.
-    #current_path = os.getcwd()
+    # Sixth, save the profile of each stage for all roots together, if profiling.
+    if profile:
+        save_and_print_profile(profiler, [get_saving_folder(data_foldername, root[2::]) for root, *_ in roots])
+
+    # Report that everything finished successfully
+    #print('EKMC process_results finished successfully.')
+
+# ============================================================================================================================================================================================================
+
+def get_roots_to_process():
+    """
+    This method is designed to obtain the folders (roots) in the current directory that contain Sim folders to process.
+
+    Returns
+    -------
+    roots : list
+        This contains (root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit) for each root.
+    """
 
     roots = []
 
-    # First, for each subdirectory in the path
-    for root, dirs, files in os.walk('.'):
+    # First, for each subdirectory in the path. If there is a run manifest, only the roots it gives are looked in.
+    for root, dirs, files in walk_roots('.'):
 
         dirs.sort(key=lambda dirname: split_string_by_floats(dirname))
         files.sort(key=lambda filename: split_string_by_floats(filename))
 
-        # Second, if you are searching through data_foldername, move on.
-        if data_foldername in root:
+        # Second, if you are searching through data_foldername (or partials_foldername), move on.
+        if (data_foldername in root) or (partials_foldername in root):
             dirs[:]  = []
             files[:] = []
             continue
@@ -150,19 +270,47 @@ def Run_method(path_to_crystal_file=None, no_of_cpus=1):
         dirs[:]  = []
         files[:] = []
 
-    # Eleventh, Process the data from EKMC simulations, and gather the data to save to excel spreadsheet
-    #with mp.Pool(no_of_cpus) as pool:
-        #data_for_excel = pool.map(collect_save_and_provide_data_from_simulation, tqdm(roots, total=len(roots), desc='Gathering data (This may take some time)', unit='sims'))
-    begin_recording_time = 500
-    end_recording_time = 1000
-    print('Node to Geoff: I have permamentatly set begin_recording_time = '+str(begin_recording_time)+' and end_recording_time '+str(end_recording_time))
-    data_for_excel = [collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_time, end_recording_time, no_of_cpus) for root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit in roots]
+    # Eleventh, return the roots to process.
+    return roots
+
+# ============================================================================================================================================================================================================
 
-    # Twelfth, save data to excel spreadsheet.
-    save_to_excel_spreadsheet(data_foldername, data_for_excel)
+def get_cpu_budget_for_roots(no_of_cpus, no_of_roots, max_roots_at_once=None):
+    """
+    This method is designed to share the CPUs given between the roots being processed.
+
+    The roots are processed at the same time, with each root given an equal share of the CPUs to use for its own stages (such as reading 
+    the kMC_sim.txt files). The total number of processes running at any time is no more than no_of_cpus.
+
+    Parameters
+    ----------
+    no_of_cpus : int.
+        This is the number of CPUs that can be used.
+    no_of_roots : int.
+        This is the number of roots to process.
+    max_roots_at_once : int or None
+        This is the maximum number of roots to process at the same time. If None, up to no_of_cpus roots are processed at the same time.
+
+    Returns
+    -------
+    no_of_roots_at_once : int.
+        This is the number of roots to process at the same time.
+    no_of_cpus_per_root : int.
+        This is the number of CPUs that each root can use.
+    """
 
-    # Report that everything finished successfully
-    #print('EKMC process_results finished successfully.')
+    # First, determine the number of roots to process at the same time.
+    no_of_roots_at_once = min(max(no_of_cpus, 1), max(no_of_roots, 1))
+    if max_roots_at_once is not None:
+        if max_roots_at_once < 1:
+            raise Exception('Error: max_roots_at_once must be 1 or greater. max_roots_at_once = '+str(max_roots_at_once))
+        no_of_roots_at_once = min(no_of_roots_at_once, max_roots_at_once)
+
+    # Second, share the CPUs between the roots being processed at the same time.
+    no_of_cpus_per_root = max(no_of_cpus // no_of_roots_at_once, 1)
+
+    # Third, return no_of_roots_at_once and no_of_cpus_per_root
+    return no_of_roots_at_once, no_of_cpus_per_root
 
 # ============================================================================================================================================================================================================
 
@@ -187,23 +335,91 @@ def obtain_confromationally_unique_molecules_bandgap_energies(bandgap_energies,
 
 # ============================================================================================================================================================================================================
 
-def create_saving_folder(data_foldername, path):
+def register_roots_in_results_index(roots, data_for_excel, end_recording_time, no_of_threads=1):
+    """
+    This method will register the results of each root in the results index, along with how many of its Sims have finished.
+
+    Parameters
+    ----------
+    roots : list
+        These are the roots that were processed, as given by get_roots_to_process.
+    data_for_excel : list
+        These are the results of each root, as given by collect_save_and_provide_data_from_simulation.
+    end_recording_time : float
+        This is the time (in ps) that the data was time-averaged up to.
+    no_of_threads : int
+        This is the number of threads to read the status files of the Sims with.
+    """
+
+    # First, obtain the Sims in each root.
+    sim_numbers = {}
+    for root, *_ in roots:
+        sim_numbers[root] = [int(dirname.replace('Sim','')) for dirname in os.listdir(root) if (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+
+    # Second, obtain the state of every Sim.
+    simulation_states = get_simulation_states([(root, sim_no) for root in sim_numbers.keys() for sim_no in sim_numbers[root]], no_of_threads=no_of_threads)
+
+    # Third, register the results of each root.
+    for (root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit), processed_data in zip(roots, data_for_excel):
+        no_of_finished_simulations = sum([(state == finished_state) for state in simulation_states.get(root, {}).values()])
+        latest_simulation_change = get_latest_simulation_change(root, sim_numbers[root])
+        register_processed_results_in_results_index(root, processed_data, sim_time_limit, len(sim_numbers[root]), no_of_finished_simulations, latest_simulation_change, get_saving_folder(data_foldername, root[2::]), data_foldername+'/EKMC_data.xlsx', end_recording_time)
+
+# ============================================================================================================================================================================================================
+
+def save_and_print_profile(profiler, paths_to_root_profiles):
+    """
+    This method will save the profile of the stages run for all roots together to data_foldername, and print a summary of it.
+
+    Parameters
+    ----------
+    profiler : StageProfiler
+        This is the profiler of the stages that were not run for a particular root.
+    paths_to_root_profiles : list of str.
+        These are the folders that contain the profiles of the stages run for each root.
+    """
+    records = list(profiler.records)
+    for path_to_root_profile in paths_to_root_profiles:
+        records += load_profile(path_to_root_profile)
+    if not os.path.exists(data_foldername):
+        os.makedirs(data_foldername)
+    save_profile(data_foldername, records)
+    print('=================================================================================')
+    print('Profile of each stage (saved to '+str(data_foldername)+'):')
+    print_profile_summary(records)
+    print('=================================================================================')
+
+# ============================================================================================================================================================================================================
+
+def get_saving_folder(data_foldername, path):
     path_to_place_data_in = data_foldername+'/'+path
     if path_to_place_data_in[-1] == '/':
         path_to_place_data_in = path_to_place_data_in[:-1]
+    return path_to_place_data_in
+
+def create_saving_folder(data_foldername, path):
+    path_to_place_data_in = get_saving_folder(data_foldername, path)
     remove_folder(path_to_place_data_in)
     make_folder(path_to_place_data_in)
     return path_to_place_data_in
 
 # ============================================================================================================================================================================================================
 
-def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_time, end_recording_time, no_of_cpus=1):
+def collect_save_and_provide_data_from_simulation_single_input(input_datum):
+    """
+    This method is used by the process pool to process a root, where all the inputs are given as a tuple.
+    """
+    return collect_save_and_provide_data_from_simulation(*input_datum)
+
+def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_time, end_recording_time, no_of_cpus=1, use_cache=True, profile=False, multiple_time_origins=False, read_up_to_end_recording_time=False):
 
     print('=================================================================================')
     print('Gathering data for: '+str(root))
+    profiler = StageProfiler('process_results', enabled=profile, root=root)
 
-    # First, collect the data from this subdirectory.
-    all_sims, all_sims_hop_probs = collect_data(root, cpu_count=no_of_cpus)
+    # First, collect the data from this subdirectory, sample each simulation over time, and add them to the ensemble accumulator.
+    times = get_times_to_sample(end_recording_time, no_of_times_to_sample=10000)
+    sim_names, accumulator, positions_at_time, hop_probability_data = collect_and_accumulate_simulations(root, molnames_and_coms, unit_cell_matrix, times, cpu_count=no_of_cpus, use_cache=use_cache, read_up_to_time=(end_recording_time if read_up_to_end_recording_time else None), hop_probabilities_from_time=begin_recording_time, profiler=profiler, multiple_time_origins=multiple_time_origins)
 
     # Second, obtain the path to save data to.
     path = root[2::]
@@ -212,15 +428,71 @@ def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_
     path_to_place_data_in = create_saving_folder(data_foldername, path)
 
     # Ninth, obtain the average hopping probabilities for each exciton hop across all simulations. 
-    process_and_save_average_hopping_probabilities(data_foldername, path, all_sims_hop_probs)
+    with profiler.stage('hopping_probabilities'):
+        process_and_save_average_hopping_probabilities(data_foldername, path, hop_probability_data)
+
+    # Tenth, obtain the ensemble averages, the diffusion coefficients, and the diffusion tensors over time from the ensemble accumulator.
+    average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics = process_ensemble_accumulator(times, accumulator, profiler=profiler)
+
+    # Eleventh, save the quantities to disk, and time-average them.
+    return save_and_provide_processed_data(root, path_to_place_data_in, profiler, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file, begin_recording_time, end_recording_time)
+
+def reduce_save_and_provide_data_from_partials_single_input(input_datum):
+    """
+    This method is used by the process pool to reduce a root, where all the inputs are given as a tuple.
+    """
+    return reduce_save_and_provide_data_from_partials(*input_datum)
+
+def reduce_save_and_provide_data_from_partials(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_time, end_recording_time, no_of_cpus=1, use_cache=True, profile=False, multiple_time_origins=False, read_up_to_end_recording_time=False):
+    """
+    This method will merge the partial accumulators made by all the shards of process_results --map for a root, and save the data from them.
+
+    This takes the same inputs as collect_save_and_provide_data_from_simulation, and gives the same outputs.
+    """
+
+    print('=================================================================================')
+    print('Reducing the partial accumulators for: '+str(root))
+    profiler = StageProfiler('process_results', enabled=profile, root=root)
+
+    # First, merge the partial accumulators of all the shards of this root.
+    with profiler.stage('merge_partial_accumulators'):
+        accumulator, hop_probability_accumulator, positions_at_time, sim_names = load_and_merge_partial_accumulators(root, begin_recording_time, end_recording_time, multiple_time_origins=multiple_time_origins)
+        hop_probability_data = None if (hop_probability_accumulator is None) else (get_hop_neighbour_list(root), hop_probability_accumulator)
+    print('Merged the partial accumulators of '+str(len(sim_names))+' simulations.')
+
+    # Second, note if Sims have been added to the root since the shards were made.
+    sims_not_in_shards = [dirname for dirname in os.listdir(root) if (dirname.startswith('Sim') and dirname.replace('Sim','').isdigit() and (dirname not in sim_names))]
+    if len(sims_not_in_shards) > 0:
+        print('Note: '+str(len(sims_not_in_shards))+' Sim(s) in '+str(root)+' are not in the partial accumulators, as they were added after process_results --map was run. Run process_results --map again to include them.')
+
+    # Third, obtain the path to save data to, and create the folder to save data to.
+    path = root[2::]
+    path_to_place_data_in = create_saving_folder(data_foldername, path)
+
+    # Fourth, obtain the average hopping probabilities for each exciton hop across all simulations. 
+    with profiler.stage('hopping_probabilities'):
+        process_and_save_average_hopping_probabilities(data_foldername, path, hop_probability_data)
+
+    # Fifth, process the merged ensemble accumulator.
+    times = get_times_to_sample(end_recording_time, no_of_times_to_sample=10000)
+    average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics = process_ensemble_accumulator(times, accumulator, profiler=profiler)
 
-    # Tenth, process the collected data across all simulations.
-    times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, all_timesteps, time_for_all_sims = process_data(all_sims, molnames_and_coms, unit_cell_matrix, end_recording_time, no_of_times_to_sample=10000, cpu_count=no_of_cpus)
+    # Sixth, save the quantities to disk, and time-average them.
+    return save_and_provide_processed_data(root, path_to_place_data_in, profiler, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file, begin_recording_time, end_recording_time)
 
-    # Eleventh, make plots of quantites.
-    save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file)
+def save_and_provide_processed_data(root, path_to_place_data_in, profiler, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file, begin_recording_time, end_recording_time):
+    """
+    This method will save the quantities processed for a root to disk, time-average them, and give the data to save to the Excel spreadsheet.
+    """
+
+    # First, save the quantities to disk. The figures of these quantities are plotted once all roots have been processed.
+    with profiler.stage('save_data'):
+        save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file)
+        save_ensemble_statistics(path_to_place_data_in, times, ensemble_statistics)
 
-    time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci = time_average_data(times, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, begin_recording_time=begin_recording_time, end_recording_time=end_recording_time)
+    # Second, time-average the quantities.
+    with profiler.stage('time_averaging'):
+        time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci = time_average_data(times, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, begin_recording_time=begin_recording_time, end_recording_time=end_recording_time)
 
     endtime = times[-1]
 
@@ -233,10 +505,14 @@ def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_
     del diffusion_tensor_over_time
     del eigenvalues_of_diffusion_tensor_over_time
     del eigenvectors_of_diffusion_tensor_over_time
-    del all_timesteps
-    del time_for_all_sims 
+    del ensemble_statistics
 
-    save_time_averaged_data(path_to_place_data_in, time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci, begin_recording_time, endtime, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies)
+    # Third, save the time-averaged quantities.
+    with profiler.stage('save_time_averaged_data'):
+        save_time_averaged_data(path_to_place_data_in, time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci, begin_recording_time, endtime, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies)
+
+    # Fourth, save the profile of each stage for this root, if profiling.
+    profiler.save(path_to_place_data_in)
 
     print('Finished processing the KMC results for: '+str(root))
     print('=================================================================================')
@@ -244,3 +520,57 @@ def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_
     return root, time_average_energy, time_average_energy_sd, time_average_energy_ci, time_average_diffusion, time_average_diffusion_sd, time_average_diffusion_ci, time_average_diffusion_tensor, time_average_diffusion_tensor_sd, time_average_diffusion_tensor_ci, time_average_eigenvalues_of_diffusion_tensor, time_average_eigenvalues_of_diffusion_tensor_sd, time_average_eigenvalues_of_diffusion_tensor_ci, begin_recording_time, endtime, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies
 
 # ============================================================================================================================================================================================================
+
+def map_roots(roots, map_shard, no_of_cpus=1, begin_recording_time=500.0, end_recording_time=1000.0, use_cache=True, max_roots_at_once=None, profile=False, multiple_time_origins=False, read_up_to_end_recording_time=False):
+    """
+    This method will process a shard of the Sims in each root, and save them as partial accumulators in partials_foldername.
+
+    Parameters
+    ----------
+    roots : list
+        These are the roots to process, as given by get_roots_to_process.
+    map_shard : tuple of ints
+        This is the (shard_index, no_of_shards) of the Sims to process in each root.
+    See Run_method for the other parameters.
+    """
+    shard_index, no_of_shards = map_shard
+    print('Processing shard '+str(shard_index)+' of '+str(no_of_shards)+' shards (from 0 to '+str(no_of_shards-1)+') of the Sims in '+str(len(roots))+' folder(s). The partial accumulators are saved in '+str(partials_foldername)+'.')
+    no_of_roots_at_once, no_of_cpus_per_root = get_cpu_budget_for_roots(no_of_cpus, len(roots), max_roots_at_once=max_roots_at_once)
+    inputs = [(root, molnames_and_coms, unit_cell_matrix, map_shard, begin_recording_time, end_recording_time, no_of_cpus_per_root, use_cache, profile, multiple_time_origins, read_up_to_end_recording_time) for root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit in roots]
+    if no_of_roots_at_once <= 1:
+        for input_datum in inputs:
+            map_shard_of_root(*input_datum)
+    else:
+        process_map(map_shard_of_root_single_input, inputs, max_workers=no_of_roots_at_once, chunksize=1, unit=' folders', desc='Processing folders')
+
+def map_shard_of_root_single_input(input_datum):
+    """
+    This method is used by the process pool to process a shard of a root, where all the inputs are given as a tuple.
+    """
+    return map_shard_of_root(*input_datum)
+
+def map_shard_of_root(root, molnames_and_coms, unit_cell_matrix, map_shard, begin_recording_time, end_recording_time, no_of_cpus=1, use_cache=True, profile=False, multiple_time_origins=False, read_up_to_end_recording_time=False):
+    """
+    This method will process a shard of the Sims in a root, and save them as partial accumulators in partials_foldername.
+    """
+
+    print('=================================================================================')
+    print('Gathering data for shard '+str(map_shard[0])+' of: '+str(root))
+    profiler = StageProfiler('process_results_map', enabled=profile, root=root)
+
+    # First, collect the data from the Sims in this shard, sample them over time, and add them to the ensemble accumulator of this shard.
+    times = get_times_to_sample(end_recording_time, no_of_times_to_sample=10000)
+    sim_names, accumulator, positions_at_time, hop_probability_data = collect_and_accumulate_simulations(root, molnames_and_coms, unit_cell_matrix, times, cpu_count=no_of_cpus, use_cache=use_cache, read_up_to_time=(end_recording_time if read_up_to_end_recording_time else None), shard=map_shard, hop_probabilities_from_time=begin_recording_time, profiler=profiler, multiple_time_origins=multiple_time_origins)
+
+    # Second, save the partial accumulators of this shard.
+    with profiler.stage('save_partial_accumulators'):
+        shard_details = {'shard_index': map_shard[0], 'no_of_shards': map_shard[1], 'sim_names': sim_names, 'begin_recording_time': begin_recording_time, 'end_recording_time': end_recording_time, 'multiple_time_origins': multiple_time_origins}
+        save_partial_accumulators(root, shard_details, accumulator, positions_at_time, (None if (hop_probability_data is None) else hop_probability_data[1]))
+
+    # Third, save the profile of each stage for this shard, if profiling.
+    profiler.save(get_partials_folder(root)+'/Shard'+str(map_shard[0]))
+
+    print('Saved the partial accumulators of '+str(len(sim_names))+' simulations for: '+str(root))
+    print('=================================================================================')
+
+# ============================================================================================================================================================================================================
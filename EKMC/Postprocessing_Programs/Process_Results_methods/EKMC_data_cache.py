@@ -0,0 +1,200 @@
+"""
+EKMC_data_cache.py, Geoffrey Weal, 19/10/26
+
+This script is designed to save and load the cache file of a kinetic Monte Carlo simulation.
+
+The cache file is an uncompressed npz file that is placed in each Sim folder. It contains the data read from the kMC_sim.txt file
+(as a structured array). The size and modification time of the kMC_sim.txt file are stored in the cache file, so that the cache file
+is only used if the kMC_sim.txt file has not changed since the cache file was written. Because the cache file is uncompressed, it is
+memory mapped rather than read.
+
+The data sampled over time from each simulation is saved in a separate small cache file (the sampled cache file), along with the
+sampling parameters and the size and modification time of the kMC_sim.txt file it was sampled from. This means that the large cache
+file is never rewritten once it has been written, while the sampled cache file is rewritten whenever the sampling parameters change.
+"""
+import os
+import numpy as np
+
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_model import memory_map_npz
+
+EKMC_data_cache_filename = 'kMC_sim_cache.npz'
+EKMC_data_cache_format_version = 1
+EKMC_sampled_data_cache_filename = 'kMC_sim_sampled_cache.npz'
+
+def get_EKMC_datafile_key(path_to_sim):
+    """
+    This method will obtain the size and modification time of the kMC_sim.txt file in the Sim folder.
+
+    Parameters
+    ----------
+    path_to_sim : str.
+        This is the path to the Sim folder.
+
+    Returns
+    -------
+    EKMC_datafile_key : numpy.array of ints
+        This is the size (in bytes) and the modification time (in ns) of the kMC_sim.txt file.
+    """
+    from EKMC.Postprocessing_Programs.Process_Results_methods.collect_data import EKMC_data_filename
+    stat_result = os.stat(path_to_sim+'/'+EKMC_data_filename)
+    return np.array([stat_result.st_size, stat_result.st_mtime_ns], dtype=np.int64)
+
+def load_EKMC_data_cache(path_to_sim):
+    """
+    This method will load the cache file in the Sim folder, if it exists and is up to date with the kMC_sim.txt file.
+
+    Parameters
+    ----------
+    path_to_sim : str.
+        This is the path to the Sim folder.
+
+    Returns
+    -------
+    EKMC_data_cache : dict. or None
+        These are the memory mapped arrays in the cache file. None is returned if there is no cache file, if it is from a different format version, or if the kMC_sim.txt file has changed since the cache file was written.
+    """
+
+    # First, check that the cache file exists.
+    path_to_cache = path_to_sim+'/'+EKMC_data_cache_filename
+    if not os.path.exists(path_to_cache):
+        return None
+
+    # Second, memory map the cache file. If the cache file can not be read, it will be remade.
+    try:
+        EKMC_data_cache = memory_map_npz(path_to_cache)
+    except Exception:
+        return None
+
+    # Third, check that the cache file is the format version this version of EKMC reads.
+    if ('format_version' not in EKMC_data_cache) or (int(EKMC_data_cache['format_version']) != EKMC_data_cache_format_version):
+        return None
+
+    # Fourth, check that the kMC_sim.txt file has not changed since the cache file was made.
+    if not np.array_equal(EKMC_data_cache['EKMC_datafile_key'], get_EKMC_datafile_key(path_to_sim)):
+        return None
+
+    # Fifth, return the cache.
+    return EKMC_data_cache
+
+def save_EKMC_data_cache(path_to_sim, EKMC_datafile_key, data):
+    """
+    This method will save the cache file to the Sim folder.
+
+    Parameters
+    ----------
+    path_to_sim : str.
+        This is the path to the Sim folder.
+    EKMC_datafile_key : numpy.array of ints
+        This is the size and the modification time of the kMC_sim.txt file that data was read from.
+    data : numpy.array
+        This is the data read from the kMC_sim.txt file.
+    """
+    arrays = {'format_version': np.array(EKMC_data_cache_format_version, dtype=np.int32), 'EKMC_datafile_key': EKMC_datafile_key, 'data': data}
+    save_npz_file(path_to_sim+'/'+EKMC_data_cache_filename, arrays)
+
+def save_npz_file(path_to_cache, arrays):
+    """
+    This method will save arrays to a cache file. This is written to a temporary file first, so that a partly written cache file is never read.
+
+    If the Sim folder can not be written to, the data is just not cached.
+
+    Parameters
+    ----------
+    path_to_cache : str.
+        This is the path to the cache file.
+    arrays : dict.
+        These are the arrays to save to the cache file.
+    """
+    path_to_temp_cache = path_to_cache+'.tmp.npz'
+    try:
+        np.savez(path_to_temp_cache, **arrays)
+        os.replace(path_to_temp_cache, path_to_cache)
+    except OSError as exception:
+        print('Note: Could not write the cache file '+str(path_to_cache)+'. '+str(exception))
+        if os.path.exists(path_to_temp_cache):
+            os.remove(path_to_temp_cache)
+
+def get_EKMC_data_from_cache(root, sim_names):
+    """
+    This method will obtain the data of each simulation that has an up to date cache file.
+
+    Parameters
+    ----------
+    root : str.
+        This is the path to the folders that contain kinetic Monte Carlo simulations.
+    sim_names : list of str.
+        These are the names of the simulation folders.
+
+    Returns
+    -------
+    cached_sims : list
+        This is the (sim_name, data) for each simulation that was obtained from its cache file.
+    sim_names_to_read : list of str.
+        These are the names of the simulations whose kMC_sim.txt files need to be read.
+    """
+    cached_sims = []
+    sim_names_to_read = []
+    for sim_name in sim_names:
+        EKMC_data_cache = load_EKMC_data_cache(root+'/'+sim_name)
+        if EKMC_data_cache is None:
+            sim_names_to_read.append(sim_name)
+        else:
+            cached_sims.append((sim_name, EKMC_data_cache['data']))
+    return cached_sims, sim_names_to_read
+
+def load_sampled_data_from_cache(path_to_sim, sampling_parameters):
+    """
+    This method will load the sampled data of a simulation from its sampled cache file, if it was sampled with the same sampling parameters from the current kMC_sim.txt file.
+
+    Parameters
+    ----------
+    path_to_sim : str.
+        This is the path to the Sim folder.
+    sampling_parameters : tuple
+        This is the time to sample up to and the number of times to sample.
+
+    Returns
+    -------
+    sampled_data : tuple of numpy.arrays or None
+        These are the molecules, cell points, and energies of the exciton at each sampled time. None if there is no up to date sampled cache file with these sampling parameters.
+    """
+
+    # First, read the sampled cache file. If the sampled cache file can not be read, it will be remade.
+    path_to_sampled_cache = path_to_sim+'/'+EKMC_sampled_data_cache_filename
+    if not os.path.exists(path_to_sampled_cache):
+        return None
+    try:
+        with np.load(path_to_sampled_cache) as sampled_data_cache:
+            sampled_data_cache = dict(sampled_data_cache)
+    except Exception:
+        return None
+
+    # Second, check that the sampled cache file is the format version this version of EKMC reads, and was sampled from the current kMC_sim.txt file with the same sampling parameters.
+    if ('format_version' not in sampled_data_cache) or (int(sampled_data_cache['format_version']) != EKMC_data_cache_format_version):
+        return None
+    if not np.array_equal(sampled_data_cache['EKMC_datafile_key'], get_EKMC_datafile_key(path_to_sim)):
+        return None
+    if not np.array_equal(sampled_data_cache['sampling_parameters'], np.array(sampling_parameters, dtype=np.float64)):
+        return None
+
+    # Third, return the sampled data.
+    return sampled_data_cache['sampled_molecules'], sampled_data_cache['sampled_cell_points'], sampled_data_cache['sampled_energies']
+
+def save_sampled_data_to_cache(path_to_sim, sampling_parameters, sampled_data, EKMC_datafile_key):
+    """
+    This method will save the sampled data of a simulation to its sampled cache file. The cache file of the data read from the kMC_sim.txt file is not changed.
+
+    Parameters
+    ----------
+    path_to_sim : str.
+        This is the path to the Sim folder.
+    sampling_parameters : tuple
+        This is the time to sample up to and the number of times to sample.
+    sampled_data : tuple of numpy.arrays
+        These are the molecules, cell points, and energies of the exciton at each sampled time.
+    EKMC_datafile_key : numpy.array of ints
+        This is the size and the modification time of the kMC_sim.txt file, taken before the data that was sampled was obtained.
+    """
+    sampled_molecules, sampled_cell_points, sampled_energies = sampled_data
+    arrays = {'format_version': np.array(EKMC_data_cache_format_version, dtype=np.int32), 'EKMC_datafile_key': EKMC_datafile_key, 'sampling_parameters': np.array(sampling_parameters, dtype=np.float64), 'sampled_molecules': sampled_molecules, 'sampled_cell_points': sampled_cell_points, 'sampled_energies': sampled_energies}
+    save_npz_file(path_to_sim+'/'+EKMC_sampled_data_cache_filename, arrays)
@@ -4,52 +4,155 @@ Check_Result.py, Geoffrey Weal, 12/8/22
 This program will determine 
 '''
 import os
+import numpy as np
 
-from tqdm.contrib.concurrent import process_map
+from EKMC.Postprocessing_Programs.Process_Results_methods.map_over_cpus   import map_over_cpus
+from EKMC.Postprocessing_Programs.Process_Results_methods.EKMC_data_cache import get_EKMC_datafile_key, load_EKMC_data_cache, save_EKMC_data_cache, get_EKMC_data_from_cache
+from EKMC.Postprocessing_Programs.Process_Results_methods.hop_probability_accumulator import get_hop_neighbour_list, make_hop_probability_accumulator, add_hop_probabilities_to_accumulator, merge_hop_probability_accumulators
+from EKMC.EKMC.Run_EKMC_setup_files.time_index_file import read_time_index, get_byte_range_of_time_window
 
-def collect_data(root, cpu_count=1):
+def collect_data(root, cpu_count=1, use_cache=True, read_up_to_time=None, shard=None, hop_probabilities_from_time=500.0):
     """
     This method is designed to gather all the kinetic Monte Carlo data for all the kinetic Monte Carlo simulations performed.
 
+    If use_cache is True, the data of each simulation is taken from the cache file in its Sim folder if its kMC_sim.txt file has not 
+    changed since the cache file was written. Otherwise, the kMC_sim.txt file is read and the cache file is (re)written. 
+
+    If read_up_to_time is given, only the part of each kMC_sim.txt file up to (and just after) this time is read, using the time index 
+    file of the simulation to find where to stop reading. As only part of the kMC_sim.txt file is read, these are not saved to cache files.
+
+    If shard is given, only the simulations in this shard are collected (see process_results --map). The simulations are given to each 
+    shard in turn, in order of their Sim number.
+
     Parameters
     ----------
     root : str
         This is the path to the folders that contain kinetic Monte Carlo simulations.
+    cpu_count : int
+        This is the number of CPUs to use to read the kMC_sim.txt files.
+    use_cache : bool.
+        This indicates if the cache files in each Sim folder should be used and written. Default: True
+    read_up_to_time : float or None
+        This is the time (in ps) to read each kMC_sim.txt file up to. If None, the whole kMC_sim.txt file is read. Default: None
+    shard : tuple of ints or None
+        This is the (shard_index, no_of_shards) of the simulations to collect. If None, all simulations are collected. Default: None
+    hop_probabilities_from_time : float
+        Only the steps from this simulation time (in ps) are included in the hopping probabilities. This is usually the begin_recording_time. Default: 500.0 ps
 
     Returns
     -------
     all_sims : list
         This is all the data from all the kinetic Monte Carlo simulations performed. 
+    hop_probability_data : tuple or None
+        This is the neighbour list of the crystal and the hop probability accumulator containing the hopping probabilities from all the kinetic Monte Carlo simulations. This is None if no kMC_sim_rate_constants.txt files were written. 
     """
 
     print('Collecting the various KMC simulation data from disk.')
 
-    # First, obtain the names of the folders that contain each of the kinetic Monte Carlo simulations.
-    sim_names = [dirname for dirname in os.listdir(root) if (os.path.isdir(root+'/'+dirname) and dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+    # First, obtain the names of the folders that contain each of the kinetic Monte Carlo simulations, in order of their Sim number.
+    sim_names = get_sim_names(root, shard=shard)
 
     # Second, collect all the data from all the  kinetic Monte Carlo simulations
     all_sims = []
 
-    # Third, obtain all the names of the simulation folders
-    sim_names.sort(key=lambda x: int(x.replace('Sim','')))
-
-    # Fourth, obtain the number of cpus that are available for use.
+    # Third, obtain the number of cpus that are available for use.
     print('Number of CPUs that will be used: '+str(cpu_count))
 
-    # Fifth, obtain the data from all the kinetic Monte Carlo simulations.
-    all_sims = process_map(read_EKMC_datafile, get_folder_path(root, sim_names), max_workers=cpu_count, unit=' KMC Sim', total=len(sim_names), desc="Obtaining the data from all the kinetic Monte Carlo simulations", leave=False)
-
-    # Sixth, sort the simulation data by it's simulation folder name.
+    # Fourth, obtain the data from all the kinetic Monte Carlo simulations. 
+    if use_cache:
+        # 4.1: Obtain the data from the simulations that have up to date cache files.
+        all_sims, sim_names_to_read = get_EKMC_data_from_cache(root, sim_names)
+        print('Obtained the data of '+str(len(all_sims))+' simulations from their cache files. Reading '+str(len(sim_names_to_read))+' kMC_sim.txt files.')
+
+        # 4.2: Read the kMC_sim.txt file of the other simulations, and save their data to cache files. If only part of each kMC_sim.txt 
+        #      file is read, the data is not saved to the cache files.
+        if read_up_to_time is None:
+            all_sims += map_over_cpus(read_EKMC_datafile_and_save_cache, get_folder_path(root, sim_names_to_read), cpu_count=cpu_count, unit=' KMC Sim', total=len(sim_names_to_read), desc="Obtaining the data from all the kinetic Monte Carlo simulations", leave=False)
+        else:
+            all_sims += map_over_cpus(read_EKMC_datafile, get_folder_path(root, sim_names_to_read, read_up_to_time), cpu_count=cpu_count, unit=' KMC Sim', total=len(sim_names_to_read), desc="Obtaining the data from all the kinetic Monte Carlo simulations", leave=False)
+    else:
+        all_sims = map_over_cpus(read_EKMC_datafile, get_folder_path(root, sim_names, read_up_to_time), cpu_count=cpu_count, unit=' KMC Sim', total=len(sim_names), desc="Obtaining the data from all the kinetic Monte Carlo simulations", leave=False)
+
+    # Fifth, sort the simulation data by it's simulation folder name.
     all_sims.sort(key=lambda x: int(x[0].replace('Sim','')))
 
-    # Seventh, obtain the data from all the kinetic Monte Carlo simulations.
-    #all_sims_hop_probs = [read_EKMC_rate_constant_datafile(input_data) for input_data in get_folder_path_rate_constants(root, all_sims)]
-    all_sims_hop_probs = process_map(read_EKMC_rate_constant_datafile, get_folder_path_rate_constants(root, all_sims), max_workers=cpu_count, unit=' KMC Sim Probs', total=len(sim_names), desc="Obtaining the rate constant data from all the kinetic Monte Carlo simulations (if this data has been written to disk)", leave=False)
+    # Sixth, obtain the hopping probabilities from all the kinetic Monte Carlo simulations, if the rate constant data has been written to disk.
+    hop_probability_data = None
+    if any(os.path.exists(root+'/'+sim_name+'/'+EKMC_rate_constant_data_filename) for sim_name, sim_data in all_sims):
 
-    # Eighth, return the data for all the kinetic Monte Carlo simulations
-    return all_sims, all_sims_hop_probs
+        # 6.1: Obtain the neighbour list of the crystal, which gives the slot of each hop in the hop probability accumulators.
+        neighbour_list = get_hop_neighbour_list(root)
 
-def get_folder_path(root, sim_names):
+        # 6.2: Read the hopping probabilities of each simulation into its own accumulator.
+        all_sims_hop_probs = map_over_cpus(read_EKMC_rate_constant_datafile, get_folder_path_rate_constants(root, all_sims, neighbour_list, hop_probabilities_from_time), cpu_count=cpu_count, unit=' KMC Sim Probs', total=len(all_sims), desc="Obtaining the rate constant data from all the kinetic Monte Carlo simulations", leave=False)
+
+        # 6.3: Merge the accumulators of all the simulations together.
+        accumulator = make_hop_probability_accumulator(neighbour_list)
+        for sim_name, sim_accumulator in all_sims_hop_probs:
+            accumulator = merge_hop_probability_accumulators(accumulator, sim_accumulator)
+        hop_probability_data = (neighbour_list, accumulator)
+
+    # Seventh, return the data for all the kinetic Monte Carlo simulations
+    return all_sims, hop_probability_data
+
+def get_sim_names(root, shard=None):
+    """
+    This method will obtain the names of the Sim folders in root, in order of their Sim number.
+
+    Parameters
+    ----------
+    root : str
+        This is the path to the folders that contain kinetic Monte Carlo simulations.
+    shard : tuple of ints or None
+        This is the (shard_index, no_of_shards) of the simulations to give. The simulations are given to each shard in turn, in order of their Sim number. If None, all simulations are given. Default: None
+
+    Returns
+    -------
+    sim_names : list of str.
+        These are the names of the Sim folders.
+    """
+
+    # First, obtain the names of the folders that contain each of the kinetic Monte Carlo simulations, in order of their Sim number.
+    sim_names = [dirname for dirname in os.listdir(root) if (os.path.isdir(root+'/'+dirname) and dirname.startswith('Sim') and dirname.replace('Sim','').isdigit())]
+    sim_names.sort(key=lambda x: int(x.replace('Sim','')))
+
+    # Second, only give the simulations in the shard, if given.
+    if shard is not None:
+        shard_index, no_of_shards = shard
+        sim_names = sim_names[shard_index::no_of_shards]
+
+    # Third, return sim_names
+    return sim_names
+
+def get_data_of_simulation(root, sim_name, use_cache=True, read_up_to_time=None):
+    """
+    This method will obtain the data of a simulation, from its cache file if it is up to date, or otherwise from its kMC_sim.txt file.
+
+    Parameters
+    ----------
+    root : str
+        This is the path to the folders that contain kinetic Monte Carlo simulations.
+    sim_name : str.
+        This is the name of the simulation folder.
+    use_cache : bool.
+        This indicates if the cache file in the Sim folder should be used and written. Default: True
+    read_up_to_time : float or None
+        This is the time (in ps) to read the kMC_sim.txt file up to. If given, the data read is not saved to the cache file. If None, the whole kMC_sim.txt file is read. Default: None
+
+    Returns
+    -------
+    data : numpy.array of EKMC_data_dtype
+        This is the data of the simulation. See read_EKMC_datafile.
+    """
+    if use_cache:
+        EKMC_data_cache = load_EKMC_data_cache(root+'/'+sim_name)
+        if EKMC_data_cache is not None:
+            return EKMC_data_cache['data']
+        if read_up_to_time is None:
+            return read_EKMC_datafile_and_save_cache((root, sim_name, None))[1]
+    return read_EKMC_datafile((root, sim_name, read_up_to_time))[1]
+
+def get_folder_path(root, sim_names, read_up_to_time=None):
     """
     This is a generator designed to generator all the path to all the KMC simulations in root. 
 
@@ -59,11 +162,13 @@ def get_folder_path(root, sim_names):
         This is the path to the folders that contain kinetic Monte Carlo simulations.
     sim_name : str.
         This is the name of the simulation folder that contains the information about the kinetic Monte Carlo simulation.
+    read_up_to_time : float or None
+        This is the time (in ps) to read each kMC_sim.txt file up to. If None, the whole kMC_sim.txt file is read. Default: None
     """
     for sim_name in sim_names:
-        yield (root, sim_name)
+        yield (root, sim_name, read_up_to_time)
 
-def get_folder_path_rate_constants(root, all_sims):
+def get_folder_path_rate_constants(root, all_sims, neighbour_list, hop_probabilities_from_time=500.0):
     """
     This is a generator designed to generator all the path to all the KMC simulations in root. 
 
@@ -71,24 +176,50 @@ def get_folder_path_rate_constants(root, all_sims):
     ----------
     root : str.
         This is the path to the folders that contain kinetic Monte Carlo simulations.
-    sim_name : str.
-        This is the name of the simulation folder that contains the information about the kinetic Monte Carlo simulation.
+    all_sims : list
+        This is the data from all the kinetic Monte Carlo simulations, as (sim_name, sim_data).
+    neighbour_list : dict.
+        This is the neighbour list of the crystal, as given by get_hop_neighbour_list.
+    hop_probabilities_from_time : float
+        Only the steps from this simulation time (in ps) are included in the hopping probabilities. Default: 500.0 ps
     """
     for a_sim in all_sims:
         sim_name, sim_data = a_sim
-        yield (root, sim_name, sim_data)
+        yield (root, sim_name, sim_data, neighbour_list, hop_probabilities_from_time)
 
 EKMC_data_filename = 'kMC_sim.txt'
-def read_EKMC_datafile(input_data):
+
+# This is the data type of each line (step) in the EKMC_data_filename file.
+EKMC_data_dtype = np.dtype([('count', np.int64), ('molecule', np.int32), ('cell_point', np.int32, (3,)), ('sim_time', np.float64), ('time_step', np.float64), ('hopping_distance', np.float64), ('energy', np.float64), ('sum_kij', np.float64), ('D_xx', np.float64), ('D_yy', np.float64), ('D_zz', np.float64), ('D_xy', np.float64), ('D_xz', np.float64), ('D_yz', np.float64)])
+
+# These are the number of numbers on each line of the EKMC_data_filename file, once "(", ")", ",", and "|" have been removed.
+no_of_numbers_per_EKMC_data_line = 16
+
+# This is used to convert the brackets and commas of the cell points (and the | dividers) into spaces.
+EKMC_data_translation_table = bytes.maketrans(b'(),|', b'    ')
+
+# This is the approximate number of bytes to read from the EKMC_data_filename file at a time.
+EKMC_data_chunk_size = 2**24
+
+def read_EKMC_datafile(input_data, chunk_size=EKMC_data_chunk_size):
     """
     This method is designed to read the data from the kinetic Monte Carlo simulation files, called EKMC_data_filename
 
+    The file is read in chunks of whole lines, where each chunk is converted into numbers in one go by NumPy. This means that the 
+    memory used (besides the data itself) stays bounded by the size of the chunk, no matter how long the simulation is.
+
     Parameters
     ----------
     root : str.
         This is the path to the overall folder that contains all the kinetic Monte Carlo simulations for a particular system.
     sim_name : str.
         This is the name of the simulation that was performed, and is the name of the folder that it's kinetic Monte Carlo simulation is held in.
+    read_up_to_time : float or None
+        This is the time (in ps) to read the EKMC_data_filename file up to. The first step after this time is also read, so that the 
+        exciton's position is known up to this time. This uses the time index file of the simulation. If None, or if the time index 
+        file does not reach this time, the whole EKMC_data_filename file is read.
+    chunk_size : int
+        This is the approximate number of bytes to read from the EKMC_data_filename file at a time.
 
     Attributes
     ----------
@@ -97,168 +228,291 @@ def read_EKMC_datafile(input_data):
 
     Returns
     -------
-    data : list
-        This is the list of the movement of the exciton about the molecules of the crystal over time. 
+    data : numpy.array of EKMC_data_dtype
+        This is the structured array of the movement of the exciton about the molecules of the crystal over time. Each entry in this 
+        array can be unpacked in the same order as a line in the EKMC_data_filename file: 
+        (count, molecule, cell_point, sim_time, time_step, hopping_distance, energy, sum_kij, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz).
     """
 
-    # First, separate the input_data into the root and the sim_name variables.
-    root, sim_name = input_data
+    # First, separate the input_data into the root, the sim_name, and the read_up_to_time variables.
+    root, sim_name, read_up_to_time = input_data
+    path_to_EKMC_datafile = root+'/'+sim_name+'/'+EKMC_data_filename
 
-    # Second, initalise the data list to record the data about this kinetic Monte Carlo simulation. 
-    data = []
+    # Second, initalise the list to record the data from each chunk of this kinetic Monte Carlo simulation. 
+    data_chunks = []
 
     # Third, open the EKMC_data_filename file.
-    with open(root+'/'+sim_name+'/'+EKMC_data_filename, 'r') as datafile:
+    with open(path_to_EKMC_datafile, 'rb') as datafile:
+
+        # 3.1: If only reading up to read_up_to_time, obtain the byte offset to stop reading at from the time index file.
+        stop_offset = get_offset_to_read_up_to(datafile, root+'/'+sim_name, read_up_to_time) if (read_up_to_time is not None) else None
 
         # Fourth, ignore the first line, which is the top of the table
         datafile.readline()
 
-        # Fifth, for each line in the datafile:
-        #counter = 0
-        for line in datafile:
-
-            # Sixth, extract the data from the line.
-            count, molecule, cell_point, sim_time, time_step, hopping_distance, energy, sum_kij, end_of_line1, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz, end_of_line2 = line.rstrip().split()
-
-            # Seventh, convert all the variables into ints, tuples, and floats
-            count            = int(count)
-            molecule         = int(molecule)
-            cell_point       = eval(cell_point)
-            sim_time         = float(sim_time)
-            time_step        = float(time_step)
-            hopping_distance = float(hopping_distance) 
-            energy           = float(energy) 
-            sum_kij          = float(sum_kij)
-            D_xx             = float(D_xx)
-            D_yy             = float(D_yy)
-            D_zz             = float(D_zz)
-            D_xy             = float(D_xy)
-            D_xz             = float(D_xz)
-            D_yz             = float(D_yz)
-
-            # Eighth, save this data to the data list
-            data.append((count, molecule, cell_point, sim_time, time_step, hopping_distance, energy, sum_kij, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz))
-
-            #if counter > 10:
-            #    break
-            #counter += 1
-
-    # Ninth, sort the data by the count
-    data.sort()
-
-    # Tenth, return the data list.
+        # Fifth, read the datafile a chunk of lines at a time.
+        while True:
+
+            # 5.1: Read the next chunk of whole lines from the file, stopping at stop_offset if given.
+            if stop_offset is None:
+                lines = datafile.readlines(chunk_size)
+            elif datafile.tell() < stop_offset:
+                lines = datafile.readlines(min(chunk_size, stop_offset - datafile.tell()))
+            else:
+                break
+            if len(lines) == 0:
+                break
+
+            # 5.2: Convert the brackets and commas of the cell points (and the | dividers) into spaces, and convert all the numbers 
+            #      in the chunk into floats.
+            numbers = np.fromstring(b''.join(lines).translate(EKMC_data_translation_table), sep=' ')
+
+            # 5.3: Check that each line in the chunk had the expected number of numbers in it.
+            if not (len(numbers) == no_of_numbers_per_EKMC_data_line*len(lines)):
+                raise Exception('Error: Could not read all the data in '+str(path_to_EKMC_datafile)+'. Expected '+str(no_of_numbers_per_EKMC_data_line)+' numbers on each line. This file may be corrupted or partially written.')
+            numbers = numbers.reshape(len(lines), no_of_numbers_per_EKMC_data_line)
+
+            # 5.4: Place the numbers into the structured array for this chunk.
+            data_chunk = np.empty(len(lines), dtype=EKMC_data_dtype)
+            data_chunk['count']      = numbers[:,0]
+            data_chunk['molecule']   = numbers[:,1]
+            data_chunk['cell_point'] = numbers[:,2:5]
+            for column_index, name in enumerate(EKMC_data_dtype.names[3:], start=5):
+                data_chunk[name] = numbers[:,column_index]
+            data_chunks.append(data_chunk)
+
+    # Sixth, join all the chunks together.
+    data = np.concatenate(data_chunks) if (len(data_chunks) > 0) else np.empty(0, dtype=EKMC_data_dtype)
+
+    # Seventh, sort the data by the count
+    if np.any(np.diff(data['count']) < 0):
+        data = data[np.argsort(data['count'], kind='stable')]
+
+    # Eighth, return the data array.
     return (sim_name, data)
 
-import re
-EKMC_rate_constant_data_filename = 'kMC_sim_rate_constants.txt'
-def read_EKMC_rate_constant_datafile(input_data):
+def get_offset_to_read_up_to(datafile, path_to_sim, read_up_to_time):
     """
-    This method is designed to read the rate constant data from the kinetic Monte Carlo simulation files, called EKMC_rate_constant_data_filename
+    This method will obtain the byte offset in the EKMC_data_filename file to stop reading at, so that it is read up to read_up_to_time.
 
-    The rate constant data given is for an exciton on an exciton donor to all the neighbouring exciton acceptor. 
+    This is the end of the line after the line of the step that the exciton is on at the first checkpoint at or after read_up_to_time 
+    in the time index file. 
+
+    Parameters
+    ----------
+    datafile : file
+        This is the EKMC_data_filename file, opened in binary mode. This is returned to the start of the file.
+    path_to_sim : str.
+        This is the path to the Sim folder.
+    read_up_to_time : float
+        This is the time (in ps) to read the EKMC_data_filename file up to.
+
+    Returns
+    -------
+    stop_offset : int or None
+        This is the byte offset to stop reading at. None if the whole file needs to be read, such as if there is no time index file, 
+        if it does not reach read_up_to_time, or if it does not agree with the EKMC_data_filename file.
+    """
+
+    # First, obtain the step that the exciton is on at the first checkpoint at or after read_up_to_time, and the byte offset of its line.
+    time_index = read_time_index(path_to_sim)
+    if time_index is None:
+        return None
+    start_record, start_offset, end_record, end_offset = get_byte_range_of_time_window(time_index, end_time=read_up_to_time)
+    if end_offset is None:
+        return None
+
+    # Second, check that the line at end_offset is the line of end_record, in case the time index file is out of date. 
+    datafile.seek(end_offset)
+    line = datafile.readline().split()
+    if (len(line) == 0) or (not line[0].isdigit()) or (not (int(line[0]) == end_record)):
+        datafile.seek(0)
+        return None
+
+    # Third, include the line of the next step, so that the exciton's position is known up to read_up_to_time.
+    datafile.readline()
+    stop_offset = datafile.tell()
+
+    # Fourth, return to the start of the file and return stop_offset.
+    datafile.seek(0)
+    return stop_offset
+
+def read_EKMC_datafile_and_save_cache(input_data):
+    """
+    This method will read the kMC_sim.txt file of a simulation and save its data to the cache file of the simulation.
 
     Parameters
     ----------
     root : str.
         This is the path to the overall folder that contains all the kinetic Monte Carlo simulations for a particular system.
     sim_name : str.
-        This is the name of the simulation that was performed, and is the name of the folder that it's kinetic Monte Carlo simulation is held in.
-
-    Attributes
-    ----------
-    EKMC_rate_constant_data_filename :str.
-        This is the name of the data files that contain the kinetic Monte Carlo simulation data.
+        This is the name of the simulation folder.
 
     Returns
     -------
-    data : list
-        This is the list of the movement of the exciton about the molecules of the crystal over time. 
+    See read_EKMC_datafile.
     """
 
     # First, separate the input_data into the root and the sim_name variables.
-    root, sim_name, sim_data = input_data
-
-    # Second, initalise the data list to record the data about this kinetic Monte Carlo simulation. 
-    hop_probability_data = {}
+    root, sim_name, read_up_to_time = input_data
+    path_to_sim = root+'/'+sim_name
 
-    # Third, get the path to the EKMC_rate_constant_data_filename
-    path_to_EKMC_rate_constant_data_filename = root+'/'+sim_name+'/'+EKMC_rate_constant_data_filename
-
-    # Fourth, check to see if the EKMC_rate_constant_data_filename file exists. 
-    if os.path.exists(path_to_EKMC_rate_constant_data_filename):
+    # Second, obtain the size and modification time of the kMC_sim.txt file before it is read.
+    EKMC_datafile_key = get_EKMC_datafile_key(path_to_sim)
 
-        # Fifth, open the EKMC_data_filename file.
-        with open(path_to_EKMC_rate_constant_data_filename, 'r') as datafile:
+    # Third, read the kMC_sim.txt file.
+    sim_name, data = read_EKMC_datafile(input_data)
 
-            # Sixth, ignore the first line, which is the top of the table
-            datafile.readline()
+    # Fourth, save the data to the cache file.
+    save_EKMC_data_cache(path_to_sim, EKMC_datafile_key, data)
 
-            # Seventh, for each line in the datafile:
-            for line, sim_datum in zip(datafile, sim_data):
-
-                counter_KMC_sim = sim_datum[0]
-                simulation_time = sim_datum[3]
+    # Fifth, return the data from the kMC_sim.txt file.
+    return (sim_name, data)
 
-                if simulation_time < 500.0: 
-                    continue
+EKMC_rate_constant_data_filename = 'kMC_sim_rate_constants.txt'
 
-                # 7.1: Split string into exciton donor informtion and the corresponding exciton acceptor rate constants. 
-                exciton_donor_info, exciton_acceptor_rate_constants = line.rstrip().split('-->')
+# This is used to convert the brackets, commas, colons and / dividers of each line in the EKMC_rate_constant_data_filename file into spaces.
+EKMC_rate_constant_data_translation_table = str.maketrans('(),:[]/', '       ')
 
-                # 7.2: Get the molecule name for the exciton donor that the exciton is current on.
-                counter_KMC_sim_prob, exciton_donor_info = exciton_donor_info.split(':')
-                counter_KMC_sim_prob = int(counter_KMC_sim_prob)
-                if not counter_KMC_sim == counter_KMC_sim_prob:
-                    raise Exception('Error')
+# This is the number of lines of the EKMC_rate_constant_data_filename file to parse before adding their hopping probabilities to the accumulator.
+EKMC_rate_constant_data_lines_per_chunk = 4096
 
-                # 7.2: Get the molecule name for the exciton donor that the exciton is current on.
-                exciton_donor_name = int(exciton_donor_info.split()[0])
+def read_EKMC_rate_constant_datafile(input_data, lines_per_chunk=EKMC_rate_constant_data_lines_per_chunk):
+    """
+    This method is designed to read the rate constant data from the kinetic Monte Carlo simulation files, called EKMC_rate_constant_data_filename
 
-                # 7.3: Get the unit cell position for the exciton donor that the exciton is currently on. 
-                exciton_donor_unit_cell_position = eval(re.findall(r'\(.*?\)', exciton_donor_info)[0])
+    The rate constant data given is for an exciton on an exciton donor to all the neighbouring exciton acceptor. The file is read in a single 
+    pass, and the hopping probabilities are added to a hop probability accumulator every lines_per_chunk lines. This means that the memory 
+    used stays bounded by the size of the neighbour list and lines_per_chunk, no matter how long the simulation is.
 
-                # 7.4: Get the unit cell position for the exciton donor that the exciton is currently on. 
-                sum_of_k_ijs = float(re.findall(r'\[.*?\]', exciton_donor_info)[0].replace('[','').replace(']','')) # s-1
+    Parameters
+    ----------
+    root : str.
+        This is the path to the overall folder that contains all the kinetic Monte Carlo simulations for a particular system.
+    sim_name : str.
+        This is the name of the simulation that was performed, and is the name of the folder that it's kinetic Monte Carlo simulation is held in.
+    sim_data : numpy.array
+        This is the data from the EKMC_data_filename file of this simulation, as given by read_EKMC_datafile.
+    neighbour_list : dict.
+        This is the neighbour list of the crystal, as given by get_hop_neighbour_list.
+    hop_probabilities_from_time : float
+        Only the steps from this simulation time (in ps) are included.
+    lines_per_chunk : int
+        This is the number of lines to parse before adding their hopping probabilities to the accumulator.
 
-                #hop_probability_data.setdefault(exciton_donor_name,{})
+    Attributes
+    ----------
+    EKMC_rate_constant_data_filename :str.
+        This is the name of the data files that contain the kinetic Monte Carlo simulation data.
 
-                # 7.5: Get the rate constant data for the neighbouring exciton acceptors.
-                for exciton_acceptor_rate_constant_data in exciton_acceptor_rate_constants.split('/'):
+    Returns
+    -------
+    sim_name : str.
+        This is the name of the simulation.
+    accumulator : dict.
+        This is the hop probability accumulator that contains the hopping probabilities of this simulation (see hop_probability_accumulator.py).
+    """
 
-                    # 7.5.1: split the data into info and rate constant data.
-                    exciton_acceptor_info, exciton_acceptor_rate_constant = exciton_acceptor_rate_constant_data.split(':')
+    # First, separate the input_data into the root, the sim_name, the sim_data, the neighbour_list and the hop_probabilities_from_time variables.
+    root, sim_name, sim_data, neighbour_list, hop_probabilities_from_time = input_data
 
-                    # 7.5.2: Get the molecule name for the exciton acceptor that the exciton could hop to.
-                    exciton_acceptor_name = int(exciton_acceptor_info.split()[0])
+    # Second, initalise the accumulator to record the hopping probabilities for this kinetic Monte Carlo simulation. 
+    accumulator = make_hop_probability_accumulator(neighbour_list)
 
-                    # 7.5.3: Get the unit cell position for the exciton acceptor that the exciton could hop to.
-                    exciton_acceptor_unit_cell_position = eval(re.findall(r'\(.*?\)', exciton_acceptor_info)[0])
+    # Third, get the path to the EKMC_rate_constant_data_filename
+    path_to_EKMC_rate_constant_data_filename = root+'/'+sim_name+'/'+EKMC_rate_constant_data_filename
 
-                    # 7.5.4: Get the rate constant data for an exciton moving from the exciton donor the exciton is currently 
-                    #        on, to the neighbouring exciton acceptor. 
-                    exciton_acceptor_hop_probability = float(exciton_acceptor_rate_constant)/sum_of_k_ijs
+    # Fourth, check to see if the EKMC_rate_constant_data_filename file exists and if there are any steps to include. 
+    if (not os.path.exists(path_to_EKMC_rate_constant_data_filename)) or (len(sim_data) == 0):
+        return (sim_name, accumulator)
 
-                    relative_exciton_acceptor_unit_cell_position_i = exciton_acceptor_unit_cell_position[0] - exciton_donor_unit_cell_position[0]
-                    relative_exciton_acceptor_unit_cell_position_j = exciton_acceptor_unit_cell_position[1] - exciton_donor_unit_cell_position[1]
-                    relative_exciton_acceptor_unit_cell_position_k = exciton_acceptor_unit_cell_position[2] - exciton_donor_unit_cell_position[2]
+    # Fifth, obtain the counters of the first step to include and of the last step in the EKMC_data_filename file.
+    index_of_first_step = np.searchsorted(sim_data['sim_time'], hop_probabilities_from_time, side='left')
+    if index_of_first_step == len(sim_data):
+        return (sim_name, accumulator)
+    first_counter = int(sim_data['count'][index_of_first_step])
+    last_counter  = int(sim_data['count'][-1])
 
-                    exciton_donor_acceptor_info = (exciton_donor_name, exciton_acceptor_name, relative_exciton_acceptor_unit_cell_position_i, relative_exciton_acceptor_unit_cell_position_j, relative_exciton_acceptor_unit_cell_position_k)
+    # Sixth, obtain the index of each molecule in the neighbour list.
+    molecule_indices  = {int(molecule_name): index for index, molecule_name in enumerate(neighbour_list['molecule_names'])}
+    neighbour_offsets = neighbour_list['neighbour_offsets']
+    hops              = neighbour_list['hops']
 
-                    #hop_probability_data[exciton_donor_name].setdefault(exciton_acceptor_info, []).append(exciton_acceptor_hop_probability)
-                    if not exciton_donor_acceptor_info in hop_probability_data:
-                        hop_probability_data[exciton_donor_acceptor_info] = []
-                    hop_probability_data.setdefault(exciton_donor_acceptor_info,[]).append(exciton_acceptor_hop_probability)
+    # Seventh, open the EKMC_rate_constant_data_filename file.
+    with open(path_to_EKMC_rate_constant_data_filename, 'r') as datafile:
 
-    # Come back here
-    #for exciton_donor_name in hop_probability_data.keys():
-    #    for exciton_acceptor_info in hop_probability_data[exciton_donor_name].keys():
-    #        all_hopping_probabilities = hop_probability_data[exciton_donor_name][exciton_acceptor_info]
-    #        hop_probability_data[exciton_donor_name][exciton_acceptor_info] = sum(all_hopping_probabilities) / float(len(all_hopping_probabilities))
+        # 7.1: Ignore the first line, which is the top of the table
+        datafile.readline()
 
-    # Eighth, return the hop_probability_data containing hopping probability averages.
-    return (sim_name, hop_probability_data)
+        # 7.2: For each line in the datafile:
+        hop_slots_chunk = []; hop_data_chunk = []
+        for line in datafile:
 
+            # 7.2.1: Only include the steps that occur from hop_probabilities_from_time, and that are in the EKMC_data_filename file.
+            counter = int(line[:line.index(':')])
+            if counter < first_counter:
+                continue
+            if counter > last_counter:
+                break
+
+            # 7.2.2: Split string into exciton donor informtion and the corresponding exciton acceptor rate constants. 
+            exciton_donor_info, exciton_acceptor_rate_constants = line.split('-->')
+            _, exciton_donor_name, cell_i, cell_j, cell_k, sum_of_k_ijs = exciton_donor_info.translate(EKMC_rate_constant_data_translation_table).split()
+
+            # 7.2.3: Get the rate constant data for the neighbouring exciton acceptors, as rows of (acceptor name, acceptor cell point i, j, k, rate constant)
+            exciton_acceptor_data = np.array(exciton_acceptor_rate_constants.translate(EKMC_rate_constant_data_translation_table).split(), dtype=np.float64).reshape(-1,5)
+
+            # 7.2.4: Get the slots in the neighbour list of the hops from this exciton donor.
+            if int(exciton_donor_name) not in molecule_indices:
+                raise Exception('Error: Molecule '+str(exciton_donor_name)+' in step '+str(counter)+' of '+str(path_to_EKMC_rate_constant_data_filename)+' is not in the KMC_setup_data.ekmc file.')
+            molecule_index = molecule_indices[int(exciton_donor_name)]
+            first_hop_slot, last_hop_slot = neighbour_offsets[molecule_index], neighbour_offsets[molecule_index+1]
+            if not (len(exciton_acceptor_data) == last_hop_slot - first_hop_slot):
+                raise Exception('Error: Molecule '+str(exciton_donor_name)+' has '+str(len(exciton_acceptor_data))+' neighbours in step '+str(counter)+' of '+str(path_to_EKMC_rate_constant_data_filename)+', but has '+str(last_hop_slot - first_hop_slot)+' neighbours in the KMC_setup_data.ekmc file.')
+
+            # 7.2.5: Convert the acceptor cell points into cell points relative to the exciton donor, and the rate constants into hopping probabilities.
+            exciton_acceptor_data[:,1:4] -= (float(cell_i), float(cell_j), float(cell_k))
+            exciton_acceptor_data[:,4]   /= float(sum_of_k_ijs)
+            hop_slots_chunk.append(np.arange(first_hop_slot, last_hop_slot))
+            hop_data_chunk.append(exciton_acceptor_data)
+
+            # 7.2.6: Add the hopping probabilities to the accumulator every lines_per_chunk lines.
+            if len(hop_slots_chunk) >= lines_per_chunk:
+                add_chunk_to_hop_probability_accumulator(accumulator, hop_slots_chunk, hop_data_chunk, hops, path_to_EKMC_rate_constant_data_filename)
+                hop_slots_chunk = []; hop_data_chunk = []
+
+        # 7.3: Add the hopping probabilities of the last chunk to the accumulator.
+        if len(hop_slots_chunk) > 0:
+            add_chunk_to_hop_probability_accumulator(accumulator, hop_slots_chunk, hop_data_chunk, hops, path_to_EKMC_rate_constant_data_filename)
+
+    # Eighth, return the accumulator containing the hopping probabilities of this simulation.
+    return (sim_name, accumulator)
+
+def add_chunk_to_hop_probability_accumulator(accumulator, hop_slots_chunk, hop_data_chunk, hops, path_to_EKMC_rate_constant_data_filename):
+    """
+    This method is designed to check that the hops in a chunk of the EKMC_rate_constant_data_filename file are those in the neighbour list, and then add their hopping probabilities to the accumulator.
 
+    Parameters
+    ----------
+    accumulator : dict.
+        This is the hop probability accumulator.
+    hop_slots_chunk : list of numpy.array
+        These are the slots in the neighbour list of the hops of each line in the chunk.
+    hop_data_chunk : list of numpy.array
+        These are the (acceptor name, relative cell point i, j, k, hopping probability) of the hops of each line in the chunk.
+    hops : numpy.array
+        These are the hops in the neighbour list, given as (donor molecule name, acceptor molecule name, relative cell point i, j, k).
+    path_to_EKMC_rate_constant_data_filename : str.
+        This is the path to the EKMC_rate_constant_data_filename file. This is used for reporting errors.
+    """
 
+    # First, join the lines of the chunk together.
+    hop_slots = np.concatenate(hop_slots_chunk)
+    hop_data  = np.concatenate(hop_data_chunk)
 
+    # Second, check that the acceptor and relative cell point of each hop are the same as in the neighbour list.
+    if not np.array_equal(hop_data[:,0:4], hops[hop_slots,1:5]):
+        raise Exception('Error: The neighbours given in '+str(path_to_EKMC_rate_constant_data_filename)+' are not the same as the neighbours in the KMC_setup_data.ekmc file.')
 
+    # Third, add the hopping probabilities to the accumulator.
+    add_hop_probabilities_to_accumulator(accumulator, hop_slots, hop_data[:,4])
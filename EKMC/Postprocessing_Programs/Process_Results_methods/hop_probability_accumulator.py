@@ -0,0 +1,177 @@
+"""
+hop_probability_accumulator.py, Geoffrey Weal, 19/10/26
+
+This script is designed to accumulate the probabilities of an exciton hopping from each exciton donor to each of its neighbouring exciton
+acceptors, one kMC_sim_rate_constants.txt file at a time.
+
+Each possible hop is given a slot in the neighbour list of the crystal (the neighbours table of get_crystal_tables), which is the same list
+(and in the same order) that the EKMC C++ code writes to the kMC_sim_rate_constants.txt file for each step. For each hop, the number of
+times it was possible (count), the sum of its hopping probabilities (sum_p), and the sum of its squared hopping probabilities
+(sum_p_squared) are kept in arrays that are made once the neighbour list is known. This means that the memory needed by an accumulator only
+depends on the number of neighbours in the crystal, not on the length of the simulation. Accumulators can be merged by adding them
+together, so each kMC_sim_rate_constants.txt file can be read in a separate process.
+"""
+import numpy as np
+
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_setup_data import read_KMC_setup_data
+from EKMC.EKMC.Run_EKMC_setup_files.read_KMC_model      import load_KMC_model, convert_KMC_setup_data_to_KMC_model
+from EKMC.EKMC.KMC_algorithm.get_crystal_tables         import get_crystal_tables
+
+def get_hop_neighbour_list(path_to_KMC_setup_data):
+    """
+    This method is designed to obtain the neighbour list of the crystal, in the same order as the EKMC C++ code writes to the kMC_sim_rate_constants.txt file.
+
+    Parameters
+    ----------
+    path_to_KMC_setup_data : str.
+        This is the path to the folder that contains the KMC_setup_data.ekmc file (and the KMC_setup_data.npz model file, if it was written during setup).
+
+    Returns
+    -------
+    neighbour_list : dict.
+        This contains the names of the molecules in the unit cell ('molecule_names'), the offsets of the neighbours of each molecule in the neighbour list ('neighbour_offsets'), and each hop in the neighbour list, given as (donor molecule name, acceptor molecule name, relative cell point i, j, k) ('hops').
+    """
+
+    # First, obtain the model of the crystal, in the same way as when running EKMC.
+    KMC_model = load_KMC_model(path_to_KMC_setup_data)
+    if KMC_model is None:
+        KMC_model = convert_KMC_setup_data_to_KMC_model(*read_KMC_setup_data(path_to_KMC_setup_data, use_KMC_model=False))
+
+    # Second, obtain the neighbours of each molecule.
+    crystal_tables = get_crystal_tables(KMC_model)
+    molecule_names    = np.array(crystal_tables['molecule_names'], dtype=np.int64)
+    neighbour_offsets = np.array(crystal_tables['neighbour_offsets'], dtype=np.int64)
+    neighbours        = crystal_tables['neighbours']
+
+    # Third, obtain the donor molecule, acceptor molecule and relative cell point of each hop in the neighbour list.
+    hops = np.empty((len(neighbours), 5), dtype=np.int64)
+    hops[:,0] = np.repeat(molecule_names, np.diff(neighbour_offsets))
+    hops[:,1] = molecule_names[neighbours['mol_index']]
+    hops[:,2] = neighbours['uniti']
+    hops[:,3] = neighbours['unitj']
+    hops[:,4] = neighbours['unitk']
+
+    # Fourth, return the neighbour list.
+    return {'molecule_names': molecule_names, 'neighbour_offsets': neighbour_offsets, 'hops': hops}
+
+def make_hop_probability_accumulator(neighbour_list):
+    """
+    This method is designed to make an empty hop probability accumulator.
+
+    Parameters
+    ----------
+    neighbour_list : dict.
+        This is the neighbour list of the crystal, as given by get_hop_neighbour_list.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the hop probability accumulator. This contains the number of times each hop was possible ('count'), the sum of the hopping probabilities of each hop ('sum_p'), and the sum of the squared hopping probabilities of each hop ('sum_p_squared').
+    """
+    no_of_hops = len(neighbour_list['hops'])
+    return {'count': np.zeros(no_of_hops, dtype=np.int64), 'sum_p': np.zeros(no_of_hops, dtype=np.float64), 'sum_p_squared': np.zeros(no_of_hops, dtype=np.float64)}
+
+def add_hop_probabilities_to_accumulator(accumulator, hop_slots, hop_probabilities):
+    """
+    This method is designed to add hopping probabilities to the hop probability accumulator. The accumulator is updated in place.
+
+    Parameters
+    ----------
+    accumulator : dict.
+        This is the hop probability accumulator.
+    hop_slots : numpy.array of ints
+        These are the slots in the neighbour list of each hop.
+    hop_probabilities : numpy.array of floats
+        These are the hopping probabilities of each hop.
+    """
+    no_of_hops = len(accumulator['count'])
+    accumulator['count']         += np.bincount(hop_slots, minlength=no_of_hops)
+    accumulator['sum_p']         += np.bincount(hop_slots, weights=hop_probabilities, minlength=no_of_hops)
+    accumulator['sum_p_squared'] += np.bincount(hop_slots, weights=hop_probabilities ** 2.0, minlength=no_of_hops)
+
+def merge_hop_probability_accumulators(accumulator1, accumulator2):
+    """
+    This method is designed to merge two hop probability accumulators.
+
+    Parameters
+    ----------
+    accumulator1 : dict.
+        This is a hop probability accumulator.
+    accumulator2 : dict.
+        This is another hop probability accumulator, made from the same neighbour list as accumulator1.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the hop probability accumulator that contains the hopping probabilities from both accumulator1 and accumulator2.
+    """
+    if not (len(accumulator1['count']) == len(accumulator2['count'])):
+        raise Exception('Error: Can not merge hop probability accumulators that were made from different neighbour lists. Number of hops: '+str(len(accumulator1['count']))+' and '+str(len(accumulator2['count'])))
+    return {key: accumulator1[key] + accumulator2[key] for key in ('count', 'sum_p', 'sum_p_squared')}
+
+def get_hop_probability_statistics(neighbour_list, accumulator):
+    """
+    This method is designed to obtain the mean and standard deviation of the hopping probability of each hop from the hop probability accumulator.
+
+    Parameters
+    ----------
+    neighbour_list : dict.
+        This is the neighbour list of the crystal, as given by get_hop_neighbour_list.
+    accumulator : dict.
+        This is the hop probability accumulator.
+
+    Returns
+    -------
+    hop_probability_statistics : dict.
+        This contains the (mean, sample standard deviation) of the hopping probability of each hop that was possible at least once, given by (donor molecule name, acceptor molecule name, relative cell point i, j, k). The standard deviation is nan if the hop was only possible once.
+    """
+
+    # First, obtain the hops that were possible at least once.
+    was_possible  = accumulator['count'] > 0
+    count         = accumulator['count'][was_possible].astype(np.float64)
+    sum_p         = accumulator['sum_p'][was_possible]
+    sum_p_squared = accumulator['sum_p_squared'][was_possible]
+
+    # Second, obtain the mean and the sample standard deviation of the hopping probability of each hop.
+    means = sum_p / count
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = np.maximum(sum_p_squared - sum_p * means, 0.0) / (count - 1.0)
+    stdevs = np.where(count > 1, np.sqrt(variances), np.nan)
+
+    # Third, return the mean and standard deviation of each hop.
+    hops = neighbour_list['hops'][was_possible]
+    return {tuple(int(value) for value in hop): (float(mean), float(stdev)) for hop, mean, stdev in zip(hops, means, stdevs)}
+
+def save_hop_probability_accumulator(path_to_accumulator, accumulator):
+    """
+    This method is designed to save a hop probability accumulator to disk, so that it can be merged with other accumulators later.
+
+    Parameters
+    ----------
+    path_to_accumulator : str.
+        This is the path to save the accumulator to (as a npz file).
+    accumulator : dict.
+        This is the hop probability accumulator.
+    """
+    np.savez(path_to_accumulator, **accumulator)
+
+def load_hop_probability_accumulator(path_to_accumulator):
+    """
+    This method is designed to load a hop probability accumulator from disk.
+
+    Parameters
+    ----------
+    path_to_accumulator : str.
+        This is the path to the accumulator npz file.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the hop probability accumulator.
+    """
+    with np.load(path_to_accumulator) as accumulator_npz:
+        accumulator = {key: np.array(accumulator_npz[key]) for key in accumulator_npz.files}
+    for key in ('count', 'sum_p', 'sum_p_squared'):
+        if key not in accumulator:
+            raise Exception('Error: '+str(path_to_accumulator)+' is not a hop probability accumulator file. Could not find '+str(key)+'.')
+    return accumulator
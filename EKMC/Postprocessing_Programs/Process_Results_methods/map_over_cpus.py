@@ -0,0 +1,87 @@
+"""
+map_over_cpus.py, Geoffrey Weal, 19/10/26
+
+This script is designed to apply a method to each input, using a process pool only if more than one cpu is given.
+
+When a folder is processed in one of the processes of the process pool used by Process_Results, it is usually given one cpu.
+Running the inputs in that process (rather than starting a new process pool with one process) means that process pools are
+not started inside process pools, and that the number of processes running at once stays within the cpus given.
+
+imap_over_cpus gives the outputs one at a time, in the same order as the inputs, so that each output can be used (for example, merged
+into an accumulator) and discarded before the next is given. Only a few inputs are given to the process pool ahead of the output being
+given, so the outputs waiting to be given do not build up in memory.
+"""
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from tqdm import tqdm
+from tqdm.contrib.concurrent import process_map
+
+# This is the number of inputs given to the process pool for each cpu ahead of the output being given in imap_over_cpus.
+no_of_inputs_ahead_per_cpu = 2
+
+def map_over_cpus(method, inputs, cpu_count=1, total=None, **tqdm_kwargs):
+    """
+    This method is designed to apply a method to each input, using a process pool if more than one cpu is given.
+
+    Parameters
+    ----------
+    method : function
+        This is the method to apply to each input.
+    inputs : iterable
+        These are the inputs to give to method.
+    cpu_count : int
+        This is the number of cpus to use. If this is 1, the inputs are given to method in this process.
+    total : int or None
+        This is the number of inputs, used for the progress bar.
+    tqdm_kwargs : dict.
+        These are the other arguments to give to the progress bar (such as unit, desc and leave).
+
+    Returns
+    -------
+    outputs : list
+        These are the outputs from method for each input, in the same order as inputs.
+    """
+    if cpu_count <= 1:
+        return [method(input_datum) for input_datum in tqdm(inputs, total=total, **tqdm_kwargs)]
+    return process_map(method, inputs, max_workers=cpu_count, total=total, **tqdm_kwargs)
+
+def imap_over_cpus(method, inputs, cpu_count=1, total=None, **tqdm_kwargs):
+    """
+    This is a generator designed to apply a method to each input, using a process pool if more than one cpu is given, and give each output in the same order as inputs.
+
+    Parameters
+    ----------
+    method : function
+        This is the method to apply to each input.
+    inputs : iterable
+        These are the inputs to give to method.
+    cpu_count : int
+        This is the number of cpus to use. If this is 1, the inputs are given to method in this process.
+    total : int or None
+        This is the number of inputs, used for the progress bar.
+    tqdm_kwargs : dict.
+        These are the other arguments to give to the progress bar (such as unit, desc and leave).
+
+    Yields
+    ------
+    output : object
+        This is the output from method for each input, in the same order as inputs.
+    """
+
+    # First, if only one cpu is given, give the inputs to method in this process.
+    if cpu_count <= 1:
+        for input_datum in tqdm(inputs, total=total, **tqdm_kwargs):
+            yield method(input_datum)
+        return
+
+    # Second, give the inputs to the process pool, only keeping no_of_inputs_ahead_per_cpu inputs for each cpu in the process pool at a time.
+    with ProcessPoolExecutor(max_workers=cpu_count) as executor, tqdm(total=total, **tqdm_kwargs) as progress_bar:
+        futures = deque()
+        for input_datum in inputs:
+            futures.append(executor.submit(method, input_datum))
+            if len(futures) >= no_of_inputs_ahead_per_cpu * cpu_count:
+                yield futures.popleft().result()
+                progress_bar.update(1)
+        while len(futures) > 0:
+            yield futures.popleft().result()
+            progress_bar.update(1)
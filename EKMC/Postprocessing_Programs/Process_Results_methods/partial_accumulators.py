@@ -0,0 +1,181 @@
+"""
+partial_accumulators.py, Geoffrey Weal, 19/10/26
+
+This script is designed to save and load the partial accumulators made by each shard of process_results --map.
+
+With process_results --map, each task of a slurm array (a shard) reduces its share of the Sims of each root into partial accumulators:
+the ensemble accumulator of the displacements and energies of the exciton at each sampled time, the hop probability accumulator, and the
+positions of the exciton in each of its Sims at each sampled time (used to write the paths of the excitons to disk). These are saved in
+EKMC_Partials_Folder/<root>/Shard<shard_index>. process_results --reduce then merges the partial accumulators of all the shards of each
+root together, and saves the usual data, figures and Excel spreadsheet from them.
+"""
+import os, json
+import tempfile
+import numpy as np
+from SUMELF import make_folder, remove_folder
+
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.ensemble_accumulator import save_ensemble_accumulator, load_ensemble_accumulator, merge_ensemble_accumulators
+from EKMC.Postprocessing_Programs.Process_Results_methods.hop_probability_accumulator              import save_hop_probability_accumulator, load_hop_probability_accumulator, merge_hop_probability_accumulators
+
+partials_foldername = 'EKMC_Partials_Folder'
+shard_details_filename = 'shard_details.json'
+ensemble_accumulator_filename = 'ensemble_accumulator.npz'
+hop_probability_accumulator_filename = 'hop_probability_accumulator.npz'
+positions_at_time_filename = 'positions_at_time.npy'
+
+def get_shard_from_environment(shard_index=None, no_of_shards=None):
+    """
+    This method will obtain the shard that this task is to process. Any of these not given are obtained from the slurm array environment variables.
+
+    Parameters
+    ----------
+    shard_index : int or None
+        This is the index of the shard, from 0 to no_of_shards-1. If None, this is SLURM_ARRAY_TASK_ID - SLURM_ARRAY_TASK_MIN.
+    no_of_shards : int or None
+        This is the number of shards. If None, this is SLURM_ARRAY_TASK_COUNT.
+
+    Returns
+    -------
+    shard_index : int
+        This is the index of the shard.
+    no_of_shards : int
+        This is the number of shards.
+    """
+
+    # First, obtain the shard index and the number of shards from the slurm array, if not given.
+    if shard_index is None:
+        if 'SLURM_ARRAY_TASK_ID' not in os.environ:
+            raise Exception('Error: The shard index was not given (--shard_index), and this is not running as a slurm array task (SLURM_ARRAY_TASK_ID is not set).')
+        shard_index = int(os.environ['SLURM_ARRAY_TASK_ID']) - int(os.environ.get('SLURM_ARRAY_TASK_MIN', 0))
+    if no_of_shards is None:
+        if 'SLURM_ARRAY_TASK_COUNT' not in os.environ:
+            raise Exception('Error: The number of shards was not given (--no_of_shards), and this is not running as a slurm array task (SLURM_ARRAY_TASK_COUNT is not set).')
+        no_of_shards = int(os.environ['SLURM_ARRAY_TASK_COUNT'])
+
+    # Second, check that the shard is valid.
+    if no_of_shards < 1:
+        raise Exception('Error: The number of shards must be 1 or greater. no_of_shards = '+str(no_of_shards))
+    if not (0 <= shard_index < no_of_shards):
+        raise Exception('Error: The shard index must be between 0 and '+str(no_of_shards-1)+'. shard_index = '+str(shard_index))
+
+    # Third, return shard_index and no_of_shards
+    return shard_index, no_of_shards
+
+def get_partials_folder(root):
+    """
+    This method will obtain the folder that the partial accumulators of the shards of a root are saved in.
+
+    Parameters
+    ----------
+    root : str.
+        This is the path to the root, as given by get_roots_to_process.
+
+    Returns
+    -------
+    path_to_partials : str.
+        This is the folder that the partial accumulators of the shards of the root are saved in.
+    """
+    path_to_partials = partials_foldername+'/'+root[2::]
+    if path_to_partials[-1] == '/':
+        path_to_partials = path_to_partials[:-1]
+    return path_to_partials
+
+def save_partial_accumulators(root, shard_details, ensemble_accumulator, positions_at_time, hop_probability_accumulator=None):
+    """
+    This method will save the partial accumulators of a shard of a root.
+
+    The details of the shard are written last, so that a shard that did not finish being saved is not used by process_results --reduce.
+
+    Parameters
+    ----------
+    root : str.
+        This is the path to the root.
+    shard_details : dict.
+        These are the details of the shard, including the shard_index, no_of_shards, the names of the Sims in the shard (sim_names), and the settings the shard was made with.
+    ensemble_accumulator : dict.
+        This is the ensemble accumulator of the Sims in the shard.
+    positions_at_time : numpy.array
+        These are the positions of the exciton in each Sim of the shard at each sampled time.
+    hop_probability_accumulator : dict. or None
+        This is the hop probability accumulator of the Sims in the shard. None if no kMC_sim_rate_constants.txt files were written. Default: None
+    """
+    path_to_shard = get_partials_folder(root)+'/Shard'+str(shard_details['shard_index'])
+    remove_folder(path_to_shard)
+    make_folder(path_to_shard)
+    save_ensemble_accumulator(path_to_shard+'/'+ensemble_accumulator_filename, ensemble_accumulator)
+    np.save(path_to_shard+'/'+positions_at_time_filename, positions_at_time)
+    if hop_probability_accumulator is not None:
+        save_hop_probability_accumulator(path_to_shard+'/'+hop_probability_accumulator_filename, hop_probability_accumulator)
+    with open(path_to_shard+'/'+shard_details_filename, 'w') as shard_detailsJSON:
+        json.dump(shard_details, shard_detailsJSON, indent=4)
+
+def load_and_merge_partial_accumulators(root, begin_recording_time, end_recording_time, multiple_time_origins=False):
+    """
+    This method will load the partial accumulators of all the shards of a root, and merge them together.
+
+    Parameters
+    ----------
+    root : str.
+        This is the path to the root.
+    begin_recording_time : float
+        This is the time (in ps) that the shards must have obtained the hopping probabilities from.
+    end_recording_time : float
+        This is the time (in ps) that the shards must have sampled up to.
+    multiple_time_origins : bool.
+        This is whether the shards must have averaged over every sampled time origin. Default: False
+
+    Returns
+    -------
+    ensemble_accumulator : dict.
+        This is the ensemble accumulator of all the Sims in the shards.
+    hop_probability_accumulator : dict. or None
+        This is the hop probability accumulator of all the Sims in the shards. None if no shards had a hop probability accumulator.
+    positions_at_time : numpy.memmap
+        These are the positions of the exciton in each Sim at each sampled time, in order of Sim number.
+    sim_names : list of str.
+        These are the names of all the Sims in the shards, in order of Sim number.
+    """
+
+    # First, read the details of each shard of the root.
+    path_to_partials = get_partials_folder(root)
+    shard_folders = [dirname for dirname in os.listdir(path_to_partials) if (dirname.startswith('Shard') and dirname.replace('Shard','').isdigit())] if os.path.exists(path_to_partials) else []
+    if len(shard_folders) == 0:
+        raise Exception('Error: Could not find any partial accumulators for '+str(root)+' in '+str(path_to_partials)+'. Run "EKMC process_results --map" for each shard first.')
+    all_shard_details = []
+    for shard_folder in shard_folders:
+        path_to_shard_details = path_to_partials+'/'+shard_folder+'/'+shard_details_filename
+        if not os.path.exists(path_to_shard_details):
+            raise Exception('Error: '+str(path_to_partials+'/'+shard_folder)+' did not finish being saved. Run "EKMC process_results --map" for this shard again.')
+        with open(path_to_shard_details, 'r') as shard_detailsJSON:
+            all_shard_details.append((path_to_partials+'/'+shard_folder, json.load(shard_detailsJSON)))
+
+    # Second, check that there is one of each shard, and that all the shards were made with the same settings.
+    no_of_shards = all_shard_details[0][1]['no_of_shards']
+    shard_indices = sorted([shard_details['shard_index'] for path_to_shard, shard_details in all_shard_details])
+    if (not all((shard_details['no_of_shards'] == no_of_shards) for path_to_shard, shard_details in all_shard_details)) or (not (shard_indices == list(range(no_of_shards)))):
+        raise Exception('Error: The shards in '+str(path_to_partials)+' do not make up a full set of shards. Shards found: '+str(shard_indices)+'. Number of shards: '+str(sorted(set(shard_details['no_of_shards'] for path_to_shard, shard_details in all_shard_details)))+'. Remove this folder and run "EKMC process_results --map" for each shard again.')
+    for path_to_shard, shard_details in all_shard_details:
+        if not ((shard_details.get('begin_recording_time') == begin_recording_time) and (shard_details['end_recording_time'] == end_recording_time) and (shard_details['multiple_time_origins'] == multiple_time_origins)):
+            raise Exception('Error: '+str(path_to_shard)+' was made with begin_recording_time = '+str(shard_details.get('begin_recording_time'))+' ps, end_recording_time = '+str(shard_details['end_recording_time'])+' ps and multiple_time_origins = '+str(shard_details['multiple_time_origins'])+', but begin_recording_time = '+str(begin_recording_time)+' ps, end_recording_time = '+str(end_recording_time)+' ps and multiple_time_origins = '+str(multiple_time_origins)+' were given. Use the same settings for --map and --reduce.')
+
+    # Third, merge the ensemble accumulators and the hop probability accumulators of all the shards.
+    ensemble_accumulator = None
+    hop_probability_accumulator = None
+    for path_to_shard, shard_details in all_shard_details:
+        shard_ensemble_accumulator = load_ensemble_accumulator(path_to_shard+'/'+ensemble_accumulator_filename)
+        ensemble_accumulator = shard_ensemble_accumulator if (ensemble_accumulator is None) else merge_ensemble_accumulators(ensemble_accumulator, shard_ensemble_accumulator)
+        if os.path.exists(path_to_shard+'/'+hop_probability_accumulator_filename):
+            shard_hop_probability_accumulator = load_hop_probability_accumulator(path_to_shard+'/'+hop_probability_accumulator_filename)
+            hop_probability_accumulator = shard_hop_probability_accumulator if (hop_probability_accumulator is None) else merge_hop_probability_accumulators(hop_probability_accumulator, shard_hop_probability_accumulator)
+
+    # Fourth, place the positions of the exciton in each Sim of every shard into one array, in order of Sim number.
+    sims_in_shards = sorted([(int(sim_name.replace('Sim','')), sim_name, path_to_shard, index) for path_to_shard, shard_details in all_shard_details for index, sim_name in enumerate(shard_details['sim_names'])])
+    no_of_times = len(ensemble_accumulator['energy_mean'])
+    positions_at_time = np.memmap(tempfile.TemporaryFile(), dtype=np.float64, mode='w+', shape=(len(sims_in_shards), no_of_times, 3))
+    shard_positions_at_time = {path_to_shard: np.load(path_to_shard+'/'+positions_at_time_filename, mmap_mode='r') for path_to_shard, shard_details in all_shard_details}
+    for sim_index, (sim_number, sim_name, path_to_shard, index) in enumerate(sims_in_shards):
+        positions_at_time[sim_index] = shard_positions_at_time[path_to_shard][index]
+    sim_names = [sim_name for sim_number, sim_name, path_to_shard, index in sims_in_shards]
+
+    # Fifth, return the merged accumulators, the positions of the exciton, and the names of the Sims.
+    return ensemble_accumulator, hop_probability_accumulator, positions_at_time, sim_names
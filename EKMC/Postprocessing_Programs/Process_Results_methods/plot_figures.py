@@ -0,0 +1,151 @@
+"""
+plot_figures.py, Geoffrey Weal, 19/10/26
+
+This script is designed to plot the figures of the ensemble data over time from the text files written by save_data_and_plot_figures.
+
+The figures are plotted as a separate stage after the data of every folder has been processed, so that the figures of all folders can
+be plotted at the same time in a process pool, or skipped altogether and plotted later from the text files. Each figure is drawn
+with line artists that are rasterised (so the PDF files do not contain every point as a separate vector object), and the points can
+optionally be decimated before plotting.
+"""
+import os
+import numpy as np
+
+from matplotlib.figure import Figure
+
+from EKMC.Postprocessing_Programs.Process_Results_methods.map_over_cpus import map_over_cpus
+
+# These are the figures that can be plotted, along with the text file their data is read from, the labels of each column of data, and the y axis label.
+figure_details = {}
+figure_details['Disp_Vs_Time']             = ('Disp_Vs_Time.txt',             None, r"$\mathregular{\left\langle d \right\rangle  (Å)}$")
+figure_details['Disp2_Vs_Time']            = ('Disp2_Vs_Time.txt',            None, r"$\mathregular{\left\langle d^2 \right\rangle  (Å^2)}$")
+figure_details['Energy_Vs_Time']           = ('Energy_Vs_Time.txt',           None, r"$\mathregular{\left\langle E \right\rangle  (eV)}$")
+figure_details['Diffusion_Vs_Time']        = ('Diffusion_Vs_Time.txt',        None, r"Diffusion Coefficient $\mathregular{(cm^{2} s^{-1})}$")
+figure_details['Diffusion_Tensor_Vs_Time'] = ('Diffusion_Tensor_Vs_Time.txt', ['xx', 'xy/yx', 'xz/zx', 'yy', 'yz/zy', 'zz'], r"Diffusion Tensor Components $\mathregular{(cm^2 s^{-1})}$")
+figure_details['Eigenvalues_of_Diagonalised_Diffusion_Tensor_Vs_Time'] = ('Eigenvalues_of_Diagonalised_Diffusion_Tensor_Vs_Time.txt', ['major', 'first minor', 'second minor'], r"Diffusion Tensor Eigenvalues $\mathregular{(cm^2 s^{-1})}$")
+
+# This is the name of the file that contains the energy asymptote of each conformationally unique molecule, which are drawn on the Energy_Vs_Time figure.
+energy_limits_filename = 'Energy_Limits.txt'
+
+def plot_figures(paths_to_data, cpu_count=1, max_points_per_plot=None):
+    """
+    This method is designed to plot the figures for each folder of data in a process pool.
+
+    Parameters
+    ----------
+    paths_to_data : list of str.
+        These are the folders that contain the text files written by save_data_and_plot_figures.
+    cpu_count : int
+        This is the number of CPUs to use to plot figures.
+    max_points_per_plot : int or None
+        This is the maximum number of points to plot for each line. If None, all points are plotted. Default: None
+    """
+
+    # First, obtain the figures to plot in each folder.
+    inputs = [(path_to_data, figure_name, max_points_per_plot) for path_to_data in paths_to_data for figure_name, (data_filename, labels, ylabel) in figure_details.items() if os.path.exists(path_to_data+'/'+data_filename)]
+
+    # Second, plot all the figures.
+    print('Plotting '+str(len(inputs))+' figures for '+str(len(paths_to_data))+' folder(s).')
+    map_over_cpus(plot_figure, inputs, cpu_count=cpu_count, total=len(inputs), unit=' figures', desc='Plotting figures', leave=False)
+
+def get_folders_to_plot(data_foldername):
+    """
+    This method is designed to obtain all the folders in data_foldername that contain data to plot.
+
+    Parameters
+    ----------
+    data_foldername : str.
+        This is the folder that contains the data written by process_results.
+
+    Returns
+    -------
+    paths_to_data : list of str.
+        These are the folders that contain data to plot.
+    """
+    paths_to_data = []
+    for root, dirs, files in os.walk(data_foldername):
+        dirs.sort()
+        if any((data_filename in files) for data_filename, labels, ylabel in figure_details.values()):
+            paths_to_data.append(root)
+    return paths_to_data
+
+def plot_figure(input_data):
+    """
+    This method is designed to plot a figure from its text file, and save it as a png and pdf file.
+
+    Parameters
+    ----------
+    path_to_data : str.
+        This is the folder that contains the text file of the figure, and to save the figure to.
+    figure_name : str.
+        This is the name of the figure to plot, as given in figure_details.
+    max_points_per_plot : int or None
+        This is the maximum number of points to plot for each line. If None, all points are plotted.
+    """
+
+    # First, separate the input_data into the path_to_data, figure_name, and max_points_per_plot variables.
+    path_to_data, figure_name, max_points_per_plot = input_data
+    data_filename, labels, ylabel = figure_details[figure_name]
+
+    # Second, read the data from the text file, where the first column is the time.
+    data = np.loadtxt(path_to_data+'/'+data_filename, skiprows=1, delimiter='\t', ndmin=2)
+    data = decimate_points(data, max_points_per_plot)
+    times = data[:,0]
+
+    # Third, draw the figure.
+    figure = Figure()
+    axis = figure.add_subplot(111)
+    if figure_name == 'Energy_Vs_Time':
+        for energy_limit in read_energy_limits(path_to_data):
+            axis.axhline(y=energy_limit, color='r', linestyle='--')
+    for column_index in range(1, data.shape[1]):
+        label = None if (labels is None) else labels[column_index-1]
+        axis.plot(times, data[:,column_index], label=label, linewidth=1, rasterized=True)
+    axis.set_xlabel('Time (ps)')
+    axis.set_ylabel(ylabel)
+    if labels is not None:
+        axis.legend()
+
+    # Fourth, save the figure.
+    figure.savefig(path_to_data+'/'+figure_name+'.png', dpi=300)
+    figure.savefig(path_to_data+'/'+figure_name+'.pdf', dpi=300)
+
+def decimate_points(data, max_points_per_plot=None):
+    """
+    This method is designed to reduce the number of points to plot to at most max_points_per_plot, by taking evenly spaced rows of data. The first and last rows are always kept.
+
+    Parameters
+    ----------
+    data : numpy.array
+        This is the data to plot, where each row is a point.
+    max_points_per_plot : int or None
+        This is the maximum number of points to plot. If None, all points are plotted.
+
+    Returns
+    -------
+    data : numpy.array
+        This is the decimated data.
+    """
+    if (max_points_per_plot is None) or (len(data) <= max_points_per_plot):
+        return data
+    if max_points_per_plot < 2:
+        raise Exception('Error: max_points_per_plot must be 2 or greater. max_points_per_plot = '+str(max_points_per_plot))
+    return data[np.unique(np.linspace(0, len(data)-1, max_points_per_plot).round().astype(int))]
+
+def read_energy_limits(path_to_data):
+    """
+    This method is designed to read the energy asymptotes of the conformationally unique molecules from energy_limits_filename, if it exists.
+
+    Parameters
+    ----------
+    path_to_data : str.
+        This is the folder that contains energy_limits_filename.
+
+    Returns
+    -------
+    energy_limits : numpy.array
+        These are the energy asymptotes (in eV).
+    """
+    if not os.path.exists(path_to_data+'/'+energy_limits_filename):
+        return np.empty(0)
+    return np.loadtxt(path_to_data+'/'+energy_limits_filename, skiprows=1, delimiter='\t', usecols=1, ndmin=1)
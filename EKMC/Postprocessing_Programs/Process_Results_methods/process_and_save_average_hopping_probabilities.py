@@ -1,45 +1,42 @@
 """
-time_average_data.py, Geoffrey Weal, 30/8/22
+process_and_save_average_hopping_probabilities.py, Geoffrey Weal, 30/8/22
 
-This script is designed to collect the time average data for simulations
+This script is designed to obtain and save the average hopping probabilities for simulations
 """
 
 import os
-from statistics import mean, stdev
+from EKMC.Postprocessing_Programs.Process_Results_methods.hop_probability_accumulator import get_hop_probability_statistics
 
-def process_and_save_average_hopping_probabilities(data_foldername, path, all_sims_hop_probs):
+def process_and_save_average_hopping_probabilities(data_foldername, path, hop_probability_data):
 
-    all_sims_hop_probs = get_average_hopping_probabilities(all_sims_hop_probs)
+    all_sims_hop_probs = get_average_hopping_probabilities(hop_probability_data)
     save_average_hopping_probabilities(data_foldername, path, all_sims_hop_probs)
 
 
-def get_average_hopping_probabilities(all_sims_hop_probs):
+def get_average_hopping_probabilities(hop_probability_data):
     """
     This method is designed to obtain the average hopping probability for between exciton donor and all its neighbouring exciton acceptors across all simulations performed. 
 
     Parameters
     ----------
-    all_sims_hop_probs : list
-        This is the hopping probability data between exciton donor and all its neighbouring exciton acceptors.
-    """
-
-    print('Rearranging Hopping Probability Data')
+    hop_probability_data : tuple or None
+        This is the neighbour list of the crystal and the hop probability accumulator containing the hopping probabilities across all simulations, as given by collect_data.
 
-    # First, gather all the hopping probabilities across all simulation and concatenate them together. 
-    all_hop_probs_across_sims = {}
-    for index, sim_hop_probs in enumerate(all_sims_hop_probs):
-        simname, sim_hop_probs_data = sim_hop_probs
-        for exciton_donor_acceptor_info in list(sim_hop_probs_data.keys()):
-            all_hop_probs_across_sims[exciton_donor_acceptor_info] = all_hop_probs_across_sims.get(exciton_donor_acceptor_info,[]) + sim_hop_probs_data[exciton_donor_acceptor_info]
-            del all_sims_hop_probs[index][1][exciton_donor_acceptor_info]
+    Returns
+    -------
+    all_hop_probs_across_sims : dict.
+        This contains the (mean, standard deviation) of the hopping probability for each (exciton donor, exciton acceptor, relative cell point i, j, k).
+    """
 
     print('Obtaining Average Hopping Probability for Exciton Donor Acceptor Hops')
 
+    # First, if no rate constant data was written to disk, there are no hopping probabilities.
+    if hop_probability_data is None:
+        return {}
+
     # Second, obtain the average and standard deviations for all hopping probabilities across all simulation together. 
-    for exciton_donor_acceptor_info in all_hop_probs_across_sims:
-        mean_hopping_probability  = mean(all_hop_probs_across_sims[exciton_donor_acceptor_info])
-        stdev_hopping_probability = stdev(all_hop_probs_across_sims[exciton_donor_acceptor_info])
-        all_hop_probs_across_sims[exciton_donor_acceptor_info] = (mean_hopping_probability, stdev_hopping_probability)
+    neighbour_list, accumulator = hop_probability_data
+    all_hop_probs_across_sims = get_hop_probability_statistics(neighbour_list, accumulator)
 
     # Third, return all_hop_probs_across_sims
     return all_hop_probs_across_sims
@@ -50,8 +47,8 @@ def save_average_hopping_probabilities(data_foldername, path, all_sims_hop_probs
 
     Parameters
     ----------
-    all_sims_hop_probs : list
-        This is the hopping probability data between exciton donor and all its neighbouring exciton acceptors.
+    all_sims_hop_probs : dict.
+        This is the (mean, standard deviation) of the hopping probability between exciton donor and all its neighbouring exciton acceptors.
     """
     print('Save exciton hopping probability data and figures to disk.')
     path_to_place_data_in = data_foldername+'/'+path
@@ -65,7 +62,7 @@ def save_average_hopping_probabilities(data_foldername, path, all_sims_hop_probs
     with open(path_to_place_data_in+'/'+time_averaged_filename, 'w') as fileTXT:
         for exciton_donor_acceptor_info in sorted(all_sims_hop_probs.keys(), key=lambda x: (x[0], x[1], abs(x[2]), abs(x[3]), abs(x[4]), -x[2], -x[3], -x[4])):
             average_hopping_probability, stdev_hopping_probability = all_sims_hop_probs[exciton_donor_acceptor_info]
-            fileTXT.write(str(exciton_donor_acceptor_info)+': '+str(average_hopping_probability)+' ['+str(average_hopping_probability)+']\n')
+            fileTXT.write(str(exciton_donor_acceptor_info)+': '+str(average_hopping_probability)+' ['+str(stdev_hopping_probability)+']\n')
 
 
 
@@ -1,54 +1,207 @@
 '''
 Check_Result.py, Geoffrey Weal, 12/8/22
 
-This program will determine 
+This program will determine
 '''
+import os
+import tempfile
 import numpy as np
-from tqdm import trange
 
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.sample_data_from_ensemble_over_time     import sample_data_from_ensemble_over_time
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_timesteps_from_ensemble             import get_timesteps_from_ensemble
+from EKMC.Postprocessing_Programs.Process_Results_methods.map_over_cpus                                                import imap_over_cpus
+from EKMC.Postprocessing_Programs.Process_Results_methods.collect_data                                                 import get_sim_names, get_data_of_simulation, read_EKMC_rate_constant_datafile, EKMC_rate_constant_data_filename
+from EKMC.Postprocessing_Programs.Process_Results_methods.hop_probability_accumulator                                  import get_hop_neighbour_list, make_hop_probability_accumulator, merge_hop_probability_accumulators
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.sample_data_from_ensemble_over_time     import sample_simulation_over_time
 from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_sample_data_from_ensemble_over_time import get_sample_data_from_ensemble_over_time
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_displacements_from_initial_position import get_displacements_from_initial_position
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_over_time                 import get_diffusion_over_time
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_tensor_over_time          import get_diffusion_tensor_over_time
-from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_average_values_over_time            import get_average_values_over_time
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.ensemble_accumulator                    import make_ensemble_accumulator, add_simulation_to_ensemble_accumulator, merge_ensemble_accumulators, get_ensemble_statistics
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_over_time                 import get_diffusion_from_average_displacement_squared
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_tensor_over_time          import get_diffusion_tensor_from_average_displacement_tensor, diagonalise_diffusion_tensors
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_multiple_time_origin_displacement_tensor import get_multiple_time_origin_displacement_tensor
+from EKMC.Postprocessing_Programs.Process_Results_methods.profiling                                                    import StageProfiler
 
-def process_data(all_sims, molnames_and_coms, unit_cell_matrix, end_recording_time, no_of_times_to_sample=10000, cpu_count=1):
-    """
-    This method is designed to process the data from across all simulations performed for this system.
+def get_times_to_sample(end_recording_time, no_of_times_to_sample=10000):
     """
+    This method is designed to obtain the times to sample each simulation at, from 0 ps to end_recording_time.
+
+    Parameters
+    ----------
+    end_recording_time : float
+        This is the time (in ps) to sample up to.
+    no_of_times_to_sample : int
+        This is the number of intervals to sample over, so no_of_times_to_sample+1 times are sampled. Default: 10000
 
-    # First, collect the positions of exciton for each Simulation every dt intervals
+    Returns
+    -------
+    times : numpy.array
+        These are the times to sample each simulation at.
+    """
     print('Sampling '+str(no_of_times_to_sample+1)+' time points from the ensemble of simulations between 0 ps and '+str(end_recording_time)+' ps (intervals of '+str(float(end_recording_time)/no_of_times_to_sample)+' ps)')
-    data_over_time_for_all_sims, times = sample_data_from_ensemble_over_time(all_sims, end_recording_time, no_of_times_to_sample=no_of_times_to_sample, cpu_count=cpu_count)
+    return np.linspace(0.0, end_recording_time, num=no_of_times_to_sample+1)
+
+def collect_and_accumulate_simulations(root, molnames_and_coms, unit_cell_matrix, times, cpu_count=1, use_cache=True, read_up_to_time=None, shard=None, hop_probabilities_from_time=500.0, profiler=None, multiple_time_origins=False):
+    """
+    This method is designed to obtain the data of each simulation, sample it over time, and add the displacements and energies of the exciton in each simulation to an ensemble accumulator.
+
+    Each simulation is read, sampled, and added to its own ensemble accumulator in one of the processes of the process pool (see
+    read_sample_and_accumulate_simulation), so only the accumulator of the simulation and the positions of its exciton at each sampled
+    time are sent back, rather than the data of the whole simulation. These are merged into the ensemble accumulator of all the
+    simulations in order of Sim number (see merge_ensemble_accumulators) and then discarded. The positions of the exciton in each
+    simulation (used to write the paths of the excitons to disk) are written to a temporary file on disk that is memory mapped, rather
+    than being held in memory.
 
-    # Second, obtain the distance from the starting point across all ensembles.
-    print('Get the displacement vectors from the ensemble of simulations')
-    positions_at_time, displacement_vectors_from_initial_position, energies_over_time_for_all_sims = get_sample_data_from_ensemble_over_time(data_over_time_for_all_sims, molnames_and_coms, unit_cell_matrix, cpu_count=cpu_count)
-    
-    # Third, delete the data_over_time_for_all_sims which contains a lot of information that is not needed anymore. 
-    del data_over_time_for_all_sims
+    The accumulator can be merged with the accumulators of other simulations of the same system, such as those made by other shards of
+    process_results --map.
 
-    # Fourth, obtain the displacement and displacement^2 values.
-    print('Get the displacements from the ensemble of simulations')
-    displacements_from_initial_position, displacements_squared_from_initial_position = get_displacements_from_initial_position(displacement_vectors_from_initial_position, cpu_count=cpu_count)
+    Parameters
+    ----------
+    root : str.
+        This is the path to the folders that contain the kinetic Monte Carlo simulations.
+    molnames_and_coms : dict.
+        These are the centres of mass of the molecules in the unit cell.
+    unit_cell_matrix : numpy.array
+        This is the unit cell matrix of the crystal.
+    times : numpy.array
+        These are the times to sample each simulation at.
+    cpu_count : int
+        This is the number of CPUs to use to read, sample and accumulate the simulations. Default: 1
+    use_cache : bool.
+        This indicates if the cache files in each Sim folder should be used and written. Default: True
+    read_up_to_time : float or None
+        This is the time (in ps) to read each kMC_sim.txt file up to. If None, the whole kMC_sim.txt file is read. Default: None
+    shard : tuple of ints or None
+        This is the (shard_index, no_of_shards) of the simulations to collect. If None, all simulations are collected. Default: None
+    hop_probabilities_from_time : float
+        Only the steps from this simulation time (in ps) are included in the hopping probabilities. Default: 500.0 ps
+    profiler : StageProfiler or None
+        If given, this stage is profiled with it. Default: None
+    multiple_time_origins : bool.
+        If True, the displacement squared values and displacement tensors are averaged over every sampled time origin. Default: False
+
+    Returns
+    -------
+    sim_names : list of str.
+        These are the names of the simulations, in order of Sim number.
+    accumulator : dict.
+        This is the ensemble accumulator that contains all the simulations.
+    positions_at_time : numpy.memmap
+        These are the positions of the exciton in each simulation at each sampled time, as a (no of simulations, no of sampled times, 3) array.
+    hop_probability_data : tuple or None
+        This is the neighbour list of the crystal and the hop probability accumulator containing the hopping probabilities from all the simulations. This is None if no kMC_sim_rate_constants.txt files were written.
+    """
+    if profiler is None:
+        profiler = StageProfiler('process_data')
+
+    # First, obtain the names of the simulations, in order of Sim number.
+    sim_names = get_sim_names(root, shard=shard)
+    print('Collecting and sampling the data of '+str(len(sim_names))+' KMC simulations. Number of CPUs that will be used: '+str(cpu_count))
+
+    # Second, obtain the neighbour list of the crystal if the rate constant data has been written to disk. This gives the slot of each hop in the hop probability accumulators.
+    neighbour_list = get_hop_neighbour_list(root) if any(os.path.exists(root+'/'+sim_name+'/'+EKMC_rate_constant_data_filename) for sim_name in sim_names) else None
+
+    # Third, initialise the ensemble accumulator, the hop probability accumulator, and the array to record the positions of the exciton in.
+    accumulator = make_ensemble_accumulator(len(times))
+    hop_probability_accumulator = None if (neighbour_list is None) else make_hop_probability_accumulator(neighbour_list)
+    positions_at_time = np.memmap(tempfile.TemporaryFile(), dtype=np.float64, mode='w+', shape=(len(sim_names), len(times), 3))
+
+    # Fourth, read, sample and accumulate each simulation, and merge its accumulators into the accumulators of all the simulations.
+    with profiler.stage('collect_and_sample'):
+        inputs = ((root, sim_name, times, molnames_and_coms, unit_cell_matrix, use_cache, read_up_to_time, multiple_time_origins, neighbour_list, hop_probabilities_from_time) for sim_name in sim_names)
+        for sim_index, (sim_name, sim_accumulator, sim_positions_at_time, sim_hop_probability_accumulator) in enumerate(imap_over_cpus(read_sample_and_accumulate_simulation, inputs, cpu_count=cpu_count, total=len(sim_names), unit=' KMC Sim', desc="Collecting, sampling and accumulating all KMC simulations over time", leave=False)):
+            accumulator = merge_ensemble_accumulators(accumulator, sim_accumulator)
+            positions_at_time[sim_index] = sim_positions_at_time
+            if sim_hop_probability_accumulator is not None:
+                hop_probability_accumulator = merge_hop_probability_accumulators(hop_probability_accumulator, sim_hop_probability_accumulator)
+
+    # Fifth, return the names of the simulations, the ensemble accumulator, the positions of the exciton, and the hopping probabilities.
+    hop_probability_data = None if (neighbour_list is None) else (neighbour_list, hop_probability_accumulator)
+    return sim_names, accumulator, positions_at_time, hop_probability_data
+
+def read_sample_and_accumulate_simulation(input_data):
+    """
+    This method is designed to obtain the data of a simulation, sample it over time, and add it to its own ensemble accumulator.
 
-    # Fifth, get the diffusion values of the system over time.
-    print('Get the Diffusion Coefficients from the ensemble of simulations')
-    diffusion_over_time = get_diffusion_over_time(times, displacements_squared_from_initial_position, cpu_count=cpu_count)
+    The data of the simulation is discarded once this is done, so only the accumulators and the positions of the exciton at each sampled time are given.
+
+    Parameters
+    ----------
+    input_data : tuple
+        This is the root, sim_name, times, molnames_and_coms, unit_cell_matrix, use_cache, read_up_to_time, multiple_time_origins, neighbour_list and hop_probabilities_from_time (see collect_and_accumulate_simulations). neighbour_list is None if the hopping probabilities are not obtained.
+
+    Returns
+    -------
+    sim_name : str.
+        This is the name of the simulation.
+    accumulator : dict.
+        This is the ensemble accumulator that contains this simulation.
+    positions_at_time : numpy.array
+        These are the positions of the exciton in this simulation at each sampled time, as a (no of sampled times, 3) array.
+    hop_probability_accumulator : dict. or None
+        This is the hop probability accumulator of this simulation. None if the simulation does not have a kMC_sim_rate_constants.txt file, or if neighbour_list is None.
+    """
+
+    # First, separate the input_data into its variables.
+    root, sim_name, times, molnames_and_coms, unit_cell_matrix, use_cache, read_up_to_time, multiple_time_origins, neighbour_list, hop_probabilities_from_time = input_data
+
+    # Second, sample the simulation over time.
+    data_over_time_for_simulation, simulation_data = sample_simulation_over_time(root, sim_name, times, use_cache=use_cache, read_up_to_time=read_up_to_time)
+
+    # Third, obtain the positions, displacement vectors, and energies of the exciton at each sampled time.
+    positions_at_time, displacement_vectors_from_initial_position, energies_over_time = get_sample_data_from_ensemble_over_time([data_over_time_for_simulation], molnames_and_coms, unit_cell_matrix)
+
+    # Fourth, add the simulation to its own ensemble accumulator.
+    accumulator = make_ensemble_accumulator(len(times))
+    displacement_tensor = get_multiple_time_origin_displacement_tensor(positions_at_time[0]) if multiple_time_origins else None
+    add_simulation_to_ensemble_accumulator(accumulator, displacement_vectors_from_initial_position[0], energies_over_time[0], displacement_tensor=displacement_tensor)
+
+    # Fifth, obtain the hopping probabilities of the simulation, if its rate constant data has been written to disk. The data of the
+    #        simulation is needed for this, so it is obtained here if the sampled data was taken from the sampled cache file.
+    hop_probability_accumulator = None
+    if (neighbour_list is not None) and os.path.exists(root+'/'+sim_name+'/'+EKMC_rate_constant_data_filename):
+        if simulation_data is None:
+            simulation_data = get_data_of_simulation(root, sim_name, use_cache=use_cache, read_up_to_time=read_up_to_time)
+        sim_name, hop_probability_accumulator = read_EKMC_rate_constant_datafile((root, sim_name, simulation_data, neighbour_list, hop_probabilities_from_time))
+
+    # Sixth, return the accumulators and the positions of the exciton of this simulation.
+    return sim_name, accumulator, positions_at_time[0], hop_probability_accumulator
+
+def process_ensemble_accumulator(times, accumulator, profiler=None):
+    """
+    This method is designed to obtain the ensemble averages, the diffusion coefficients, and the diffusion tensors over time from an ensemble accumulator.
+
+    Parameters
+    ----------
+    times : numpy.array
+        These are the times that each simulation was sampled at.
+    accumulator : dict.
+        This is the ensemble accumulator.
+    profiler : StageProfiler or None
+        If given, the ensemble statistics and diffusion stages are profiled with it. Default: None
+
+    Returns
+    -------
+    The average displacements, average displacements squared, average energies, diffusion coefficients, diffusion tensors, and the 
+    eigenvalues and eigenvectors of the diffusion tensors at each sampled time, and the ensemble statistics.
+    """
+    if profiler is None:
+        profiler = StageProfiler('process_data')
 
-    # Sixth, get the diffusion tensor of the system over time.
-    print('Get the Diffusion Tensor from the ensemble of simulations')
-    diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time = get_diffusion_tensor_over_time(times, displacement_vectors_from_initial_position, cpu_count=cpu_count)
+    # First, obtain the mean, variance, and confidence intervals of the quantities across the ensemble at each sampled time.
+    with profiler.stage('ensemble_statistics'):
+        print('Obtaining the ensemble averages from the ensemble of simulations')
+        ensemble_statistics = get_ensemble_statistics(accumulator)
+        average_displacements_from_initial_position_over_time         = ensemble_statistics['displacement_mean']
+        average_displacements_squared_from_initial_position_over_time = ensemble_statistics['displacement_squared_mean']
+        average_energies_over_time                                    = ensemble_statistics['energy_mean']
 
-    # Seventh, get data for plotting and showing/comparing
-    print('Obtaining data for comparisons and plotting.')
-    average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time = get_average_values_over_time(displacements_from_initial_position, displacements_squared_from_initial_position, energies_over_time_for_all_sims)
+    # Second, get the diffusion values of the system over time.
+    with profiler.stage('diffusion'):
+        print('Get the Diffusion Coefficients from the ensemble of simulations')
+        diffusion_over_time = get_diffusion_from_average_displacement_squared(times, ensemble_statistics['displacement_squared_mean'])
 
-    # Eighth, gather the timestep information from across all ensembles
-    print('Gather the timesteps of exciton movements over time.')
-    all_timesteps, time_for_all_sims = get_timesteps_from_ensemble(all_sims)
+    # Third, get the diffusion tensor of the system over time.
+    with profiler.stage('diffusion_tensor'):
+        print('Get the Diffusion Tensor from the ensemble of simulations')
+        diffusion_tensor_over_time = get_diffusion_tensor_from_average_displacement_tensor(times, ensemble_statistics['displacement_tensor_mean'])
+        eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time = diagonalise_diffusion_tensors(diffusion_tensor_over_time)
 
-    # Ninth, return the lists of quantities across all ensembles for each sampled time.
-    return times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, all_timesteps, time_for_all_sims
+    # Fourth, return the quantities for each sampled time.
+    return average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, ensemble_statistics
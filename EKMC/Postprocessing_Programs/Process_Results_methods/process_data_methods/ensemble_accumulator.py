@@ -0,0 +1,201 @@
+"""
+ensemble_accumulator.py, Geoffrey Weal, 19/10/26
+
+This script is designed to accumulate the statistics of the ensemble of simulations over sampled time, one simulation at a time.
+
+The mean and the sum of squared differences from the mean (M2) of each quantity at each sampled time are updated with Welford's algorithm
+as each simulation is added, so the data of a simulation can be discarded once it has been added. Two accumulators (for example, from two
+parts of the same ensemble) can be merged together using Chan's parallel algorithm. The memory needed by an accumulator only depends on
+the number of sampled times, not on the number of simulations in the ensemble.
+"""
+import numpy as np
+import scipy.stats
+
+# These are the quantities that are accumulated, along with the shape of each quantity at each sampled time.
+ensemble_accumulator_quantities = {'displacement': (), 'displacement_squared': (), 'displacement_tensor': (3,3), 'energy': ()}
+
+def make_ensemble_accumulator(no_of_times):
+    """
+    This method is designed to make an empty ensemble accumulator.
+
+    Parameters
+    ----------
+    no_of_times : int
+        This is the number of sampled times.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the ensemble accumulator. This contains the number of simulations added (count), as well as the mean ('<quantity>_mean') and the sum of squared differences from the mean ('<quantity>_M2') of each quantity at each sampled time.
+    """
+    accumulator = {'count': np.array(0, dtype=np.int64)}
+    for quantity, shape in ensemble_accumulator_quantities.items():
+        accumulator[quantity+'_mean'] = np.zeros((no_of_times,)+shape, dtype=np.float64)
+        accumulator[quantity+'_M2']   = np.zeros((no_of_times,)+shape, dtype=np.float64)
+    return accumulator
+
+def get_quantities_of_simulation(displacement_vectors_from_initial_position, energies_over_time, displacement_tensor=None):
+    """
+    This method is designed to obtain the quantities to accumulate for a simulation.
+
+    Parameters
+    ----------
+    displacement_vectors_from_initial_position : numpy.array
+        These are the displacement vectors of the exciton from its initial position at each sampled time, as a (no of sampled times, 3) array.
+    energies_over_time : numpy.array
+        These are the energies of the exciton at each sampled time.
+    displacement_tensor : numpy.array or None
+        If given, this is used as the displacement tensor <d_i d_j> at each sampled time (such as one averaged over multiple time origins), and its trace is used as the displacement squared. Otherwise, these are obtained from displacement_vectors_from_initial_position. Default: None
+
+    Returns
+    -------
+    quantities : dict.
+        These are the values of each quantity in ensemble_accumulator_quantities at each sampled time.
+    """
+    displacement_vectors_from_initial_position = np.asarray(displacement_vectors_from_initial_position, dtype=np.float64)
+    displacement_squared = np.einsum('ti,ti->t', displacement_vectors_from_initial_position, displacement_vectors_from_initial_position)
+    quantities = {}
+    quantities['displacement']         = np.sqrt(displacement_squared)
+    quantities['displacement_squared'] = displacement_squared
+    quantities['displacement_tensor']  = np.einsum('ti,tj->tij', displacement_vectors_from_initial_position, displacement_vectors_from_initial_position)
+    quantities['energy']               = np.asarray(energies_over_time, dtype=np.float64)
+    if displacement_tensor is not None:
+        quantities['displacement_tensor']  = np.asarray(displacement_tensor, dtype=np.float64)
+        quantities['displacement_squared'] = np.trace(quantities['displacement_tensor'], axis1=1, axis2=2)
+    return quantities
+
+def add_simulation_to_ensemble_accumulator(accumulator, displacement_vectors_from_initial_position, energies_over_time, displacement_tensor=None):
+    """
+    This method is designed to add a simulation to the ensemble accumulator using Welford's algorithm. The accumulator is updated in place.
+
+    Parameters
+    ----------
+    accumulator : dict.
+        This is the ensemble accumulator.
+    displacement_vectors_from_initial_position : numpy.array
+        These are the displacement vectors of the exciton from its initial position at each sampled time, as a (no of sampled times, 3) array.
+    energies_over_time : numpy.array
+        These are the energies of the exciton at each sampled time.
+    displacement_tensor : numpy.array or None
+        If given, this is used as the displacement tensor of the simulation (see get_quantities_of_simulation). Default: None
+    """
+
+    # First, obtain the quantities of the simulation at each sampled time.
+    quantities = get_quantities_of_simulation(displacement_vectors_from_initial_position, energies_over_time, displacement_tensor=displacement_tensor)
+
+    # Second, update the number of simulations added to the accumulator.
+    accumulator['count'] = accumulator['count'] + 1
+    count = int(accumulator['count'])
+
+    # Third, update the mean and M2 of each quantity.
+    for quantity in ensemble_accumulator_quantities.keys():
+        mean = accumulator[quantity+'_mean']
+        delta = quantities[quantity] - mean
+        mean += delta / count
+        accumulator[quantity+'_M2'] += delta * (quantities[quantity] - mean)
+
+def merge_ensemble_accumulators(accumulator1, accumulator2):
+    """
+    This method is designed to merge two ensemble accumulators using Chan's parallel algorithm.
+
+    Parameters
+    ----------
+    accumulator1 : dict.
+        This is an ensemble accumulator.
+    accumulator2 : dict.
+        This is another ensemble accumulator, sampled at the same times as accumulator1.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the ensemble accumulator that contains the simulations from both accumulator1 and accumulator2.
+    """
+
+    # First, obtain the number of simulations in each accumulator.
+    count1 = int(accumulator1['count'])
+    count2 = int(accumulator2['count'])
+    count  = count1 + count2
+
+    # Second, if either of the accumulators is empty, return a copy of the other accumulator.
+    if count1 == 0 or count2 == 0:
+        return {key: np.array(value) for key, value in (accumulator2 if count1 == 0 else accumulator1).items()}
+
+    # Third, merge the mean and M2 of each quantity.
+    accumulator = {'count': np.array(count, dtype=np.int64)}
+    for quantity in ensemble_accumulator_quantities.keys():
+        mean1, mean2 = accumulator1[quantity+'_mean'], accumulator2[quantity+'_mean']
+        if not (mean1.shape == mean2.shape):
+            raise Exception('Error: Can not merge ensemble accumulators that were sampled over a different number of times. Shapes of '+str(quantity)+': '+str(mean1.shape)+' and '+str(mean2.shape))
+        delta = mean2 - mean1
+        accumulator[quantity+'_mean'] = mean1 + delta * (count2 / count)
+        accumulator[quantity+'_M2']   = accumulator1[quantity+'_M2'] + accumulator2[quantity+'_M2'] + (delta ** 2.0) * (count1 * count2 / count)
+
+    # Fourth, return the merged accumulator
+    return accumulator
+
+def get_ensemble_statistics(accumulator, confidence=0.95):
+    """
+    This method is designed to obtain the mean, variance, and confidence interval of each quantity at each sampled time from the ensemble accumulator.
+
+    Parameters
+    ----------
+    accumulator : dict.
+        This is the ensemble accumulator.
+    confidence : float
+        This is the confidence level of the confidence interval. Default: 0.95
+
+    Returns
+    -------
+    ensemble_statistics : dict.
+        This contains the mean ('<quantity>_mean'), sample variance ('<quantity>_variance'), and half-width of the confidence interval of the mean ('<quantity>_ci') of each quantity at each sampled time. The variance and confidence interval are nan if less than two simulations have been added.
+    """
+
+    # First, obtain the number of simulations in the accumulator, and the t-value for the confidence interval.
+    count = int(accumulator['count'])
+    t_value = scipy.stats.t.ppf((1 + confidence) / 2., count-1) if (count > 1) else np.nan
+
+    # Second, obtain the mean, variance, and confidence interval of each quantity.
+    ensemble_statistics = {'count': count}
+    for quantity in ensemble_accumulator_quantities.keys():
+        mean = accumulator[quantity+'_mean']
+        variance = accumulator[quantity+'_M2'] / (count - 1) if (count > 1) else np.full(mean.shape, np.nan)
+        ensemble_statistics[quantity+'_mean']     = mean
+        ensemble_statistics[quantity+'_variance'] = variance
+        ensemble_statistics[quantity+'_ci']       = t_value * np.sqrt(variance / count) if (count > 1) else np.full(mean.shape, np.nan)
+
+    # Third, return ensemble_statistics
+    return ensemble_statistics
+
+def save_ensemble_accumulator(path_to_accumulator, accumulator):
+    """
+    This method is designed to save an ensemble accumulator to disk, so that it can be merged with other accumulators later.
+
+    Parameters
+    ----------
+    path_to_accumulator : str.
+        This is the path to save the accumulator to (as a npz file).
+    accumulator : dict.
+        This is the ensemble accumulator.
+    """
+    np.savez(path_to_accumulator, **accumulator)
+
+def load_ensemble_accumulator(path_to_accumulator):
+    """
+    This method is designed to load an ensemble accumulator from disk.
+
+    Parameters
+    ----------
+    path_to_accumulator : str.
+        This is the path to the accumulator npz file.
+
+    Returns
+    -------
+    accumulator : dict.
+        This is the ensemble accumulator.
+    """
+    with np.load(path_to_accumulator) as accumulator_npz:
+        accumulator = {key: np.array(accumulator_npz[key]) for key in accumulator_npz.files}
+    for quantity in ensemble_accumulator_quantities.keys():
+        if (quantity+'_mean' not in accumulator) or (quantity+'_M2' not in accumulator):
+            raise Exception('Error: '+str(path_to_accumulator)+' is not an ensemble accumulator file. Could not find the data for '+str(quantity)+'.')
+    return accumulator
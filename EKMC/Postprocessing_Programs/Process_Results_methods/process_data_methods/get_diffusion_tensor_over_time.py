@@ -1,132 +1,75 @@
 """
-get_diffusion_over_time.py, Geoffrey Weal, 16/8/22
+get_diffusion_tensor_over_time.py, Geoffrey Weal, 16/8/22
 
-This script is designed to obtain the diffusion coefficient of an ensemble of the same system over time.
+This script is designed to obtain the diffusion tensor of an ensemble of the same system over time.
 """
 import numpy as np
-from numpy.linalg import eig
-
-import multiprocessing as mp
-from tqdm.contrib.concurrent import process_map
+from numpy.linalg import eig, eigh
 
 from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_over_time import convert_diffusion_coefficient
 
-def get_diffusion_tensor_over_time(times, displacement_vectors_from_initial_position, cpu_count=1):
+def get_diffusion_tensor_from_average_displacement_tensor(times, average_disp_squared_ij):
     """
-    This method is designed to obtain the diffusion coefficient of an ensemble of the same system over time.
+    This method is designed to obtain the diffusion tensor from <d_i d_j> of the ensemble at each sampled time.
 
     Parameters
     ----------
     times : list/numpy.array
         These are the sample times sampled for each simulation in the ensemble.
-    displacement_vectors_from_initial_position : list of list of floats
-        These are the displacement vectors of the each simulation in the ensemble over sampled time.
+    average_disp_squared_ij : numpy.array
+        This is <d_i d_j> (or any other quantity in A^2, such as its confidence intervals) of the ensemble at each sampled time, as a (no of sampled times, 3, 3) array.
 
     Returns
     -------
-    diffusion_over_time : list of floats
-        This is the diffusion coefficients over time across the ensemble of simulations.
+    diffusion_tensor_over_time : numpy.array
+        This is the diffusion tensors over time, as a (no of sampled times, 3, 3) array. Given in units of cm^2/s. This is nan at t = 0 ps.
     """
-    
-    # First, obtain the data from the simulations as sampled over time
-    diffusion_tensor_over_time = process_map(get_diffusion_tensor_at_time, get_inputs(times, displacement_vectors_from_initial_position), max_workers=cpu_count, unit=' sample times', total=len(times), desc="Obtaining the Diffusion Tensor over time", leave=False)
-
-    # Second, diagonalise the diffusion tensor over time
-    diagonalised_diffusion_tensor_over_time = process_map(diagonalise_diffusion_tensor_at_time, diffusion_tensor_over_time, max_workers=cpu_count, unit=' sample times', total=len(times), desc="Diagonalising the Diffusion Tensor over time", leave=False)
 
-    # Third, separate the diagonalised_diffusion_tensor_over_time into two lists, one that holds eigenvalues and one that holds eigenvectors
-    eigenvalues_of_diffusion_tensor_over_time  = [eigenvalues  for eigenvalues, eigenvectors in diagonalised_diffusion_tensor_over_time]
-    eigenvectors_of_diffusion_tensor_over_time = [eigenvectors for eigenvalues, eigenvectors in diagonalised_diffusion_tensor_over_time]
+    # First, obtain the diffusion tensor at each sampled time. Units are A^2/ps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diffusion_tensor_over_time_in_A2_per_ps = average_disp_squared_ij/(2*np.asarray(times, dtype=float)[:,np.newaxis,np.newaxis])
 
-    # Fourth, return diffusion_tensor_over_time
-    return diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time
+    # Second, convert the diffusion tensors from A^2/ps to cm^2/s
+    diffusion_tensor_over_time = convert_diffusion_coefficient(diffusion_tensor_over_time_in_A2_per_ps)
 
-def get_inputs(times, displacement_vectors_from_initial_position):
-    """
-    This generator is designed to give each simulation data in all_sims, along with sim_time_limit and no_of_times_to_sample
+    # Third, return diffusion_tensor_over_time
+    return diffusion_tensor_over_time
 
-    Parameters
-    ----------
-    times : list/numpy.array
-        These are the sample times sampled for each simulation in the ensemble.
-    displacement_vectors_from_initial_position : list of list of floats
-        These are the displacement vectors of the each simulation in the ensemble over sampled time.
+def diagonalise_diffusion_tensors(diffusion_tensors):
     """
+    This method is designed to diagonalise the diffusion tensors at all sampled times together. 
 
-    for index in range(0,len(times)):
-        time = times[index]
-        XYZ_distance_values_from_initial_position_for_sims_at_a_time = [displacement_vectors_from_initial_position_for_a_sim[index] for displacement_vectors_from_initial_position_for_a_sim in displacement_vectors_from_initial_position]
-        yield (time, XYZ_distance_values_from_initial_position_for_sims_at_a_time)
-
-def get_diffusion_tensor_at_time(input_data):
-    """
-    This method is designed to obtain the diffusion tensor at a specific sample time.
+    As the diffusion tensors are symmetric, numpy.linalg.eigh is used. Diffusion tensors that contain nan or inf values (such as at t = 0 ps) 
+    are not diagonalised, and are given nan eigenvalues and eigenvectors.
 
     Parameters
     ----------
-    times : list/numpy.array
-        These are the sample times sampled for each simulation in the ensemble.
-    XYZ_distance_values_from_initial_position_for_sims_at_a_time : list of list of floats
-        These are the displacement vectors of the each simulation in the ensemble at a sampled time.
+    diffusion_tensors : numpy.array
+        These are the diffusion tensors at each sampled time, as a (no of sampled times, 3, 3) array.
 
     Returns
     -------
-    diffusion_tensor : np.array
-        This is the diffusion tensor at the sampled time.
+    eigenvalues : numpy.array
+        These are the eigenvalues of the diffusion tensors, from the highest to lowest eigenvalue, as a (no of sampled times, 3) array.
+    eigenvectors : numpy.array
+        These are the eigenvectors of the diffusion tensors, as a (no of sampled times, 3, 3) array. The eigenvector for eigenvalues[:,index] is eigenvectors[:,:,index].
     """
 
-    # First, extract the data from the data list.
-    time, XYZ_distance_values_from_initial_position_for_sims_at_a_time = input_data
-
-    # Second, obtain the displacement in each direction.
-    X_displacement_values_from_initial_position_for_sims_at_a_time = [x_disp for x_disp, y_disp, z_disp in XYZ_distance_values_from_initial_position_for_sims_at_a_time]
-    Y_displacement_values_from_initial_position_for_sims_at_a_time = [y_disp for x_disp, y_disp, z_disp in XYZ_distance_values_from_initial_position_for_sims_at_a_time]
-    Z_displacement_values_from_initial_position_for_sims_at_a_time = [z_disp for x_disp, y_disp, z_disp in XYZ_distance_values_from_initial_position_for_sims_at_a_time]
-
-    # Third, obtain the diffusion coefficient for each component in the diffusion tensor
-    diffusion_XX_at_time = get_2D_diffusion_coefficient(X_displacement_values_from_initial_position_for_sims_at_a_time, X_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_XY_at_time = get_2D_diffusion_coefficient(X_displacement_values_from_initial_position_for_sims_at_a_time, Y_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_XZ_at_time = get_2D_diffusion_coefficient(X_displacement_values_from_initial_position_for_sims_at_a_time, Z_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    
-    diffusion_YX_at_time = get_2D_diffusion_coefficient(Y_displacement_values_from_initial_position_for_sims_at_a_time, X_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_YY_at_time = get_2D_diffusion_coefficient(Y_displacement_values_from_initial_position_for_sims_at_a_time, Y_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_YZ_at_time = get_2D_diffusion_coefficient(Y_displacement_values_from_initial_position_for_sims_at_a_time, Z_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    
-    diffusion_ZX_at_time = get_2D_diffusion_coefficient(Z_displacement_values_from_initial_position_for_sims_at_a_time, X_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_ZY_at_time = get_2D_diffusion_coefficient(Z_displacement_values_from_initial_position_for_sims_at_a_time, Y_displacement_values_from_initial_position_for_sims_at_a_time, time)
-    diffusion_ZZ_at_time = get_2D_diffusion_coefficient(Z_displacement_values_from_initial_position_for_sims_at_a_time, Z_displacement_values_from_initial_position_for_sims_at_a_time, time)
-
-    # Fourth, obtain the diffusion tensor at time.
-    diffusion_tensor = np.array([[diffusion_XX_at_time, diffusion_XY_at_time, diffusion_XZ_at_time], [diffusion_YX_at_time, diffusion_YY_at_time, diffusion_YZ_at_time], [diffusion_ZX_at_time, diffusion_ZY_at_time, diffusion_ZZ_at_time]])
-
-    # Fifth, return diffusion_tensor
-    return diffusion_tensor
-
-def get_2D_diffusion_coefficient(dimension_displacement_1, dimension_displacement_2, time):
-    """
-    This method is designed to obtain the 2D diffsion coefficient, used to obtain the components of the diffusion tensor.
+    # First, initialise the eigenvalue and eigenvector arrays.
+    eigenvalues  = np.full(diffusion_tensors.shape[:-1], np.nan)
+    eigenvectors = np.full(diffusion_tensors.shape,      np.nan)
 
-    Parameters
-    ----------
-    dimension_displacement_1 : list of floats
-        This is the displacement in one dimension across the whole ensemble of KMC simulations at time.
-    dimension_displacement_2 : list of floats
-        This is another set of displacements in one dimension across the whole ensemble of KMC simulations at time. Can be the same or different dimension as dimension_displacement_1
-    time : float
-        This is the time that dimension_displacement_1 and dimension_displacement_2 were sampled at.
-    """
-
-    # First, obtain the squared displacement across dimension_displacement_1 and dimension_displacement_2
-    average_disp_squared_12 = np.mean([(disps_1 * disps_2) for disps_1, disps_2 in zip(dimension_displacement_1, dimension_displacement_2)])
+    # Second, calculate the eigenvalues and eigenvectors of the diffusion tensors that can be diagonalised.
+    can_be_diagonalised = np.all(np.isfinite(diffusion_tensors), axis=(1,2))
+    if np.any(can_be_diagonalised):
+        eigenvalues_to_sort, eigenvectors_to_sort = eigh(diffusion_tensors[can_be_diagonalised])
 
-    # Second, obtain the diffusion_coefficient across dimension 1 and 2
-    diffusion_coefficient_12_in_A2_per_ps = average_disp_squared_12/(2*time)
+        # Third, order the eigenvalues and associated eigenvector from the highest to lowest eigenvalue (eigh gives these from lowest to highest).
+        eigenvalues [can_be_diagonalised] = eigenvalues_to_sort[:,::-1]
+        eigenvectors[can_be_diagonalised] = eigenvectors_to_sort[:,:,::-1]
 
-    # Fourth, convert the diffusion coefficient from A^2/ps to cm^2/s
-    diffusion_coefficient_12_in_cm2_per_s = convert_diffusion_coefficient(diffusion_coefficient_12_in_A2_per_ps)
-
-    # Fifth, return diffusion_coefficient_in_cm2_per_s
-    return diffusion_coefficient_12_in_cm2_per_s
+    # Fourth, return eigenvalues and eigenvectors
+    return eigenvalues, eigenvectors
 
 def diagonalise_diffusion_tensor_at_time(diffusion_tensor_at_time):
     """
@@ -0,0 +1,61 @@
+"""
+get_multiple_time_origin_displacement_tensor.py, Geoffrey Weal, 19/10/26
+
+This script is designed to obtain the displacement tensor <d_i d_j> of a simulation at each lag time, averaged over every time origin.
+
+Rather than only measuring the displacement of the exciton from its position at t = 0 ps, the displacement over a lag time tau is measured
+from every sampled time origin t0 (r(t0+tau) - r(t0)) and averaged. Each simulation then contributes many (correlated) samples for each lag
+time rather than one, which reduces the number of simulations needed for a given statistical error in the diffusion coefficient.
+
+The average over all time origins is obtained for all lag times at once in O(N log N) time (where N is the number of sampled times) by
+obtaining the cross-correlations of the position components with FFTs, and the remaining terms from cumulative sums.
+"""
+import numpy as np
+
+def get_multiple_time_origin_displacement_tensor(positions_at_time):
+    """
+    This method is designed to obtain the displacement tensor <d_i d_j> of a simulation at each lag time, averaged over every time origin.
+
+    For lag time index k, <d_i d_j>(k) = 1/(N-k) sum_{t=0}^{N-1-k} (r_i(t+k) - r_i(t)) (r_j(t+k) - r_j(t)). Expanding this gives:
+
+        sum_{t=k}^{N-1} r_i(t) r_j(t) + sum_{t=0}^{N-1-k} r_i(t) r_j(t) - C_ij(k) - C_ji(k)
+
+    where C_ij(k) = sum_{t=0}^{N-1-k} r_i(t) r_j(t+k) is the cross-correlation of r_i and r_j, obtained with zero-padded FFTs.
+
+    Note that lag times near the end of the simulation are averaged over few time origins, and that time origins before the exciton has
+    equilibrated are included.
+
+    Parameters
+    ----------
+    positions_at_time : numpy.array
+        These are the positions of the exciton at each sampled time, as a (no of sampled times, 3) array. The times must be evenly spaced.
+
+    Returns
+    -------
+    displacement_tensor_over_lag_time : numpy.array
+        This is <d_i d_j> at each lag time (given by the sampled times), averaged over every time origin, as a (no of sampled times, 3, 3) array.
+    """
+
+    # First, centre the positions to reduce round-off error. The displacements do not depend on the origin of the positions.
+    positions_at_time = np.asarray(positions_at_time, dtype=np.float64)
+    positions_at_time = positions_at_time - positions_at_time.mean(axis=0)
+    no_of_times = len(positions_at_time)
+
+    # Second, obtain sum_{t=k}^{N-1} r_i(t) r_j(t) + sum_{t=0}^{N-1-k} r_i(t) r_j(t) for each lag time index k from cumulative sums.
+    position_products = np.einsum('ti,tj->tij', positions_at_time, positions_at_time)
+    cumulative_position_products = np.concatenate((np.zeros((1,3,3)), np.cumsum(position_products, axis=0)))
+    sum_of_later_products   = cumulative_position_products[-1] - cumulative_position_products[:no_of_times]
+    sum_of_earlier_products = cumulative_position_products[no_of_times:0:-1]
+
+    # Third, obtain the cross-correlations C_ij(k) for all lag time indices together using FFTs, zero-padded to avoid wrapping around.
+    fft_length = 2 * no_of_times
+    positions_fft = np.fft.rfft(positions_at_time, n=fft_length, axis=0)
+    cross_correlations = np.fft.irfft(np.conj(positions_fft)[:,:,np.newaxis] * positions_fft[:,np.newaxis,:], n=fft_length, axis=0)[:no_of_times]
+
+    # Fourth, obtain <d_i d_j> for each lag time index, averaged over the number of time origins for that lag time.
+    no_of_time_origins = np.arange(no_of_times, 0, -1, dtype=np.float64)
+    displacement_tensor_over_lag_time = (sum_of_later_products + sum_of_earlier_products - cross_correlations - np.swapaxes(cross_correlations, 1, 2)) / no_of_time_origins[:,np.newaxis,np.newaxis]
+    displacement_tensor_over_lag_time[0] = 0.0
+
+    # Fifth, return displacement_tensor_over_lag_time
+    return displacement_tensor_over_lag_time
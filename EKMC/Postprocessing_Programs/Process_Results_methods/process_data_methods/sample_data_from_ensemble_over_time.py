@@ -1,116 +1,107 @@
 """
 sample_data_from_ensemble_over_time.py, Geoffrey Weal, 16/8/22
 
-This script is designed to obtain the data from each of the simulation over time, sampled at time intervals of dt and ending at sim_time_limit.
+This script is designed to obtain the data from a simulation over time, sampled at time intervals of dt and ending at the time to sample up to.
 """
 import numpy as np
 
-import multiprocessing as mp
-from tqdm.contrib.concurrent import process_map
+from EKMC.Postprocessing_Programs.Process_Results_methods.collect_data    import get_data_of_simulation
+from EKMC.Postprocessing_Programs.Process_Results_methods.EKMC_data_cache import get_EKMC_datafile_key, load_sampled_data_from_cache, save_sampled_data_to_cache
 
-def sample_data_from_ensemble_over_time(all_sims, sim_time_limit, no_of_times_to_sample=10000, cpu_count=1):
+def sample_simulation_over_time(root, sim_name, times, use_cache=True, read_up_to_time=None):
     """
-    This method will sample the data from each of the simulation over time, sampled at time intervals of dt and ending at sim_time_limit
+    This method will sample the data of a simulation at the given times.
+
+    The step that the simulation is on at each sampled time is found by a binary search (np.searchsorted) of the time column of the 
+    simulation, so this is done in NumPy rather than by stepping through each hop in python. 
+
+    If use_cache is True, the sampled data is taken from the sampled cache file in the Sim folder if it was sampled at the same times 
+    from the current kMC_sim.txt file, in which case the data of the simulation is not read at all. Newly sampled data is saved to the 
+    sampled cache file of the simulation. 
 
     Parameters
     ----------
-    all_sims : list
-        This is the data obtained for all kinetic Monte Carlo simulations. 
-    sim_time_limit : float
-        This it the time that all kinetic Monte Carlo simulations were simulated for.
-    no_of_times_to_sample : int
-        This is the number of times to samples over, from 0.0 fs to sim_time_limit fs
+    root : str.
+        This is the path to the folders that contain the kinetic Monte Carlo simulations.
+    sim_name : str.
+        This is the name of the simulation. 
+    times : numpy.array
+        These are the times to sample the simulation at, from 0.0 ps to the time to sample up to.
+    use_cache : bool.
+        This indicates if the cache files in the Sim folder should be used and written. Default: True
+    read_up_to_time : float or None
+        This is the time (in ps) to read the kMC_sim.txt file up to, if it needs to be read. If None, the whole kMC_sim.txt file is read. Default: None
 
     Returns
     -------
-    time : list of floats
-        These are the times that have been sampled.
-    data_over_time_for_all_sims : list
-        This is the data of each simulations at each time interval.
+    data_over_time_for_simulation : tuple of numpy.arrays
+        This is the (molecules, cell_points, energies) arrays of the simulation at each sampled time.
+    simulation_data : numpy.array or None
+        This is the data of the simulation. None if the sampled data was taken from the sampled cache file, as the data was not read.
     """
-    
-    # First, obtain the data from the simulations as sampled over time
-    if cpu_count == 1:
-        data_over_time_for_all_sims = [get_data_over_time(input_data) for input_data in get_inputs(all_sims, sim_time_limit, no_of_times_to_sample)]
-    else:
-        data_over_time_for_all_sims = process_map(get_data_over_time, get_inputs(all_sims, sim_time_limit, no_of_times_to_sample), max_workers=cpu_count, unit=' KMC Sim', total=len(all_sims), desc="Sampling all KMC simulations over time", leave=False)
 
-    # Second, initialise all the times to record over
-    times = np.linspace(0.0, sim_time_limit, num=no_of_times_to_sample+1)
+    # First, obtain the size and modification time of the kMC_sim.txt file before it is read.
+    path_to_sim = root+'/'+sim_name
+    EKMC_datafile_key = get_EKMC_datafile_key(path_to_sim)
 
-    # Third, return the sample times and data_over_time_for_all_sims
-    return data_over_time_for_all_sims, times
+    # Second, obtain the sampled data from the sampled cache file of the simulation if it has been sampled in the same way before.
+    sampling_parameters = (times[-1], len(times)-1)
+    if use_cache:
+        data_over_time_for_simulation = load_sampled_data_from_cache(path_to_sim, sampling_parameters)
+        if data_over_time_for_simulation is not None:
+            return data_over_time_for_simulation, None
 
-def get_inputs(all_sims, sim_time_limit, no_of_times_to_sample):
-    """
-    This generator is designed to give each simulation data in all_sims, along with sim_time_limit and no_of_times_to_sample
+    # Third, obtain the data of the simulation, and sample it over time.
+    simulation_data = get_data_of_simulation(root, sim_name, use_cache=use_cache, read_up_to_time=read_up_to_time)
+    data_over_time_for_simulation = get_data_over_time(sim_name, simulation_data, times)
 
-    Parameters
-    ----------
-    all_sims : list
-        This is the data obtained for all kinetic Monte Carlo simulations. 
-    sim_time_limit : float
-        This it the time that all kinetic Monte Carlo simulations were simulated for.
-    no_of_times_to_sample : int
-        This is the number of times to samples over, from 0.0 fs to sim_time_limit fs
-    """
-    for simulation_datum in all_sims:
-        yield (simulation_datum, sim_time_limit, no_of_times_to_sample)
+    # Fourth, save the sampled data to the sampled cache file of the simulation.
+    if use_cache:
+        save_sampled_data_to_cache(path_to_sim, sampling_parameters, data_over_time_for_simulation, EKMC_datafile_key)
 
-def get_data_over_time(input_datum):
+    # Fifth, return the sampled data and the data of the simulation.
+    return data_over_time_for_simulation, simulation_data
+
+def get_data_over_time(sim_name, simulation_data, times):
     """
     This method is designed to sample a simulation over time.
 
     Parameters
     ----------
-    simulation_datum : list
+    sim_name : str.
+        This is the name of the simulation. 
+    simulation_data : numpy.array
         This is the data obtained for a single kinetic Monte Carlo simulation. 
-    sim_time_limit : float
-        This it the time that all kinetic Monte Carlo simulations were simulated for.
-    no_of_times_to_sample : int
-        This is the number of times to samples over, from 0.0 fs to sim_time_limit fs
+    times : numpy.array
+        These are the times to sample the simulation at.
 
     Returns
     -------
-    data_over_time_for_simulation : list
-        This is the data of the current simulation at each time interval.
+    sampled_molecules : numpy.array of ints
+        These are the molecules that the exciton is on at each sampled time.
+    sampled_cell_points : numpy.array of ints
+        These are the cell points that the exciton is in at each sampled time.
+    sampled_energies : numpy.array of floats
+        These are the energies of the exciton at each sampled time.
     """
 
-    # First, get the input data to process the simulation over time
-    simulation_datum, sim_time_limit, no_of_times_to_sample = input_datum
-
-    # Second, note the current index to monitor.
-    index = 0
-
-    # Third, initialise all the times to record over
-    times = np.linspace(0.0, sim_time_limit, num=no_of_times_to_sample+1)
-
-    # Fourth, initialise the list to save sampled data to over time.
-    data_over_time_for_simulation = []
-
-    # Fifth, for each time to sample
-    for time in times:
-
-        # Sixth, determine the index of simulation_datum to sample.
-        while True:
-
-            # 6.1: Get the simulation time at index
-            sim_time = simulation_datum[1][index][3]
-
-            # 6.2: If the simulation time for index is creater than time, we want to sample simulation_datum at index-1.
-            if sim_time > time:
-                index -= 1
-                break
-
-            # 6.3: Else, increment index by 1
-            index += 1
+    # First, get the times of each step in the simulation
+    sim_times = simulation_data['sim_time']
 
-        # Seventh, Obtain the data from index position in simulation_data
-        count, molecule, cell_point, sim_time, change_in_time, hopping_distance, energy, sum_of_kij, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz = simulation_datum[1][index]
+    # Second, check that the simulation has been run for long enough to be sampled at all times.
+    if (len(sim_times) == 0) or (sim_times[-1] < times[-1]):
+        raise Exception('Error: Simulation '+str(sim_name)+' has only been simulated to '+str(sim_times[-1] if (len(sim_times) > 0) else 0.0)+' ps, but needs to be sampled up to '+str(times[-1])+' ps.')
 
-        # Eighth, append data to data_over_time_for_simulation
-        data_over_time_for_simulation.append((molecule, cell_point, energy))
+    # Third, determine the step that the simulation is on at each sampled time. This is the last step that began at or before the sampled time.
+    indices = np.searchsorted(sim_times, times, side='right') - 1
+    if indices[0] < 0:
+        raise Exception('Error: Simulation '+str(sim_name)+' begins at '+str(sim_times[0])+' ps, which is after the first sampled time ('+str(times[0])+' ps).')
 
-    # Ninth, return data_over_time_for_simulation
-    return data_over_time_for_simulation
+    # Fourth, obtain the data from the simulation at each sampled time.
+    sampled_data = simulation_data[indices]
+    sampled_molecules   = np.ascontiguousarray(sampled_data['molecule'])
+    sampled_cell_points = np.ascontiguousarray(sampled_data['cell_point'])
+    sampled_energies    = np.ascontiguousarray(sampled_data['energy'])
 
+    # Fifth, return the sampled data
+    return sampled_molecules, sampled_cell_points, sampled_energies
@@ -0,0 +1,209 @@
+"""
+profiling.py, Geoffrey Weal, 19/10/26
+
+This script is designed to record the wall time, CPU time and peak memory (RSS) used by each stage of processing, for each root.
+
+Profiling is only performed if asked for (with the --profile option of process_results and process_steps). The records are saved
+as a JSON file and a CSV file, so that they can be read by other programs when sizing analysis jobs, or compared between versions.
+
+On Linux, the peak RSS of the process is reset at the beginning of each stage (through /proc/self/clear_refs), so the peak RSS given
+is the peak of that stage. Where this is not possible, the peak RSS given is the peak of the process up to the end of the stage. The
+CPU time and peak RSS of child processes (such as those in process pools) are only included once those processes have finished.
+"""
+import os, sys, csv, json
+import time
+from contextlib import contextmanager
+try:
+    import resource
+except ImportError:
+    resource = None
+
+profile_filename = 'EKMC_profile'
+profile_columns = ['command', 'root', 'stage', 'wall_time_s', 'cpu_time_s', 'children_cpu_time_s', 'peak_rss_mb', 'children_peak_rss_mb', 'pid', 'started_at']
+
+class StageProfiler:
+    """
+    This class is designed to record the wall time, CPU time and peak RSS of each stage of processing.
+
+    If enabled is False, nothing is recorded, so a StageProfiler can always be given to the stages of processing.
+
+    Parameters
+    ----------
+    command : str.
+        This is the name of the EKMC program being profiled, such as 'process_results'.
+    enabled : bool.
+        This indicates if the stages should be profiled. Default: False
+    root : str. or None
+        This is the root that the stages are for, unless another root is given to a stage. Default: None
+    """
+    def __init__(self, command, enabled=False, root=None):
+        self.command = command
+        self.enabled = enabled
+        self.root = root
+        self.records = []
+        self.open_stages = []
+
+    @contextmanager
+    def stage(self, stage_name, root=None):
+        """
+        This method will profile the code run within this context as a stage.
+
+        Parameters
+        ----------
+        stage_name : str.
+            This is the name of the stage.
+        root : str. or None
+            This is the root being processed in this stage. If None, the root given to this profiler is used.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        # First, record the times and the CPU times at the start of the stage, and reset the peak RSS of the process.
+        if len(self.open_stages) > 0:
+            self.open_stages[-1]['peak_rss_mb'] = max(self.open_stages[-1]['peak_rss_mb'], get_peak_rss_mb())
+        reset_peak_rss()
+        open_stage = {'peak_rss_mb': 0.0}
+        self.open_stages.append(open_stage)
+        started_at = time.time()
+        wall_time_start = time.perf_counter()
+        cpu_time_start = time.process_time()
+        children_cpu_time_start = get_children_cpu_time()
+
+        try:
+            yield
+        finally:
+
+            # Second, record the wall time, CPU time and peak RSS of the stage.
+            self.open_stages.pop()
+            peak_rss_mb = max(open_stage['peak_rss_mb'], get_peak_rss_mb())
+            if len(self.open_stages) > 0:
+                self.open_stages[-1]['peak_rss_mb'] = max(self.open_stages[-1]['peak_rss_mb'], peak_rss_mb)
+            self.records.append({'command': self.command, 'root': (self.root if (root is None) else root), 'stage': stage_name, 'wall_time_s': time.perf_counter() - wall_time_start, 'cpu_time_s': time.process_time() - cpu_time_start, 'children_cpu_time_s': get_children_cpu_time() - children_cpu_time_start, 'peak_rss_mb': peak_rss_mb, 'children_peak_rss_mb': get_children_peak_rss_mb(), 'pid': os.getpid(), 'started_at': started_at})
+
+    def save(self, path_to_folder):
+        """
+        This method will save the records of this profiler to the folder given, if profiling is enabled.
+
+        Parameters
+        ----------
+        path_to_folder : str.
+            This is the folder to save the profile files to.
+        """
+        if self.enabled:
+            save_profile(path_to_folder, self.records)
+
+def reset_peak_rss():
+    """
+    This method will reset the peak RSS of this process, if this is possible (on Linux).
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as clear_refs:
+            clear_refs.write('5')
+    except OSError:
+        pass
+
+def get_peak_rss_mb():
+    """
+    This method will obtain the peak RSS of this process (in MB) since it was last reset.
+
+    Returns
+    -------
+    peak_rss_mb : float
+        This is the peak RSS of this process (in MB). 0.0 is given if this could not be obtained.
+    """
+    try:
+        with open('/proc/self/status', 'r') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return float(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    if resource is None:
+        return 0.0
+    return convert_maxrss_to_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def get_children_peak_rss_mb():
+    """
+    This method will obtain the largest peak RSS (in MB) of the child processes of this process that have finished.
+
+    Returns
+    -------
+    children_peak_rss_mb : float
+        This is the largest peak RSS of the finished child processes (in MB).
+    """
+    if resource is None:
+        return 0.0
+    return convert_maxrss_to_mb(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+def convert_maxrss_to_mb(maxrss):
+    """
+    This method will convert ru_maxrss to MB. ru_maxrss is given in bytes on macOS, and in kilobytes otherwise.
+    """
+    return maxrss / (1024.0**2 if (sys.platform == 'darwin') else 1024.0)
+
+def get_children_cpu_time():
+    """
+    This method will obtain the CPU time (user and system) of the child processes of this process that have finished.
+
+    Returns
+    -------
+    children_cpu_time : float
+        This is the CPU time of the finished child processes (in s).
+    """
+    times = os.times()
+    return times.children_user + times.children_system
+
+def save_profile(path_to_folder, records):
+    """
+    This method will save the profile records to a JSON file and a CSV file.
+
+    Parameters
+    ----------
+    path_to_folder : str.
+        This is the folder to save the profile files to.
+    records : list of dict.
+        These are the profile records to save.
+    """
+    with open(path_to_folder+'/'+profile_filename+'.json', 'w') as profileJSON:
+        json.dump(records, profileJSON, indent=4)
+    with open(path_to_folder+'/'+profile_filename+'.csv', 'w', newline='') as profileCSV:
+        writer = csv.DictWriter(profileCSV, fieldnames=profile_columns)
+        writer.writeheader()
+        writer.writerows(records)
+
+def load_profile(path_to_folder):
+    """
+    This method will load the profile records from the JSON file in the folder given.
+
+    Parameters
+    ----------
+    path_to_folder : str.
+        This is the folder that contains the profile files.
+
+    Returns
+    -------
+    records : list of dict.
+        These are the profile records. This is empty if there is no profile file in the folder.
+    """
+    if not os.path.exists(path_to_folder+'/'+profile_filename+'.json'):
+        return []
+    with open(path_to_folder+'/'+profile_filename+'.json', 'r') as profileJSON:
+        return json.load(profileJSON)
+
+def print_profile_summary(records):
+    """
+    This method will print the total wall time, CPU time, and the largest peak RSS of each stage across all roots.
+
+    Parameters
+    ----------
+    records : list of dict.
+        These are the profile records.
+    """
+    summary = {}
+    for record in records:
+        wall_time, cpu_time, peak_rss_mb = summary.get(record['stage'], (0.0, 0.0, 0.0))
+        summary[record['stage']] = (wall_time + record['wall_time_s'], cpu_time + record['cpu_time_s'] + record['children_cpu_time_s'], max(peak_rss_mb, record['peak_rss_mb']))
+    print('Stage\tWall time (s)\tCPU time (s)\tPeak RSS (MB)')
+    for stage_name, (wall_time, cpu_time, peak_rss_mb) in summary.items():
+        print(stage_name+'\t'+str(round(wall_time, 3))+'\t'+str(round(cpu_time, 3))+'\t'+str(round(peak_rss_mb, 1)))
@@ -1,14 +1,11 @@
 """
 save_data_and_plot_figures.py, Geoffrey Weal, 17/8/22
 
-This script is designed to plot
+This script is designed to save the ensemble data over time to disk. The figures of this data are plotted from the text files saved here by plot_figures.py
 """
 import os
 import numpy as np
 
-import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-
 from tqdm import tqdm, trange
 
 from ase import Atoms
@@ -16,9 +13,12 @@ from ase.io import read, write
 
 from SUMELF import make_folder, remove_folder
 
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_over_time        import get_diffusion_from_average_displacement_squared
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_tensor_over_time import get_diffusion_tensor_from_average_displacement_tensor
+from EKMC.Postprocessing_Programs.Process_Results_methods.plot_figures                                        import energy_limits_filename
+
 kB = 8.617333262145 * (10.0 ** -5.0) # eV K-1
 no_of_atoms = 50
-s=5
 def save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time, average_displacements_from_initial_position_over_time, average_displacements_squared_from_initial_position_over_time, average_energies_over_time, diffusion_over_time, diffusion_tensor_over_time, eigenvalues_of_diffusion_tensor_over_time, eigenvectors_of_diffusion_tensor_over_time, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, path_to_crystal_file=None):
     """
     This method is designed to obtain the displacement vectors and energies for all the simulations over sampled time.
@@ -41,45 +41,23 @@ def save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time,
     """
 
     # First, get the name of the folder to save data to, and make this folder. 
-    print('Save data and figures to disk.')
+    print('Save data to disk.')
 
     # Second, save the average displacement of the exciton across the ensemble over time.
-    plt.scatter(times, average_displacements_from_initial_position_over_time, s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"$\mathregular{\left\langle d \right\rangle  (Å)}$")
-    plt.savefig(path_to_place_data_in+'/'+'Disp_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Disp_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_single(times, average_displacements_from_initial_position_over_time, 'Average Displacement (A)', path_to_place_data_in, 'Disp_Vs_Time.txt')
 
     # Third, save the average displacement squared of the exciton across the ensemble over time.
-    plt.scatter(times, average_displacements_squared_from_initial_position_over_time, s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"$\mathregular{\left\langle d^2 \right\rangle  (Å^2)}$")
-    plt.savefig(path_to_place_data_in+'/'+'Disp2_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Disp2_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_single(times, average_displacements_squared_from_initial_position_over_time, 'Average Displacement Squared (A^2)', path_to_place_data_in, 'Disp2_Vs_Time.txt')
 
     # Fourth, save the average energy of the exciton across the ensemble over time.
-    for molname, bandgap_energy in sorted(conformationally_unique_bandgap_energies.items()):
-        energy_limit = bandgap_energy - ((energetic_disorder ** 2.0)/(kB * temperature))
-        plt.axhline(y=energy_limit, color='r', linestyle='--')
-    plt.scatter(times, average_energies_over_time, s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"$\mathregular{\left\langle E \right\rangle  (eV)}$")
-    plt.savefig(path_to_place_data_in+'/'+'Energy_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Energy_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_single(times, average_energies_over_time, 'Energy (eV)', path_to_place_data_in, 'Energy_Vs_Time.txt')
+    with open(path_to_place_data_in+'/'+energy_limits_filename, 'w') as fileTXT:
+        fileTXT.write('Molecule\tEnergy Asympote (eV)\n')
+        for molname, bandgap_energy in sorted(conformationally_unique_bandgap_energies.items()):
+            energy_limit = bandgap_energy - ((energetic_disorder ** 2.0)/(kB * temperature))
+            fileTXT.write(str(molname)+'\t'+str(energy_limit)+'\n')
 
     # Fifth, save the Diffusion Coefficient of the exciton across the ensemble over time.
-    plt.scatter(times, diffusion_over_time, s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"Diffusion Coefficient $\mathregular{(cm^{2} s^{-1})}$")
-    plt.savefig(path_to_place_data_in+'/'+'Diffusion_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Diffusion_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_single(times, diffusion_over_time, 'Diffusion Coefficient (cm^2 s^-1)', path_to_place_data_in, 'Diffusion_Vs_Time.txt')
 
     # Sixth, save each of the components of the diffusion tensor over time.
@@ -92,33 +70,12 @@ def save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time,
         diffusion_tensor_yy.append(diffusion_tensor_at_time[1][1])
         diffusion_tensor_yz.append(diffusion_tensor_at_time[1][2])
         diffusion_tensor_zz.append(diffusion_tensor_at_time[2][2])
-    plt.scatter(times, diffusion_tensor_xx, label='xx', s=s)
-    plt.scatter(times, diffusion_tensor_xy, label='xy/yx', s=s)
-    plt.scatter(times, diffusion_tensor_xz, label='xz/zx', s=s)
-    plt.scatter(times, diffusion_tensor_yy, label='yy', s=s)
-    plt.scatter(times, diffusion_tensor_yz, label='yz/zy', s=s)
-    plt.scatter(times, diffusion_tensor_zz, label='zz', s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"Diffusion Tensor Components $\mathregular{(cm^2 s^{-1})}$")
-    plt.legend()
-    plt.savefig(path_to_place_data_in+'/'+'Diffusion_Tensor_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Diffusion_Tensor_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_six(times, diffusion_tensor_xx, diffusion_tensor_xy, diffusion_tensor_xz, diffusion_tensor_yy, diffusion_tensor_yz, diffusion_tensor_zz, 'Diffusion Tensor XX Component (cm^2 s^-1)', 'Diffusion Tensor XY Component (cm^2 s^-1)', 'Diffusion Tensor XZ Component (cm^2 s^-1)', 'Diffusion Tensor YY Component (cm^2 s^-1)', 'Diffusion Tensor YZ Component (cm^2 s^-1)', 'Diffusion Tensor ZZ Component (cm^2 s^-1)', path_to_place_data_in, 'Diffusion_Tensor_Vs_Time.txt')
 
     # Seventh, Obtain the eigenvalues of the tensor matrix and show this over time. 
     major_eigenvalue_of_diffusion_tensor_over_time        = [major  for major, minor1, minor2 in eigenvalues_of_diffusion_tensor_over_time]
     first_minor_eigenvalue_of_diffusion_tensor_over_time  = [minor1 for major, minor1, minor2 in eigenvalues_of_diffusion_tensor_over_time]
     second_minor_eigenvalue_of_diffusion_tensor_over_time = [minor2 for major, minor1, minor2 in eigenvalues_of_diffusion_tensor_over_time]
-    plt.scatter(times, major_eigenvalue_of_diffusion_tensor_over_time, label='major', s=s)
-    plt.scatter(times, first_minor_eigenvalue_of_diffusion_tensor_over_time, label='first minor', s=s)
-    plt.scatter(times, second_minor_eigenvalue_of_diffusion_tensor_over_time, label='second minor', s=s)
-    plt.xlabel('Time (ps)')
-    plt.ylabel(r"Diffusion Tensor Eigenvalues $\mathregular{(cm^2 s^{-1})}$")
-    plt.legend()
-    plt.savefig(path_to_place_data_in+'/'+'Eigenvalues_of_Diagonalised_Diffusion_Tensor_Vs_Time.png', dpi=300)
-    plt.savefig(path_to_place_data_in+'/'+'Eigenvalues_of_Diagonalised_Diffusion_Tensor_Vs_Time.pdf', dpi=300)
-    plt.clf()
     write_plot_data_to_disk_three(times, major_eigenvalue_of_diffusion_tensor_over_time, first_minor_eigenvalue_of_diffusion_tensor_over_time, second_minor_eigenvalue_of_diffusion_tensor_over_time, 'Diffusion Tensor Major Eigenvalue (cm^2 s^-1)', 'Diffusion Tensor Minor Eigenvalue 1 (cm^2 s^-1)', 'Diffusion Tensor Minor Eigenvalue 2 (cm^2 s^-1)', path_to_place_data_in, 'Eigenvalues_of_Diagonalised_Diffusion_Tensor_Vs_Time.txt')
 
     # Eighth, obtain the visual of the direction of the diagonalised diffusion tensor. 
@@ -132,6 +89,8 @@ def save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time,
         origin_vector = Atoms('O', [(0,0,0)])
         eigenvectors_at_sampled_time = crystal_system.copy() + origin_vector
         try:
+            if not np.all(np.isfinite(eigenvalues)):
+                raise Exception('Error: The diffusion tensor could not be diagonalised at this sampled time.')
             major_vector  = eig_major  * eiv_major
             minor1_vector = eig_minor1 * eiv_minor1
             minor2_vector = eig_minor2 * eiv_minor2
@@ -153,23 +112,43 @@ def save_data_and_plot_figures(path_to_place_data_in, times, positions_at_time,
     write(path_to_place_data_in+'/'+'end_of_simulation_exciton_diffusion_over_time.xyz', excitons)
 
 
-    '''
-    final_eigenvector_of_diffusion_tensor = eigenvectors_of_diffusion_tensor_over_time[-1]
-
-    X, Y, Z = np.array((0., 0., 0.))
-    U, V, W = zip(*final_eigenvector_of_diffusion_tensor)
+tensor_components = {'XX': (0,0), 'XY': (0,1), 'XZ': (0,2), 'YY': (1,1), 'YZ': (1,2), 'ZZ': (2,2)}
+def save_ensemble_statistics(path_to_place_data_in, times, ensemble_statistics, filename='Ensemble_Statistics_Vs_Time.txt'):
+    """
+    This method is designed to save the mean, standard deviation, and 95% confidence interval of the quantities across the ensemble at each sampled time.
 
-    fig = plt.figure()
-    ax = fig.add_subplot(111, projection='3d')
-    ax.quiver(X, Y, Z, U, V, W)
+    Parameters
+    ----------
+    path_to_place_data_in : str.
+        This is the folder to save the file to.
+    times : numpy.array
+        These are the times that were sampled across all simulations for this system.
+    ensemble_statistics : dict.
+        These are the statistics of the ensemble at each sampled time, as given by get_ensemble_statistics in ensemble_accumulator.py.
+    filename : str.
+        This is the name of the file to save. Default: 'Ensemble_Statistics_Vs_Time.txt'
+    """
 
-    ax.set_xlabel('x axis')
-    ax.set_ylabel('y axis')
-    ax.set_xlabel('z axis')
-    ax.legend()
-    plt.savefig(path_to_place_data_in+'/'+'Eigenvectors_of_Diagonalised_Diffusion_Tensor_Vs_Time.png')
-    plt.clf()
-    '''
+    # First, obtain the columns for the displacement, displacement squared, and energy.
+    column_names = ['Time (ps)']
+    columns = [times]
+    for quantity, quantity_name, unit in (('displacement', 'Displacement', 'A'), ('displacement_squared', 'Displacement Squared', 'A^2'), ('energy', 'Energy', 'eV')):
+        column_names += ['Average '+quantity_name+' ('+unit+')', quantity_name+' SD ('+unit+')', quantity_name+' 95% CI ('+unit+')']
+        columns      += [ensemble_statistics[quantity+'_mean'], np.sqrt(ensemble_statistics[quantity+'_variance']), ensemble_statistics[quantity+'_ci']]
+
+    # Second, obtain the columns for the diffusion coefficient, and its 95% confidence interval.
+    column_names += ['Diffusion Coefficient (cm^2 s^-1)', 'Diffusion Coefficient 95% CI (cm^2 s^-1)']
+    columns      += [get_diffusion_from_average_displacement_squared(times, ensemble_statistics['displacement_squared_mean']), get_diffusion_from_average_displacement_squared(times, ensemble_statistics['displacement_squared_ci'])]
+
+    # Third, obtain the columns for the components of the diffusion tensor, and their 95% confidence intervals.
+    diffusion_tensor_over_time    = get_diffusion_tensor_from_average_displacement_tensor(times, ensemble_statistics['displacement_tensor_mean'])
+    diffusion_tensor_ci_over_time = get_diffusion_tensor_from_average_displacement_tensor(times, ensemble_statistics['displacement_tensor_ci'])
+    for component_name, (ii, jj) in tensor_components.items():
+        column_names += ['Diffusion Tensor '+component_name+' Component (cm^2 s^-1)', 'Diffusion Tensor '+component_name+' Component 95% CI (cm^2 s^-1)']
+        columns      += [diffusion_tensor_over_time[:,ii,jj], diffusion_tensor_ci_over_time[:,ii,jj]]
+
+    # Fourth, write the columns to disk.
+    np.savetxt(path_to_place_data_in+'/'+filename, np.column_stack(columns), delimiter='\t', header='Number of simulations: '+str(ensemble_statistics['count'])+'\n'+'\t'.join(column_names), comments='')
 
 def write_plot_data_to_disk_single(times, data_to_save, data_to_save_name, path_to_place_data_in, filename):
     if os.path.exists(path_to_place_data_in+'/'+filename):
@@ -0,0 +1,101 @@
+"""
+shared_memory_arrays.py, Geoffrey Weal, 19/10/26
+
+This script is designed to place NumPy arrays in shared memory (multiprocessing.shared_memory), so that they can be given to the
+processes in a process pool without being pickled and copied into each task.
+
+A shared array is described by a small tuple, called a descriptor, that contains the name of the shared memory block, as well as
+the shape and dtype of the array. Only this descriptor (along with the indices of the data to work on) needs to be given to a
+process in a task. The process attaches to the shared memory block and obtains a NumPy array that is a view of the shared memory.
+
+The process that makes a shared array owns it, and must release it with unlink=True once all processes have finished with it.
+"""
+import numpy as np
+from multiprocessing import shared_memory
+
+def make_shared_array(shape, dtype):
+    """
+    This method is designed to make an array in shared memory.
+
+    Parameters
+    ----------
+    shape : tuple of ints
+        This is the shape of the array.
+    dtype : numpy.dtype
+        This is the dtype of the array. This can be a structured dtype.
+
+    Returns
+    -------
+    shared_memory_block : multiprocessing.shared_memory.SharedMemory
+        This is the shared memory block that contains the array.
+    shared_array : numpy.array
+        This is the array, as a view of the shared memory block.
+    descriptor : tuple
+        This is the (name, shape, dtype) of the shared array, to give to other processes.
+    """
+    dtype = np.dtype(dtype)
+    shape = tuple(int(length) for length in np.atleast_1d(shape))
+    shared_memory_block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape))*dtype.itemsize, 1))
+    shared_array = np.ndarray(shape, dtype=dtype, buffer=shared_memory_block.buf)
+    descriptor = (shared_memory_block.name, shape, dtype)
+    return shared_memory_block, shared_array, descriptor
+
+def copy_to_shared_array(array):
+    """
+    This method is designed to copy an array into shared memory.
+
+    Parameters
+    ----------
+    array : numpy.array
+        This is the array to copy into shared memory.
+
+    Returns
+    -------
+    shared_memory_block : multiprocessing.shared_memory.SharedMemory
+        This is the shared memory block that contains the array.
+    shared_array : numpy.array
+        This is the copy of the array, as a view of the shared memory block.
+    descriptor : tuple
+        This is the (name, shape, dtype) of the shared array, to give to other processes.
+    """
+    shared_memory_block, shared_array, descriptor = make_shared_array(array.shape, array.dtype)
+    shared_array[...] = array
+    return shared_memory_block, shared_array, descriptor
+
+def attach_shared_array(descriptor):
+    """
+    This method is designed to attach to an array in shared memory that was made by another process.
+
+    Parameters
+    ----------
+    descriptor : tuple
+        This is the (name, shape, dtype) of the shared array, as given by make_shared_array or copy_to_shared_array.
+
+    Returns
+    -------
+    shared_memory_block : multiprocessing.shared_memory.SharedMemory
+        This is the shared memory block that contains the array. This must be kept (and not released) while shared_array is being used.
+    shared_array : numpy.array
+        This is the array, as a view of the shared memory block.
+    """
+    name, shape, dtype = descriptor
+    shared_memory_block = shared_memory.SharedMemory(name=name)
+    shared_array = np.ndarray(shape, dtype=dtype, buffer=shared_memory_block.buf)
+    return shared_memory_block, shared_array
+
+def release_shared_array(shared_memory_block, unlink=False):
+    """
+    This method is designed to release a shared memory block.
+
+    Any NumPy arrays that are views of the shared memory block must not be used after this.
+
+    Parameters
+    ----------
+    shared_memory_block : multiprocessing.shared_memory.SharedMemory
+        This is the shared memory block to release.
+    unlink : bool.
+        This indicates if the shared memory block should be removed. This should only be set to True by the process that made the shared array. Default: False
+    """
+    shared_memory_block.close()
+    if unlink:
+        shared_memory_block.unlink()
@@ -24,32 +24,23 @@ def time_average_data(times, average_energies_over_time, diffusion_over_time, di
     """
 
     if begin_recording_time >= end_recording_time:
-        raise Exception('Error.')
-
-    beginning_index = None
-    ending_index = None
-
-    for index in range(len(times)):
-        if (beginning_index is None) and (times[index] >= begin_recording_time):
-            beginning_index = index
-        if (ending_index is None)    and (times[index] >= end_recording_time):
-            ending_index = index
-            break
-    else:
-        import pdb; pdb.set_trace()
-        raise Exception('Error.')
-
-    if ending_index == len(average_energies_over_time):
-        average_energies_over_time_selected = average_energies_over_time[beginning_index::]
-        diffusion_over_time_selected = diffusion_over_time[beginning_index::]
-        measured_diffusion_tensor = diffusion_tensor_over_time[beginning_index::]
-        measured_eigenvalues_of_diffusion_tensor = eigenvalues_of_diffusion_tensor_over_time[beginning_index::]
-    else:
-        average_energies_over_time_selected = average_energies_over_time[beginning_index:ending_index+1:]
-        diffusion_over_time_selected = diffusion_over_time[beginning_index:ending_index+1:]
-        measured_diffusion_tensor = diffusion_tensor_over_time[beginning_index:ending_index+1:]
-        measured_eigenvalues_of_diffusion_tensor = eigenvalues_of_diffusion_tensor_over_time[beginning_index:ending_index+1:]
-
+        raise Exception('Error: begin_recording_time ('+str(begin_recording_time)+' ps) must be before end_recording_time ('+str(end_recording_time)+' ps).')
+
+    # First, obtain the indices of the first sampled times at or after begin_recording_time and end_recording_time.
+    #        The diffusion coefficient is not defined at t = 0 ps (0/0), so the data is only time-averaged from the first sampled time after 0 ps.
+    times = np.asarray(times)
+    beginning_index = max(int(np.searchsorted(times, begin_recording_time, side='left')), int(np.searchsorted(times, 0.0, side='right')))
+    ending_index    = int(np.searchsorted(times, end_recording_time,   side='left'))
+    if ending_index == len(times):
+        raise Exception('Error: end_recording_time ('+str(end_recording_time)+' ps) is after the last sampled time ('+str(times[-1])+' ps).')
+
+    # Second, select the data between begin_recording_time and end_recording_time.
+    average_energies_over_time_selected = np.asarray(average_energies_over_time)[beginning_index:ending_index+1]
+    diffusion_over_time_selected = np.asarray(diffusion_over_time)[beginning_index:ending_index+1]
+    measured_diffusion_tensor = np.asarray(diffusion_tensor_over_time)[beginning_index:ending_index+1]
+    measured_eigenvalues_of_diffusion_tensor = np.asarray(eigenvalues_of_diffusion_tensor_over_time)[beginning_index:ending_index+1]
+
+    # Third, obtain the time averages, standard deviations, and confidence intervals of the selected data.
     time_average_energy    = np.mean(average_energies_over_time_selected)
     time_average_energy_sd = np.std (average_energies_over_time_selected)
     time_average_energy_ci = mean_confidence_interval(average_energies_over_time_selected, confidence=0.95)
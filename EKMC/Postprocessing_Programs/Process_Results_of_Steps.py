@@ -13,6 +13,9 @@ from SUMELF import make_folder, remove_folder
 from EKMC.Postprocessing_Programs.Process_Results_methods.split_string_by_floats                         import split_string_by_floats
 from EKMC.Postprocessing_Programs.Process_Results_methods.collect_data                                   import collect_data
 from EKMC.Postprocessing_Programs.Process_Results_of_Steps_methods.process_data                          import process_data
+from EKMC.Postprocessing_Programs.Process_Results_of_Steps_methods.save_stepwise_data                    import save_stepwise_data
+from EKMC.Postprocessing_Programs.Process_Results_methods.profiling                                      import StageProfiler, print_profile_summary
+from EKMC.EKMC_Setup.run_manifest_file                                                                   import walk_roots
 
 class CLICommand:
     """Will determine which exciton kinetic monte carlo jobs have run for the time you desire.
@@ -21,6 +24,7 @@ class CLICommand:
     def add_arguments(parser):
         parser.add_argument('no_of_cpus', nargs='*', help='This is the number of CPUs to use to process data.')
         parser.add_argument('path_to_crystal_file', nargs='*', help='This is the crystal to add to Diffusion Diagonalisation Eigenvector Analysis.')
+        parser.add_argument('--profile', action='store_true', help='Record the wall time, CPU time and peak memory (RSS) of each stage of processing for each folder. These are saved to '+str(data_foldername)+'/EKMC_profile.json and EKMC_profile.csv.')
 
     @staticmethod
     def run(arguments):
@@ -44,22 +48,25 @@ class CLICommand:
             path_to_crystal_file = None
 
         # Third, run the processing program.
-        Run_method(path_to_crystal_file, no_of_cpus=no_of_cpus)
+        Run_method(path_to_crystal_file, no_of_cpus=no_of_cpus, profile=arguments.profile)
 
 KMC_setup_data_filename = 'KMC_setup_data.ekmc'
 data_foldername = 'EKMC_Ensemble_Step_Data_Folder'
-def Run_method(path_to_crystal_file=None, no_of_cpus=1):
+def Run_method(path_to_crystal_file=None, no_of_cpus=1, profile=False):
     """
     This method will create a number of plots for checking the simulations performed, as well as to obtain data about your KMC simulation.
+
+    If profile is True, the wall time, CPU time and peak RSS of each stage is recorded for each root, and saved to data_foldername.
     """
+    profiler = StageProfiler('process_steps', enabled=profile)
 
     # First, get the current path.
     #current_path = os.getcwd()
 
     roots = []
 
-    # First, for each subdirectory in the path
-    for root, dirs, files in os.walk('.'):
+    # First, for each subdirectory in the path. If there is a run manifest, only the roots it gives are looked in.
+    for root, dirs, files in walk_roots('.'):
 
         dirs.sort(key=lambda dirname: split_string_by_floats(dirname))
         files.sort(key=lambda filename: split_string_by_floats(filename))
@@ -149,11 +156,19 @@ def Run_method(path_to_crystal_file=None, no_of_cpus=1):
     #with mp.Pool(no_of_cpus) as pool:
         #data_for_excel = pool.map(collect_save_and_provide_data_from_simulation, tqdm(roots, total=len(roots), desc='Gathering data (This may take some time)', unit='sims'))
     begin_recording_no_of_steps = 0
-    data_for_excel = [collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_no_of_steps, no_of_cpus) for root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit in roots]
+    data_for_excel = [collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_no_of_steps, no_of_cpus, profiler) for root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit in roots]
 
     # Twelfth, save data to excel spreadsheet.
     #save_to_excel_spreadsheet(data_foldername, data_for_excel)
 
+    # Thirteenth, save the profile of each stage for all roots, if profiling.
+    if profile:
+        if not os.path.exists(data_foldername):
+            os.makedirs(data_foldername)
+        profiler.save(data_foldername)
+        print('Profile of each stage (saved to '+str(data_foldername)+'):')
+        print_profile_summary(profiler.records)
+
     # Report that everything finished successfully
     print('EKMC process_results finished successfully.')
 
@@ -190,13 +205,16 @@ def create_saving_folder(data_foldername, path):
 
 # ============================================================================================================================================================================================================
 
-def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_no_of_steps, no_of_cpus=1):
+def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_cell_matrix, temperature, energetic_disorder, coupling_disorder, conformationally_unique_bandgap_energies, sim_time_limit, path_to_crystal_file, begin_recording_no_of_steps, no_of_cpus=1, profiler=None):
 
     print('=================================================================================')
     print('Gathering data for: '+str(root))
+    if profiler is None:
+        profiler = StageProfiler('process_steps')
 
     # First, collect the data from this subdirectory.
-    all_sims, all_sims_hop_probs = collect_data(root, cpu_count=no_of_cpus)
+    with profiler.stage('collect_data', root):
+        all_sims, hop_probability_data = collect_data(root, cpu_count=no_of_cpus)
 
     # Second, obtain the path to save data to.
     path = root[2::]
@@ -205,7 +223,12 @@ def collect_save_and_provide_data_from_simulation(root, molnames_and_coms, unit_
     path_to_place_data_in = create_saving_folder(data_foldername, path)
 
     # Tenth, process the collected data across all simulations.
-    spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, eigenvectors_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, eigenvectors_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor = process_data(all_sims, molnames_and_coms, unit_cell_matrix, begin_recording_no_of_steps, cpu_count=no_of_cpus)
+    with profiler.stage('process_data', root):
+        spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, eigenvectors_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, eigenvectors_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor, stepwise_data_per_molecule = process_data(all_sims, molnames_and_coms, unit_cell_matrix, begin_recording_no_of_steps, cpu_count=no_of_cpus)
+
+    # Eleventh, save the stepwise diffusion properties to disk.
+    with profiler.stage('save_stepwise_data', root):
+        save_stepwise_data(path_to_place_data_in, spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor, stepwise_data_per_molecule)
 
     print('=================================================================================')
 
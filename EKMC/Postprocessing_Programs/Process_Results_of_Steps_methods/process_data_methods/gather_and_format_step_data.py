@@ -21,11 +21,11 @@ def gather_and_format_step_data(all_sims, begin_recording_no_of_steps):
             exit('Error. There are not enough steps to record. Total number of steps: '+str(len(steps_information)-1)+'; Step number to begin recording: '+str(begin_recording_no_of_steps))
 
         # 1.3: Remove all steps in simulations that are less than begin_recording_no_of_steps
-        del all_sims[index][1][:begin_recording_no_of_steps]
+        all_sims[index] = (all_sims[index][0], steps_information[begin_recording_no_of_steps:])
 
     # Second, check that all the simulations have the same number of steps recorded.
     if not len(set([len(all_sim[1]) for all_sim in all_sims])) == 1:
-        raise Exception('here ')
+        raise Exception('Error: The simulations do not all have the same number of steps recorded. Number of steps recorded in each simulation: '+str(sorted(set([len(all_sim[1]) for all_sim in all_sims]))))
 
     # Third, return the reduced steps version of all_sims.
     return all_sims
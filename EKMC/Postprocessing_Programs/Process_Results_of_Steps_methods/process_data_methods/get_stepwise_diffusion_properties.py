@@ -3,127 +3,149 @@ get_stepwise_diffusion_properties.py, Geoffrey Weal, 20/11/23
 
 This script is designed to obtain the stepwise diffusion properties for the system of interest. 
 """
-from tqdm import tqdm
-from collections import Counter
-
 import numpy as np
-from numpy.linalg import eig
-
-import multiprocessing as mp
-from tqdm.contrib.concurrent import process_map
 
 from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_over_time        import convert_diffusion_coefficient
 from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_diffusion_tensor_over_time import diagonalise_diffusion_tensor_at_time
 
 displacement_components_to_measure = ((0,0), (1,1), (2,2), (0,1), (0,2), (1,2))
+D_components = ('D_xx', 'D_yy', 'D_zz', 'D_xy', 'D_xz', 'D_yz')
 
-def get_stepwise_diffusion_properties(all_stepwise_diffusion_data, molnames_and_coms):
+def get_stepwise_diffusion_properties(all_stepwise_diffusion_data, molnames_and_coms, hop_length_decimals=4):
 	"""
 	This method is designed to obtain the stepwise diffusion properties for the system of interest. 
 
+	All the steps are grouped by the molecule the exciton hops from (the donor molecule) using np.bincount and np.add.at, so no 
+	python loop is performed over the steps.
+
 	Parameters
 	----------
-	all_stepwise_diffusion_data : list
-		This list contains all the information about each step of each simulation. 
-    molnames_and_coms : dict of numpy.array
-        This dictionary contains the names of the molecules as well as their centre of masses
+	all_stepwise_diffusion_data : numpy.array
+		This structured array contains all the information about each step of each simulation, as given by get_stepwise_information. 
+	molnames_and_coms : dict of numpy.array
+		This dictionary contains the names of the molecules as well as their centre of masses
+	hop_length_decimals : int
+		This is the number of decimal places to round hop lengths (in A) to when obtaining the distribution of hop lengths. Default: 4
+
+	Returns
+	-------
+	spatial_stepwise_D_tensor : numpy.array
+		This is the spatial-based stepwise diffusion tensor, given as [D_xx, D_yy, D_zz, D_xy, D_xz, D_yz] in cm^2/s.
+	eigenvalues_of_spatial_stepwise_diffusion_tensor : numpy.array
+		These are the eigenvalues of the spatial-based stepwise diffusion tensor.
+	eigenvectors_of_spatial_stepwise_diffusion_tensor : numpy.array
+		These are the eigenvectors of the spatial-based stepwise diffusion tensor.
+	diffusion_coefficient_from_spatial_stepwise_diffusion_tensor : float
+		This is the diffusion coefficient obtained from the eigenvalues of the spatial-based stepwise diffusion tensor.
+	prob_stepwise_D_tensor : numpy.array
+		This is the probability-based stepwise diffusion tensor, given as [D_xx, D_yy, D_zz, D_xy, D_xz, D_yz] in cm^2/s.
+	eigenvalues_of_prob_stepwise_diffusion_tensor : numpy.array
+		These are the eigenvalues of the probability-based stepwise diffusion tensor.
+	eigenvectors_of_prob_stepwise_diffusion_tensor : numpy.array
+		These are the eigenvectors of the probability-based stepwise diffusion tensor.
+	diffusion_coefficient_from_prob_stepwise_diffusion_tensor : float
+		This is the diffusion coefficient obtained from the eigenvalues of the probability-based stepwise diffusion tensor.
+	stepwise_data_per_molecule : dict.
+		This contains the stepwise data for each donor molecule, including the number of steps on each molecule, the average dwell time, the stepwise diffusion tensors, the distribution of hop lengths, and the number of hops to each acceptor molecule and relative cell.
 	"""
 
-	# First, get the names of the molecules in the crystal to analyse
-	molecule_names = sorted(molnames_and_coms.keys())
-
-	# Second, initialise a Counter object to record the number of times the exciton was on a molecule per step.
-	molecule_step_counter        = Counter({molecule_name: 0   for molecule_name in molecule_names})
-
-	# Third, initialise the dictionaries to hold data for obtaining the average spatial-based stepwise diffusion tensor. 
-	spatial_stepwise_sum_of_tensor_components_per_mol               = {molecule_name : [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]       for molecule_name in molecule_names}
-	spatial_stepwise_sum_of_timestep_per_mol                        = {molecule_name : 0.0                                  for molecule_name in molecule_names}
-	average_spatial_stepwise_displacement_tensor_components_per_mol = {molecule_name : [None, None, None, None, None, None] for molecule_name in molecule_names}
-	average_spatial_stepwise_timestep_per_mol                       = {molecule_name : None                                 for molecule_name in molecule_names}
-	average_spatial_stepwise_D_tensors_per_mol                      = {molecule_name : [None, None, None, None, None, None] for molecule_name in molecule_names}
-
-	# Fourth, initialise the dictionaries to hold data for obtaining the average probability-based stepwise diffusion tensor. 
-	prob_stepwise_sum_of_D_tensor_components_per_mol                = {molecule_name : [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]       for molecule_name in molecule_names}
-	average_prob_stepwise_D_tensors_per_mol                         = {molecule_name : [None, None, None, None, None, None] for molecule_name in molecule_names}
-
-	# Fifth, for each step in each simulation perform the following:
-	for molecule_name, displacement_vector, time_step_in_fs, site_energy, apb_D_xx, apb_D_yy, apb_D_zz, apb_D_xy, apb_D_xz, apb_D_yz in tqdm(all_stepwise_diffusion_data):
-
-		# 5.1: Convert the timestep from femtoseconds to picoseconds. 
-		time_step_in_ps = time_step_in_fs / 1000
-
-		# 5.2.1: Obtain the components of the spatial-based stepwise displacement tensor  for each molecule in the crystal for this KMC step. 
-		for index, (index1, index2) in enumerate(displacement_components_to_measure):
-			spatial_stepwise_sum_of_tensor_components_per_mol[molecule_name][index] += displacement_vector[index1] * displacement_vector[index2]
-
-		# 5.2.2: Obtain the components of the spatial-based stepwise timestep for each molecule in the crystal for this KMC step. 
-		spatial_stepwise_sum_of_timestep_per_mol[molecule_name] += time_step_in_ps
-		
-		# 5.3: Obtain the probability-based stepwise diffusion tensor for each molecule in the crystal for this KMC step. 
-		for index, apb_D_component in enumerate([apb_D_xx, apb_D_yy, apb_D_zz, apb_D_xy, apb_D_xz, apb_D_yz]):
-			prob_stepwise_sum_of_D_tensor_components_per_mol[molecule_name][index] += apb_D_component
-
-		# 5.4: Increment the counter for this molecule. The counter is given by the time the exciton was on the molecule for. 
-		molecule_step_counter[molecule_name] += 1
-
-	# ==============================================================================================================================
-
-	# Sixth, get the average for the displacement tensor and timesteps for each molecule across all the steps in all the KMC simulation.
-	#          Use thees to obtain the components of the spatial-based stepwise diffusion tensor for each molecule across all the steps in all the KMC simulation.
-	
-	# 6.1: Obtain the average displacement tensor for each molecule across all the steps in all the KMC simulation. 
-	for molecule_name, sum_of_tensor_component_for_a_molecule in spatial_stepwise_sum_of_tensor_components_per_mol.items():
-		for index in range(len(sum_of_tensor_component_for_a_molecule)):
-			average_displacement = sum_of_tensor_component_for_a_molecule[index] / molecule_step_counter[molecule_name]
-			average_spatial_stepwise_displacement_tensor_components_per_mol[molecule_name][index] = average_displacement
-	
-	# 6.2: Obtain the average time step for each molecule across all the steps in all the KMC simulation. 
-	for molecule_name, sum_of_time_steps_in_ps_for_a_molecule in spatial_stepwise_sum_of_timestep_per_mol.items():
-		average_time_step = sum_of_time_steps_in_ps_for_a_molecule / molecule_step_counter[molecule_name]
-		average_spatial_stepwise_timestep_per_mol[molecule_name] = average_time_step
-
-	# 6.3: Obtain the spatial-based stepwise diffusion tensor for each molecule across all the steps in all the KMC simulation
-	for molecule_name in average_spatial_stepwise_displacement_tensor_components_per_mol.keys(): 
-
-		# 6.3.1: Obtain the average displacement tensor and timesteps for the molecule of interest. 
-		average_spatial_stepwise_displacement_tensor_components = average_spatial_stepwise_displacement_tensor_components_per_mol[molecule_name]
-		average_spatial_stepwise_timestep                       = average_spatial_stepwise_timestep_per_mol[molecule_name]
-
-		# 6.3.2: Obtain the spatial-based stepwise diffusion tensor for the molecule of interest. 
-		for index in range(len(average_spatial_stepwise_displacement_tensor_components)):
-			spatial_stepwise_diffusion_tensor_component_in_A2_per_ps = (1.0/2.0) * average_spatial_stepwise_displacement_tensor_components[index] / average_spatial_stepwise_timestep
-			spatial_stepwise_diffusion_tensor_component = convert_diffusion_coefficient(spatial_stepwise_diffusion_tensor_component_in_A2_per_ps)
-			average_spatial_stepwise_D_tensors_per_mol[molecule_name][index] = spatial_stepwise_diffusion_tensor_component
-		
-	# ==============================================================================================================================
-
-	# Seventh, obtain the probability that the exciton will be on a certain molecule during the KMC simulation. 
-	total = sum(molecule_step_counter.values())
-	probability_exciton_found_on_molecule = {key: value/total for key, value in molecule_step_counter.items()}
-
-	# Eighth, obtain the overall spatial-based stepwise diffusion tensor for this crystal, and use this to obtain the eigenvalues and 
+	# First, get the names of the molecules in the crystal to analyse, and the index of each step's donor molecule in molecule_names.
+	molecule_names = np.array(sorted(molnames_and_coms.keys()), dtype=np.int64)
+	molecule_indices = np.full(int(molecule_names.max())+1, -1, dtype=np.int64)
+	molecule_indices[molecule_names] = np.arange(len(molecule_names))
+	donor_indices = molecule_indices[all_stepwise_diffusion_data['molecule']]
+	no_of_molecules = len(molecule_names)
+
+	# Second, obtain the number of steps the exciton was on each molecule.
+	molecule_step_counter = np.bincount(donor_indices, minlength=no_of_molecules).astype(np.float64)
+
+	# Third, obtain the sums of the components of the displacement tensor and of the timesteps (converted from fs to ps) for each molecule.
+	displacement_vectors = all_stepwise_diffusion_data['displacement_vector']
+	spatial_stepwise_sum_of_tensor_components_per_mol = np.stack([np.bincount(donor_indices, weights=displacement_vectors[:,index1]*displacement_vectors[:,index2], minlength=no_of_molecules) for index1, index2 in displacement_components_to_measure], axis=1)
+	time_steps_in_ps = all_stepwise_diffusion_data['time_step'] / 1000
+	spatial_stepwise_sum_of_timestep_per_mol = np.bincount(donor_indices, weights=time_steps_in_ps, minlength=no_of_molecules)
+
+	# Fourth, obtain the sums of the components of the probability-based diffusion tensor for each molecule.
+	prob_stepwise_sum_of_D_tensor_components_per_mol = np.stack([np.bincount(donor_indices, weights=all_stepwise_diffusion_data[D_component], minlength=no_of_molecules) for D_component in D_components], axis=1)
+
+	# Fifth, obtain the averages for each molecule across all the steps in all the KMC simulations. Molecules that the exciton was never on give nan.
+	with np.errstate(divide='ignore', invalid='ignore'):
+		average_spatial_stepwise_displacement_tensor_components_per_mol = spatial_stepwise_sum_of_tensor_components_per_mol / molecule_step_counter[:,np.newaxis]
+		average_spatial_stepwise_timestep_per_mol                       = spatial_stepwise_sum_of_timestep_per_mol / molecule_step_counter
+		average_spatial_stepwise_D_tensors_per_mol                      = convert_diffusion_coefficient((1.0/2.0) * average_spatial_stepwise_displacement_tensor_components_per_mol / average_spatial_stepwise_timestep_per_mol[:,np.newaxis])
+		average_prob_stepwise_D_tensors_per_mol                         = prob_stepwise_sum_of_D_tensor_components_per_mol / molecule_step_counter[:,np.newaxis]
+
+	# Sixth, obtain the probability that the exciton will be on a certain molecule during the KMC simulation. 
+	probability_exciton_found_on_molecule = molecule_step_counter / molecule_step_counter.sum()
+	visited = molecule_step_counter > 0
+
+	# Seventh, obtain the overall spatial-based stepwise diffusion tensor for this crystal, and use this to obtain the eigenvalues and 
 	#        eigenvectors of the spatial-based stepwise diffusion tensor, as well as the exciton diffusion coefficient using the 
 	#        eigenvalues of the spatial-based stepwise diffusion tensor.
-	spatial_stepwise_D_tensor = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-	for molecule_name, sum_of_spatial_stepwise_D_tensor_components in average_spatial_stepwise_D_tensors_per_mol.items():
-		for index in range(len(sum_of_spatial_stepwise_D_tensor_components)):
-			spatial_stepwise_D_tensor[index] += sum_of_spatial_stepwise_D_tensor_components[index] * probability_exciton_found_on_molecule[molecule_name]
+	spatial_stepwise_D_tensor = np.matmul(probability_exciton_found_on_molecule[visited], average_spatial_stepwise_D_tensors_per_mol[visited])
 	eigenvalues_of_spatial_stepwise_diffusion_tensor, eigenvectors_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor = get_data_from_diagonalisation(spatial_stepwise_D_tensor)
 
-	# Ninth, obtain the overall probability-based stepwise diffusion tensor for this crystal, and use this to obtain the eigenvalues and 
+	# Eighth, obtain the overall probability-based stepwise diffusion tensor for this crystal, and use this to obtain the eigenvalues and 
 	#        eigenvectors of the probability-based stepwise diffusion tensor, as well as the exciton diffusion coefficient using the 
 	#        eigenvalues of the probability-based stepwise diffusion tensor.
-	prob_stepwise_D_tensor = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
-	for molecule_name, sum_of_prob_stepwise_D_tensor_components_for_a_molecule in prob_stepwise_sum_of_D_tensor_components_per_mol.items():
-		for index in range(len(sum_of_prob_stepwise_D_tensor_components_for_a_molecule)):
-			average_prob_stepwise_D_tensors_per_mol[molecule_name][index] = sum_of_prob_stepwise_D_tensor_components_for_a_molecule[index] / molecule_step_counter[molecule_name]
-			prob_stepwise_D_tensor[index] += average_prob_stepwise_D_tensors_per_mol[molecule_name][index] * probability_exciton_found_on_molecule[molecule_name]
+	prob_stepwise_D_tensor = np.matmul(probability_exciton_found_on_molecule[visited], average_prob_stepwise_D_tensors_per_mol[visited])
 	eigenvalues_of_prob_stepwise_diffusion_tensor, eigenvectors_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor = get_data_from_diagonalisation(prob_stepwise_D_tensor)
 
-	import pdb; pdb.set_trace()
+	# Ninth, obtain the number of hops from each donor molecule to each acceptor molecule in each relative cell, along with the average time step of these hops.
+	hop_keys, hop_key_shape = get_hop_keys(donor_indices, molecule_indices[all_stepwise_diffusion_data['acceptor_molecule']], all_stepwise_diffusion_data['relative_cell_point'], no_of_molecules)
+	all_hop_counts = np.bincount(hop_keys)
+	unique_hop_keys = np.flatnonzero(all_hop_counts)
+	hop_counts = all_hop_counts[unique_hop_keys]
+	with np.errstate(divide='ignore', invalid='ignore'):
+		average_time_step_per_hop = np.bincount(hop_keys, weights=time_steps_in_ps)[unique_hop_keys] / hop_counts
+	hop_donor_indices, hop_acceptor_indices, hop_cell_point_1, hop_cell_point_2, hop_cell_point_3 = np.unravel_index(unique_hop_keys, hop_key_shape)
+	minimum_relative_cell_point = all_stepwise_diffusion_data['relative_cell_point'].min(axis=0) if (len(all_stepwise_diffusion_data) > 0) else np.zeros(3, dtype=np.int64)
+	unique_hops = np.column_stack((molecule_names[hop_donor_indices], molecule_names[hop_acceptor_indices], np.column_stack((hop_cell_point_1, hop_cell_point_2, hop_cell_point_3)) + minimum_relative_cell_point))
+
+	# Tenth, obtain the distribution of hop lengths from each molecule. Each type of hop has one hop length, so this is obtained from the hop counts.
+	hop_displacement_vectors = np.zeros((len(all_hop_counts), 3))
+	hop_displacement_vectors[hop_keys] = displacement_vectors
+	hop_displacement_vectors = hop_displacement_vectors[unique_hop_keys]
+	hop_lengths = np.round(np.sqrt(np.einsum('hi,hi->h', hop_displacement_vectors, hop_displacement_vectors)), hop_length_decimals)
+	unique_hop_lengths, hop_length_indices = np.unique(hop_lengths, return_inverse=True)
+	hop_length_counts_per_mol = np.zeros((no_of_molecules, len(unique_hop_lengths)), dtype=np.int64)
+	np.add.at(hop_length_counts_per_mol, (hop_donor_indices, hop_length_indices.ravel()), hop_counts)
+
+	# Eleventh, gather the stepwise data for each molecule.
+	stepwise_data_per_molecule = {'molecule_names': molecule_names, 'no_of_steps': molecule_step_counter.astype(np.int64), 'probability_exciton_found_on_molecule': probability_exciton_found_on_molecule, 'average_dwell_time_in_ps': average_spatial_stepwise_timestep_per_mol, 'average_displacement_tensor': average_spatial_stepwise_displacement_tensor_components_per_mol, 'spatial_stepwise_D_tensor': average_spatial_stepwise_D_tensors_per_mol, 'prob_stepwise_D_tensor': average_prob_stepwise_D_tensors_per_mol, 'hop_lengths': unique_hop_lengths, 'hop_length_counts': hop_length_counts_per_mol, 'hops': unique_hops, 'hop_counts': hop_counts, 'average_time_step_per_hop_in_ps': average_time_step_per_hop}
+
+	# Twelfth, return stepwise diffusion properties
+	return spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, eigenvectors_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, eigenvectors_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor, stepwise_data_per_molecule
+
+def get_hop_keys(donor_indices, acceptor_indices, relative_cell_points, no_of_molecules):
+	"""
+	This method is designed to give each type of hop (donor molecule, acceptor molecule, and the cell of the acceptor relative to the donor) a single integer key, 
+	so that the hops can be grouped together using np.bincount.
 
-	# Tenth, return stepwise diffusion properties
-	return spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, eigenvectors_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, eigenvectors_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor
+	Parameters
+	----------
+	donor_indices : numpy.array of ints
+		These are the indices of the donor molecule of each hop.
+	acceptor_indices : numpy.array of ints
+		These are the indices of the acceptor molecule of each hop.
+	relative_cell_points : numpy.array of ints
+		These are the cell points of the acceptor molecules relative to the donor molecules, as a (no of hops, 3) array.
+	no_of_molecules : int
+		This is the number of molecules in the unit cell.
+
+	Returns
+	-------
+	hop_keys : numpy.array of ints
+		This is the key of each hop.
+	hop_key_shape : tuple of ints
+		This is the shape to give to np.unravel_index to obtain the donor index, acceptor index, and relative cell point (minus the minimum relative cell point) from a key.
+	"""
+	if len(relative_cell_points) == 0:
+		return np.zeros(0, dtype=np.int64), (no_of_molecules, no_of_molecules, 1, 1, 1)
+	shifted_relative_cell_points = relative_cell_points - relative_cell_points.min(axis=0)
+	hop_key_shape = (no_of_molecules, no_of_molecules) + tuple(int(length) for length in (shifted_relative_cell_points.max(axis=0) + 1))
+	hop_keys = np.ravel_multi_index((donor_indices, acceptor_indices, shifted_relative_cell_points[:,0], shifted_relative_cell_points[:,1], shifted_relative_cell_points[:,2]), hop_key_shape)
+	return hop_keys, hop_key_shape
 
 def get_data_from_diagonalisation(stepwise_diffusion_tensor):
 	"""
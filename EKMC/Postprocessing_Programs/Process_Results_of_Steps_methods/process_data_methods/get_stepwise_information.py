@@ -1,156 +1,167 @@
 """
-get_sample_data_from_ensemble_over_time.py, Geoffrey Weal, 16/8/22
+get_stepwise_information.py, Geoffrey Weal, 16/8/22
 
 This script is designed to obtain the displacement vectors and energies for all the simulations over sampled time.
 """
 import numpy as np
 
-import multiprocessing as mp
 from tqdm.contrib.concurrent import process_map
 
+from EKMC.Postprocessing_Programs.Process_Results_methods.process_data_methods.get_sample_data_from_ensemble_over_time import get_centre_of_mass_lookup_table
+from EKMC.Postprocessing_Programs.Process_Results_methods.shared_memory_arrays                                         import make_shared_array, copy_to_shared_array, attach_shared_array, release_shared_array
+
+stepwise_diffusion_data_dtype = np.dtype([('molecule', np.int32), ('acceptor_molecule', np.int32), ('relative_cell_point', np.int32, (3,)), ('displacement_vector', np.float64, (3,)), ('time_step', np.float64), ('energy', np.float64), ('D_xx', np.float64), ('D_yy', np.float64), ('D_zz', np.float64), ('D_xy', np.float64), ('D_xz', np.float64), ('D_yz', np.float64)])
+
 def get_stepwise_information(all_sims, molnames_and_coms, unit_cell_matrix, cpu_count=1):
     """
     This method is designed to obtain the stepwise displacement vectors and energies for all the simulations over all the steps that you want to sample over.
 
+    If more than one cpu is used, the data of all the simulations is placed in shared memory, along with the array that the stepwise data 
+    is written to. Each task given to the process pool only contains the descriptors of these shared arrays and the indices of the 
+    simulation to work on, so the data of the simulations is not pickled and copied into each process.
+
     Parameters
     ----------
     all_sims : list
-        This is the 
+        This is the (sim_name, data) of each simulation, where data is the structured array of the steps to sample over. 
     molnames_and_coms : dict of numpy.array
         This dictionary contains the names of the molecules as well as their centre of masses
     unit_cell_matrix : numpy.array
         These are the lattice vectors of the unit cell.
+    cpu_count : int
+        This is the number of cpus to use.
 
     Returns
     -------
-    displacement_vectors_from_initial_point : list
-        This is a list of the displacement vectors (over sampled time) for each simulation.
-    energies_over_time_for_all_sims : list
-        This is a list of the energies (over sampled time) for each simulation.
-    timesteps_over_time_for_all_sims : list
-        This is a list of the timesteps (over sampled time) for each simulation.
+    all_stepwise_diffusion_data : numpy.array
+        This is the (molecule, acceptor_molecule, relative_cell_point, displacement_vector, time_step, energy, D_xx, D_yy, D_zz, D_xy, D_xz, D_yz) of each step across all simulations, as a structured array with dtype stepwise_diffusion_data_dtype.
     """
 
-    # First, obtain the displacement vector for each KMC simulation.
-    #[get_stepwise_information_for_each_step(input_datum) for input_datum in get_inputs(all_sims, molnames_and_coms, unit_cell_matrix)]
-    all_simulation_stepwise_diffusion_data = process_map(get_stepwise_information_for_each_step, get_inputs(all_sims, molnames_and_coms, unit_cell_matrix), max_workers=cpu_count, unit=' KMC Sim', total=len(all_sims))
+    # First, obtain the indices of the first step of each simulation in the combined data, as well as in the stepwise data. 
+    #        Each simulation gives one less stepwise datum than the number of steps it contains.
+    no_of_steps_per_sim = np.array([len(simulation_data) for sim_name, simulation_data in all_sims], dtype=np.int64)
+    data_offsets     = np.concatenate(([0], np.cumsum(no_of_steps_per_sim)))
+    stepwise_offsets = np.concatenate(([0], np.cumsum(np.maximum(no_of_steps_per_sim - 1, 0))))
+
+    # Second, obtain the lookup table of the centre of mass of each molecule, and the unit cell matrix.
+    centre_of_masses = get_centre_of_mass_lookup_table(molnames_and_coms)
+    unit_cell_matrix = np.asarray(unit_cell_matrix, dtype=np.float64)
+
+    # Third, if only one cpu is used, obtain the stepwise data in this process.
+    if cpu_count <= 1 or len(all_sims) <= 1:
+        all_stepwise_diffusion_data = np.empty(stepwise_offsets[-1], dtype=stepwise_diffusion_data_dtype)
+        for index, (sim_name, simulation_data) in enumerate(all_sims):
+            all_stepwise_diffusion_data[stepwise_offsets[index]:stepwise_offsets[index+1]] = get_stepwise_information_for_simulation(simulation_data, centre_of_masses, unit_cell_matrix)
+        return all_stepwise_diffusion_data
+
+    # Fourth, place the data of all simulations in shared memory, and make the shared array to write the stepwise data to.
+    all_sims_data = np.concatenate([simulation_data for sim_name, simulation_data in all_sims])
+    all_sims_shared_memory_block, all_sims_shared_data, all_sims_descriptor = copy_to_shared_array(all_sims_data)
+    del all_sims_data
+    stepwise_shared_memory_block, stepwise_shared_data, stepwise_descriptor = make_shared_array(stepwise_offsets[-1], stepwise_diffusion_data_dtype)
+
+    try:
+
+        # Fifth, obtain the stepwise data of each simulation using the process pool.
+        process_map(get_stepwise_information_for_each_step, get_inputs(all_sims_descriptor, stepwise_descriptor, data_offsets, stepwise_offsets, centre_of_masses, unit_cell_matrix), max_workers=cpu_count, unit=' KMC Sim', total=len(all_sims), leave=False)
+
+        # Sixth, copy the stepwise data out of shared memory.
+        all_stepwise_diffusion_data = np.array(stepwise_shared_data)
 
-    # Second, obtain the displacement_vectors and energies for each simulation over sampled time from data.
-    all_stepwise_diffusion_data = [j for sub in all_simulation_stepwise_diffusion_data for j in sub]
+    finally:
 
-    # Third, return displacement_vectors_from_initial_point
+        # Seventh, remove the shared arrays.
+        del all_sims_shared_data, stepwise_shared_data
+        release_shared_array(all_sims_shared_memory_block, unlink=True)
+        release_shared_array(stepwise_shared_memory_block, unlink=True)
+
+    # Eighth, return all_stepwise_diffusion_data
     return all_stepwise_diffusion_data
 
-def get_inputs(all_sims, molnames_and_coms, unit_cell_matrix):
+def get_inputs(all_sims_descriptor, stepwise_descriptor, data_offsets, stepwise_offsets, centre_of_masses, unit_cell_matrix):
     """
-    This generator is designed to give thr data for each KMC simulation in data_over_time, along with molnames_and_coms, unit_cell_matrix and initial_position
+    This generator is designed to give the descriptors of the shared arrays and the indices of each simulation to the process pool.
 
     Parameters
     ----------
-    data_over_time : list
-        This is the 
-    molnames_and_coms : dict of numpy.array
-        This dictionary contains the names of the molecules as well as their centre of masses
+    all_sims_descriptor : tuple
+        This is the descriptor of the shared array that contains the data of all the simulations.
+    stepwise_descriptor : tuple
+        This is the descriptor of the shared array to write the stepwise data to.
+    data_offsets : numpy.array
+        These are the indices of the first step of each simulation in the data of all the simulations.
+    stepwise_offsets : numpy.array
+        These are the indices of the first stepwise datum of each simulation in the stepwise data.
+    centre_of_masses : numpy.array
+        This is the centre of mass of each molecule, indexed by the name of the molecule.
     unit_cell_matrix : numpy.array
         These are the lattice vectors of the unit cell.
     """
-    for simulation_data in all_sims:
-        yield (simulation_data, molnames_and_coms, unit_cell_matrix)
+    for index in range(len(data_offsets)-1):
+        yield (all_sims_descriptor, stepwise_descriptor, (int(data_offsets[index]), int(data_offsets[index+1])), (int(stepwise_offsets[index]), int(stepwise_offsets[index+1])), centre_of_masses, unit_cell_matrix)
 
 def get_stepwise_information_for_each_step(input_datum):
     """
-    This method is designed to obtain the displacement vectors for a single KMC simulations across all the steps you want to sample across. 
+    This method is designed to obtain the stepwise data for a single KMC simulation from shared memory, and write it to the shared stepwise data array. 
 
     Parameters
     ----------
-    data_over_time : list
-        This is the  
-    molnames_and_coms : dict of numpy.array
-        This dictionary contains the names of the molecules as well as their centre of masses
-    unit_cell_matrix : numpy.array
-        These are the lattice vectors of the unit cell.
-
-    Returns
-    -------
-    displacement_vectors_from_initial_point_for_a_sim : list
-        These are the displacement vectors from the initial position at time 0.0 fs to the position of the exciton at the sampled time.
+    input_datum : tuple
+        This contains the descriptors of the shared arrays, the indices of the simulation in these arrays, the centre of mass lookup table, and the unit cell matrix.
     """
 
     # First, obtain the data from input_datum
-    simulation_data, molnames_and_coms, unit_cell_matrix = input_datum
-
-    # Second, obtain the intial molecule and cell_point for this simulation
-    initial_counter, initial_molecule, initial_cell_point, initial_simulation_time, initial_time_step, initial_hop_distance, initial_energy, initial_sum_of_kij, initial_D_xx, initial_D_yy, initial_D_zz, initial_D_xy, initial_D_xz, initial_D_yz = simulation_data[1][0]
-
-    # Third, obtain the initial position for this simulation.
-    initial_position = get_position(initial_molecule, initial_cell_point, molnames_and_coms, unit_cell_matrix)
-
-    # Fourth, initialise the list to record the diffusion data for each step. 
-    stepwise_diffusion_data = []
-
-    # Fifth, for each set of spatial data over time
-    for simulation_datum in simulation_data[1][1:]:
-
-        # 5.1: Get the information about step index-1 from step index
-        final_counter, final_molecule, final_cell_point, final_simulation_time, final_time_step, final_hop_distance, final_energy, final_sum_of_kij, final_D_xx, final_D_yy, final_D_zz, final_D_xy, final_D_xz, final_D_yz = simulation_datum
-
-        # 5.2: Get the position of the exciton at step index
-        final_position = get_position(final_molecule, final_cell_point, molnames_and_coms, unit_cell_matrix)
-
-        # 5.3: Get the displacement vector for the exciton hop for step index
-        displacement_vector = final_position - initial_position
+    all_sims_descriptor, stepwise_descriptor, (data_start, data_end), (stepwise_start, stepwise_end), centre_of_masses, unit_cell_matrix = input_datum
 
-        # 5.4: Get the time step for step index
-        time_step = final_time_step
+    # Second, attach to the shared arrays.
+    all_sims_shared_memory_block, all_sims_shared_data = attach_shared_array(all_sims_descriptor)
+    stepwise_shared_memory_block, stepwise_shared_data = attach_shared_array(stepwise_descriptor)
 
-        # 5.5: Record the diffusion data for step index-1
-        stepwise_diffusion_data.append((initial_molecule, displacement_vector, time_step, initial_energy, initial_D_xx, initial_D_yy, initial_D_zz, initial_D_xy, initial_D_xz, initial_D_yz))
+    # Third, obtain the stepwise data of the simulation, and write it to the shared stepwise data array.
+    try:
+        stepwise_shared_data[stepwise_start:stepwise_end] = get_stepwise_information_for_simulation(all_sims_shared_data[data_start:data_end], centre_of_masses, unit_cell_matrix)
+    finally:
+        del all_sims_shared_data, stepwise_shared_data
+        release_shared_array(all_sims_shared_memory_block)
+        release_shared_array(stepwise_shared_memory_block)
 
-        # 5.6: Set final data to initial data.
-        initial_molecule        = final_molecule
-        initial_cell_point      = final_cell_point
-        initial_position        = final_position
-        initial_simulation_time = final_simulation_time
-        initial_time_step       = final_time_step
-        initial_hop_distance    = final_hop_distance
-        initial_energy          = final_energy
-        initial_sum_of_kij      = final_sum_of_kij
-        initial_D_xx            = final_D_xx
-        initial_D_yy            = final_D_yy
-        initial_D_zz            = final_D_zz
-        initial_D_xy            = final_D_xy
-        initial_D_xz            = final_D_xz
-        initial_D_yz            = final_D_yz
-
-    # Sixth, return stepwise_diffusion_data
-    return stepwise_diffusion_data
-
-def get_position(molname, cell_point, molnames_and_coms, unit_cell_matrix):
+def get_stepwise_information_for_simulation(simulation_data, centre_of_masses, unit_cell_matrix):
     """
-    This method is designed to get the position of the exciton given the cell point of the exciton and the molecule the exciton is on.
+    This method is designed to obtain the displacement vectors for a single KMC simulations across all the steps you want to sample across. 
+
+    For each step, the molecule, energy and D components are those of the step the exciton hops from, while the acceptor molecule, 
+    the cell point of the acceptor relative to the donor, the displacement vector, and the time step are those of the hop to the next step.
 
     Parameters
     ----------
-    molname : int
-        This is the name of the molecule that the exciton is currently on.
-    cell_point : tuple
-        This described the ijk values of the cell the exciton is currently in.
-    molnames_and_coms : list of numpy.array
-        This is the centre of mass for each molecule in the crystal unit cell.
+    simulation_data : numpy.array
+        This is the structured array of the steps of the simulation.
+    centre_of_masses : numpy.array
+        This is the centre of mass of each molecule, indexed by the name of the molecule.
     unit_cell_matrix : numpy.array
         These are the lattice vectors of the unit cell.
 
     Returns
     -------
-    position : numpy.array
-        This is the position of the exciton on molecule in the cell described by the ijk values of cell_point
+    stepwise_diffusion_data : numpy.array
+        This is the stepwise data of the simulation, as a structured array with dtype stepwise_diffusion_data_dtype.
     """
 
-    # First, get the position of the exciton.
+    # First, get the position of the exciton at each step.
     # Note: Because of how unit cell works in ASE, need to perform
     #       np.matmul(cell_point,unit_cell_matrix) or np.matmul(unit_cell_matrix.T,cell_point)
-    position = np.matmul(cell_point,unit_cell_matrix) + molnames_and_coms[molname]
-
-    # Second, return the position of the exciton in the cell.
-    return position
-
+    positions = np.matmul(simulation_data['cell_point'], unit_cell_matrix) + centre_of_masses[simulation_data['molecule']]
+
+    # Second, record the diffusion data for each step.
+    stepwise_diffusion_data = np.empty(max(len(simulation_data)-1, 0), dtype=stepwise_diffusion_data_dtype)
+    stepwise_diffusion_data['molecule']            = simulation_data['molecule'][:-1]
+    stepwise_diffusion_data['acceptor_molecule']   = simulation_data['molecule'][1:]
+    stepwise_diffusion_data['relative_cell_point'] = simulation_data['cell_point'][1:] - simulation_data['cell_point'][:-1]
+    stepwise_diffusion_data['displacement_vector'] = positions[1:] - positions[:-1]
+    stepwise_diffusion_data['time_step']           = simulation_data['time_step'][1:]
+    stepwise_diffusion_data['energy']              = simulation_data['energy'][:-1]
+    for component in ('D_xx', 'D_yy', 'D_zz', 'D_xy', 'D_xz', 'D_yz'):
+        stepwise_diffusion_data[component] = simulation_data[component][:-1]
+
+    # Third, return stepwise_diffusion_data
+    return stepwise_diffusion_data
@@ -0,0 +1,62 @@
+"""
+save_stepwise_data.py, Geoffrey Weal, 19/10/26
+
+This script is designed to save the stepwise diffusion properties of the system to disk.
+"""
+import numpy as np
+
+tensor_component_names = ('XX', 'YY', 'ZZ', 'XY', 'XZ', 'YZ')
+def save_stepwise_data(path_to_place_data_in, spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor, prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor, stepwise_data_per_molecule):
+    """
+    This method is designed to save the stepwise diffusion properties of the system to disk.
+
+    This writes three files:
+
+        * Stepwise_Diffusion_Data.txt: The spatial-based and probability-based stepwise diffusion tensors, as well as the data for each donor molecule.
+        * Stepwise_Hop_Lengths.txt: The number of hops of each hop length from each donor molecule.
+        * Stepwise_Hops.txt: The number of hops, and the average time step, from each donor molecule to each acceptor molecule in each relative cell.
+
+    Parameters
+    ----------
+    path_to_place_data_in : str.
+        This is the folder to save the files to.
+    spatial_stepwise_D_tensor : numpy.array
+        This is the spatial-based stepwise diffusion tensor, given as [D_xx, D_yy, D_zz, D_xy, D_xz, D_yz] in cm^2/s.
+    eigenvalues_of_spatial_stepwise_diffusion_tensor : numpy.array
+        These are the eigenvalues of the spatial-based stepwise diffusion tensor.
+    diffusion_coefficient_from_spatial_stepwise_diffusion_tensor : float
+        This is the diffusion coefficient obtained from the eigenvalues of the spatial-based stepwise diffusion tensor.
+    prob_stepwise_D_tensor : numpy.array
+        This is the probability-based stepwise diffusion tensor, given as [D_xx, D_yy, D_zz, D_xy, D_xz, D_yz] in cm^2/s.
+    eigenvalues_of_prob_stepwise_diffusion_tensor : numpy.array
+        These are the eigenvalues of the probability-based stepwise diffusion tensor.
+    diffusion_coefficient_from_prob_stepwise_diffusion_tensor : float
+        This is the diffusion coefficient obtained from the eigenvalues of the probability-based stepwise diffusion tensor.
+    stepwise_data_per_molecule : dict.
+        This is the stepwise data for each donor molecule, as given by get_stepwise_diffusion_properties.
+    """
+
+    # First, save the stepwise diffusion tensors, and the data for each donor molecule.
+    with open(path_to_place_data_in+'/Stepwise_Diffusion_Data.txt', 'w') as fileTXT:
+        for name, D_tensor, eigenvalues, diffusion_coefficient in (('Spatial-based', spatial_stepwise_D_tensor, eigenvalues_of_spatial_stepwise_diffusion_tensor, diffusion_coefficient_from_spatial_stepwise_diffusion_tensor), ('Probability-based', prob_stepwise_D_tensor, eigenvalues_of_prob_stepwise_diffusion_tensor, diffusion_coefficient_from_prob_stepwise_diffusion_tensor)):
+            fileTXT.write(name+' stepwise diffusion tensor (cm^2 s^-1): '+', '.join([component_name+' = '+str(component) for component_name, component in zip(tensor_component_names, D_tensor)])+'\n')
+            fileTXT.write(name+' stepwise diffusion tensor eigenvalues (cm^2 s^-1): '+str([float(eigenvalue) for eigenvalue in np.real(eigenvalues)])+'\n')
+            fileTXT.write(name+' stepwise diffusion coefficient: '+str(float(np.real(diffusion_coefficient)))+'\n')
+        fileTXT.write('\n')
+        fileTXT.write('Molecule\tNo of steps\tProbability exciton on molecule\tAverage dwell time (ps)\t'+'\t'.join(['Spatial-based D '+component_name+' (cm^2 s^-1)' for component_name in tensor_component_names])+'\t'+'\t'.join(['Probability-based D '+component_name+' (cm^2 s^-1)' for component_name in tensor_component_names])+'\n')
+        for index, molecule_name in enumerate(stepwise_data_per_molecule['molecule_names']):
+            row = [molecule_name, stepwise_data_per_molecule['no_of_steps'][index], stepwise_data_per_molecule['probability_exciton_found_on_molecule'][index], stepwise_data_per_molecule['average_dwell_time_in_ps'][index]]
+            row += list(stepwise_data_per_molecule['spatial_stepwise_D_tensor'][index]) + list(stepwise_data_per_molecule['prob_stepwise_D_tensor'][index])
+            fileTXT.write('\t'.join([str(value) for value in row])+'\n')
+
+    # Second, save the distribution of hop lengths from each donor molecule.
+    with open(path_to_place_data_in+'/Stepwise_Hop_Lengths.txt', 'w') as fileTXT:
+        fileTXT.write('Hop length (A)\t'+'\t'.join(['No of hops from molecule '+str(molecule_name) for molecule_name in stepwise_data_per_molecule['molecule_names']])+'\n')
+        for hop_length, hop_length_counts in zip(stepwise_data_per_molecule['hop_lengths'], stepwise_data_per_molecule['hop_length_counts'].T):
+            fileTXT.write(str(hop_length)+'\t'+'\t'.join([str(hop_length_count) for hop_length_count in hop_length_counts])+'\n')
+
+    # Third, save the number of hops from each donor molecule to each acceptor molecule in each relative cell.
+    with open(path_to_place_data_in+'/Stepwise_Hops.txt', 'w') as fileTXT:
+        fileTXT.write('Donor molecule\tAcceptor molecule\tRelative cell point\tNo of hops\tAverage time step (ps)\n')
+        for (donor_molecule, acceptor_molecule, cell_point_1, cell_point_2, cell_point_3), hop_count, average_time_step in zip(stepwise_data_per_molecule['hops'], stepwise_data_per_molecule['hop_counts'], stepwise_data_per_molecule['average_time_step_per_hop_in_ps']):
+            fileTXT.write(str(donor_molecule)+'\t'+str(acceptor_molecule)+'\t'+str((int(cell_point_1), int(cell_point_2), int(cell_point_3)))+'\t'+str(hop_count)+'\t'+str(average_time_step)+'\n')
@@ -0,0 +1,67 @@
+'''
+Results_Index.py, Geoffrey Weal, 19/10/26
+
+This program will list the systems in the EKMC results index, along with their headline results.
+'''
+import os
+import sqlite3
+from datetime import datetime
+
+from EKMC.EKMC_Setup.results_index import get_results_index_path, connect_to_results_index, is_root_stale
+
+class CLICommand:
+    """Will list the systems in the EKMC results index, along with their headline results.
+    """
+    @staticmethod
+    def add_arguments(parser):
+        parser.add_argument('--where', type=str, default=None, help='This is a SQL condition to select the systems to list, such as "temperature = 300 AND energetic_disorder < 0.05". See results_index.py for the columns that can be used.')
+        parser.add_argument('--order_by', type=str, default='path', help='This is the column (or columns) to order the systems by. Default: path')
+        parser.add_argument('--stale', action='store_true', help='Only list the systems that have not been processed, or whose Sims have been added to or changed since they were last processed.')
+        parser.add_argument('--index', type=str, default=None, help='This is the path to the results index. Default: The EKMC_RESULTS_INDEX environment variable if set, otherwise '+str(get_results_index_path()))
+
+    @staticmethod
+    def run(arguments):
+        Run_method(where=arguments.where, order_by=arguments.order_by, only_stale=arguments.stale, path_to_results_index=arguments.index)
+
+def Run_method(where=None, order_by='path', only_stale=False, path_to_results_index=None):
+    """
+    This method will list the systems in the EKMC results index, along with their headline results.
+
+    Parameters
+    ----------
+    where : str. or None
+        This is a SQL condition to select the systems to list. If None, all systems are listed. Default: None
+    order_by : str.
+        This is the column (or columns) to order the systems by. Default: 'path'
+    only_stale : bool.
+        If True, only list the systems that need to be processed again. Default: False
+    path_to_results_index : str. or None
+        This is the path to the results index. If None, get_results_index_path is used. Default: None
+    """
+
+    # First, obtain the systems from the results index.
+    if path_to_results_index is None:
+        path_to_results_index = get_results_index_path()
+    if not os.path.exists(path_to_results_index):
+        raise Exception('Error: Could not find the results index: '+str(path_to_results_index)+'. Systems are added to the results index when they are set up or processed.')
+    connection = connect_to_results_index(path_to_results_index)
+    try:
+        rows = connection.execute('SELECT * FROM roots'+('' if (where is None) else (' WHERE '+where))+' ORDER BY '+order_by).fetchall()
+    except sqlite3.Error as exception:
+        raise Exception('Error: Problem with the query given to the results index: '+str(exception))
+    finally:
+        connection.close()
+
+    # Second, only keep the systems that need to be processed again, if desired.
+    if only_stale:
+        rows = [row for row in rows if is_root_stale(row)]
+
+    # Third, print the systems and their headline results.
+    print('Results index: '+str(path_to_results_index))
+    print('Number of systems: '+str(len(rows)))
+    print('Path\tT (K)\tEnergetic disorder\tCoupling disorder\tSims (finished/found/planned)\t<E> (eV)\t<E> CI (eV)\tD (cm^2 s^-1)\tD CI (cm^2 s^-1)\tEigenvalues of D (cm^2 s^-1)\tProcessed')
+    for row in rows:
+        sims_string = str(row['no_of_finished_simulations'])+'/'+str(row['no_of_simulations'])+'/'+str(row['no_of_simulations_planned'])
+        eigenvalues_string = str([row['eigenvalue_major'], row['eigenvalue_minor_1'], row['eigenvalue_minor_2']]) if (row['eigenvalue_major'] is not None) else 'None'
+        processed_string = datetime.fromtimestamp(row['processed_at']).strftime("%d/%m/%Y %H:%M:%S") if (row['processed_at'] is not None) else 'Not processed'
+        print('\t'.join([str(value) for value in (row['path'], row['temperature'], row['energetic_disorder'], row['coupling_disorder'], sims_string, row['energy'], row['energy_ci'], row['diffusion'], row['diffusion_ci'], eigenvalues_string, processed_string)]))
@@ -79,28 +79,32 @@ if not ase_found:
 	toString += '================================================'+'\n'
 	raise ImportError(toString)	
 
-import ase
 ase_version_minimum = '3.19.0'
-from packaging import version
-#from distutils.version import StrictVersion
-#if StrictVersion(ase.__version__) < StrictVersion(ase_version_minimum):
-if version.parse(ase.__version__) < version.parse(ase_version_minimum):
-	toString = ''
-	toString += '\n'
-	toString += '================================================'+'\n'
-	toString += 'This is the EKMC Program'+'\n'
-	toString += 'Version: '+str(__version__)+'\n'
-	toString += '\n'
-	toString += 'The EKMC program requires ASE greater than or equal to '+str(ase_version_minimum)+'.'+'\n'
-	toString += 'The current version of ASE you are using is '+str(ase.__version__)+'.'+'\n'
-	toString += '\n'
-	toString += 'Install ASE through pip by following the instruction in https://github.com/GardenGroupUO/EKMC'+'\n'
-	toString += 'These instructions will ask you to install ase by typing the following into your terminal\n'
-	toString += 'pip3 install --user --upgrade ase\n'
-	toString += '\n'
-	toString += 'This program will exit before beginning'+'\n'
-	toString += '================================================'+'\n'
-	raise ImportError(toString)
+def check_ase_version():
+	"""
+	This method will check that the version of ASE is greater than or equal to ase_version_minimum. 
+
+	This is only checked when the EKMC setup methods are first used, as importing ASE is slow and ASE is not needed to run a simulation.
+	"""
+	import ase
+	from packaging import version
+	if version.parse(ase.__version__) < version.parse(ase_version_minimum):
+		toString = ''
+		toString += '\n'
+		toString += '================================================'+'\n'
+		toString += 'This is the EKMC Program'+'\n'
+		toString += 'Version: '+str(__version__)+'\n'
+		toString += '\n'
+		toString += 'The EKMC program requires ASE greater than or equal to '+str(ase_version_minimum)+'.'+'\n'
+		toString += 'The current version of ASE you are using is '+str(ase.__version__)+'.'+'\n'
+		toString += '\n'
+		toString += 'Install ASE through pip by following the instruction in https://github.com/GardenGroupUO/EKMC'+'\n'
+		toString += 'These instructions will ask you to install ase by typing the following into your terminal\n'
+		toString += 'pip3 install --user --upgrade ase\n'
+		toString += '\n'
+		toString += 'This program will exit before beginning'+'\n'
+		toString += '================================================'+'\n'
+		raise ImportError(toString)
 
 # ------------------------------------------------------------------------------------------------------------------------
 
@@ -173,8 +177,27 @@ __license__ = 'GNU AFFERO GENERAL PUBLIC LICENSE'
 __url__ = 'https://github.com/geoffreyweal/EKMC'
 __doc__ = 'See https://github.com/geoffreyweal/EKMC for the documentation on this program'
 
-from EKMC.EKMC_Setup.EKMC_Setup      import EKMC_Setup
-from EKMC.EKMC.Run_EKMC              import Run_EKMC
-__all__ = ['EKMC_Setup', 'Run_EKMC']
+# The methods below are only imported when they are first used. This means that running a simulation (which only needs
+# EKMC.EKMC.Run_EKMC) does not need to import the setup methods (and ASE, networkx, scipy, ...) every time it begins.
+_lazy_imports = {'EKMC_Setup':        'EKMC.EKMC_Setup.EKMC_Setup',
+                 'Run_EKMC':          'EKMC.EKMC.Run_EKMC',
+                 'Run_EKMC_Ensemble': 'EKMC.EKMC.Run_EKMC_Ensemble'}
+__all__ = ['EKMC_Setup', 'Run_EKMC', 'Run_EKMC_Ensemble']
+
+def __getattr__(name):
+	"""
+	This method will import EKMC_Setup, Run_EKMC, and Run_EKMC_Ensemble when they are first used.
+	"""
+	if name in _lazy_imports:
+		if name == 'EKMC_Setup':
+			check_ase_version()
+		module = importlib.import_module(_lazy_imports[name])
+		value = getattr(module, name)
+		globals()[name] = value
+		return value
+	raise AttributeError("module 'EKMC' has no attribute '"+str(name)+"'")
+
+def __dir__():
+	return sorted(list(globals().keys()) + __all__)
 
 # ------------------------------------------------------------------------------------------------------------------------
@@ -1,4 +1,4 @@
-import argparse, textwrap
+import sys, argparse, textwrap
 from importlib import import_module
 
 from EKMC import __version__
@@ -16,6 +16,10 @@ commands = [
     ('did_complete',    'EKMC.EKMC_Programs.EKMC_Did_Complete'),
     ('process_results', 'EKMC.Postprocessing_Programs.Process_Results'),
     ('process_steps',   'EKMC.Postprocessing_Programs.Process_Results_of_Steps'),
+    ('adaptive_ensemble', 'EKMC.Postprocessing_Programs.Adaptive_Ensemble_Sizing'),
+    ('results_index',   'EKMC.Postprocessing_Programs.Results_Index'),
+    ('analytic',        'EKMC.Analytic_Programs.Analytic_Diffusion_Tensor'),
+    ('steady_state',    'EKMC.Analytic_Programs.Steady_State_Diffusion_Tensor'),
 ]
 
 def main(prog='EKMC', description='EKMC command line tool.',version=__version__, commands=commands, hook=None, args=None):
@@ -27,9 +31,16 @@ def main(prog='EKMC', description='EKMC command line tool.',version=__version__,
     subparser = subparsers.add_parser('help',description='Help',help='Help for sub-command.')
     subparser.add_argument('helpcommand',nargs='?',metavar='sub-command',help='Provide help for sub-command.')
 
+    # Only the module of the sub-command being run is imported, as importing every module
+    # (and the packages they use) is slow. All modules are imported when giving help.
+    command_to_run = get_command_to_run(commands, args)
+
     functions = {}
     parsers = {}
     for command, module_name in commands:
+        if (command_to_run is not None) and (command != command_to_run):
+            parsers[command] = subparsers.add_parser(command)
+            continue
         cmd = import_module(module_name).CLICommand
         docstring = cmd.__doc__
         parts = docstring.split('\n', 1)
@@ -76,6 +87,40 @@ def main(prog='EKMC', description='EKMC command line tool.',version=__version__,
                       .format(prog, args.command))
                 parser.error(l1 + l2)
 
+def get_command_to_run(commands, args=None):
+    """
+    This method will obtain the sub-command that is being run from the command line arguments.
+
+    Parameters
+    ----------
+    commands : list of (str, str)
+        These are the names of the sub-commands and the modules they are in.
+    args : list of str. or None
+        These are the command line arguments. If None, sys.argv is used.
+
+    Returns
+    -------
+    command_to_run : str. or None
+        This is the sub-command being run. None is given if help is being given, or if the sub-command could not be determined.
+    """
+    if args is None:
+        args = sys.argv[1:]
+    command_names = [command for command, module_name in commands]
+    positional_args = []
+    for arg in args:
+        if arg.startswith('-'):
+            if (len(positional_args) == 0) and (arg not in ['-T', '--traceback']):
+                return None
+            continue
+        positional_args.append(arg)
+    if len(positional_args) == 0:
+        return None
+    if positional_args[0] == 'help':
+        positional_args = positional_args[1:2]
+    if (len(positional_args) > 0) and (positional_args[0] in command_names):
+        return positional_args[0]
+    return None
+
 class Formatter(argparse.HelpFormatter):
     """Improved help formatter."""
 
@@ -0,0 +1,39 @@
+"""
+test_run_ekmc_ensemble.py, Geoffrey Weal, 19/10/26
+
+This test checks that an ensemble run with Run_EKMC_Ensemble can be processed with "EKMC process_results". Run with "python -m pytest tests".
+"""
+import os
+import pytest
+
+# These are the lines of the KMC_setup_data.ekmc file of a small crystal, with two molecules in a cubic unit cell.
+KMC_setup_data_lines = ["{1: (0.0, 0.0, 0.0), 2: (2.5, 2.5, 0.0)}",
+                        "((5.0, 0.0, 0.0), (0.0, 5.0, 0.0), (0.0, 0.0, 5.0))",
+                        "Marcus",
+                        "{'temperature': 300, 'coupling_disorder': '10.0%', 'energetic_disorder': 0.05}",
+                        "{1: 2.0, 2: 2.05}",
+                        "{(1, 1): 0.2, (1, 2): 0.2, (2, 1): 0.2, (2, 2): 0.2}",
+                        "{}",
+                        "(1.6747967027709394e+16, 9.6704317679586)",
+                        "{1: {1: {(1, 0, 0): 0.01, (-1, 0, 0): 0.01, (0, 1, 0): 0.005, (0, -1, 0): 0.005, (0, 0, 1): 0.002, (0, 0, -1): 0.002}, 2: {(0, 0, 0): 0.008, (-1, 0, 0): 0.008, (0, -1, 0): 0.008, (-1, -1, 0): 0.008}}, 2: {2: {(1, 0, 0): 0.01, (-1, 0, 0): 0.01, (0, 1, 0): 0.005, (0, -1, 0): 0.005, (0, 0, 1): 0.002, (0, 0, -1): 0.002}, 1: {(0, 0, 0): 0.008, (1, 0, 0): 0.008, (0, 1, 0): 0.008, (1, 1, 0): 0.008}}}"]
+
+def test_run_ekmc_ensemble_then_process_results(tmp_path, monkeypatch):
+    pytest.importorskip('SUMELF')
+    from EKMC.EKMC.Run_EKMC_Ensemble import Run_EKMC_Ensemble
+    from EKMC.Postprocessing_Programs.Process_Results import Run_method, data_foldername
+
+    # First, run an ensemble of simulations in Root.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('EKMC_RESULTS_INDEX', str(tmp_path/'EKMC_results_index.db'))
+    os.makedirs('Root')
+    with open('Root/KMC_setup_data.ekmc', 'w') as KMC_setup_data_EKMC:
+        KMC_setup_data_EKMC.write('\n'.join(KMC_setup_data_lines)+'\n')
+    Run_EKMC_Ensemble('Root', 4, sim_time_limit=20.0, seed=1, path_to_simulations='Root')
+
+    # Second, process the ensemble with process_results.
+    Run_method(begin_recording_time=10.0, end_recording_time=20.0, make_plots=False)
+    for filename in ['Diffusion_Vs_Time.txt', 'Time_Averaged_Data.txt']:
+        assert os.path.exists(data_foldername+'/Root/'+filename), filename+' was not made by process_results for the ensemble made by Run_EKMC_Ensemble.'
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,51 @@
+"""
+test_run_path_imports.py, Geoffrey Weal, 19/10/26
+
+This test checks that running a simulation (importing EKMC.EKMC.Run_EKMC, as each Run_EKMC.py does) does not import the packages
+only needed for setting up and processing simulations, and that importing it stays quick. Run with "python -m pytest tests" or
+"python tests/test_run_path_imports.py".
+"""
+import sys, subprocess
+
+packages_not_needed_to_run = ['ase', 'networkx', 'scipy', 'matplotlib', 'tqdm', 'xlsxwriter']
+
+# This is the most time (in s) that importing EKMC.EKMC.Run_EKMC can take, not including numpy (which is needed to run). This is
+# about 0.03 s, so this is generous. Importing one of packages_not_needed_to_run (such as ase.io, which takes about 0.7 s) goes over it.
+import_time_budget = 0.5
+
+def test_run_path_imports():
+    code = 'import EKMC.EKMC.Run_EKMC, sys; print(",".join(sorted(package for package in '+repr(packages_not_needed_to_run)+' if package in sys.modules)))'
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    imported_packages = [package for package in result.stdout.strip().split(',') if package]
+    assert imported_packages == [], 'Importing EKMC.EKMC.Run_EKMC imports: '+', '.join(imported_packages)
+
+def get_run_path_import_time():
+    """
+    This method will obtain the time taken to import EKMC.EKMC.Run_EKMC, not including numpy, from "python -X importtime".
+
+    Returns
+    -------
+    import_time : float
+        This is the time (in s) taken to import EKMC.EKMC.Run_EKMC, not including numpy.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import EKMC.EKMC.Run_EKMC'], capture_output=True, text=True, check=True)
+    import_time_in_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or ('cumulative' in line):
+            continue
+        self_time, cumulative_time, module_name = line.replace('import time:', '').split('|')
+        if module_name.strip() == 'numpy':
+            import_time_in_us -= int(cumulative_time)
+        elif module_name.startswith(' EKMC'):
+            import_time_in_us += int(cumulative_time)
+    return import_time_in_us / 1e6
+
+def test_run_path_import_time():
+    import_time = get_run_path_import_time()
+    assert import_time < import_time_budget, 'Importing EKMC.EKMC.Run_EKMC took '+str(round(import_time, 3))+' s (not including numpy), which is over the budget of '+str(import_time_budget)+' s.'
+
+if __name__ == '__main__':
+    test_run_path_imports()
+    print('Importing EKMC.EKMC.Run_EKMC does not import: '+', '.join(packages_not_needed_to_run))
+    test_run_path_import_time()
+    print('Importing EKMC.EKMC.Run_EKMC took '+str(round(get_run_path_import_time(), 3))+' s (not including numpy).')